@@ -16,6 +16,8 @@ from agents.brain.aggressive_agent   import AggressiveAgent
 from agents.brain.balanced_agent     import BalancedAgent
 from agents.brain.conservative_agent import ConservativeAgent
 from agents.market_feed   import PriceFeed
+from agents.decision_cache import DecisionCache
+from agents.http_session  import get_http_pool
 from agents.monoracle_writer import MonoracleWriter
 
 logger = logging.getLogger(__name__)
@@ -39,6 +41,7 @@ class AgentOrchestrator:
         rpc_url: str | None = None,
     ) -> None:
         self._feed    = PriceFeed()
+        self._cache   = DecisionCache()
         self._configs = agent_configs
         self._writer  = MonoracleWriter(
             private_key           = os.getenv("KEEPER_PRIVATE_KEY", ""),
@@ -66,8 +69,14 @@ class AgentOrchestrator:
         logger.info("Orchestrator started — %d agents", len(self._configs))
 
         # Start memecoin feed in background
-        asyncio.create_task(self._feed.stream_memecoin_prices())
-
+        memecoin_task = asyncio.create_task(self._feed.stream_memecoin_prices())
+        try:
+            await self._loop()
+        finally:
+            memecoin_task.cancel()
+            await get_http_pool().close()
+
+    async def _loop(self) -> None:
         commodities = ["GHOST_ORE", "PHANTOM_GAS", "VOID_CHIP", "MON_USDC"]
         tick = 0
 
@@ -75,21 +84,36 @@ class AgentOrchestrator:
             tick += 1
             logger.info("─── Tick #%d ───────────────────────────────────────", tick)
 
-            for cfg in self._configs:
+            # Refresh the whole commodity universe in one JSON-RPC batch per tick;
+            # market states are then built from the cache
+            try:
+                await self._feed.fetch_oracle_prices(commodities)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Oracle batch refresh failed: %s", exc)
+            markets: dict[str, MarketState] = {
+                c: await self._build_market_state(c) for c in commodities
+            }
+
+            # All decisions are in flight at once on the async client; on-chain
+            # writes below stay sequential so keeper nonces do not race
+            results = await asyncio.gather(
+                *(
+                    self._cache.adecide(
+                        self._brains[cfg["dna"].agent_id],
+                        markets[self._pick_commodity(cfg["dna"], commodities, tick)],
+                    )
+                    for cfg in self._configs
+                ),
+                return_exceptions=True,
+            )
+
+            for cfg, decision in zip(self._configs, results):
                 dna: AgentDNA = cfg["dna"]
                 token_id: int = cfg["token_id"]
 
-                if dna.strategy == Strategy.CONSERVATIVE:
-                    commodity = commodities[tick % 3]  # conservative rotates calmly
-                elif dna.strategy == Strategy.AGGRESSIVE:
-                    commodity = commodities[0]          # aggressive targets highest-vol
-                else:
-                    commodity = commodities[tick % len(commodities)]
-
                 try:
-                    market = await self._build_market_state(commodity)
-                    brain  = self._brains[dna.agent_id]
-                    decision = brain.decide(market)
+                    if isinstance(decision, BaseException):
+                        raise decision
 
                     logger.info(
                         "Agent %s [%s] → %s @ %.4f x %.4f (conf=%.2f) | %s",
@@ -104,28 +128,28 @@ class AgentOrchestrator:
                 except Exception as exc:  # noqa: BLE001
                     logger.error("Agent %s tick failed: %s", dna.agent_id, exc)
 
+            logger.debug("Oracle cache: %s", self._feed.cache_stats())
+            logger.debug("Decision cache: %s", self._cache.stats())
+
             # Wait for 2 Monad blocks
             await asyncio.sleep(TICK_INTERVAL_BLOCKS * BLOCK_TIME_SECONDS)
 
+    @staticmethod
+    def _pick_commodity(dna: AgentDNA, commodities: list[str], tick: int) -> str:
+        if dna.strategy == Strategy.CONSERVATIVE:
+            return commodities[tick % 3]          # conservative rotates calmly
+        if dna.strategy == Strategy.AGGRESSIVE:
+            return commodities[0]                 # aggressive targets highest-vol
+        return commodities[tick % len(commodities)]
+
     async def _build_market_state(self, commodity: str) -> MarketState:
         """
-        In production: read GhostMarket order book via RPC for real bid/ask.
-        For demo: use oracle price ±0.5% as synthetic spread.
+        Refresh the oracle reading (cached for a couple of blocks) and snapshot
+        the feed's rolling market stats. In production the bid/ask should come
+        from the GhostMarket order book.
         """
-        oracle_price, _ = await self._feed.fetch_oracle_price(commodity)
-        spread_pct = 0.005
-        best_bid = oracle_price * (1 - spread_pct)
-        best_ask = oracle_price * (1 + spread_pct)
-
-        return await self._feed.get_market_state(
-            commodity    = commodity,
-            best_bid     = best_bid,
-            best_ask     = best_ask,
-            volume_24h   = oracle_price * 10_000,
-            price_change = 0.5,
-            depth_bid    = 8,
-            depth_ask    = 6,
-        )
+        await self._feed.fetch_oracle_price(commodity)
+        return self._feed.market_state(commodity)
 
     # ── CrewAI Multi-Agent Task (used for complex partnership decisions) ────────
 
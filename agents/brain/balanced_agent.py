@@ -1,110 +1,53 @@
 """
 Ghost Broker — Balanced Agent Brain
 Mean-reversion + trend-following hybrid strategy.
-Uses Google Gemini AI directly via google-generativeai SDK.
+Prompting, scheduling and parsing live in brain/base.py.
 """
 from __future__ import annotations
 
-import os
-import json
-import re
-from google import genai
-from google.genai import types as genai_types
+from agents.brain.base import BaseAgent
+from agents.brain.prompts import batch_static_prompt, static_prompt
+from agents.brain.schema import DECISION_SCHEMA
 
-from agents.types import AgentDNA, MarketState, AgentDecision, ActionType
 
+PERSONALITY = "Disciplined hybrid trader — blend mean-reversion with trend following. Capture spread, avoid large drawdowns."
 
-SYSTEM_PROMPT = """You are "{agent_name}", a BALANCED autonomous trading agent in the Ghost Broker marketplace.
-Personality: Disciplined hybrid trader — blend mean-reversion with trend following. Capture spread, avoid large drawdowns.
+SIZE_PCT    = (0.08, 0.15)
+TEMPERATURE = 0.4
 
-=== YOUR IDENTITY ===
-Name:             {agent_name}
-Strategy:         BALANCED
-Risk Appetite:    {risk_appetite}/100 (moderate)
-Current Capital:  {capital} USD
-Initial Capital:  {initial_capital} USD
-P&L:              {pnl_pct:+.2f}%
+# Rule thresholds (%, except depth / confidence) — rendered into RULES and evaluated by agents/rule_engine.py
+THRESHOLDS = {
+    "oracle_gap":     1.0,   # mean reversion: mid this far below / above the oracle
+    "trend_change":   2.0,
+    "trend_depth":    5,
+    "hold_spread":    3.0,
+    "min_confidence": 0.5,
+}
 
-=== LIVE MARKET ===
-Commodity:    {commodity}
-Bid / Ask:    {best_bid} / {best_ask}
-Mid Price:    {mid_price}
-Spread:       {spread}%
-Oracle Price: {oracle_price}  (confidence: {oracle_confidence})
-24h Volume:   {volume_24h}
-Price Change: {price_change}%
-Book Depth:   bids={depth_bid}  asks={depth_ask}
-
-=== YOUR TRADING RULES ===
-- BID when mid_price > 1% below oracle (mean-reversion buy)
-- ASK when mid_price > 1% above oracle (mean-reversion sell)
-- If price_change > 2% AND depth_bid > 5 → follow trend, BID
-- HOLD if spread > 3% or oracle confidence < 0.5
+RULES = f"""- BID when mid_price > {THRESHOLDS['oracle_gap']:g}% below oracle (mean-reversion buy)
+- ASK when mid_price > {THRESHOLDS['oracle_gap']:g}% above oracle (mean-reversion sell)
+- If price_change > {THRESHOLDS['trend_change']:g}% AND depth_bid > {THRESHOLDS['trend_depth']} → follow trend, BID
+- HOLD if spread > {THRESHOLDS['hold_spread']:g}% or oracle confidence < {THRESHOLDS['min_confidence']:g}
 - PARTNER when another balanced agent can amplify spread capture
-- Size: 8-15% of your current capital ({size_min:.2f}–{size_max:.2f} USD)
-
-Respond ONLY with a valid JSON object (no markdown, no extra text):
-{{
-  "action": "BID or ASK or HOLD or PARTNER",
-  "price": <float>,
-  "qty": <float>,
-  "reasoning": "<2-3 sentence rationale mentioning your name and current capital>",
-  "confidence": <float between 0.0 and 1.0>
-}}"""
-
-
-class BalancedAgent:
-    def __init__(self, dna: AgentDNA):
-        self.dna = dna
-        self._client = genai.Client(api_key=os.getenv("GEMINI_API_KEY", ""))
-        self._model = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
-
-    def decide(self, market: MarketState) -> AgentDecision:
-        pnl_pct = ((self.dna.capital - self.dna.initial_capital) / max(self.dna.initial_capital, 0.001)) * 100
-        size_min = self.dna.capital * 0.08
-        size_max = self.dna.capital * 0.15
-
-        prompt = SYSTEM_PROMPT.format(
-            agent_name=self.dna.name or f"Agent #{self.dna.token_id}",
-            risk_appetite=self.dna.risk_appetite,
-            capital=round(self.dna.capital, 4),
-            initial_capital=round(self.dna.initial_capital, 4),
-            pnl_pct=pnl_pct,
-            size_min=size_min,
-            size_max=size_max,
-            commodity=market.commodity,
-            best_bid=round(market.best_bid, 4),
-            best_ask=round(market.best_ask, 4),
-            mid_price=round(market.mid_price, 4),
-            spread=round(market.spread, 4),
-            oracle_price=round(market.oracle_price, 4),
-            oracle_confidence=round(market.oracle_confidence, 3),
-            volume_24h=market.volume_24h,
-            price_change=round(market.price_change, 2),
-            depth_bid=market.orderbook_depth_bid,
-            depth_ask=market.orderbook_depth_ask,
-        )
-
-        response = self._client.models.generate_content(
-            model=self._model,
-            contents=prompt,
-            config=genai_types.GenerateContentConfig(
-                temperature=0.4,
-                response_mime_type="application/json",
-            ),
-        )
-
-        raw = response.text.strip()
-        raw = re.sub(r"^```(?:json)?\s*", "", raw)
-        raw = re.sub(r"\s*```$", "", raw)
-        data = json.loads(raw)
-
-        return AgentDecision(
-            agent_id=self.dna.agent_id,
-            action=ActionType(data["action"]),
-            commodity=market.commodity,
-            price=float(data["price"]),
-            qty=float(data["qty"]),
-            reasoning=str(data["reasoning"]),
-            confidence=float(data["confidence"]),
-        )
+- Size: {SIZE_PCT[0] * 100:g}-{SIZE_PCT[1] * 100:g}% of current capital (the size range)"""
+
+# The response schema constrains the model to the AgentDecision fields (batch.py swaps in the array schema)
+GENERATION = {
+    "temperature":        TEMPERATURE,
+    "response_mime_type": "application/json",
+    "response_schema":    DECISION_SCHEMA,
+}
+
+# Static prefixes — identical for every balanced agent, served from the prompt cache;
+# only identity + LIVE MARKET are rendered per call
+STATIC_PROMPT       = static_prompt("BALANCED", PERSONALITY, RULES)
+BATCH_STATIC_PROMPT = batch_static_prompt("BALANCED", PERSONALITY, RULES)
+
+
+class BalancedAgent(BaseAgent):
+    STRATEGY            = "BALANCED"
+    SIZE_PCT            = SIZE_PCT
+    THRESHOLDS          = THRESHOLDS
+    GENERATION          = GENERATION
+    STATIC_PROMPT       = STATIC_PROMPT
+    BATCH_STATIC_PROMPT = BATCH_STATIC_PROMPT
@@ -0,0 +1,85 @@
+"""
+Ghost Broker — Brain Base
+Prompting, scheduling and parsing shared by every strategy brain. A
+strategy module only supplies its constants (persona, rules, size range,
+generation settings and the static prompt prefixes built from them).
+"""
+from __future__ import annotations
+
+import os
+from typing import Any, Callable
+
+from google import genai
+
+from agents.types import AgentDNA, MarketState, AgentDecision
+from agents.brain.batch import adecide_batch
+from agents.brain.prompt_cache import PromptCache, get_prompt_cache
+from agents.brain.prompts import render_identity, render_market
+from agents.brain.schema import parse_decision
+from agents.brain.stream import agenerate
+from agents.llm_backend import make_client
+from agents.llm_scheduler import PRIORITY_NORMAL, estimate_tokens, get_llm_scheduler
+
+
+class BaseAgent:
+    # Set by each strategy module
+    STRATEGY:            str
+    SIZE_PCT:            tuple[float, float]
+    THRESHOLDS:          dict
+    GENERATION:          dict
+    STATIC_PROMPT:       str
+    BATCH_STATIC_PROMPT: str
+
+    def __init__(
+        self,
+        dna: AgentDNA,
+        client: genai.Client | None = None,
+        prompt_cache: PromptCache | None = None,
+    ):
+        self.dna = dna
+        # A shared client (see BrainPool) reuses one HTTP connection pool across brains;
+        # LLM_BACKEND swaps Gemini for a record / replay stand-in
+        self._client = client or make_client()
+        self._model = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+        self._prompts = prompt_cache or get_prompt_cache(self._client)
+        self.timeout = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "12"))
+        # Rate budget is shared process-wide; the ticker sets `priority` per tick
+        self._scheduler = get_llm_scheduler()
+        self.priority: tuple = (PRIORITY_NORMAL,)
+
+    async def adecide(self, market: MarketState) -> AgentDecision:
+        """
+        One decision on the SDK's async client — no thread held, cancellable. Every
+        call goes through the LLM scheduler (budget, breaker); `timeout` bounds the call
+        itself, and malformed output is reported to the breaker as a failed call.
+        """
+        return await self._agenerate(self._prompt(market), lambda text: self._parse(text, market))
+
+    async def _agenerate(self, prompt: str, parse: Callable[[str], Any]):
+        config = self._prompts.config(self._model, self.STATIC_PROMPT, prompt, **self.GENERATION)
+
+        def decode(response):
+            self._prompts.record_usage(response)
+            return parse(response.text)
+
+        return await self._scheduler.submit(
+            lambda: agenerate(self._client, model=self._model, contents=prompt, config=config),
+            tokens=estimate_tokens(self.STATIC_PROMPT, prompt),
+            priority=self.priority,
+            timeout=self.timeout,
+            parse=decode,
+        )
+
+    def _prompt(self, market: MarketState) -> str:
+        return render_identity(self.dna, self.SIZE_PCT) + "\n\n" + render_market(market)
+
+    def _parse(self, text: str, market: MarketState) -> AgentDecision:
+        # Compiled schema validation; price / qty / confidence clamped to this strategy's rules
+        return parse_decision(text, self.dna, market, self.SIZE_PCT)
+
+    @classmethod
+    async def adecide_batch(cls, brains: list["BaseAgent"], market: MarketState) -> dict[str, AgentDecision]:
+        """Decide for several agents of this strategy on the same market with one call."""
+        return await adecide_batch(
+            brains, market, static=cls.BATCH_STATIC_PROMPT, size_pct=cls.SIZE_PCT, generation=cls.GENERATION,
+        )
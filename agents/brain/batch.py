@@ -0,0 +1,97 @@
+"""
+Ghost Broker — Batched Brain Decisions
+One Gemini call decides for every agent of a strategy trading the same
+commodity in a tick: the strategy's rules come from the cached static prefix
+(see prompts.py), the live market is sent once, each agent contributes a
+single identity line, and the model answers with a JSON array keyed by
+agent_id. Items are validated one by one against the batch schema, so
+agents the response omits (or garbles) are left to the caller's individual
+fallback.
+"""
+from __future__ import annotations
+
+import logging
+import os
+from typing import TYPE_CHECKING, Sequence
+
+from agents.brain.prompts import render_agent_line, render_market
+from agents.brain.schema import BATCH_SCHEMA, batch_decisions, parse_batch
+from agents.brain.stream import agenerate, all_answered
+from agents.llm_scheduler import estimate_tokens
+from agents.types import AgentDecision, MarketState
+
+if TYPE_CHECKING:
+    from agents.brain_pool import Brain
+
+logger = logging.getLogger(__name__)
+
+# Agents per batched prompt; 1 disables batching (one call per agent)
+BATCH_SIZE = int(os.getenv("AGENT_DECISION_BATCH_SIZE", "1"))
+
+
+def build_batch_prompt(brains: Sequence["Brain"], market: MarketState, size_pct: tuple[float, float]) -> str:
+    """Dynamic part of a batched call: the live market once, then one line per agent."""
+    lines = [render_agent_line(brain.dna, size_pct) for brain in brains]
+    return render_market(market) + "\n\n=== AGENTS ===\n" + "\n".join(lines)
+
+
+def parse_batch_response(
+    text: str,
+    market: MarketState,
+    brains: Sequence["Brain"],
+    size_pct: tuple[float, float],
+) -> dict[str, AgentDecision]:
+    """JSON array → {agent_id: clamped AgentDecision}; unknown ids and malformed items are dropped."""
+    return batch_decisions(parse_batch(text), {b.dna.agent_id: b for b in brains}, market, size_pct)
+
+
+async def adecide_batch(
+    brains: Sequence["Brain"],
+    market: MarketState,
+    *,
+    static: str,
+    size_pct: tuple[float, float],
+    generation: dict,
+) -> dict[str, AgentDecision]:
+    """One generate_content call for all `brains` (same strategy, same market), scheduled at the group's best priority."""
+    if not brains:
+        return {}
+    lead = brains[0]
+    prompt = build_batch_prompt(brains, market, size_pct)
+
+    config = lead._prompts.config(lead._model, static, prompt, **_batch_generation(generation))
+
+    def decode(response) -> dict[str, AgentDecision]:
+        lead._prompts.record_usage(response)
+        return _collect(response.text, brains, market, size_pct)
+
+    return await lead._scheduler.submit(
+        lambda: agenerate(
+            lead._client, model=lead._model, contents=prompt, config=config,
+            until=all_answered(b.dna.agent_id for b in brains),
+        ),
+        tokens=estimate_tokens(static, prompt, outputs=len(brains)),
+        priority=min(b.priority for b in brains),
+        timeout=lead.timeout,
+        parse=decode,
+    )
+
+
+def _batch_generation(generation: dict) -> dict:
+    # The brain's generation settings, answering with the array schema instead of one object
+    return {**generation, "response_schema": BATCH_SCHEMA}
+
+
+def _collect(
+    text: str,
+    brains: Sequence["Brain"],
+    market: MarketState,
+    size_pct: tuple[float, float],
+) -> dict[str, AgentDecision]:
+    decisions = parse_batch_response(text, market, brains, size_pct)
+    if len(decisions) < len(brains):
+        logger.info(
+            "Batch %s/%s: %d/%d agents answered", brains[0].dna.strategy.value, market.commodity,
+            len(decisions), len(brains),
+        )
+    return decisions
@@ -0,0 +1,91 @@
+"""
+Ghost Broker — Prompt Prefix Cache
+Splits every brain call into the static prefix of its strategy (persona,
+rules, response format), sent as system_instruction, and the small dynamic
+part (identity + LIVE MARKET) rendered per call. Prefixes are kept once per
+client and their reuse is tracked; the provider's implicit prefix caching
+shows up as `cached_tokens` in the usage stats.
+
+There is no explicit provider context cache: it needs a prefix of at least
+1024 tokens, and the strategy prefixes are ~300 tokens each (~750 for all
+three together), so every create() would be refused.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+from typing import Any
+
+from google.genai import types as genai_types
+
+
+class PromptCache:
+    """
+    (model, static text) → shared prefix, for every brain on a client.
+    `config()` returns the GenerateContentConfig for one call.
+    """
+
+    def __init__(self, client: Any = None) -> None:
+        self._client  = client
+        self._prefixes: dict[tuple[str, str], str] = {}
+        self._lock    = threading.Lock()
+        self.calls           = 0
+        self.reused          = 0      # calls whose prefix was already known
+        self.static_chars    = 0      # static prefix size, summed per call
+        self.dynamic_chars   = 0      # rendered per-call prompt size, summed
+        self.prompt_tokens   = 0
+        self.cached_tokens   = 0
+
+    # ── Config for one call ────────────────────────────────────────────────────
+    def config(self, model: str, static: str, dynamic: str, **kwargs) -> genai_types.GenerateContentConfig:
+        return genai_types.GenerateContentConfig(system_instruction=self._prefix(model, static, dynamic), **kwargs)
+
+    def record_usage(self, response: Any) -> None:
+        """Account provider-reported prompt / cached token counts of a response."""
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return
+        self.prompt_tokens += getattr(usage, "prompt_token_count", None) or 0
+        self.cached_tokens += getattr(usage, "cached_content_token_count", None) or 0
+
+    def stats(self) -> dict:
+        calls = self.calls or 1
+        return {
+            "prefixes":          len(self._prefixes),
+            "calls":             self.calls,
+            "reused":            self.reused,
+            "reuse_rate":        round(self.reused / calls, 4) if self.calls else 0.0,
+            "avg_static_chars":  round(self.static_chars / calls, 1),
+            "avg_dynamic_chars": round(self.dynamic_chars / calls, 1),
+            "prompt_tokens":     self.prompt_tokens,
+            "cached_tokens":     self.cached_tokens,
+        }
+
+    # ── Internals ──────────────────────────────────────────────────────────────
+    @staticmethod
+    def _key(model: str, static: str) -> tuple[str, str]:
+        return model, hashlib.sha256(static.encode()).hexdigest()
+
+    def _prefix(self, model: str, static: str, dynamic: str) -> str:
+        key = self._key(model, static)
+        with self._lock:
+            self.calls += 1
+            self.static_chars += len(static)
+            self.dynamic_chars += len(dynamic)
+            prefix = self._prefixes.get(key)
+            if prefix is not None:
+                self.reused += 1
+                return prefix
+            self._prefixes[key] = static
+            return static
+
+
+_by_client: dict[int, PromptCache] = {}
+
+
+def get_prompt_cache(client: Any) -> PromptCache:
+    """One PromptCache per Gemini client (brains sharing a client share prefixes)."""
+    cache = _by_client.get(id(client))
+    if cache is None or cache._client is not client:
+        cache = _by_client[id(client)] = PromptCache(client)
+    return cache
@@ -0,0 +1,135 @@
+"""
+Ghost Broker — Prompt Blocks
+Brain prompts are split in two: a static prefix per strategy (persona,
+trading rules, response format) that is served from the prompt cache, and
+a small dynamic part (agent identity + LIVE MARKET) rendered every tick.
+"""
+from __future__ import annotations
+
+from agents.types import AgentDNA, MarketState
+
+STATIC_PROMPT = """You are an autonomous trading agent in the Ghost Broker marketplace running the {strategy} strategy.
+Personality: {personality}
+
+=== YOUR TRADING RULES ===
+{rules}
+
+The user message carries your identity (name, capital, size range) and the live market for this tick.
+
+{response_format}"""
+
+BATCH_STATIC_PROMPT = """You are the decision engine for {strategy} autonomous trading agents in the Ghost Broker marketplace.
+Every agent in the user message follows the SAME personality and rules, but decides independently with its OWN capital and risk appetite.
+Personality: {personality}
+
+=== TRADING RULES (apply to each agent) ===
+{rules}
+
+{response_format}"""
+
+DECISION_FORMAT = """Respond ONLY with a valid JSON object (no markdown, no extra text):
+{
+  "action": "BID or ASK or HOLD or PARTNER",
+  "price": <float>,
+  "qty": <float>,
+  "confidence": <float between 0.0 and 1.0>,
+  "reasoning": "<2-3 sentence rationale mentioning your name and current capital>"
+}"""
+
+BATCH_FORMAT = """Respond ONLY with a valid JSON array holding exactly one object per listed agent (no markdown, no extra text):
+[
+  {
+    "agent_id": "<agent_id from the list>",
+    "action": "BID or ASK or HOLD or PARTNER",
+    "price": <float>,
+    "qty": <float>,
+    "confidence": <float between 0.0 and 1.0>,
+    "reasoning": "<1-2 sentence rationale mentioning the agent's name and current capital>"
+  }
+]"""
+
+IDENTITY_BLOCK = """=== YOUR IDENTITY ===
+Name:             {agent_name}
+Strategy:         {strategy}
+Risk Appetite:    {risk_appetite}/100
+Current Capital:  {capital} USD
+Initial Capital:  {initial_capital} USD
+P&L:              {pnl_pct:+.2f}%
+Size Range:       {size_min:.2f}–{size_max:.2f} USD"""
+
+AGENT_LINE = (
+    "- agent_id={agent_id} | name={name} | risk={risk}/100 | capital={capital} USD | "
+    "initial={initial_capital} USD | P&L={pnl_pct:+.2f}% | size={size_min:.2f}–{size_max:.2f} USD"
+)
+
+MARKET_BLOCK = """=== LIVE MARKET ===
+Commodity:    {commodity}
+Bid / Ask:    {best_bid} / {best_ask}
+Mid Price:    {mid_price}
+Spread:       {spread}%
+Oracle Price: {oracle_price}  (confidence: {oracle_confidence})
+24h Volume:   {volume_24h}
+Price Change: {price_change}%
+Volatility:   {volatility}%
+VWAP:         {vwap}
+Book Depth:   bids={depth_bid}  asks={depth_ask}"""
+
+
+def static_prompt(strategy: str, personality: str, rules: str) -> str:
+    return STATIC_PROMPT.format(
+        strategy=strategy, personality=personality, rules=rules, response_format=DECISION_FORMAT,
+    )
+
+
+def batch_static_prompt(strategy: str, personality: str, rules: str) -> str:
+    return BATCH_STATIC_PROMPT.format(
+        strategy=strategy, personality=personality, rules=rules, response_format=BATCH_FORMAT,
+    )
+
+
+def _pnl_pct(dna: AgentDNA) -> float:
+    return ((dna.capital - dna.initial_capital) / max(dna.initial_capital, 0.001)) * 100
+
+
+def render_identity(dna: AgentDNA, size_pct: tuple[float, float]) -> str:
+    return IDENTITY_BLOCK.format(
+        agent_name=dna.name or f"Agent #{dna.token_id}",
+        strategy=dna.strategy.value.upper(),
+        risk_appetite=dna.risk_appetite,
+        capital=round(dna.capital, 4),
+        initial_capital=round(dna.initial_capital, 4),
+        pnl_pct=_pnl_pct(dna),
+        size_min=dna.capital * size_pct[0],
+        size_max=dna.capital * size_pct[1],
+    )
+
+
+def render_agent_line(dna: AgentDNA, size_pct: tuple[float, float]) -> str:
+    return AGENT_LINE.format(
+        agent_id=dna.agent_id,
+        name=dna.name or f"Agent #{dna.token_id}",
+        risk=dna.risk_appetite,
+        capital=round(dna.capital, 4),
+        initial_capital=round(dna.initial_capital, 4),
+        pnl_pct=_pnl_pct(dna),
+        size_min=dna.capital * size_pct[0],
+        size_max=dna.capital * size_pct[1],
+    )
+
+
+def render_market(market: MarketState) -> str:
+    return MARKET_BLOCK.format(
+        commodity=market.commodity,
+        best_bid=round(market.best_bid, 4),
+        best_ask=round(market.best_ask, 4),
+        mid_price=round(market.mid_price, 4),
+        spread=round(market.spread, 4),
+        oracle_price=round(market.oracle_price, 4),
+        oracle_confidence=round(market.oracle_confidence, 3),
+        volume_24h=market.volume_24h,
+        price_change=round(market.price_change, 2),
+        volatility=round(market.volatility, 3),
+        vwap=round(market.vwap or market.mid_price, 4),
+        depth_bid=market.orderbook_depth_bid,
+        depth_ask=market.orderbook_depth_ask,
+    )
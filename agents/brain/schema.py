@@ -0,0 +1,176 @@
+"""
+Ghost Broker — Structured Decision Output
+The response schema sent with every brain call (so the model answers with
+the AgentDecision fields only) and the compiled pydantic validators that
+decode it. Decoded values are clamped to the prompt's sizing rules instead
+of failing the call: qty to the strategy's maximum size, price to a band
+around the live mid, confidence to 0–1.
+"""
+from __future__ import annotations
+
+import math
+import os
+from typing import Optional, Sequence
+
+from google.genai import types as genai_types
+from pydantic import BaseModel, ConfigDict, TypeAdapter, ValidationError, field_validator
+
+from agents.types import ActionType, AgentDecision, AgentDNA, MarketState
+
+# Max distance of a decision price from the mid price, as a fraction of mid
+MAX_PRICE_DEVIATION = float(os.getenv("DECISION_MAX_PRICE_DEVIATION", "0.10"))
+
+# Field order matters for streaming: the short fields come first, reasoning last
+_FIELDS = ("action", "price", "qty", "confidence", "reasoning")
+
+_DECISION_PROPERTIES = {
+    "action":     genai_types.Schema(type="STRING", enum=[a.value for a in ActionType]),
+    "price":      genai_types.Schema(type="NUMBER"),
+    "qty":        genai_types.Schema(type="NUMBER"),
+    "confidence": genai_types.Schema(type="NUMBER", minimum=0.0, maximum=1.0),
+    "reasoning":  genai_types.Schema(type="STRING"),
+}
+
+DECISION_SCHEMA = genai_types.Schema(
+    type="OBJECT",
+    properties=_DECISION_PROPERTIES,
+    required=list(_FIELDS),
+    property_ordering=list(_FIELDS),
+)
+
+BATCH_SCHEMA = genai_types.Schema(
+    type="ARRAY",
+    items=genai_types.Schema(
+        type="OBJECT",
+        properties={"agent_id": genai_types.Schema(type="STRING"), **_DECISION_PROPERTIES},
+        required=["agent_id", *_FIELDS],
+        property_ordering=["agent_id", *_FIELDS],
+    ),
+)
+
+
+class DecisionOut(BaseModel):
+    """One decision as the model returns it (before clamping)."""
+    model_config = ConfigDict(extra="ignore")
+
+    action:     ActionType
+    price:      float
+    qty:        float
+    confidence: float
+    reasoning:  str = ""
+
+    @field_validator("action", mode="before")
+    @classmethod
+    def _normalize_action(cls, value):
+        return value.strip().upper() if isinstance(value, str) else value
+
+
+class BatchDecisionOut(DecisionOut):
+    agent_id: str
+
+    @field_validator("agent_id", mode="before")
+    @classmethod
+    def _coerce_id(cls, value):
+        return str(value) if isinstance(value, int) else value
+
+
+# Validators are built once per process; validate_json() decodes in pydantic-core
+_decision_adapter = TypeAdapter(DecisionOut)
+_item_adapter     = TypeAdapter(BatchDecisionOut)
+_batch_adapter    = TypeAdapter(list)
+_object_adapter   = TypeAdapter(dict)
+
+
+def _strip_fences(text: str) -> str:
+    # Schema-constrained responses are bare JSON; fences only show up on fallback models
+    raw = text.strip()
+    if raw.startswith("```"):
+        raw = raw.split("\n", 1)[1] if "\n" in raw else raw[3:]
+        raw = raw.removeprefix("json").rstrip()
+        raw = raw.removesuffix("```").rstrip()
+    return raw
+
+
+def _clamp(value: float, low: float, high: float) -> float:
+    return min(max(value, low), high)
+
+
+def to_decision(
+    out: DecisionOut,
+    dna: AgentDNA,
+    market: MarketState,
+    size_pct: tuple[float, float],
+) -> AgentDecision:
+    """Clamp a decoded decision to the prompt's sizing rules."""
+    mid = market.mid_price
+    price = out.price if math.isfinite(out.price) and out.price > 0 else mid
+    if mid > 0:
+        price = _clamp(price, mid * (1 - MAX_PRICE_DEVIATION), mid * (1 + MAX_PRICE_DEVIATION))
+
+    if out.action == ActionType.HOLD:
+        qty = 0.0
+    else:
+        qty = out.qty if math.isfinite(out.qty) else 0.0
+        # Only the upper bound is enforced: a smaller order is a valid (cautious) choice
+        qty = min(qty, dna.capital * size_pct[1])
+
+    confidence = out.confidence if math.isfinite(out.confidence) else 0.0
+    return AgentDecision(
+        agent_id=dna.agent_id,
+        action=out.action,
+        commodity=market.commodity,
+        price=round(price, 6),
+        qty=round(max(qty, 0.0), 6),
+        reasoning=out.reasoning,
+        confidence=_clamp(confidence, 0.0, 1.0),
+    )
+
+
+def parse_decision(
+    text: str,
+    dna: AgentDNA,
+    market: MarketState,
+    size_pct: tuple[float, float],
+) -> AgentDecision:
+    """Single-agent response → clamped AgentDecision. Raises ValidationError on garbage."""
+    return to_decision(_decision_adapter.validate_json(_strip_fences(text)), dna, market, size_pct)
+
+
+def parse_item(item: dict | str | bytes) -> Optional[BatchDecisionOut]:
+    """One batch array element (decoded dict or raw JSON) → BatchDecisionOut, or None if malformed."""
+    try:
+        if isinstance(item, (str, bytes)):
+            return _item_adapter.validate_json(item)
+        return _item_adapter.validate_python(item)
+    except ValidationError:
+        return None
+
+
+def parse_batch(text: str) -> list:
+    """Batch response → raw array items (validated one by one so one bad item costs one agent)."""
+    raw = _strip_fences(text)
+    try:
+        return _batch_adapter.validate_json(raw)
+    except ValidationError:
+        # Some models wrap the array: {"decisions": [...]} or a lone object
+        data = _object_adapter.validate_json(raw)
+        items = data.get("decisions", [data])
+        return items if isinstance(items, list) else []
+
+
+def batch_decisions(
+    items: Sequence,
+    brains_by_id: dict,
+    market: MarketState,
+    size_pct: tuple[float, float],
+) -> dict[str, AgentDecision]:
+    """{agent_id: clamped decision} for known agents; first answer per agent wins."""
+    decisions: dict[str, AgentDecision] = {}
+    for item in items:
+        out = item if isinstance(item, BatchDecisionOut) else parse_item(item)
+        if out is None or out.agent_id in decisions:
+            continue
+        brain = brains_by_id.get(out.agent_id)
+        if brain is not None:
+            decisions[out.agent_id] = to_decision(out, brain.dna, market, size_pct)
+    return decisions
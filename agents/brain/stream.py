@@ -0,0 +1,143 @@
+"""
+Ghost Broker — Streaming Decision Decode
+Brain calls stream the response and stop reading as soon as the JSON value
+is complete (single decision) or every requested agent has a complete item
+(batch), instead of waiting for the model to finish — schema-constrained
+JSON output tends to trail whitespace or extra items after the value.
+
+`agenerate()` returns an object with `.text` and
+`.usage_metadata`, like a GenerateContentResponse, so callers do not care
+whether streaming is on (DECISION_STREAMING=0 turns it off).
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional
+
+from agents.brain.schema import parse_item
+
+DECISION_STREAMING = os.getenv("DECISION_STREAMING", "1") not in ("0", "false", "False", "")
+
+
+class JsonScanner:
+    """
+    Incremental scanner over one streamed JSON value. Tracks string / escape
+    state and nesting depth; records each complete element of a top-level
+    array and whether the top-level value has closed.
+    """
+
+    def __init__(self) -> None:
+        self.text  = ""
+        self.items: list[str] = []     # raw JSON of complete top-level array elements
+        self.done  = False
+        self._end  = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._item_start: Optional[int] = None
+        self._is_array = False
+
+    def feed(self, chunk: str) -> None:
+        start = len(self.text)
+        self.text += chunk
+        if self.done:
+            return
+        text = self.text
+        for i in range(start, len(text)):
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c == "{" or c == "[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._is_array = c == "["
+                elif self._depth == 2 and self._is_array:
+                    self._item_start = i
+            elif c == "}" or c == "]":
+                self._depth -= 1
+                if self._depth == 1 and self._item_start is not None:
+                    self.items.append(text[self._item_start:i + 1])
+                    self._item_start = None
+                elif self._depth == 0:
+                    self.done = True
+                    self._end = i + 1
+                    return
+
+    def value(self) -> str:
+        """The complete value, the complete items of an unfinished array, or the raw text."""
+        if self.done:
+            return self.text[:self._end]
+        if self._is_array and self.items:
+            return "[" + ",".join(self.items) + "]"
+        return self.text
+
+
+Until = Callable[[JsonScanner], bool]
+
+
+def value_complete(scanner: JsonScanner) -> bool:
+    return scanner.done
+
+
+def all_answered(agent_ids: Iterable[str]) -> Until:
+    """Stop once every agent in `agent_ids` has a valid item (or the array closes)."""
+    pending = set(agent_ids)
+    seen = 0
+
+    def until(scanner: JsonScanner) -> bool:
+        nonlocal seen
+        for raw in scanner.items[seen:]:
+            out = parse_item(raw)
+            if out is not None:
+                pending.discard(out.agent_id)
+        seen = len(scanner.items)
+        return scanner.done or not pending
+
+    return until
+
+
+@dataclass
+class StreamedResponse:
+    text:           str
+    usage_metadata: Any = None
+    chunks:         int = 0
+    stopped_early:  bool = False
+
+
+def _consume(scanner: JsonScanner, response: StreamedResponse, chunk: Any) -> None:
+    response.chunks += 1
+    scanner.feed(getattr(chunk, "text", None) or "")
+    usage = getattr(chunk, "usage_metadata", None)
+    if usage is not None:
+        response.usage_metadata = usage
+
+
+async def agenerate(client, *, model: str, contents: str, config, until: Until = value_complete):
+    """
+    generate_content() on the async client, streamed and cut off at `until` when
+    streaming is enabled; breaking out closes the HTTP stream.
+    """
+    if not DECISION_STREAMING:
+        return await client.aio.models.generate_content(model=model, contents=contents, config=config)
+    scanner, response = JsonScanner(), StreamedResponse("")
+    stream = await client.aio.models.generate_content_stream(model=model, contents=contents, config=config)
+    try:
+        async for chunk in stream:
+            _consume(scanner, response, chunk)
+            if until(scanner):
+                response.stopped_early = True
+                break
+    finally:
+        aclose = getattr(stream, "aclose", None)
+        if aclose is not None:
+            await aclose()
+    response.text = scanner.value()
+    return response
@@ -0,0 +1,101 @@
+"""
+Ghost Broker — Brain Pool
+Keeps one brain per agent alive across ticks. Brains share a single
+Gemini client, so client and connection setup happen once per process
+instead of once per agent per tick.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Iterable
+
+from google import genai
+
+from agents.types import AgentDNA, Strategy
+from agents.brain.aggressive_agent   import AggressiveAgent
+from agents.brain.base               import BaseAgent
+from agents.brain.balanced_agent     import BalancedAgent
+from agents.brain.conservative_agent import ConservativeAgent
+from agents.brain.prompt_cache import PromptCache, get_prompt_cache
+from agents.llm_backend import make_client
+
+logger = logging.getLogger(__name__)
+
+Brain = BaseAgent
+
+BRAIN_CLASSES: dict[Strategy, type] = {
+    Strategy.AGGRESSIVE:   AggressiveAgent,
+    Strategy.BALANCED:     BalancedAgent,
+    Strategy.CONSERVATIVE: ConservativeAgent,
+}
+
+# DNA fields that may change between ticks without rebuilding the brain
+_MUTABLE_FIELDS = ("capital", "initial_capital", "risk_appetite", "name", "owner_address")
+
+
+class BrainPool:
+    """
+    token_id → brain cache.
+    `get()` refreshes mutable DNA fields in place; a strategy change is the
+    only thing that forces a rebuild. `retain()` evicts deleted agents.
+    """
+
+    def __init__(self, client: genai.Client | None = None) -> None:
+        self._client = client
+        self._brains: dict[int, Brain] = {}
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+
+    @property
+    def client(self) -> genai.Client:
+        if self._client is None:
+            self._client = make_client()     # LLM_BACKEND: gemini | record | replay | fake
+        return self._client
+
+    @property
+    def prompt_cache(self) -> PromptCache:
+        """Static prompt prefixes shared by every brain on the pool's client."""
+        return get_prompt_cache(self.client)
+
+    def get(self, dna: AgentDNA) -> Brain:
+        brain = self._brains.get(dna.token_id)
+        if brain is not None and brain.dna.strategy == dna.strategy:
+            self.hits += 1
+            for name in _MUTABLE_FIELDS:
+                value = getattr(dna, name)
+                if getattr(brain.dna, name) != value:
+                    setattr(brain.dna, name, value)
+            return brain
+
+        self.misses += 1
+        cls = BRAIN_CLASSES.get(dna.strategy, BalancedAgent)
+        brain = cls(dna, client=self.client)
+        self._brains[dna.token_id] = brain
+        return brain
+
+    def retain(self, token_ids: Iterable[int]) -> int:
+        """Drop brains whose agents no longer exist. Returns the evicted count."""
+        live = set(token_ids)
+        stale = [tid for tid in self._brains if tid not in live]
+        for tid in stale:
+            del self._brains[tid]
+        self.evictions += len(stale)
+        return len(stale)
+
+    def evict(self, token_id: int) -> None:
+        if self._brains.pop(token_id, None) is not None:
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._brains)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size":      len(self._brains),
+            "hits":      self.hits,
+            "misses":    self.misses,
+            "evictions": self.evictions,
+            "hit_rate":  round(self.hits / lookups, 4) if lookups else 0.0,
+        }
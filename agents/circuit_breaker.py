@@ -0,0 +1,148 @@
+"""
+Ghost Broker — LLM Circuit Breaker
+Watches the outcome of recent brain calls. When the error rate or the p95
+latency over the window passes its threshold the breaker opens: callers
+stop sending LLM work and use their rule-based fallback. After a cooldown
+one background probe call is allowed (half-open); success closes the
+breaker, failure keeps it open for another cooldown.
+
+Rate-limit responses are not counted — the scheduler already backs off
+on those.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+BREAKER_ENABLED       = os.getenv("LLM_BREAKER_ENABLED", "1") not in ("0", "false", "False", "")
+BREAKER_ERROR_RATE    = float(os.getenv("LLM_BREAKER_ERROR_RATE", "0.5"))
+BREAKER_P95_SECONDS   = float(os.getenv("LLM_BREAKER_P95_SECONDS", "10"))
+BREAKER_WINDOW        = int(os.getenv("LLM_BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS     = int(os.getenv("LLM_BREAKER_MIN_CALLS", "5"))
+BREAKER_COOLDOWN      = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "30"))
+
+# Set inside the probe task so its call passes an open breaker
+_probing: contextvars.ContextVar[bool] = contextvars.ContextVar("llm_breaker_probing", default=False)
+
+CLOSED    = "closed"
+OPEN      = "open"
+HALF_OPEN = "half_open"
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list (0 for an empty one)."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised for LLM calls submitted while the breaker is open."""
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        *,
+        error_rate: float = BREAKER_ERROR_RATE,
+        p95_seconds: float = BREAKER_P95_SECONDS,
+        window: int = BREAKER_WINDOW,
+        min_calls: int = BREAKER_MIN_CALLS,
+        cooldown: float = BREAKER_COOLDOWN,
+        enabled: bool = BREAKER_ENABLED,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.error_rate  = error_rate
+        self.p95_seconds = p95_seconds
+        self.min_calls   = max(1, min_calls)
+        self.cooldown    = cooldown
+        self.enabled     = enabled
+        self._clock      = clock
+        self._window: deque[tuple[bool, float]] = deque(maxlen=max(1, window))   # (ok, seconds)
+        self.state       = CLOSED
+        self._opened_at  = 0.0
+        self._probe: Optional[asyncio.Task] = None
+        self.trips       = 0
+        self.probes      = 0
+        self.last_reason = ""
+
+    # ── Call outcomes ──────────────────────────────────────────────────────────
+    def record(self, ok: bool, seconds: float) -> None:
+        if self.state != CLOSED:
+            return      # only the probe decides while open / half-open
+        self._window.append((ok, seconds))
+        if len(self._window) < self.min_calls:
+            return
+        errors, p95 = self._health()
+        if errors >= self.error_rate:
+            self._open(f"error rate {errors:.0%}")
+        elif p95 >= self.p95_seconds:
+            self._open(f"p95 latency {p95:.1f}s")
+
+    def allow(self) -> bool:
+        """True when LLM calls may go out; False means use the rule-based fallback."""
+        return not self.enabled or self.state == CLOSED or _probing.get()
+
+    # ── Recovery ───────────────────────────────────────────────────────────────
+    def probe_due(self) -> bool:
+        return (
+            self.state == OPEN
+            and self._clock() - self._opened_at >= self.cooldown
+            and (self._probe is None or self._probe.done())
+        )
+
+    def start_probe(self, call: Callable[[], Awaitable[Any]]) -> bool:
+        """Run one trial call in the background if the cooldown has passed."""
+        if not self.probe_due():
+            return False
+        self.state = HALF_OPEN
+        self.probes += 1
+        self._probe = asyncio.get_running_loop().create_task(self._run_probe(call))
+        return True
+
+    async def _run_probe(self, call: Callable[[], Awaitable[Any]]) -> None:
+        _probing.set(True)
+        try:
+            await call()
+        except Exception as exc:  # noqa: BLE001
+            self._open(f"probe failed: {exc}")
+            return
+        except asyncio.CancelledError:
+            self._open("probe cancelled")
+            raise
+        self.state = CLOSED
+        self._window.clear()
+        logger.info("LLM circuit closed — probe succeeded")
+
+    def _open(self, reason: str) -> None:
+        if self.state == CLOSED:
+            self.trips += 1
+            logger.warning("LLM circuit OPEN (%s) — agents use rule-based fallback", reason)
+        self.state = OPEN
+        self._opened_at = self._clock()
+        self.last_reason = reason
+
+    def _health(self) -> tuple[float, float]:
+        errors = sum(1 for ok, _ in self._window if not ok) / len(self._window)
+        return errors, percentile(sorted(s for _, s in self._window), 95)
+
+    def stats(self) -> dict:
+        errors, p95 = self._health() if self._window else (0.0, 0.0)
+        return {
+            "enabled":     self.enabled,
+            "state":       self.state,
+            "error_rate":  round(errors, 3),
+            "window_p95":  round(p95, 3),
+            "trips":       self.trips,
+            "probes":      self.probes,
+            "last_reason": self.last_reason,
+        }
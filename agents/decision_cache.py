@@ -0,0 +1,237 @@
+"""
+Ghost Broker — Decision Cache
+Memoizes brain decisions for agents that see practically the same inputs.
+The key is a quantization of the MarketState plus strategy, a risk bucket
+and a (log-scale) capital bucket; a hit is rescaled to the requesting
+agent's capital. Entries expire by TTL and are evicted LRU beyond
+`max_entries`. Coarser steps mean more hits — and less decision diversity.
+Concurrent misses on one key are single-flight: the first caller asks the
+brain, the others await its answer.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Callable, Hashable, Optional
+
+from agents.brain_pool import BRAIN_CLASSES
+from agents.types import AgentDecision, AgentDNA, MarketState
+
+logger = logging.getLogger(__name__)
+
+DECISION_CACHE_ENABLED  = os.getenv("DECISION_CACHE_ENABLED", "1") not in ("0", "false", "False", "")
+DECISION_CACHE_TTL      = float(os.getenv("DECISION_CACHE_TTL_SECONDS", "60"))
+DECISION_CACHE_SIZE     = int(os.getenv("DECISION_CACHE_SIZE", "4096"))
+DECISION_CACHE_JITTER   = float(os.getenv("DECISION_CACHE_JITTER", "0.0"))
+DECISION_CACHE_EXPLORE  = float(os.getenv("DECISION_CACHE_EXPLORE", "0.0"))
+
+
+@dataclass(frozen=True)
+class Quantization:
+    """Bucket widths for the cache key. A step of 0 drops that input from the key."""
+    price_bps:       float = float(os.getenv("DECISION_CACHE_PRICE_BPS", "10"))     # mid price, relative
+    spread:          float = float(os.getenv("DECISION_CACHE_SPREAD_STEP", "0.1"))   # spread, % points
+    price_change:    float = float(os.getenv("DECISION_CACHE_CHANGE_STEP", "0.25"))  # price change, % points
+    oracle_gap_bps:  float = float(os.getenv("DECISION_CACHE_ORACLE_GAP_BPS", "10")) # mid vs oracle
+    confidence:      float = 0.1
+    depth:           int   = 5
+    risk:            int   = int(os.getenv("DECISION_CACHE_RISK_BUCKET", "10"))
+    capital_base:    float = float(os.getenv("DECISION_CACHE_CAPITAL_BASE", "2"))    # log buckets
+
+    def market_key(self, m: MarketState) -> tuple:
+        mid = max(m.mid_price, 1e-12)
+        return (
+            m.commodity,
+            _bucket(math.log(mid) * 1e4, self.price_bps),
+            _bucket(m.spread, self.spread),
+            _bucket(m.price_change, self.price_change),
+            _bucket((m.mid_price - m.oracle_price) / mid * 1e4, self.oracle_gap_bps),
+            _bucket(m.oracle_confidence, self.confidence),
+            _bucket(m.orderbook_depth_bid, self.depth),
+            _bucket(m.orderbook_depth_ask, self.depth),
+        )
+
+    def dna_key(self, dna: AgentDNA) -> tuple:
+        capital = max(dna.capital, 1e-12)
+        cap_bucket = (
+            math.floor(math.log(capital, self.capital_base)) if self.capital_base > 1 else None
+        )
+        pnl_sign = (dna.capital > dna.initial_capital) - (dna.capital < dna.initial_capital)
+        return (dna.strategy.value, _bucket(dna.risk_appetite, self.risk), cap_bucket, pnl_sign)
+
+
+def _bucket(value: float, step: float) -> Optional[int]:
+    return math.floor(value / step) if step else None
+
+
+@dataclass
+class _Entry:
+    decision:   AgentDecision
+    capital:    float          # capital of the agent the decision was made for
+    expires_at: float
+
+
+class DecisionCache:
+    """
+    Thread-safe LRU + TTL cache of AgentDecisions.
+    `lookup()` / `store()` / `share()` serve callers that schedule the brain call
+    themselves (the tick executor); `adecide()` wraps a brain call end to end.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl: float = DECISION_CACHE_TTL,
+        max_entries: int = DECISION_CACHE_SIZE,
+        quantization: Quantization | None = None,
+        jitter: float = DECISION_CACHE_JITTER,
+        explore: float = DECISION_CACHE_EXPLORE,
+        enabled: bool = DECISION_CACHE_ENABLED,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl         = ttl
+        self.max_entries = max(1, max_entries)
+        self.quant       = quantization or Quantization()
+        self.jitter      = max(0.0, jitter)      # ± fraction applied to a hit's qty
+        self.explore     = min(max(0.0, explore), 1.0)  # chance a lookup skips the cache
+        self.enabled     = enabled
+        self._clock      = clock
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self.hits      = 0
+        self.misses    = 0
+        self.expired   = 0
+        self.evictions = 0
+        self.coalesced = 0      # misses served by another caller's in-flight brain call
+
+    def key(self, dna: AgentDNA, market: MarketState) -> tuple:
+        return self.quant.dna_key(dna) + self.quant.market_key(market)
+
+    def lookup(self, dna: AgentDNA, market: MarketState) -> Optional[AgentDecision]:
+        """Cached decision rescaled to `dna`, or None on a miss."""
+        if not self.enabled:
+            return None
+        if self.explore and random.random() < self.explore:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        key = self.key(dna, market)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= now:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return self._rescale(entry, dna, market)
+
+    def store(self, dna: AgentDNA, market: MarketState, decision: AgentDecision) -> None:
+        if not self.enabled:
+            return
+        key = self.key(dna, market)
+        with self._lock:
+            self._entries[key] = _Entry(decision, dna.capital, self._clock() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def share(
+        self, decision: AgentDecision, source: AgentDNA, dna: AgentDNA, market: MarketState,
+    ) -> AgentDecision:
+        """
+        Hand a fresh decision made for `source` to an agent with the same key —
+        for callers that coalesce same-key misses themselves (the ticker).
+        """
+        with self._lock:
+            self.coalesced += 1
+        return self._rescale(_Entry(decision, source.capital, 0.0), dna, market)
+
+    async def adecide(self, brain, market: MarketState) -> AgentDecision:
+        """Cache-through `await brain.adecide(market)`, one brain call per key at a time."""
+        cached = self.lookup(brain.dna, market)
+        if cached is not None:
+            return cached
+        if not self.enabled:
+            return await brain.adecide(market)
+
+        key = self.key(brain.dna, market)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            try:
+                entry = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The leader was cancelled: ask the brain ourselves
+            else:
+                self.coalesced += 1
+                return self._rescale(entry, brain.dna, market)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            decision = await brain.adecide(market)
+        except BaseException as exc:
+            if isinstance(exc, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(exc)
+                future.exception()      # followers re-raise it; don't log "never retrieved"
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        self.store(brain.dna, market, decision)
+        future.set_result(_Entry(decision, brain.dna.capital, 0.0))
+        return decision
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled":   self.enabled,
+            "size":      len(self._entries),
+            "hits":      self.hits,
+            "misses":    self.misses,
+            "expired":   self.expired,
+            "evictions": self.evictions,
+            "coalesced": self.coalesced,
+            "hit_rate":  round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    # ── Internals ──────────────────────────────────────────────────────────────
+    def _rescale(self, entry: _Entry, dna: AgentDNA, market: MarketState) -> AgentDecision:
+        src = entry.decision
+        scale = dna.capital / entry.capital if entry.capital > 0 else 1.0
+        if self.jitter:
+            scale *= 1.0 + random.uniform(-self.jitter, self.jitter)
+        # Same cap parse_decision puts on fresh decisions: the strategy's max size
+        max_qty = dna.capital * BRAIN_CLASSES[dna.strategy].SIZE_PCT[1]
+        return replace(
+            src,
+            agent_id  = dna.agent_id,
+            commodity = market.commodity,
+            qty       = round(min(src.qty * scale, max_qty), 6),
+            reasoning = f"[Cached] {src.reasoning}",
+        )
@@ -0,0 +1,133 @@
+"""
+Ghost Broker — Shared HTTP Session Pool
+One keep-alive aiohttp session (connection limits + DNS cache) shared by the
+price feed, the oracle router and anything else that polls HTTP endpoints,
+instead of a new session — and TCP/TLS handshake — per request.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+HTTP_POOL_LIMIT          = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "20"))
+HTTP_DNS_TTL             = int(os.getenv("HTTP_DNS_TTL_SECONDS", "300"))
+HTTP_KEEPALIVE           = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "30"))
+
+
+class HttpSessionPool:
+    """
+    Lazily opens one ClientSession per event loop and tracks connection reuse
+    through aiohttp tracing. A session left by a previous loop is closed when
+    the next loop asks for one. `close()` must be called on shutdown.
+    """
+
+    def __init__(
+        self,
+        limit: int = HTTP_POOL_LIMIT,
+        limit_per_host: int = HTTP_POOL_LIMIT_PER_HOST,
+        dns_ttl: int = HTTP_DNS_TTL,
+        keepalive: float = HTTP_KEEPALIVE,
+    ) -> None:
+        self._limit          = limit
+        self._limit_per_host = limit_per_host
+        self._dns_ttl        = dns_ttl
+        self._keepalive      = keepalive
+        self._session: aiohttp.ClientSession | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._retiring: set[asyncio.Task] = set()     # closes of previous loops' sessions
+        self.requests           = 0
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.dns_cache_hits     = 0
+
+    def session(self) -> aiohttp.ClientSession:
+        """Return the shared session, (re)creating it for the running loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            if self._session is not None and not self._session.closed:
+                self._retire(self._session, self._loop)
+            self._session = self._create()
+            self._loop = loop
+        return self._session
+
+    def _retire(self, session: aiohttp.ClientSession, loop: asyncio.AbstractEventLoop | None) -> None:
+        """Close a session opened on another event loop instead of leaking its connector."""
+        if loop is not None and loop.is_running():
+            # Its loop still runs (another thread): close it there
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+            return
+        # The loop is gone (e.g. a finished asyncio.run()): close from the current one
+        task = asyncio.get_running_loop().create_task(_close_stale(session))
+        self._retiring.add(task)
+        task.add_done_callback(self._retiring.discard)
+
+    def _create(self) -> aiohttp.ClientSession:
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(self._on_request_start)
+        trace.on_connection_create_end.append(self._on_connection_create)
+        trace.on_connection_reuseconn.append(self._on_connection_reuse)
+        trace.on_dns_cache_hit.append(self._on_dns_cache_hit)
+
+        connector = aiohttp.TCPConnector(
+            limit=self._limit,
+            limit_per_host=self._limit_per_host,
+            ttl_dns_cache=self._dns_ttl,
+            keepalive_timeout=self._keepalive,
+        )
+        logger.info(
+            "HTTP session pool opened (limit=%d per_host=%d dns_ttl=%ds)",
+            self._limit, self._limit_per_host, self._dns_ttl,
+        )
+        return aiohttp.ClientSession(connector=connector, trace_configs=[trace])
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.info("HTTP session pool closed: %s", self.stats())
+        self._session = None
+        self._loop = None
+
+    def stats(self) -> dict:
+        conns = self.connections_opened + self.connections_reused
+        return {
+            "open":               self._session is not None and not self._session.closed,
+            "requests":           self.requests,
+            "connections_opened": self.connections_opened,
+            "connections_reused": self.connections_reused,
+            "reuse_rate":         round(self.connections_reused / conns, 4) if conns else 0.0,
+            "dns_cache_hits":     self.dns_cache_hits,
+        }
+
+    # ── Trace hooks ────────────────────────────────────────────────────────────
+    async def _on_request_start(self, *_args) -> None:
+        self.requests += 1
+
+    async def _on_connection_create(self, *_args) -> None:
+        self.connections_opened += 1
+
+    async def _on_connection_reuse(self, *_args) -> None:
+        self.connections_reused += 1
+
+    async def _on_dns_cache_hit(self, *_args) -> None:
+        self.dns_cache_hits += 1
+
+
+async def _close_stale(session: aiohttp.ClientSession) -> None:
+    try:
+        await session.close()
+    except RuntimeError as exc:     # its transports already died with their closed loop
+        logger.debug("Stale HTTP session: %s", exc)
+    logger.info("HTTP session of a previous event loop closed")
+
+
+_pool = HttpSessionPool()
+
+
+def get_http_pool() -> HttpSessionPool:
+    return _pool
@@ -0,0 +1,427 @@
+"""
+Ghost Broker — Pluggable LLM Backend
+Brains only need a genai.Client-shaped object (aio.models — every brain
+call is async and goes through the LLM scheduler). Besides the real Gemini client this module provides
+two stand-ins for offline, reproducible runs:
+
+    record — wraps the real client and appends every prompt → response pair
+             (with its measured latency and token usage) to a JSONL cassette
+    replay — answers from a cassette without network access; latency is drawn
+             from a configurable distribution and errors are injected at a
+             configurable rate. Prompts not in the cassette get a recorded
+             answer of the same strategy prompt (agent ids remapped) or, with
+             nothing recorded, a synthesized schema-valid answer
+    fake   — replay with no cassette at all (synthesized answers only)
+
+Select with LLM_BACKEND or `run_agents.py --llm`. Latency specs:
+    fixed:S | uniform:LO,HI | normal:MU,SIGMA | lognormal:MU,SIGMA | recorded
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Optional
+
+from google import genai
+from google.genai import types as genai_types
+
+logger = logging.getLogger(__name__)
+
+LLM_BACKEND         = os.getenv("LLM_BACKEND", "gemini")            # gemini | record | replay | fake
+LLM_CASSETTE        = os.getenv("LLM_CASSETTE", "data/llm_cassette.jsonl")
+LLM_FAKE_LATENCY    = os.getenv("LLM_FAKE_LATENCY", "lognormal:-0.7,0.5")
+LLM_FAKE_ERROR_RATE = float(os.getenv("LLM_FAKE_ERROR_RATE", "0"))
+LLM_FAKE_429_RATE   = float(os.getenv("LLM_FAKE_429_RATE", "0"))
+LLM_FAKE_SEED       = int(os.getenv("LLM_FAKE_SEED", "0"))
+
+BACKEND_GEMINI = "gemini"
+BACKEND_RECORD = "record"
+BACKEND_REPLAY = "replay"
+BACKEND_FAKE   = "fake"
+
+_STREAM_CHUNKS = 4
+
+_AGENT_ID  = re.compile(r"agent_id=(\S+)")
+_MID_PRICE = re.compile(r"Mid Price:\s+([-\d.eE]+)")
+_SIZE      = re.compile(r"(?:Size Range:\s+|size=)([\d.]+)–([\d.]+)")
+
+
+# ── Keys ───────────────────────────────────────────────────────────────────────
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def _contents_text(contents: Any) -> str:
+    return contents if isinstance(contents, str) else json.dumps(contents, default=str, sort_keys=True)
+
+
+def _usage_dict(usage: Any) -> Optional[dict]:
+    if usage is None:
+        return None
+    return {
+        "prompt":    getattr(usage, "prompt_token_count", None) or 0,
+        "cached":    getattr(usage, "cached_content_token_count", None) or 0,
+        "candidates": getattr(usage, "candidates_token_count", None) or 0,
+        "total":     getattr(usage, "total_token_count", None) or 0,
+    }
+
+
+def _usage_metadata(usage: Optional[dict]) -> Optional[genai_types.GenerateContentResponseUsageMetadata]:
+    if not usage:
+        return None
+    return genai_types.GenerateContentResponseUsageMetadata(
+        prompt_token_count=usage["prompt"],
+        cached_content_token_count=usage["cached"] or None,
+        candidates_token_count=usage["candidates"],
+        total_token_count=usage["total"],
+    )
+
+
+# ── Cassette ───────────────────────────────────────────────────────────────────
+class Cassette:
+    """
+    Append-only JSONL of recorded calls. Each line:
+    {"key", "static", "model", "batch", "text", "latency", "usage"}
+    `static` is the digest of the static prompt prefix, so a replay can fall
+    back to any answer recorded for the same strategy prompt.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._by_key: dict[str, dict] = {}
+        self._by_static: dict[str, list[dict]] = {}
+        self.latencies: list[float] = []
+        if self.path.exists():
+            with self.path.open() as fh:
+                for line in fh:
+                    if line.strip():
+                        self._index(json.loads(line))
+
+    def _index(self, entry: dict) -> None:
+        self._by_key[entry["key"]] = entry
+        self._by_static.setdefault(entry["static"], []).append(entry)
+        if entry.get("latency") is not None:
+            self.latencies.append(entry["latency"])
+
+    def append(self, entry: dict) -> None:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a") as fh:
+                fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._index(entry)
+
+    def exact(self, key: str) -> Optional[dict]:
+        return self._by_key.get(key)
+
+    def similar(self, static: str) -> list[dict]:
+        return self._by_static.get(static, [])
+
+    def __len__(self) -> int:
+        return len(self._by_key)
+
+
+_cassettes: dict[Path, Cassette] = {}
+
+
+def get_cassette(path: str | Path = LLM_CASSETTE) -> Cassette:
+    """One Cassette per file, shared by every client recording into / replaying from it."""
+    resolved = Path(path).resolve()
+    cassette = _cassettes.get(resolved)
+    if cassette is None:
+        cassette = _cassettes[resolved] = Cassette(resolved)
+    return cassette
+
+
+def _static_text(config: Any) -> str:
+    instruction = getattr(config, "system_instruction", None) if config is not None else None
+    return instruction if isinstance(instruction, str) else _contents_text(instruction or "")
+
+
+def _call_key(model: str, contents: Any, config: Any) -> tuple[str, str]:
+    """(prompt key, static prefix digest) of one call."""
+    static = _digest(_static_text(config))
+    return _digest(f"{model}\x00{static}\x00{_contents_text(contents)}"), static
+
+
+# ── Latency / errors ───────────────────────────────────────────────────────────
+class LatencyModel:
+    def __init__(self, spec: str, rng: random.Random, recorded: Optional[list[float]] = None) -> None:
+        self.spec = spec
+        self._rng = rng
+        self._recorded = recorded or []
+        kind, _, args = spec.partition(":")
+        self.kind = kind.strip().lower()
+        self.args = [float(a) for a in args.split(",") if a.strip()]
+        if self.kind not in ("fixed", "uniform", "normal", "lognormal", "recorded"):
+            raise ValueError(f"Unknown latency distribution: {spec!r}")
+
+    def sample(self, recorded: Optional[float] = None) -> float:
+        rng, a = self._rng, self.args
+        if self.kind == "fixed":
+            return a[0] if a else 0.0
+        if self.kind == "uniform":
+            return rng.uniform(a[0], a[1])
+        if self.kind == "normal":
+            return max(0.0, rng.gauss(a[0], a[1]))
+        if self.kind == "lognormal":
+            return rng.lognormvariate(a[0], a[1])
+        # recorded: this prompt's own latency, else any recorded one
+        if recorded is not None:
+            return recorded
+        return rng.choice(self._recorded) if self._recorded else 0.0
+
+
+class ReplayError(RuntimeError):
+    """Injected model failure (message carries the HTTP status like the SDK's errors)."""
+
+    def __init__(self, message: str, code: int) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+@dataclass
+class ReplayResponse:
+    text:           str
+    usage_metadata: Any = None
+
+
+# ── Replay ─────────────────────────────────────────────────────────────────────
+class _ReplayModels:
+    def __init__(self, owner: "ReplayClient") -> None:
+        self._owner = owner
+
+    def generate_content(self, *, model: str, contents: Any, config: Any = None):
+        return self._owner._agenerate(model, contents, config)
+
+    def generate_content_stream(self, *, model: str, contents: Any, config: Any = None):
+        return self._owner._astream(model, contents, config)
+
+
+class ReplayClient:
+    """
+    Offline stand-in for genai.Client's async surface (`aio`). Deterministic
+    for a given seed, cassette and call order; the latency is awaited with
+    asyncio.sleep so the tick loop sees realistic concurrency.
+    """
+
+    def __init__(
+        self,
+        cassette: Optional[Cassette] = None,
+        *,
+        latency: str = LLM_FAKE_LATENCY,
+        error_rate: float = LLM_FAKE_ERROR_RATE,
+        rate_limit_rate: float = LLM_FAKE_429_RATE,
+        seed: int = LLM_FAKE_SEED,
+    ) -> None:
+        self.cassette = cassette
+        self._rng = random.Random(seed)
+        self.latency = LatencyModel(latency, self._rng, cassette.latencies if cassette else None)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.aio = SimpleNamespace(models=_ReplayModels(self))
+        self.calls      = 0
+        self.exact_hits = 0
+        self.similar    = 0
+        self.synthetic  = 0
+        self.errors     = 0
+
+    def stats(self) -> dict:
+        return {
+            "cassette":   len(self.cassette) if self.cassette is not None else 0,
+            "latency":    self.latency.spec,
+            "calls":      self.calls,
+            "exact_hits": self.exact_hits,
+            "similar":    self.similar,
+            "synthetic":  self.synthetic,
+            "errors":     self.errors,
+        }
+
+    # ── Answer selection ───────────────────────────────────────────────────────
+    def _answer(self, model: str, contents: Any, config: Any) -> tuple[str, float, Optional[dict]]:
+        self.calls += 1
+        roll = self._rng.random()
+        key, static = _call_key(model, contents, config)
+        prompt = _contents_text(contents)
+        entry = self.cassette.exact(key) if self.cassette is not None else None
+        if entry is not None:
+            self.exact_hits += 1
+            text = entry["text"]
+        else:
+            candidates = self.cassette.similar(static) if self.cassette is not None else []
+            if candidates:
+                self.similar += 1
+                entry = self._rng.choice(candidates)
+                text = _remap_agents(entry["text"], prompt)
+            else:
+                self.synthetic += 1
+                text = self._synthesize(prompt)
+        latency = self.latency.sample(entry.get("latency") if entry is not None else None)
+
+        if roll < self.rate_limit_rate:
+            self.errors += 1
+            raise ReplayError("429 RESOURCE_EXHAUSTED (injected)", 429)
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.errors += 1
+            raise ReplayError("503 UNAVAILABLE (injected)", 503)
+        usage = (entry or {}).get("usage") or {
+            "prompt": len(prompt) // 4, "cached": 0, "candidates": len(text) // 4,
+            "total": (len(prompt) + len(text)) // 4,
+        }
+        return text, latency, usage
+
+    def _synthesize(self, prompt: str) -> str:
+        rng = self._rng
+        mid = float(m.group(1)) if (m := _MID_PRICE.search(prompt)) else 1.0
+
+        def one(size: tuple[float, float]) -> dict:
+            action = rng.choice(("BID", "ASK", "HOLD", "BID", "ASK"))
+            return {
+                "action":     action,
+                "price":      round(mid * (1 + rng.uniform(-0.005, 0.005)), 6),
+                "qty":        0.0 if action == "HOLD" else round(rng.uniform(*size), 6),
+                "confidence": round(rng.uniform(0.4, 0.9), 2),
+                "reasoning":  f"Synthetic {action.lower()} at {mid:.4f}.",
+            }
+
+        ids = _AGENT_ID.findall(prompt)
+        sizes = [(float(a), float(b)) for a, b in _SIZE.findall(prompt)] or [(0.0, 0.0)]
+        if not ids:
+            return json.dumps(one(sizes[0]))
+        return json.dumps([
+            {"agent_id": agent_id, **one(sizes[min(i, len(sizes) - 1)])} for i, agent_id in enumerate(ids)
+        ])
+
+    # ── Call shapes ────────────────────────────────────────────────────────────
+    async def _agenerate(self, model, contents, config) -> ReplayResponse:
+        text, latency, usage = self._answer(model, contents, config)
+        await asyncio.sleep(latency)
+        return ReplayResponse(text, _usage_metadata(usage))
+
+    async def _astream(self, model, contents, config):
+        text, latency, usage = self._answer(model, contents, config)
+
+        async def chunks():
+            for i, piece in enumerate(_split(text)):
+                await asyncio.sleep(latency / _STREAM_CHUNKS)
+                yield ReplayResponse(piece, _usage_metadata(usage) if i == _STREAM_CHUNKS - 1 else None)
+        return chunks()
+
+
+def _split(text: str) -> list[str]:
+    step = max(1, -(-len(text) // _STREAM_CHUNKS))
+    pieces = [text[i:i + step] for i in range(0, len(text), step)]
+    return pieces + [""] * (_STREAM_CHUNKS - len(pieces))
+
+
+def _remap_agents(text: str, prompt: str) -> str:
+    """A recorded batch answer for other agents → the same answers for this prompt's agents."""
+    ids = _AGENT_ID.findall(prompt)
+    if not ids:
+        return text
+    try:
+        items = json.loads(text)
+    except ValueError:
+        return text
+    if not isinstance(items, list) or not items:
+        return text
+    return json.dumps([
+        {**items[i % len(items)], "agent_id": agent_id} for i, agent_id in enumerate(ids)
+    ])
+
+
+# ── Record ─────────────────────────────────────────────────────────────────────
+class _RecordingModels:
+    def __init__(self, owner: "RecordingClient", inner: Any) -> None:
+        self._owner = owner
+        self._inner = inner
+
+    async def generate_content(self, *, model: str, contents: Any, config: Any = None):
+        started = time.monotonic()
+        response = await self._inner.generate_content(model=model, contents=contents, config=config)
+        self._owner._save(model, contents, config, response.text, time.monotonic() - started,
+                          response.usage_metadata)
+        return response
+
+    async def generate_content_stream(self, *, model: str, contents: Any, config: Any = None):
+        started = time.monotonic()
+        stream = await self._inner.generate_content_stream(model=model, contents=contents, config=config)
+
+        async def chunks():
+            parts, usage = [], None
+            try:
+                async for chunk in stream:
+                    parts.append(chunk.text or "")
+                    usage = chunk.usage_metadata or usage
+                    yield chunk
+            finally:
+                aclose = getattr(stream, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+                self._owner._save(model, contents, config, "".join(parts), time.monotonic() - started, usage)
+        return chunks()
+
+
+class RecordingClient:
+    """Pass-through around a real client's `aio` surface that writes each answered call to a cassette."""
+
+    def __init__(self, inner: Any, cassette: Cassette) -> None:
+        self._inner = inner
+        self.cassette = cassette
+        self.aio = SimpleNamespace(models=_RecordingModels(self, inner.aio.models))
+        self.recorded = 0
+
+    def _save(self, model, contents, config, text: str, latency: float, usage: Any) -> None:
+        if not text:
+            return
+        key, static = _call_key(model, contents, config)
+        self.cassette.append({
+            "key":     key,
+            "static":  static,
+            "model":   model,
+            "batch":   bool(_AGENT_ID.search(_contents_text(contents))),
+            "text":    text,
+            "latency": round(latency, 4),
+            "usage":   _usage_dict(usage),
+        })
+        self.recorded += 1
+
+    def stats(self) -> dict:
+        return {"cassette": len(self.cassette), "recorded": self.recorded}
+
+
+# ── Factory ────────────────────────────────────────────────────────────────────
+def make_client(
+    backend: str = LLM_BACKEND,
+    *,
+    cassette: str | Path = LLM_CASSETTE,
+    latency: str = LLM_FAKE_LATENCY,
+    error_rate: float = LLM_FAKE_ERROR_RATE,
+    rate_limit_rate: float = LLM_FAKE_429_RATE,
+    seed: int = LLM_FAKE_SEED,
+) -> Any:
+    """Client for the brains: the real Gemini client, a recorder around it, or a replay stand-in."""
+    backend = backend.lower()
+    if backend == BACKEND_GEMINI:
+        return genai.Client(api_key=os.getenv("GEMINI_API_KEY", ""))
+    if backend == BACKEND_RECORD:
+        logger.info("LLM backend: recording Gemini calls into %s", cassette)
+        return RecordingClient(genai.Client(api_key=os.getenv("GEMINI_API_KEY", "")), get_cassette(cassette))
+    if backend in (BACKEND_REPLAY, BACKEND_FAKE):
+        tape = get_cassette(cassette) if backend == BACKEND_REPLAY else None
+        logger.info(
+            "LLM backend: %s (cassette=%d calls, latency=%s, errors=%.1f%%, 429=%.1f%%, seed=%d)",
+            backend, len(tape) if tape is not None else 0, latency, error_rate * 100, rate_limit_rate * 100, seed,
+        )
+        return ReplayClient(tape, latency=latency, error_rate=error_rate, rate_limit_rate=rate_limit_rate, seed=seed)
+    raise ValueError(f"Unknown LLM backend: {backend!r}")
@@ -0,0 +1,395 @@
+"""
+Ghost Broker — LLM Call Scheduler
+Every Gemini call goes through one process-wide scheduler that enforces
+requests-per-minute and tokens-per-minute budgets with token buckets.
+Waiting calls are released in priority order; a 429 / RESOURCE_EXHAUSTED
+response halves the effective rate and pauses dispatch with exponential
+backoff, and successes recover the rate additively (AIMD). Tick loops ask
+`wait_ready()` instead of sleeping a fixed rate-limit pause.
+
+Each call runs under its deadline. With hedging on, a call still running
+at the chosen latency percentile gets a duplicate (if the budget has room
+right now) and the first answer wins. Outcomes feed the circuit breaker —
+unparseable output and calls cancelled after dispatch count as failures;
+while it is open, submit() fails fast with CircuitOpenError.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+
+from agents.circuit_breaker import CircuitBreaker, CircuitOpenError, percentile
+
+logger = logging.getLogger(__name__)
+
+# Default: Gemini 2.0 Flash paid tier 1. The free tier's 15 RPM covers only ~4 calls
+# per 15 s tick deadline, so most agents of a larger tick would fall back. Setting
+# this above the real quota is self-correcting: 429s halve the effective rate.
+LLM_RPM            = float(os.getenv("LLM_RPM", "2000"))
+LLM_TPM            = float(os.getenv("LLM_TPM", "1000000"))
+LLM_BACKOFF_MAX    = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "60"))
+LLM_STALE_SECONDS  = float(os.getenv("LLM_PRIORITY_STALE_SECONDS", "120"))
+LLM_HIGH_CAPITAL   = float(os.getenv("LLM_PRIORITY_HIGH_CAPITAL_USD", "1000"))
+LLM_HEDGE_PCT      = float(os.getenv("LLM_HEDGE_PERCENTILE", "0"))        # 0 = no hedged requests
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_LATENCY_WINDOW = int(os.getenv("LLM_LATENCY_WINDOW", "512"))
+
+# Priority classes — lower is served first
+PRIORITY_HIGH   = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW    = 2
+
+_OUTPUT_TOKENS = 200     # expected completion size of one decision
+_CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(*texts: str, outputs: int = 1) -> int:
+    """Rough prompt + completion token count used to charge the TPM bucket up front."""
+    return sum(len(t) for t in texts) // _CHARS_PER_TOKEN + _OUTPUT_TOKENS * outputs
+
+
+def priority_for(capital_usd: float, staleness: float, strategy: str = "") -> tuple:
+    """
+    (class, tie-break) — agents that have not decided for a while or manage a
+    lot of capital go first; momentum (aggressive) agents before the rest.
+    """
+    if staleness >= LLM_STALE_SECONDS or capital_usd >= LLM_HIGH_CAPITAL:
+        cls = PRIORITY_HIGH
+    elif strategy.upper() == "AGGRESSIVE":
+        cls = PRIORITY_NORMAL
+    else:
+        cls = PRIORITY_LOW
+    return cls, -staleness, -capital_usd
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    """
+    A 429 by status code (genai APIError.code, HTTP status_code / status) or
+    gRPC status — never by message text, which a parse error may quote.
+    """
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    return code == 429 or getattr(exc, "status", None) in (429, "RESOURCE_EXHAUSTED")
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = max(1.0, per_minute)
+        self.rate     = self.capacity / 60.0       # refill per second
+        self.tokens   = self.capacity
+        self.scale    = 1.0                        # adaptive multiplier on the refill rate
+        self._last    = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate * self.scale)
+        self._last = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 if it is now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / (self.rate * self.scale)
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= amount       # may go negative when usage is reconciled upward
+
+    def level(self) -> float:
+        self._refill()
+        return self.tokens
+
+
+class LatencyWindow:
+    """Latencies of the last `size` successful calls; percentiles are computed on demand."""
+
+    def __init__(self, size: int = LLM_LATENCY_WINDOW) -> None:
+        self._samples: deque[float] = deque(maxlen=max(1, size))
+        self._sorted: Optional[list[float]] = None
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._sorted = None
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> float:
+        if self._sorted is None:
+            self._sorted = sorted(self._samples)
+        return percentile(self._sorted, pct)
+
+    def summary(self) -> dict:
+        return {
+            "samples": len(self._samples),
+            "p50":     round(self.percentile(50), 3),
+            "p95":     round(self.percentile(95), 3),
+            "p99":     round(self.percentile(99), 3),
+        }
+
+
+class LLMScheduler:
+    def __init__(
+        self,
+        rpm: float = LLM_RPM,
+        tpm: float = LLM_TPM,
+        backoff_max: float = LLM_BACKOFF_MAX,
+        hedge_percentile: float = LLM_HEDGE_PCT,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        self.requests = TokenBucket(rpm)
+        self.tokens   = TokenBucket(tpm)
+        self.backoff_max = backoff_max
+        self.hedge_percentile = hedge_percentile
+        self.breaker  = breaker or CircuitBreaker()
+        self.latency  = LatencyWindow()
+        self._paused_until = 0.0
+        self._backoff = 0.0
+        self._queue: list[tuple[Any, int, asyncio.Future, int]] = []
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.submitted    = 0
+        self.completed    = 0
+        self.failed       = 0
+        self.rate_limited = 0
+        self.wait_seconds = 0.0
+        self.hedged       = 0
+        self.hedge_wins   = 0
+
+    # ── Public API ─────────────────────────────────────────────────────────────
+    async def submit(
+        self,
+        call: Callable[[], Awaitable[Any]],
+        *,
+        tokens: int,
+        priority: Any = (PRIORITY_NORMAL,),
+        timeout: Optional[float] = None,
+        parse: Optional[Callable[[Any], Any]] = None,
+    ) -> Any:
+        """
+        Run `call()` once budget allows; `timeout` bounds the call itself (hedge
+        included), not the queue wait. `call` may be invoked twice when hedging.
+        With `parse`, the result is parse(response) and a parse / validation error
+        counts as a failed call — the breaker only sees success for usable output.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"LLM circuit {self.breaker.state}")
+        self.submitted += 1
+        queued = time.monotonic()
+        await self._acquire(tokens, priority)
+        self.wait_seconds += time.monotonic() - queued
+        started = time.monotonic()
+        try:
+            response = await self._call(call, tokens, timeout)
+            result = response if parse is None else parse(response)
+        except asyncio.CancelledError:
+            # Dispatched, then given up on (tick deadline) — as bad as a timeout for the breaker
+            self.failed += 1
+            self.breaker.record(False, time.monotonic() - started)
+            raise
+        except Exception as exc:
+            self.failed += 1
+            if is_rate_limited(exc):
+                self._throttle()
+            else:
+                self.breaker.record(False, time.monotonic() - started)
+            raise
+        elapsed = time.monotonic() - started
+        self.completed += 1
+        self.latency.add(elapsed)
+        self.breaker.record(True, elapsed)
+        self._recover()
+        self._reconcile(tokens, response)
+        return result
+
+    def calls_within(self, seconds: float) -> float:
+        """Requests the budget can dispatch in the next `seconds` (current level + refill)."""
+        bucket = self.requests
+        return max(0.0, bucket.level()) + bucket.rate * bucket.scale * seconds
+
+    async def wait_ready(self, expected_calls: int = 1, min_interval: float = 0.0) -> float:
+        """
+        Sleep until the request budget can absorb `expected_calls` (capped at the
+        bucket size) and any 429 backoff has passed. Returns the seconds waited.
+        """
+        started = time.monotonic()
+        if min_interval:
+            await asyncio.sleep(min_interval)
+        while True:
+            wait = max(
+                self._paused_until - time.monotonic(),
+                self.requests.wait_time(max(1, expected_calls)),
+            )
+            if wait <= 0:
+                return time.monotonic() - started
+            await asyncio.sleep(wait)
+
+    def stats(self) -> dict:
+        return {
+            "rpm":            self.requests.capacity,
+            "tpm":            self.tokens.capacity,
+            "rate_scale":     round(self.requests.scale, 3),
+            "requests_left":  round(self.requests.level(), 2),
+            "tokens_left":    round(self.tokens.level()),
+            "queued":         len(self._queue),
+            "paused_for":     round(max(0.0, self._paused_until - time.monotonic()), 2),
+            "submitted":      self.submitted,
+            "completed":      self.completed,
+            "failed":         self.failed,
+            "rate_limited":   self.rate_limited,
+            "avg_wait":       round(self.wait_seconds / self.submitted, 3) if self.submitted else 0.0,
+            "latency":        self.latency.summary(),
+            "hedged":         self.hedged,
+            "hedge_wins":     self.hedge_wins,
+            "breaker":        self.breaker.state,
+        }
+
+    # ── Deadline + hedging ─────────────────────────────────────────────────────
+    async def _call(self, call: Callable[[], Awaitable[Any]], tokens: int, timeout: Optional[float]) -> Any:
+        delay = self._hedge_delay()
+        if delay is None:
+            return await (call() if timeout is None else asyncio.wait_for(call(), timeout=timeout))
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        first = asyncio.ensure_future(call())
+        pending = {first}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay if timeout is None else min(delay, timeout))
+            if not done and self._try_charge(tokens):
+                self.hedged += 1
+                pending.add(asyncio.ensure_future(call()))
+            error: Optional[BaseException] = None
+            while pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise asyncio.TimeoutError()
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    raise asyncio.TimeoutError()
+                # Retrieve every exception so losing attempts do not log "never retrieved"
+                ok = [task for task in done if task.exception() is None]
+                if ok:
+                    if ok[0] is not first:
+                        self.hedge_wins += 1
+                    return ok[0].result()
+                error = next(iter(done)).exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _hedge_delay(self) -> Optional[float]:
+        if self.hedge_percentile <= 0 or len(self.latency) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return self.latency.percentile(self.hedge_percentile)
+
+    def _try_charge(self, tokens: int) -> bool:
+        """Charge a hedge only if the budget has room now — it never waits or jumps the queue."""
+        if self._queue or self._ready_in(tokens) > 0:
+            return False
+        self._charge(tokens)
+        return True
+
+    # ── Dispatch ───────────────────────────────────────────────────────────────
+    async def _acquire(self, tokens: int, priority: Any) -> None:
+        if not self._queue and self._ready_in(tokens) <= 0:
+            self._charge(tokens)
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), future, tokens))
+        self._ensure_dispatcher()
+        self._wakeup.set()
+        await future
+
+    def _ready_in(self, tokens: int) -> float:
+        return max(
+            self._paused_until - time.monotonic(),
+            self.requests.wait_time(1),
+            self.tokens.wait_time(tokens),
+        )
+
+    def _charge(self, tokens: int) -> None:
+        self.requests.take(1)
+        self.tokens.take(tokens)
+
+    def _ensure_dispatcher(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._dispatcher is None or self._dispatcher.done() or self._dispatcher.get_loop() is not loop:
+            self._wakeup = asyncio.Event()
+            self._dispatcher = loop.create_task(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        while True:
+            # Drop callers that gave up (cancelled / tick deadline) before charging budget
+            while self._queue and self._queue[0][2].done():
+                heapq.heappop(self._queue)
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            _, _, future, tokens = self._queue[0]
+            wait = self._ready_in(tokens)
+            if wait > 0:
+                # A new (possibly higher-priority) arrival re-evaluates the head
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._queue)
+            if not future.done():
+                self._charge(tokens)
+                future.set_result(None)
+
+    # ── Adaptive rate ──────────────────────────────────────────────────────────
+    def _throttle(self) -> None:
+        self.rate_limited += 1
+        self._set_scale(self.requests.scale * 0.5)
+        self.requests.tokens = min(self.requests.tokens, 0.0)   # the provider says the budget is gone
+        self._backoff = min(self.backoff_max, max(1.0, self._backoff * 2))
+        pause = self._backoff * random.uniform(0.8, 1.2)
+        self._paused_until = max(self._paused_until, time.monotonic() + pause)
+        logger.warning(
+            "LLM rate limited — pausing %.1fs, rate scale %.2f", pause, self.requests.scale
+        )
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _recover(self) -> None:
+        self._backoff = 0.0
+        if self.requests.scale < 1.0:
+            self._set_scale(self.requests.scale + 0.05)
+
+    def _set_scale(self, scale: float) -> None:
+        scale = min(1.0, max(0.05, scale))
+        for bucket in (self.requests, self.tokens):
+            bucket._refill()          # settle refill at the old rate first
+            bucket.scale = scale
+
+    def _reconcile(self, estimated: int, response: Any) -> None:
+        """Charge the TPM bucket with the provider-reported size instead of the estimate."""
+        usage = getattr(response, "usage_metadata", None)
+        actual = getattr(usage, "total_token_count", None) if usage is not None else None
+        if actual:
+            self.tokens.take(actual - estimated)
+
+
+_scheduler = LLMScheduler()
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    return _scheduler
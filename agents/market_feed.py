@@ -8,11 +8,14 @@ import asyncio
 import json
 import logging
 import os
-from typing import AsyncGenerator, Callable
+import time
+from typing import AsyncGenerator, Callable, Iterable
 
 import aiohttp
 import websockets
 
+from agents.http_session import HttpSessionPool, get_http_pool
+from agents.market_stats import MarketStats, get_market_stats
 from agents.types import MarketState
 
 logger = logging.getLogger(__name__)
@@ -21,6 +24,12 @@ MONORACLE_RPC    = os.getenv("MONAD_RPC_URL", "https://testnet-rpc.monad.xyz")
 MONORACLE_WS     = os.getenv("MONAD_WS_URL",  "wss://testnet-rpc.monad.xyz")
 MEMECOIN_WS_URL  = os.getenv("MEMECOIN_WS_URL", "wss://stream.binance.com:9443/ws")
 
+# ── Oracle price cache ─────────────────────────────────────────────────────────
+BLOCK_TIME_SECONDS = float(os.getenv("MONAD_BLOCK_TIME_SECONDS", "0.4"))
+ORACLE_TTL_BLOCKS  = int(os.getenv("ORACLE_CACHE_TTL_BLOCKS", "2"))
+STALENESS_PENALTY_PER_BLOCK = 0.02   # confidence lost per block of cache age
+MAX_STALENESS_PENALTY       = 0.20
+
 COMMODITIES = ["GHOST_ORE", "PHANTOM_GAS", "VOID_CHIP"]
 SYMBOLS_MAP = {
     "MON_USDC": "monadusdt",  # example mapping to Binance stream
@@ -37,10 +46,29 @@ BASE_PRICES: dict[str, float] = {
 class PriceFeed:
     """Aggregates Monoracle on-chain prices + off-chain memecoin ticks."""
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        http: HttpSessionPool | None = None,
+        ttl_blocks: int = ORACLE_TTL_BLOCKS,
+        ttl_overrides: dict[str, float] | None = None,
+        stats: MarketStats | None = None,
+    ) -> None:
+        self._http = http or get_http_pool()
         self._prices: dict[str, float] = dict(BASE_PRICES)
         self._confidence: dict[str, float] = {k: 0.95 for k in BASE_PRICES}
         self._callbacks: list[Callable[[str, float], None]] = []
+        # commodity → (price, confidence, fetched_at monotonic)
+        self._oracle_cache: dict[str, tuple[float, float, float]] = {}
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._ttl = ttl_blocks * BLOCK_TIME_SECONDS
+        self._ttl_overrides = dict(ttl_overrides or {})   # commodity → TTL seconds
+        self.cache_hits      = 0
+        self.cache_misses    = 0
+        self.cache_coalesced = 0
+        self.rpc_calls       = 0
+        # Every fresh price (oracle read or stream tick) feeds the rolling stats
+        self.stats = stats or get_market_stats()
+        self._callbacks.append(self.stats.update)
 
     def on_price_update(self, cb: Callable[[str, float], None]) -> None:
         self._callbacks.append(cb)
@@ -55,31 +83,117 @@ class PriceFeed:
     # ── Monoracle Pull ──────────────────────────────────────────────────────────
     async def fetch_oracle_price(self, commodity: str) -> tuple[float, float]:
         """
-        Calls Monoracle smart contract via eth_call to get (price, confidence).
-        Falls back to simulated price if oracle is unavailable.
+        (price, confidence) for a commodity, served from a per-commodity TTL
+        cache (default: 2 blocks). Concurrent misses for the same commodity
+        share one in-flight RPC call. Confidence is reduced by the cache age.
+        """
+        prices = await self.fetch_oracle_prices([commodity])
+        return prices[commodity]
+
+    async def fetch_oracle_prices(self, commodities: Iterable[str]) -> dict[str, tuple[float, float]]:
+        """
+        Bulk variant: every commodity that is neither cached nor already in
+        flight is refreshed with a single JSON-RPC batch request.
+        """
+        wanted = list(dict.fromkeys(commodities))
+        now = time.monotonic()
+        out: dict[str, tuple[float, float]] = {}
+        waiting: dict[str, asyncio.Future] = {}
+        missing: list[str] = []
+
+        for commodity in wanted:
+            cached = self._oracle_cache.get(commodity)
+            if cached is not None and now - cached[2] <= self.ttl_for(commodity):
+                self.cache_hits += 1
+                out[commodity] = (cached[0], _stale_confidence(cached[1], now - cached[2]))
+            elif commodity in self._inflight:
+                self.cache_coalesced += 1
+                waiting[commodity] = self._inflight[commodity]
+            else:
+                self.cache_misses += 1
+                missing.append(commodity)
+
+        if missing:
+            loop = asyncio.get_running_loop()
+            futures = {c: loop.create_future() for c in missing}
+            self._inflight.update(futures)
+            try:
+                fetched = await self._rpc_oracle_prices(missing)
+                fetched_at = time.monotonic()
+                for commodity, (price, conf) in fetched.items():
+                    self._oracle_cache[commodity] = (price, conf, fetched_at)
+                    futures[commodity].set_result((price, conf))
+                    self._notify(commodity, price)
+                out.update(fetched)
+            except asyncio.CancelledError:
+                for future in futures.values():
+                    future.cancel()
+                raise
+            except Exception as exc:
+                for future in futures.values():
+                    future.set_exception(exc)
+                    future.exception()   # mark retrieved when nobody else awaited it
+                raise
+            finally:
+                for commodity in missing:
+                    self._inflight.pop(commodity, None)
+
+        for commodity, future in waiting.items():
+            out[commodity] = await asyncio.shield(future)
+        return out
+
+    def ttl_for(self, commodity: str) -> float:
+        return self._ttl_overrides.get(commodity, self._ttl)
+
+    def cache_stats(self) -> dict:
+        lookups = self.cache_hits + self.cache_misses + self.cache_coalesced
+        return {
+            "hits":      self.cache_hits,
+            "misses":    self.cache_misses,
+            "coalesced": self.cache_coalesced,
+            "rpc_calls": self.rpc_calls,
+            "hit_rate":  round((self.cache_hits + self.cache_coalesced) / lookups, 4) if lookups else 0.0,
+        }
+
+    async def _rpc_oracle_prices(self, commodities: list[str]) -> dict[str, tuple[float, float]]:
+        """
+        Calls Monoracle getPrice via one JSON-RPC batch of eth_call requests.
+        Commodities whose call fails (or the whole batch) fall back to the
+        simulated price with reduced confidence.
         """
+        oracle = os.getenv("MONORACLE_CONTRACT", "0x0000000000000000000000000000000000000001")
+        payload = [
+            {
+                "jsonrpc": "2.0",
+                "method":  "eth_call",
+                "params": [
+                    {"to": oracle, "data": f"0x{_encode_get_price(commodity)}"},
+                    "latest",
+                ],
+                "id": i,
+            }
+            for i, commodity in enumerate(commodities)
+        ]
+        results: dict[int, str] = {}
         try:
-            async with aiohttp.ClientSession() as session:
-                payload = {
-                    "jsonrpc": "2.0",
-                    "method":  "eth_call",
-                    "params": [
-                        {
-                            "to":   os.getenv("MONORACLE_CONTRACT", "0x0000000000000000000000000000000000000001"),
-                            "data": f"0x{_encode_get_price(commodity)}",
-                        },
-                        "latest",
-                    ],
-                    "id": 1,
-                }
-                async with session.post(MONORACLE_RPC, json=payload, timeout=aiohttp.ClientTimeout(total=3)) as resp:
-                    data = await resp.json()
-                    result = data.get("result", "0x")
-                    price = _decode_price(result)
-                    return price, 0.98
+            self.rpc_calls += 1
+            session = self._http.session()
+            async with session.post(MONORACLE_RPC, json=payload, timeout=aiohttp.ClientTimeout(total=3)) as resp:
+                data = await resp.json()
+            # Batch responses may arrive in any order; a single error object means the batch failed
+            for item in data if isinstance(data, list) else []:
+                if isinstance(item, dict) and "result" in item:
+                    results[int(item.get("id", -1))] = item["result"]
         except Exception as exc:  # noqa: BLE001
-            logger.debug("Oracle fetch failed for %s: %s — using simulated price", commodity, exc)
-            return self._prices.get(commodity, 1.0), 0.70
+            logger.debug("Oracle batch fetch failed for %s: %s — using simulated prices", commodities, exc)
+
+        out: dict[str, tuple[float, float]] = {}
+        for i, commodity in enumerate(commodities):
+            if i in results:
+                out[commodity] = (_decode_price(results[i]), 0.98)
+            else:
+                out[commodity] = (self._prices.get(commodity, 1.0), 0.70)
+        return out
 
     # ── Memecoin WebSocket ──────────────────────────────────────────────────────
     async def stream_memecoin_prices(self) -> None:
@@ -102,9 +216,9 @@ class PriceFeed:
 
     # ── Monad Log Subscription (monadLogs) ─────────────────────────────────────
     async def subscribe_monad_logs(
-        self, contract_address: str
+        self, contract_address: str | list[str]
     ) -> AsyncGenerator[dict, None]:
-        """Subscribe to Monad WebSocket eth_subscribe logs for a given contract."""
+        """Subscribe to Monad WebSocket eth_subscribe logs for a contract (or a list of contracts)."""
         sub_id = None
         while True:
             try:
@@ -128,6 +242,18 @@ class PriceFeed:
                 await asyncio.sleep(1)
 
     # ── Market State Builder ────────────────────────────────────────────────────
+    def market_state(self, commodity: str) -> MarketState:
+        """
+        Snapshot of the rolling stats plus the last oracle reading — no RPC.
+        Call fetch_oracle_prices() first to refresh the commodities of a tick.
+        """
+        cached = self._oracle_cache.get(commodity)
+        if cached is not None:
+            oracle_price, oracle_conf = cached[0], _stale_confidence(cached[1], time.monotonic() - cached[2])
+        else:
+            oracle_price, oracle_conf = self._prices.get(commodity, 1.0), 0.70
+        return self.stats.snapshot(commodity, oracle_price, oracle_conf)
+
     async def get_market_state(
         self,
         commodity: str,
@@ -159,6 +285,13 @@ class PriceFeed:
 
 # ── Helpers ────────────────────────────────────────────────────────────────────
 
+def _stale_confidence(confidence: float, age_seconds: float) -> float:
+    """Lower a cached confidence by how many blocks old the reading is."""
+    age_blocks = age_seconds / BLOCK_TIME_SECONDS if BLOCK_TIME_SECONDS > 0 else 0.0
+    penalty = min(MAX_STALENESS_PENALTY, STALENESS_PENALTY_PER_BLOCK * age_blocks)
+    return round(max(0.0, confidence - penalty), 4)
+
+
 def _encode_get_price(commodity: str) -> str:
     """Encode a minimal getPrice(bytes32) call ABI."""
     # Function selector: keccak256("getPrice(bytes32)")[:4]
@@ -0,0 +1,269 @@
+"""
+Ghost Broker — Rolling Market Statistics
+Per-commodity statistics kept on fixed-size ring buffers and updated in
+O(1) on every price tick (PriceFeed oracle reads, the memecoin stream, the
+API's CoinGecko poller) and every simulated trade:
+
+    price_change  % return over the last `window` price ticks
+    volatility    standard deviation of tick log returns over the window, %
+    spread        EWMA of the quoted spread, or of |tick move| when there is no quote
+    vwap          volume-weighted price of the last `window` trades
+    volume_24h    traded notional, hourly buckets
+    depth         BID / ASK prints among the last `window` trades
+
+Building a MarketState is a snapshot read of these numbers — no network.
+"""
+from __future__ import annotations
+
+import math
+import os
+import time
+from typing import Optional
+
+from agents.types import MarketState
+
+MARKET_STATS_WINDOW       = int(os.getenv("MARKET_STATS_WINDOW", "64"))
+MARKET_STATS_SPREAD_ALPHA = float(os.getenv("MARKET_STATS_SPREAD_ALPHA", "0.2"))
+MARKET_STATS_MIN_SPREAD   = float(os.getenv("MARKET_STATS_MIN_SPREAD_PCT", "0.3"))
+
+_HOUR = 3600
+_VOLUME_BUCKETS = 24
+
+
+class RingBuffer:
+    """Fixed-capacity float ring. push() returns the value it overwrote (None while filling)."""
+
+    __slots__ = ("_data", "_head", "size")
+
+    def __init__(self, capacity: int) -> None:
+        self._data = [0.0] * max(1, capacity)
+        self._head = 0
+        self.size  = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def capacity(self) -> int:
+        return len(self._data)
+
+    def push(self, value: float) -> Optional[float]:
+        old = self._data[self._head] if self.size == len(self._data) else None
+        self._data[self._head] = value
+        self._head = (self._head + 1) % len(self._data)
+        if self.size < len(self._data):
+            self.size += 1
+        return old
+
+    def oldest(self) -> float:
+        return self._data[(self._head - self.size) % len(self._data)]
+
+    def latest(self) -> float:
+        return self._data[(self._head - 1) % len(self._data)]
+
+    def values(self) -> list[float]:
+        """Oldest → newest."""
+        start = (self._head - self.size) % len(self._data)
+        return [self._data[(start + i) % len(self._data)] for i in range(self.size)]
+
+
+class RollingSum:
+    """Sum and sum of squares over a ring; re-summed once per wrap so float drift stays bounded."""
+
+    __slots__ = ("ring", "total", "squares", "_pushes")
+
+    def __init__(self, capacity: int) -> None:
+        self.ring    = RingBuffer(capacity)
+        self.total   = 0.0
+        self.squares = 0.0
+        self._pushes = 0
+
+    def __len__(self) -> int:
+        return len(self.ring)
+
+    def push(self, value: float) -> None:
+        old = self.ring.push(value)
+        self.total   += value
+        self.squares += value * value
+        if old is not None:
+            self.total   -= old
+            self.squares -= old * old
+        self._pushes += 1
+        if self._pushes % self.ring.capacity == 0:
+            values = self.ring.values()
+            self.total   = math.fsum(values)
+            self.squares = math.fsum(v * v for v in values)
+
+    def stdev(self) -> float:
+        n = len(self.ring)
+        if n < 2:
+            return 0.0
+        mean = self.total / n
+        return math.sqrt(max(0.0, (self.squares - n * mean * mean) / (n - 1)))
+
+
+class CommodityStats:
+    def __init__(
+        self,
+        window: int = MARKET_STATS_WINDOW,
+        spread_alpha: float = MARKET_STATS_SPREAD_ALPHA,
+        min_spread: float = MARKET_STATS_MIN_SPREAD,
+    ) -> None:
+        self.window       = max(2, window)
+        self.spread_alpha = spread_alpha
+        self.min_spread   = min_spread
+        self.prices       = RingBuffer(self.window + 1)     # window returns need window+1 prices
+        self.log_returns  = RollingSum(self.window)
+        self.spread       = min_spread                      # EWMA, % of mid
+        self.notional     = RollingSum(self.window)         # price × qty per trade
+        self.qty          = RollingSum(self.window)
+        self.sides        = RollingSum(self.window)         # +1 BID, -1 ASK
+        self._volume      = [0.0] * _VOLUME_BUCKETS         # notional per hour bucket
+        self._volume_hour = 0
+        self.volume_24h   = 0.0
+        self.updates      = 0
+        self.trades       = 0
+        self.updated_at   = 0.0
+
+    # ── Updates ────────────────────────────────────────────────────────────────
+    def update(self, price: float, bid: Optional[float] = None, ask: Optional[float] = None) -> None:
+        if not price > 0 or not math.isfinite(price):
+            return
+        last = self.prices.latest() if self.prices else None
+        self.prices.push(price)
+        move = math.log(price / last) if last is not None else 0.0
+        if last is not None:
+            self.log_returns.push(move)
+        if bid and ask and ask >= bid:
+            observed = (ask - bid) / ((ask + bid) / 2) * 100
+        else:
+            observed = max(self.min_spread, abs(move) * 100)
+        self.spread += self.spread_alpha * (observed - self.spread)
+        self.updates += 1
+        self.updated_at = time.time()
+
+    def trade(self, side: str, price: float, qty: float, ts: Optional[float] = None) -> None:
+        if not (price > 0 and qty > 0):
+            return
+        notional = price * qty
+        self.notional.push(notional)
+        self.qty.push(qty)
+        self.sides.push(1.0 if side == "BID" else -1.0)
+        self._add_volume(notional, time.time() if ts is None else ts)
+        self.trades += 1
+
+    def _add_volume(self, notional: float, ts: float) -> None:
+        hour = int(ts // _HOUR)
+        if hour > self._volume_hour:
+            # Buckets of the hours that passed without trades roll out of the 24h sum
+            for h in range(max(self._volume_hour + 1, hour - _VOLUME_BUCKETS + 1), hour + 1):
+                slot = h % _VOLUME_BUCKETS
+                self.volume_24h -= self._volume[slot]
+                self._volume[slot] = 0.0
+            self._volume_hour = hour
+        if hour > self._volume_hour - _VOLUME_BUCKETS:
+            self._volume[hour % _VOLUME_BUCKETS] += notional
+            self.volume_24h += notional
+
+    # ── Reads ──────────────────────────────────────────────────────────────────
+    @property
+    def last_price(self) -> float:
+        return self.prices.latest() if self.prices else 0.0
+
+    def price_change(self) -> float:
+        if len(self.prices) < 2 or self.prices.oldest() <= 0:
+            return 0.0
+        return (self.prices.latest() / self.prices.oldest() - 1) * 100
+
+    def volatility(self) -> float:
+        return self.log_returns.stdev() * 100
+
+    def vwap(self) -> float:
+        return self.notional.total / self.qty.total if self.qty.total > 0 else self.last_price
+
+    def depth(self) -> tuple[int, int]:
+        n = len(self.sides)
+        bids = round((n + self.sides.total) / 2)
+        return bids, n - bids
+
+    def summary(self) -> dict:
+        return {
+            "price":        round(self.last_price, 6),
+            "price_change": round(self.price_change(), 4),
+            "volatility":   round(self.volatility(), 4),
+            "spread":       round(self.spread, 4),
+            "vwap":         round(self.vwap(), 6),
+            "volume_24h":   round(self.volume_24h, 2),
+            "updates":      self.updates,
+            "trades":       self.trades,
+        }
+
+
+class MarketStats:
+    """commodity → CommodityStats, created on first update."""
+
+    def __init__(
+        self,
+        window: int = MARKET_STATS_WINDOW,
+        spread_alpha: float = MARKET_STATS_SPREAD_ALPHA,
+        min_spread: float = MARKET_STATS_MIN_SPREAD,
+    ) -> None:
+        self.window       = window
+        self.spread_alpha = spread_alpha
+        self.min_spread   = min_spread
+        self._stats: dict[str, CommodityStats] = {}
+
+    def __contains__(self, commodity: str) -> bool:
+        return commodity in self._stats
+
+    def get(self, commodity: str) -> CommodityStats:
+        stats = self._stats.get(commodity)
+        if stats is None:
+            stats = self._stats[commodity] = CommodityStats(self.window, self.spread_alpha, self.min_spread)
+        return stats
+
+    def update(
+        self, commodity: str, price: float, bid: Optional[float] = None, ask: Optional[float] = None,
+    ) -> None:
+        """Price tick. Signature matches PriceFeed.on_price_update callbacks."""
+        self.get(commodity).update(price, bid, ask)
+
+    def trade(self, commodity: str, side: str, price: float, qty: float, ts: Optional[float] = None) -> None:
+        self.get(commodity).trade(side, price, qty, ts)
+
+    def snapshot(
+        self,
+        commodity: str,
+        oracle_price: Optional[float] = None,
+        oracle_confidence: float = 0.0,
+    ) -> MarketState:
+        """MarketState from the rolling numbers; mid falls back to the oracle before the first tick."""
+        stats = self.get(commodity)
+        mid = stats.last_price or oracle_price or 0.0
+        half = mid * stats.spread / 200
+        depth_bid, depth_ask = stats.depth()
+        return MarketState(
+            commodity           = commodity,
+            best_bid            = round(mid - half, 6),
+            best_ask            = round(mid + half, 6),
+            mid_price           = mid,
+            spread              = round(stats.spread, 4),
+            volume_24h          = round(stats.volume_24h, 2),
+            price_change        = round(stats.price_change(), 4),
+            orderbook_depth_bid = depth_bid,
+            orderbook_depth_ask = depth_ask,
+            oracle_price        = mid if oracle_price is None else oracle_price,
+            oracle_confidence   = oracle_confidence,
+            vwap                = round(stats.vwap() or mid, 6),
+            volatility          = round(stats.volatility(), 4),
+        )
+
+    def stats(self) -> dict:
+        return {commodity: s.summary() for commodity, s in self._stats.items()}
+
+
+_market_stats = MarketStats()
+
+
+def get_market_stats() -> MarketStats:
+    return _market_stats
@@ -0,0 +1,188 @@
+"""
+Ghost Broker — Vectorized Rule Engine
+Evaluates the trading rules spelled out in each brain's RULES prompt for
+every agent of a tick at once, as NumPy arrays, and scores how robust each
+rule outcome is. Only agents whose certainty falls inside the ambiguity
+band need an LLM call; the rest take the rule decision.
+
+Rule conditions are scored with signed margins (positive = satisfied,
+magnitude = normalized distance to the threshold). AND is min, OR is max,
+so the final score is the distance to the nearest input change that would
+flip the decision.
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+
+from agents.brain_pool import BRAIN_CLASSES
+from agents.types import ActionType, AgentDecision, AgentDNA, MarketState, Strategy
+
+RULE_ENGINE_ENABLED = os.getenv("RULE_ENGINE_ENABLED", "1") not in ("0", "false", "False", "")
+RULE_ENGINE_BAND    = float(os.getenv("RULE_ENGINE_BAND", "0.5"))
+
+_ACTIONS = np.array([ActionType.HOLD, ActionType.BID, ActionType.ASK], dtype=object)
+HOLD, BID, ASK = 0, 1, 2
+
+_STRATEGIES = {Strategy.AGGRESSIVE: 0, Strategy.BALANCED: 1, Strategy.CONSERVATIVE: 2}
+
+# Size ranges and thresholds come from the brains, so the rules here are the prompts' rules
+_BRAINS = [BRAIN_CLASSES[s] for s in _STRATEGIES]
+_SIZE_PCT = np.array([brain.SIZE_PCT for brain in _BRAINS])
+_AGG, _BAL, _CON = (brain.THRESHOLDS for brain in _BRAINS)
+
+
+def _gt(x: np.ndarray, threshold: float, floor: float = 0.5) -> np.ndarray:
+    """Signed margin of `x > threshold`, normalized by the threshold's magnitude."""
+    return (x - threshold) / max(abs(threshold), floor)
+
+
+def _lt(x: np.ndarray, threshold: float, floor: float = 0.5) -> np.ndarray:
+    return -_gt(x, threshold, floor)
+
+
+@dataclass
+class RuleScreen:
+    """Per-agent rule outcome for one tick (arrays aligned with the input order)."""
+    action:    np.ndarray      # HOLD | BID | ASK
+    certainty: np.ndarray      # ≥ 0, distance to the nearest rule flip
+    price:     np.ndarray
+    qty:       np.ndarray
+    band:      float
+    rule:      np.ndarray      # short label of the rule that fired
+
+    @property
+    def ambiguous(self) -> np.ndarray:
+        return self.certainty < self.band
+
+    def __len__(self) -> int:
+        return len(self.action)
+
+    def stats(self) -> dict:
+        n = len(self)
+        escalated = int(self.ambiguous.sum()) if n else 0
+        return {
+            "agents":    n,
+            "resolved":  n - escalated,
+            "escalated": escalated,
+            "band":      self.band,
+        }
+
+    def decision(self, i: int, dna: AgentDNA, market: MarketState) -> AgentDecision:
+        action    = _ACTIONS[self.action[i]]
+        certainty = float(self.certainty[i])
+        return AgentDecision(
+            agent_id   = dna.agent_id,
+            action     = action,
+            commodity  = market.commodity,
+            price      = round(float(self.price[i]), 6),
+            qty        = round(float(self.qty[i]), 6),
+            reasoning  = (
+                f"[Rule] {dna.strategy.value.upper()} {self.rule[i]} → {action.value} "
+                f"(Δ={market.price_change:.2f}%, spread={market.spread:.2f}%, margin={certainty:.2f})"
+            ),
+            confidence = round(0.5 + 0.5 * min(certainty, 1.0), 3),
+        )
+
+
+class RuleEngine:
+    def __init__(self, band: float = RULE_ENGINE_BAND) -> None:
+        self.band = band
+
+    def evaluate(self, dnas: Sequence[AgentDNA], markets: Sequence[MarketState]) -> RuleScreen:
+        """Score every (agent, market) pair; `markets[i]` is the market agent i trades."""
+        n = len(dnas)
+        strategy = np.fromiter((_STRATEGIES.get(d.strategy, 1) for d in dnas), dtype=np.int8, count=n)
+        capital  = np.fromiter((d.capital for d in dnas), dtype=float, count=n)
+
+        # Agents share a handful of market states: gather per-agent columns by index
+        table: list[MarketState] = []
+        positions: dict[int, int] = {}
+        idx = np.empty(n, dtype=np.intp)
+        for i, m in enumerate(markets):
+            pos = positions.get(id(m))
+            if pos is None:
+                pos = positions[id(m)] = len(table)
+                table.append(m)
+            idx[i] = pos
+
+        def col(attr: str) -> np.ndarray:
+            return np.array([getattr(m, attr) for m in table], dtype=float)[idx] if n else np.zeros(0)
+
+        mid, oracle = col("mid_price"), col("oracle_price")
+        bid, ask    = col("best_bid"), col("best_ask")
+        change      = col("price_change")
+        spread      = col("spread")
+        conf        = col("oracle_confidence")
+        depth_bid   = col("orderbook_depth_bid")
+        depth_ask   = col("orderbook_depth_ask")
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            gap = np.where(oracle > 0, (mid - oracle) / oracle * 100, 0.0)   # % above oracle
+
+        # ── Per-strategy rules, in priority order: (HOLD, BID, ASK) margins ──
+        # Aggressive: momentum entries, profit taking, hold on wide/thin books
+        agg_hold = np.maximum(
+            _gt(spread, _AGG["hold_spread"]), _lt(np.minimum(depth_bid, depth_ask), _AGG["min_depth"]),
+        )
+        agg_bid  = np.minimum(_gt(change, _AGG["entry_change"]), _lt(gap, 0.0))
+        agg_ask  = np.maximum(_lt(change, _AGG["exit_change"]), (gap - spread) / np.maximum(spread, 0.5))
+
+        # Balanced: mean reversion around the oracle, trend-follow on strong depth
+        bal_hold = np.maximum(_gt(spread, _BAL["hold_spread"]), _lt(conf, _BAL["min_confidence"]))
+        bal_bid  = np.maximum(
+            _lt(gap, -_BAL["oracle_gap"]),
+            np.minimum(_gt(change, _BAL["trend_change"]), _gt(depth_bid, _BAL["trend_depth"])),
+        )
+        bal_ask  = _gt(gap, _BAL["oracle_gap"])
+
+        # Conservative: market-make when the spread pays, leaning against the last move
+        con_hold = np.maximum(_gt(np.abs(change), _CON["hold_change"]), _lt(spread, _CON["min_spread"]))
+        con_quote = _gt(spread, _CON["quote_spread"])
+        con_bid  = np.minimum(con_quote, _lt(change, 0.0))
+        con_ask  = np.minimum(con_quote, _gt(change, 0.0))
+
+        hold_m = np.choose(strategy, [agg_hold, bal_hold, con_hold])
+        bid_m  = np.choose(strategy, [agg_bid,  bal_bid,  con_bid])
+        ask_m  = np.choose(strategy, [agg_ask,  bal_ask,  con_ask])
+
+        # First satisfied rule wins; certainty = min(its margin, how far earlier rules are from firing)
+        hold_on, bid_on, ask_on = hold_m > 0, bid_m > 0, ask_m > 0
+        action = np.full(n, HOLD, dtype=np.int8)
+        certainty = np.minimum.reduce([-hold_m, -bid_m, -ask_m]) if n else np.zeros(0)   # default HOLD
+        rule = np.full(n, "no rule", dtype=object)
+
+        fired_ask = ~hold_on & ~bid_on & ask_on
+        action[fired_ask] = ASK
+        certainty = np.where(fired_ask, np.minimum.reduce([-hold_m, -bid_m, ask_m]), certainty)
+        rule[fired_ask] = "sell rule"
+
+        fired_bid = ~hold_on & bid_on
+        action[fired_bid] = BID
+        certainty = np.where(fired_bid, np.minimum(-hold_m, bid_m), certainty)
+        rule[fired_bid] = "buy rule"
+
+        action[hold_on] = HOLD
+        certainty = np.where(hold_on, hold_m, certainty)
+        rule[hold_on] = "hold rule"
+        certainty = np.nan_to_num(np.abs(certainty))
+
+        # ── Sizing and pricing ──
+        lo, hi = _SIZE_PCT[strategy, 0], _SIZE_PCT[strategy, 1]
+        qty = np.where(action == HOLD, 0.0, capital * (lo + (hi - lo) * np.clip(certainty, 0.0, 1.0)))
+        conservative = strategy == 2
+        price = np.select(
+            [action == BID, action == ASK],
+            [
+                np.where(conservative, oracle * (1 - _CON["quote_offset"] / 100), bid),
+                np.where(conservative, oracle * (1 + _CON["quote_offset"] / 100), ask),
+            ],
+            default=mid,
+        )
+
+        return RuleScreen(
+            action=action, certainty=certainty, price=price, qty=qty, band=self.band, rule=rule,
+        )
@@ -0,0 +1,180 @@
+"""
+Ghost Broker — Tick Executor
+Runs one tick's agent decisions concurrently under a concurrency limit
+and a per-tick deadline, so tick wall-time scales with
+agents / concurrency instead of with the agent count.
+"""
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Hashable, Iterable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = int(os.getenv("AGENT_TICK_CONCURRENCY", "256"))
+DEFAULT_DEADLINE    = float(os.getenv("AGENT_TICK_DEADLINE_SECONDS", "15"))
+DEFAULT_THREADS     = int(os.getenv("AGENT_TICK_THREADS", "8"))   # cap for blocking jobs only
+
+STATUS_OK       = "ok"
+STATUS_TIMEOUT  = "timeout"
+STATUS_FALLBACK = "fallback"
+STATUS_CACHED   = "cached"
+STATUS_RULE     = "rule"
+
+
+@dataclass
+class TickJob:
+    """
+    One agent's work for a tick.
+    `decide` is either a coroutine function or a blocking callable (run in the
+    executor's small, lazily created thread pool). `fallback` is called when `decide` raises or
+    misses the tick deadline.
+
+    A group job (`members` set) decides for several agents in one call:
+    `decide` returns {member.key: value}, and members missing from that
+    mapping fall back individually.
+    """
+    key:      Hashable
+    decide:   Callable[[], Any]
+    fallback: Callable[[], Any] = lambda: None
+    members:  list["TickJob"] | None = None
+
+
+@dataclass
+class TickOutcome:
+    key:    Hashable
+    value:  Any
+    status: str                    # ok | timeout | fallback | cached | rule
+    error:  str = ""
+
+
+@dataclass
+class TickReport:
+    total:     int   = 0
+    finished:  int   = 0
+    timed_out: int   = 0
+    fell_back: int   = 0
+    cached:    int   = 0
+    rule:      int   = 0
+    wall_time: float = 0.0
+    outcomes:  list[TickOutcome] = field(default_factory=list)
+
+    def add_resolved(self, outcomes: Iterable[TickOutcome]) -> None:
+        """Merge decisions resolved before scheduling (decision cache / rule engine / open breaker)."""
+        for outcome in outcomes:
+            self.outcomes.append(outcome)
+            self.total += 1
+            if outcome.status == STATUS_CACHED:
+                self.cached += 1
+            elif outcome.status == STATUS_RULE:
+                self.rule += 1
+            elif outcome.status == STATUS_FALLBACK:
+                self.fell_back += 1
+
+    def summary(self) -> dict:
+        return {
+            "total":     self.total,
+            "finished":  self.finished,
+            "timed_out": self.timed_out,
+            "fell_back": self.fell_back,
+            "cached":    self.cached,
+            "rule":      self.rule,
+            "wall_time": round(self.wall_time, 3),
+        }
+
+
+class TickExecutor:
+    """
+    Fans a tick's jobs out with at most `concurrency` decisions in flight.
+    Jobs still running at the deadline are cancelled and resolved via their
+    fallback, so a tick never takes longer than `deadline` seconds.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        deadline: float = DEFAULT_DEADLINE,
+        threads: int = DEFAULT_THREADS,
+    ) -> None:
+        self.concurrency = max(1, concurrency)
+        self.deadline    = deadline
+        self.threads     = max(1, min(threads, self.concurrency))
+        # Thread pool for blocking jobs only, created on first use; async jobs never touch it
+        self._pool: ThreadPoolExecutor | None = None
+
+    async def run(self, jobs: Iterable[TickJob]) -> TickReport:
+        jobs = list(jobs)
+        report = TickReport(total=sum(len(j.members) if j.members else 1 for j in jobs))
+        if not jobs:
+            return report
+
+        started = time.perf_counter()
+        sem = asyncio.Semaphore(self.concurrency)
+
+        async def _guarded(job: TickJob) -> Any:
+            async with sem:
+                return await self._call(job.decide)
+
+        tasks = {asyncio.create_task(_guarded(job)): job for job in jobs}
+        done, pending = await asyncio.wait(tasks, timeout=self.deadline)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        for task, job in tasks.items():
+            if task in pending:
+                status, error, result = STATUS_TIMEOUT, "tick deadline exceeded", None
+            elif task.exception() is not None:
+                status, error, result = STATUS_FALLBACK, str(task.exception()), None
+            else:
+                status, error, result = STATUS_OK, "", task.result()
+
+            for member in job.members or [job]:
+                if status == STATUS_OK and job.members is not None:
+                    if member.key in (result or {}):
+                        outcome = TickOutcome(member.key, result[member.key], STATUS_OK)
+                    else:
+                        outcome = self._fallback(member, STATUS_FALLBACK, "missing from batch response")
+                elif status == STATUS_OK:
+                    outcome = TickOutcome(member.key, result, STATUS_OK)
+                else:
+                    outcome = self._fallback(member, status, error)
+                report.outcomes.append(outcome)
+                if outcome.status == STATUS_OK:
+                    report.finished += 1
+                elif outcome.status == STATUS_TIMEOUT:
+                    report.timed_out += 1
+                else:
+                    report.fell_back += 1
+
+        report.wall_time = time.perf_counter() - started
+        return report
+
+    async def _call(self, fn: Callable[[], Any]) -> Any:
+        if inspect.iscoroutinefunction(fn):
+            return await fn()
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="tick-decide")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, fn)
+
+    @staticmethod
+    def _fallback(job: TickJob, status: str, error: str) -> TickOutcome:
+        try:
+            value = job.fallback()
+        except Exception as exc:  # noqa: BLE001
+            logger.error("Fallback failed for %s: %s", job.key, exc)
+            value = None
+        return TickOutcome(job.key, value, status, error)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -45,6 +45,8 @@ class MarketState:
     orderbook_depth_ask: int
     oracle_price:  float
     oracle_confidence: float
+    vwap:          float = 0.0     # volume-weighted price of recent trades
+    volatility:    float = 0.0     # std of tick returns over the stats window, %
 
 
 @dataclass
@@ -4,12 +4,14 @@ Ghost Broker — FastAPI Application entry point
 from __future__ import annotations
 
 import asyncio
-import json
+import functools
 import logging
 import os
 import sys
 import time
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -18,7 +20,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from api.routers import agents, market, engine, stake, reputation, partnerships, token, oracle
-from api.ws.hub import websocket_router, manager
+from api.ws.hub import websocket_router, manager, broadcast_orderbook
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("ghost_broker")
@@ -49,19 +51,15 @@ app.include_router(oracle.router,       prefix="/v1/oracle",       tags=["Oracle
 # ── WebSocket Router ───────────────────────────────────────────────────────────
 app.include_router(websocket_router)
 
-STORE_PATH = Path(os.getenv("AGENT_STORE_PATH", "data/agents.json"))
-
-# Tüm data path'leri main.py'nin bulunduğu proje kökünden mutlak olarak hesaplanır
-_BASE_DIR        = Path(__file__).parent.parent   # /Users/x/Desktop/monad
-_DECISIONS_DIR   = _BASE_DIR / "data" / "decisions"
-_DEC_ALL_PATH    = _BASE_DIR / "data" / "decisions_all.json"
-_TRADES_PATH     = _BASE_DIR / "data" / "trades.json"
-# STORE_PATH'i de mutlak hale getir
-if not STORE_PATH.is_absolute():
-    STORE_PATH = _BASE_DIR / STORE_PATH
-_DECISIONS_DIR.mkdir(parents=True, exist_ok=True)
+# Data path'leri servislerde proje kökünden mutlak olarak hesaplanır:
+#   agents            → api/services/agent_registry.py (data/agents.json snapshot)
+#   decisions / trades → api/services/log_store.py      (data/log/)
 COMMODITIES = ["ETH", "SOL", "MATIC", "BNB", "MON"]
 
+# Tick'ler arası sabit bekleme yok: LLM bütçesi (agents/llm_scheduler.py) izin verince
+# sıradaki tick başlar; bu değer sadece alt sınır
+TICK_MIN_INTERVAL = float(os.getenv("AGENT_TICK_MIN_INTERVAL_SECONDS", "5"))
+
 # sys.path'e proje kökünü ekle (agents.* import için)
 _root = Path(__file__).parent.parent
 if str(_root) not in sys.path:
@@ -95,255 +93,605 @@ async def _price_ticker() -> None:
 
 
 # ── Background: Agent ticki (Gerçek Gemini AI) ────────────────────────────────
+_brain_pool = None       # agents.brain_pool.BrainPool — ticker başlayınca kurulur
+_decision_cache = None   # agents.decision_cache.DecisionCache
+_tick_executor = None    # agents.tick_executor.TickExecutor — kapanışta shutdown()
+
+
+def _fallback_decision(dna, market_state):
+    """Gemini başarısız olursa / deadline kaçarsa kural tabanlı karar."""
+    from agents.types import AgentDecision, ActionType
+
+    if market_state.price_change > 1.5:
+        action = ActionType.BID
+    elif market_state.price_change < -1.5:
+        action = ActionType.ASK
+    else:
+        action = ActionType.HOLD
+    return AgentDecision(
+        agent_id   = dna.agent_id,
+        action     = action,
+        commodity  = market_state.commodity,
+        price      = market_state.best_bid if action == ActionType.BID else market_state.best_ask,
+        qty        = round(dna.capital * (dna.risk_appetite / 100) * 0.10, 6),
+        reasoning  = (
+            f"[Fallback] {market_state.commodity} @ {market_state.mid_price:.4f} "
+            f"— Δ={market_state.price_change:.2f}%"
+        ),
+        confidence = 0.50,
+    )
+
+
+async def _decide_group(brain_cls, brains, market_state) -> dict:
+    """Batched Gemini çağrısı; agent_id → token_id anahtarlı kararlar."""
+    decisions = await brain_cls.adecide_batch(brains, market_state)
+    return {int(agent_id): dec for agent_id, dec in decisions.items()}
+
+
+def _seed_engine_accounts(engine, registry) -> None:
+    """Registry'deki her agent için simülatör hesabını bir kez aç (mevcut hesaplar korunur)."""
+    for agent in registry:
+        try:
+            capital_wei = int(agent.get("capital", "1000000000000000000"))
+        except (TypeError, ValueError):
+            capital_wei = 10 ** 18
+        engine.seed_capital(agent["token_id"], capital_wei)
+
+
+def _group_jobs(jobs, groups, markets, batch_size):
+    """
+    Aynı strateji + commodity paylaşan agentleri batch_size'lık gruplara böl;
+    her grup tek TickJob olur, gruptaki her agent kendi fallback'ini korur.
+    """
+    from agents.tick_executor import TickJob
+
+    grouped = []
+    for (brain_cls, commodity), members in groups.items():
+        market_state = markets[commodity]
+        for i in range(0, len(members), batch_size):
+            chunk = members[i:i + batch_size]
+            if len(chunk) == 1:
+                grouped.append(jobs[chunk[0][0]])
+                continue
+            grouped.append(TickJob(
+                key     = (brain_cls.__name__, commodity, i),
+                decide  = functools.partial(_decide_group, brain_cls, [b for _, b in chunk], market_state),
+                members = [jobs[token_id] for token_id, _ in chunk],
+            ))
+    return grouped
+
+
+@dataclass
+class _TickServices:
+    """Ticker'ın her tick'te kullandığı servisler — _agent_ticker başlarken bir kez kurulur."""
+    scheduler:    Any
+    breaker:      Any
+    rule_engine:  Any
+    executor:     Any
+    market_stats: Any
+    registry:     Any
+    decision_log: Any
+    trade_log:    Any
+    candles:      Any
+    books:        Any
+    engine:       Any
+
+
 async def _agent_ticker() -> None:
-    """Her 20 saniyede her agent için gerçek Gemini AI kararı üret."""
-    import random
-    from api.routers.oracle import get_price
-    from agents.types import AgentDNA, MarketState, Strategy
-    from agents.brain.aggressive_agent   import AggressiveAgent
-    from agents.brain.balanced_agent     import BalancedAgent
-    from agents.brain.conservative_agent import ConservativeAgent
+    """
+    Agent kararlarını tick tick üret. Sabit aralık yok: bir tick biter bitmez
+    LLM bütçesi sıradakini karşılayınca (en az TICK_MIN_INTERVAL sonra) devam eder.
+    """
+    from agents.brain_pool import BrainPool
+    from agents.tick_executor import TickExecutor
+    from agents.decision_cache import DecisionCache
+    from agents.rule_engine import RuleEngine, RULE_ENGINE_ENABLED
+    from agents.brain.batch import BATCH_SIZE
+    from agents.llm_scheduler import get_llm_scheduler
+    from agents.market_stats import get_market_stats
+    from api.services.agent_registry import get_agent_registry
+    from api.services.log_store import get_decision_log, get_trade_log
+    from api.services.candles import get_candle_engine
+    from api.services.orderbook import get_order_books
+    from api.services.match_engine import get_match_engine
+
+    global _brain_pool, _decision_cache, _tick_executor
+    _brain_pool = BrainPool()
+    _decision_cache = DecisionCache()
+    _tick_executor = TickExecutor()
+    scheduler = get_llm_scheduler()
+    svc = _TickServices(
+        scheduler    = scheduler,
+        breaker      = scheduler.breaker,
+        rule_engine  = RuleEngine() if RULE_ENGINE_ENABLED else None,
+        executor     = _tick_executor,
+        market_stats = get_market_stats(),
+        registry     = get_agent_registry(),
+        decision_log = get_decision_log(),
+        trade_log    = get_trade_log(),
+        candles      = get_candle_engine(),     # trade log'unu dinler, barları artımlı kurar
+        books        = get_order_books(),       # BID/ASK kararları TTL dolana kadar L2 defterde bekler
+        engine       = get_match_engine(),      # MatchEngine.processBatch simülasyonu, tick başına bir batch
+    )
+    _seed_engine_accounts(svc.engine, svc.registry)   # yeni agentler /v1/agents'ta açılır
+    logger.info(
+        "Tick executor: concurrency=%d deadline=%.1fs batch_size=%d rule_band=%s",
+        svc.executor.concurrency, svc.executor.deadline, BATCH_SIZE,
+        svc.rule_engine.band if svc.rule_engine else "off",
+    )
 
     await asyncio.sleep(5)  # backend tam açılsın
 
     tick = 0
+    llm_calls = 1   # son tick'in Gemini çağrı sayısı — sıradaki tick için bütçe hedefi
     while True:
         tick += 1
         try:
-            if not STORE_PATH.exists():
-                await asyncio.sleep(20)
-                continue
-
-            raw_agents: list[dict] = json.loads(STORE_PATH.read_text())
+            raw_agents = list(svc.registry)
             if not raw_agents:
                 logger.info("⏳ Henüz kayıtlı agent yok, bekleniyor...")
-                await asyncio.sleep(20)
+                await asyncio.sleep(TICK_MIN_INTERVAL)
                 continue
-
-            logger.info("━━━ Tick #%d — %d agent işleniyor ━━━", tick, len(raw_agents))
-
-            for agent in raw_agents:
-                token_id     = agent["token_id"]
-                strategy_str = agent.get("strategy", "BALANCED").upper()
-                name         = agent.get("name", f"Agent #{token_id}")
-                risk         = int(agent.get("risk_appetite", 50))
-
-                # Güncel capital hesapla
-                try:
-                    capital_wei     = int(agent.get("capital", "1000000000000000000"))
-                    capital_usd     = capital_wei / 1e18
-                    init_capital    = int(agent.get("initial_capital", capital_wei)) / 1e18
-                except Exception:
-                    capital_usd  = 1.0
-                    init_capital = 1.0
-
-                # Her tick'te strateji + risk'e göre commodity seç
-                if strategy_str == "AGGRESSIVE":
-                    commodity = COMMODITIES[4]               # MON — Monad
-                elif strategy_str == "CONSERVATIVE":
-                    commodity = COMMODITIES[tick % 3]        # ETH/SOL/MATIC rotasyon
-                else:
-                    commodity = COMMODITIES[tick % len(COMMODITIES)]
-
-                price, conf = get_price(commodity)
-                spread_abs  = price * 0.003
-                price_change = round(random.uniform(-3.5, 4.0), 2)
-
-                market_state = MarketState(
-                    commodity           = commodity,
-                    best_bid            = round(price - spread_abs, 4),
-                    best_ask            = round(price + spread_abs, 4),
-                    mid_price           = price,
-                    spread              = round(spread_abs / price * 100, 4),
-                    volume_24h          = price * 50000,
-                    price_change        = price_change,
-                    orderbook_depth_bid = random.randint(5, 20),
-                    orderbook_depth_ask = random.randint(5, 20),
-                    oracle_price        = price,
-                    oracle_confidence   = conf,
-                )
-
-                # Her tick'te güncel DNA ile brain oluştur (cache yok — her zaman taze)
-                dna = AgentDNA(
-                    agent_id        = str(token_id),
-                    token_id        = token_id,
-                    risk_appetite   = risk,
-                    strategy        = Strategy(strategy_str.lower()),
-                    capital         = capital_usd,
-                    initial_capital = init_capital,
-                    owner_address   = agent.get("owner_address", "0x0"),
-                    name            = name,
-                )
-                if strategy_str == "AGGRESSIVE":
-                    brain = AggressiveAgent(dna)
-                elif strategy_str == "CONSERVATIVE":
-                    brain = ConservativeAgent(dna)
-                else:
-                    brain = BalancedAgent(dna)
-
-                logger.info(
-                    "🔍 [%s | #%d] %s | kapital=%.2f USD | risk=%d/100 | commodity=%s @ %.4f | Δ=%.2f%%",
-                    strategy_str, token_id, name, capital_usd, risk, commodity, price, price_change
-                )
-
-                try:
-                    # ── GERÇEK GEMİNİ AI ÇAĞRISI ──
-                    ai_decision = await asyncio.to_thread(brain.decide, market_state)
-
-                    action     = ai_decision.action.value
-                    dec_price  = ai_decision.price
-                    qty        = ai_decision.qty
-                    reasoning  = ai_decision.reasoning
-                    confidence = ai_decision.confidence
-
-                    logger.info(
-                        "🤖 [%s | #%d] %s → %s @ %.4f x %.6f | conf=%.2f\n    💬 %s",
-                        strategy_str, token_id, name,
-                        action, dec_price, qty, confidence, reasoning
-                    )
-
-                except Exception as ai_exc:
-                    logger.warning(
-                        "⚠️  Gemini hatası [#%d %s]: %s — kural tabanlı fallback",
-                        token_id, name, ai_exc
-                    )
-                    # Gemini başarısız olursa kural tabanlı fallback
-                    if market_state.price_change > 1.5:
-                        action = "BID"
-                    elif market_state.price_change < -1.5:
-                        action = "ASK"
-                    else:
-                        action = "HOLD"
-                    dec_price  = market_state.best_bid if action == "BID" else market_state.best_ask
-                    qty        = round(capital_usd * (risk / 100) * 0.10, 6)
-                    reasoning  = f"[Fallback] {commodity} @ {price:.4f} — Δ={market_state.price_change:.2f}%"
-                    confidence = 0.50
-
-                # ── Karar WS'e yayınla ──
-                decision_payload = {
-                    "agent_id":   token_id,
-                    "name":       name,
-                    "strategy":   strategy_str,
-                    "action":     action,
-                    "commodity":  commodity,
-                    "price":      dec_price,
-                    "qty":        qty,
-                    "reasoning":  reasoning,
-                    "confidence": confidence,
-                    "timestamp":  int(time.time()),
-                }
-                await manager.broadcast("agent.decisions", {
-                    "type": "decision",
-                    "data": decision_payload,
-                })
-
-                # Trade yayınla
-                if action in ("BID", "ASK"):
-                    await manager.broadcast("market.trades", {
-                        "type": "trade",
-                        "data": {
-                            "commodity":  commodity,
-                            "price":      dec_price,
-                            "qty":        qty,
-                            "agent_id":   token_id,
-                            "agent_name": name,
-                            "side":       action,
-                            "timestamp":  int(time.time()),
-                        },
-                    })
-
-                # ── Capital & stats güncelle ──
-                pnl = qty * price * (0.008 if action == "BID" else -0.004 if action == "ASK" else 0)
-                new_capital = max(0.0, capital_usd + pnl)
-                agent["capital"]           = str(int(new_capital * 1e18))
-                agent["last_tick_at"]      = int(time.time())
-                agent["last_action"]       = action
-                agent["preferred_commodity"] = commodity
-                if pnl > 0:
-                    agent["win_count"]  = agent.get("win_count", 0) + 1
-                elif pnl < 0:
-                    agent["loss_count"] = agent.get("loss_count", 0) + 1
-
-                # ── Karar geçmişini diske kaydet ──
-                dec_entry = {
-                    "tx_hash":      f"0xai{int(time.time()):x}{token_id}",
-                    "agent_id":     str(token_id),
-                    "agent_name":   name,
-                    "strategy":     strategy_str,
-                    "action":       action,
-                    "commodity":    commodity,
-                    "price":        str(dec_price),
-                    "qty":          str(qty),
-                    "reasoning":    reasoning,
-                    "confidence":   confidence,
-                    "block_number": int(time.time()),
-                    "timestamp":    int(time.time()),
-                }
-
-                # Agent'a özel decisions dosyası
-                dec_path = _DECISIONS_DIR / f"{token_id}.json"
-                try:
-                    history: list = json.loads(dec_path.read_text()) if dec_path.exists() else []
-                except Exception:
-                    history = []
-                history.append(dec_entry)
-                if len(history) > 1000:
-                    history = history[-1000:]
-                dec_path.write_text(json.dumps(history, indent=2))
-
-                # Global decisions log (tüm agentlar)
-                try:
-                    global_dec: list = json.loads(_DEC_ALL_PATH.read_text()) if _DEC_ALL_PATH.exists() else []
-                except Exception:
-                    global_dec = []
-                global_dec.append(dec_entry)
-                if len(global_dec) > 2000:
-                    global_dec = global_dec[-2000:]
-                _DEC_ALL_PATH.write_text(json.dumps(global_dec, indent=2))
-
-                # Global trades log (sadece BID/ASK)
-                if action in ("BID", "ASK"):
-                    trade_entry = {
-                        "commodity":  commodity,
-                        "price":      str(dec_price),
-                        "qty":        str(qty),
-                        "agent_id":   str(token_id),
-                        "agent_name": name,
-                        "strategy":   strategy_str,
-                        "side":       action,
-                        "timestamp":  int(time.time()),
-                    }
-                    try:
-                        trades_log: list = json.loads(_TRADES_PATH.read_text()) if _TRADES_PATH.exists() else []
-                    except Exception:
-                        trades_log = []
-                    trades_log.append(trade_entry)
-                    if len(trades_log) > 2000:
-                        trades_log = trades_log[-2000:]
-                    _TRADES_PATH.write_text(json.dumps(trades_log, indent=2))
-
-            # Güncellenmiş agentleri kaydet
-            STORE_PATH.write_text(json.dumps(raw_agents, indent=2))
-
+            llm_calls = await _run_tick(svc, tick, raw_agents)
         except Exception as exc:
             logger.error("🔴 Agent ticker kritik hata: %s", exc, exc_info=True)
 
-        await asyncio.sleep(20)  # Gemini rate limit için 20 sn bekle
+        # Sabit bekleme yerine: LLM bütçesi bir sonraki tick'i karşılayınca devam et
+        waited = await scheduler.wait_ready(llm_calls, min_interval=TICK_MIN_INTERVAL)
+        logger.info("⏳ Sonraki tick %.1f sn sonra — LLM bütçesi: %s", waited, scheduler.stats())
+
+
+async def _run_tick(svc: _TickServices, tick: int, raw_agents: list[dict]) -> int:
+    """Tek tick: hazırla → ön eleme → Gemini → uygula → eşleştir → yayınla. Gemini çağrı sayısını döndürür."""
+    from agents.brain.batch import BATCH_SIZE
+    from agents.market_feed import BLOCK_TIME_SECONDS
+
+    logger.info("━━━ Tick #%d — %d agent işleniyor ━━━", tick, len(raw_agents))
+    svc.books.expire(time.time())
+    block = int(time.time() / BLOCK_TIME_SECONDS)   # simüle Monad bloğu
+    svc.engine.expire(block)
+
+    # ── 1) Her agent için market state + brain hazırla ──
+    contexts, markets = _build_contexts(svc, tick, raw_agents)
+
+    # ── 1b) Kural motoru, decision cache ve devre kesici Gemini'ye gidecekleri seçer ──
+    jobs, groups, resolved, followers = _prescreen(svc, contexts)
+
+    # Silinmiş agentlerin brain'lerini at
+    _brain_pool.retain(contexts)
+    logger.info("🧠 Brain pool: %s", _brain_pool.stats())
+    logger.info("🗃️  Decision cache: %s", _decision_cache.stats())
+    logger.info("🧩 Prompt cache: %s", _brain_pool.prompt_cache.stats())
+
+    # ── 2) GERÇEK GEMİNİ AI ÇAĞRILARI — eşzamanlı, tick deadline'lı ──
+    # Batch modunda aynı strateji + commodity agentleri tek çağrıda karar verir
+    if BATCH_SIZE > 1:
+        tick_jobs = _group_jobs(jobs, groups, markets, BATCH_SIZE)
+        logger.info("📦 %d agent → %d Gemini çağrısı", len(jobs), len(tick_jobs))
+    else:
+        tick_jobs = list(jobs.values())
+    budget = svc.scheduler.calls_within(svc.executor.deadline)
+    if len(tick_jobs) > budget:
+        # LLM_RPM kotası deadline içinde bu kadar çağrıyı karşılamaz; kalanlar fallback'e düşer
+        logger.warning("🚦 %d Gemini çağrısı, deadline içinde bütçe ~%d (LLM_RPM)", len(tick_jobs), budget)
+    report = await svc.executor.run(tick_jobs)
+    report.add_resolved(resolved)
+    report.add_resolved(_share_coalesced(contexts, report.outcomes, followers))
+    logger.info("⏱️  Tick #%d karar özeti: %s", tick, report.summary())
+    logger.info("📈 Gemini gecikme: %s | devre kesici: %s", svc.scheduler.latency.summary(), svc.breaker.stats())
+
+    # ── 3) Sonuçları sırayla uygula: WS yayını + disk ──
+    for outcome in report.outcomes:
+        if outcome.value is not None:
+            _apply_outcome(svc, contexts[outcome.key], outcome, block)
+
+    # ── 4) Kesişen emirler eşleşir, tick olayları yayınlanır ──
+    _match_block(svc, block)
+    await _publish_tick(svc)
+    return len(tick_jobs)
+
+
+def _build_contexts(svc: _TickServices, tick: int, raw_agents: list[dict]) -> tuple[dict[int, dict], dict]:
+    """token_id → karar bağlamı (DNA, market state, brain) ve commodity → MarketState."""
+    from api.routers.oracle import get_price
+    from agents.types import AgentDNA, Strategy
+    from agents.llm_scheduler import priority_for
+
+    contexts: dict[int, dict] = {}
+    markets: dict = {}
+    for agent in raw_agents:
+        token_id     = agent["token_id"]
+        strategy_str = agent.get("strategy", "BALANCED").upper()
+        name         = agent.get("name", f"Agent #{token_id}")
+        risk         = int(agent.get("risk_appetite", 50))
+
+        # Güncel capital hesapla
+        try:
+            capital_wei     = int(agent.get("capital", "1000000000000000000"))
+            capital_usd     = capital_wei / 1e18
+            init_capital    = int(agent.get("initial_capital", capital_wei)) / 1e18
+        except Exception:
+            capital_usd  = 1.0
+            init_capital = 1.0
+
+        # Her tick'te strateji + risk'e göre commodity seç
+        if strategy_str == "AGGRESSIVE":
+            commodity = COMMODITIES[4]               # MON — Monad
+        elif strategy_str == "CONSERVATIVE":
+            commodity = COMMODITIES[tick % 3]        # ETH/SOL/MATIC rotasyon
+        else:
+            commodity = COMMODITIES[tick % len(COMMODITIES)]
+
+        # Market state tick başına commodity'de bir kez kurulur; aynı
+        # commodity'deki agentler aynı piyasayı görür (batch için şart)
+        market_state = markets.get(commodity)
+        if market_state is None:
+            # Rolling istatistiklerden anlık okuma (agents/market_stats.py)
+            price, conf = get_price(commodity)
+            market_state = markets[commodity] = svc.market_stats.snapshot(commodity, price, conf)
+            if commodity in svc.books:
+                _apply_book(market_state, svc.books.book(commodity))
+        price        = market_state.mid_price
+        price_change = market_state.price_change
+
+        # Brain havuzdan gelir; değişen DNA alanları (capital, risk, name) yerinde güncellenir
+        dna = AgentDNA(
+            agent_id        = str(token_id),
+            token_id        = token_id,
+            risk_appetite   = risk,
+            strategy        = Strategy(strategy_str.lower()),
+            capital         = capital_usd,
+            initial_capital = init_capital,
+            owner_address   = agent.get("owner_address", "0x0"),
+            name            = name,
+        )
+        brain = _brain_pool.get(dna)
+        # Uzun süredir karar vermemiş / büyük sermayeli agent LLM kuyruğunda öne geçer
+        brain.priority = priority_for(
+            capital_usd, time.time() - agent.get("last_tick_at", 0), strategy_str
+        )
+
+        logger.info(
+            "🔍 [%s | #%d] %s | kapital=%.2f USD | risk=%d/100 | commodity=%s @ %.4f | Δ=%.2f%%",
+            strategy_str, token_id, name, capital_usd, risk, commodity, price, price_change
+        )
+
+        contexts[token_id] = {
+            "name":         name,
+            "strategy_str": strategy_str,
+            "capital_usd":  capital_usd,
+            "commodity":    commodity,
+            "price":        price,
+            "dna":          dna,
+            "market":       market_state,
+            "brain":        brain,
+        }
+    return contexts, markets
+
+
+def _apply_book(market_state, book) -> None:
+    """
+    Simüle GhostMarket defteri: derinlik ve — iki taraf da doluysa — defterin kendi
+    bid/ask/mid'i. Oracle CoinGecko fiyatında kalır; kural motorunun ve prompt'ların
+    oracle gap kuralları bu farktan beslenir (aksi halde mid == oracle).
+    """
+    # Derinlik: defterde bekleyen emir sayısı (GhostMarket.getBidDepth gibi)
+    market_state.orderbook_depth_bid = book.order_count("BID")
+    market_state.orderbook_depth_ask = book.order_count("ASK")
+    bid, ask = book.best_bid, book.best_ask
+    if bid is not None and ask is not None and bid < ask:
+        mid = (bid + ask) / 2
+        market_state.best_bid  = bid
+        market_state.best_ask  = ask
+        market_state.mid_price = mid
+        market_state.spread    = round((ask - bid) / mid * 100, 4)
+
+
+def _prescreen(svc: _TickServices, contexts: dict[int, dict]) -> tuple[dict, dict, list, dict]:
+    """
+    Gemini'ye gitmeden çözülebilenleri ayır: kural motoru (belirsizlik bandı dışı),
+    decision cache isabeti, açık devre kesici. Aynı cache anahtarlı agentlerden
+    sadece ilki Gemini'ye gider; diğerleri onun kararını bekler (followers).
+    Kalanlar (jobs, batch grupları) döner.
+    """
+    from agents.tick_executor import TickJob, TickOutcome, STATUS_CACHED, STATUS_RULE, STATUS_FALLBACK
+
+    jobs: dict = {}
+    resolved: list = []        # Gemini'ye gitmeden karar verilenler
+    # (brain sınıfı, commodity) → [(token_id, brain)] — batched karar grupları
+    groups: dict[tuple, list] = {}
+    # Tick içi single-flight: cache anahtarı → lider token_id, lider → takipçi token_id'leri
+    leaders: dict[tuple, int] = {}
+    followers: dict[int, list[int]] = {}
+
+    # Kural motoru: tüm agentler tek vektörel geçişte skorlanır; sadece belirsizlik bandındakiler Gemini'ye gider
+    ids = list(contexts)
+    screen = None
+    if svc.rule_engine is not None:
+        screen = svc.rule_engine.evaluate(
+            [contexts[t]["dna"] for t in ids], [contexts[t]["market"] for t in ids]
+        )
+        ambiguous = screen.ambiguous
+        logger.info("📐 Kural ön elemesi: %s", screen.stats())
+
+    # Devre kesici açıksa (Gemini hata oranı / gecikmesi eşikte) kimse Gemini'ye gitmez
+    llm_open = svc.breaker.allow()
+    probe = None
+    for i, token_id in enumerate(ids):
+        ctx = contexts[token_id]
+        dna, market_state, brain = ctx["dna"], ctx["market"], ctx["brain"]
+        if screen is not None and not ambiguous[i]:
+            resolved.append(TickOutcome(token_id, screen.decision(i, dna, market_state), STATUS_RULE))
+            continue
+
+        # Benzer girdili bir agent'in kararı cache'te varsa Gemini'ye gitme
+        hit = _decision_cache.lookup(dna, market_state)
+        if hit is not None:
+            resolved.append(TickOutcome(token_id, hit, STATUS_CACHED))
+            continue
+        if not llm_open:
+            resolved.append(TickOutcome(
+                token_id, _fallback_decision(dna, market_state), STATUS_FALLBACK, "circuit open",
+            ))
+            probe = probe or functools.partial(brain.adecide, market_state)
+            continue
+        if _decision_cache.enabled:
+            key = _decision_cache.key(dna, market_state)
+            leader = leaders.setdefault(key, token_id)
+            if leader != token_id:
+                followers.setdefault(leader, []).append(token_id)
+                continue
+        jobs[token_id] = TickJob(
+            key      = token_id,
+            decide   = functools.partial(brain.adecide, market_state),   # async client, thread tutmaz
+            fallback = functools.partial(_fallback_decision, dna, market_state),
+        )
+        groups.setdefault((type(brain), ctx["commodity"]), []).append((token_id, brain))
+
+    # Cooldown dolduysa tek deneme çağrısı arka planda; başarılıysa devre kapanır
+    if probe is not None and svc.breaker.start_probe(probe):
+        logger.info("🩺 Gemini devre kesici: kurtarma denemesi başlatıldı")
+    return jobs, groups, resolved, followers
+
+
+def _share_coalesced(contexts: dict[int, dict], outcomes: list, followers: dict[int, list[int]]) -> list:
+    """Liderin Gemini kararı takipçilere sermayelerine göre ölçeklenip verilir; lider düştüyse fallback."""
+    from agents.tick_executor import TickOutcome, STATUS_OK, STATUS_CACHED, STATUS_FALLBACK
+
+    shared: list = []
+    for outcome in outcomes:
+        for token_id in followers.get(outcome.key, ()):
+            ctx = contexts[token_id]
+            if outcome.status == STATUS_OK and outcome.value is not None:
+                decision = _decision_cache.share(outcome.value, contexts[outcome.key]["dna"], ctx["dna"], ctx["market"])
+                shared.append(TickOutcome(token_id, decision, STATUS_CACHED))
+            else:
+                shared.append(TickOutcome(
+                    token_id, _fallback_decision(ctx["dna"], ctx["market"]), STATUS_FALLBACK,
+                    f"coalesced: {outcome.error or outcome.status}",
+                ))
+    return shared
+
+
+def _apply_outcome(svc: _TickServices, ctx: dict, outcome, block: int) -> None:
+    """Tek kararı uygula: WS yayını, defter + motor emri, registry güncellemesi, karar/trade log'u."""
+    from agents.market_feed import BLOCK_TIME_SECONDS
+    from agents.tick_executor import STATUS_OK, STATUS_CACHED, STATUS_RULE
+    from api.services.match_engine import to_wei
+
+    token_id     = outcome.key
+    name         = ctx["name"]
+    strategy_str = ctx["strategy_str"]
+    capital_usd  = ctx["capital_usd"]
+    commodity    = ctx["commodity"]
+    price        = ctx["price"]
+
+    ai_decision = outcome.value
+    action     = ai_decision.action.value
+    dec_price  = ai_decision.price
+    qty        = ai_decision.qty
+    reasoning  = ai_decision.reasoning
+    confidence = ai_decision.confidence
+
+    if outcome.status == STATUS_OK:
+        _decision_cache.store(ctx["dna"], ctx["market"], ai_decision)
+    if outcome.status in (STATUS_OK, STATUS_CACHED, STATUS_RULE):
+        logger.info(
+            "🤖 [%s | #%d] %s → %s @ %.4f x %.6f | conf=%.2f\n    💬 %s",
+            strategy_str, token_id, name,
+            action, dec_price, qty, confidence, reasoning
+        )
+    else:
+        logger.warning(
+            "⚠️  Gemini hatası [#%d %s]: %s (%s) — kural tabanlı fallback",
+            token_id, name, outcome.error, outcome.status
+        )
+
+    # ── Karar WS'e yayınla ──
+    decision_payload = {
+        "agent_id":   token_id,
+        "name":       name,
+        "strategy":   strategy_str,
+        "action":     action,
+        "commodity":  commodity,
+        "price":      dec_price,
+        "qty":        qty,
+        "reasoning":  reasoning,
+        "confidence": confidence,
+        "timestamp":  int(time.time()),
+    }
+    manager.publish("agent.decisions", {
+        "type": "decision",
+        "data": decision_payload,
+    })
+
+    # Trade yayınla
+    if action in ("BID", "ASK"):
+        svc.market_stats.trade(commodity, action, dec_price, qty)
+        order_id = f"{int(time.time() * 1000):x}-{token_id}"
+        svc.books.post(
+            order_id, str(token_id), commodity, action,
+            dec_price, qty, time.time() + ai_decision.ttl_blocks * BLOCK_TIME_SECONDS,
+        )
+        try:
+            svc.engine.post(
+                token_id, commodity, action, to_wei(dec_price), to_wei(qty),
+                ai_decision.ttl_blocks, block=block, order_id=order_id,
+            )
+        except ValueError as exc:
+            logger.debug("Emir motora alınmadı [#%d]: %s", token_id, exc)
+        manager.publish("market.trades", {
+            "type": "trade",
+            "data": {
+                "commodity":  commodity,
+                "price":      dec_price,
+                "qty":        qty,
+                "agent_id":   token_id,
+                "agent_name": name,
+                "side":       action,
+                "timestamp":  int(time.time()),
+            },
+        })
+
+    # ── Capital & stats güncelle ──
+    pnl = qty * price * (0.008 if action == "BID" else -0.004 if action == "ASK" else 0)
+    new_capital = max(0.0, capital_usd + pnl)
+    agent = svc.registry.get(token_id)
+    if agent is None:
+        return   # tick sırasında silindi
+    updates = {
+        "capital":             str(int(new_capital * 1e18)),
+        "last_tick_at":        int(time.time()),
+        "last_action":         action,
+        "preferred_commodity": commodity,
+    }
+    if pnl > 0:
+        updates["win_count"]  = agent.get("win_count", 0) + 1
+    elif pnl < 0:
+        updates["loss_count"] = agent.get("loss_count", 0) + 1
+    svc.registry.update(token_id, **updates)
+
+    # ── Karar geçmişini diske kaydet ──
+    dec_entry = {
+        "tx_hash":      f"0xai{int(time.time()):x}{token_id}",
+        "agent_id":     str(token_id),
+        "agent_name":   name,
+        "strategy":     strategy_str,
+        "action":       action,
+        "commodity":    commodity,
+        "price":        str(dec_price),
+        "qty":          str(qty),
+        "reasoning":    reasoning,
+        "confidence":   confidence,
+        "block_number": int(time.time()),
+        "timestamp":    int(time.time()),
+    }
+
+    # Append-only log: O(1) yazım, agent bazlı tail bellekte tutulur
+    svc.decision_log.append(dec_entry)
+
+    # Global trades log (sadece BID/ASK)
+    if action in ("BID", "ASK"):
+        svc.trade_log.append({
+            "commodity":  commodity,
+            "price":      str(dec_price),
+            "qty":        str(qty),
+            "agent_id":   str(token_id),
+            "agent_name": name,
+            "strategy":   strategy_str,
+            "side":       action,
+            "timestamp":  int(time.time()),
+        })
+
+
+def _match_block(svc: _TickServices, block: int) -> None:
+    """Blok başına tek batch: kesişen emirler eşleşir, dolan miktarlar L2 defterden düşer."""
+    matches = svc.engine.process_batch(block=block)
+    for match in matches:
+        svc.books.fill(match.bid_order_id, match.matched_qty / 1e18)
+        svc.books.fill(match.ask_order_id, match.matched_qty / 1e18)
+    # "batch" hub'ın birleşik frame zarfı ({"type": "batch", "items": [...]}); karışmasın
+    manager.publish("engine.batch", {
+        "type": "engine_batch",
+        "data": {
+            "block_number": block,
+            "match_count":  len(matches),
+            "trades":       [m.to_dict() for m in matches],
+        },
+    })
+    logger.info("⚙️  Match engine: %d eşleşme | %s", len(matches), svc.engine.status())
+
+
+async def _publish_tick(svc: _TickServices) -> None:
+    """Tick sonu: bar + defter yayınları, WS frame'leri, log fsync'leri."""
+    # Açık barlar market.price.{commodity} kanalına, tick başına bir kez
+    svc.candles.publish(manager)
+    # Defter değişiklikleri commodity başına tek sıralı diff
+    for diff in svc.books.diffs():
+        await broadcast_orderbook(diff["commodity"], diff)
+
+    # Tick boyunca biriken olaylar kanal başına tek frame olarak gider
+    manager.flush()
+
+    # Bekleyen log yazımlarını event loop dışında fsync'le
+    await asyncio.to_thread(svc.decision_log.sync)
+    await asyncio.to_thread(svc.trade_log.sync)
+    await asyncio.to_thread(svc.candles.flush)
 
 
 # ── Startup ────────────────────────────────────────────────────────────────────
 @app.on_event("startup")
 async def startup_event() -> None:
+    from api.services.agent_registry import get_agent_registry
+    from api.services.chain_index import run_indexer
+
+    asyncio.create_task(get_agent_registry().run_writer())   # agents.json write-behind
     asyncio.create_task(_price_ticker())
     asyncio.create_task(_agent_ticker())
+    asyncio.create_task(run_indexer())                          # zincir olayları → yerel indeks
     logger.info("🚀 Ghost Broker — CoinGecko fiyatlar + Gemini AI agent ticker aktif")
 
 
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    from api.services.agent_registry import get_agent_registry
+    from api.services.log_store import get_decision_log, get_trade_log
+    from api.services.candles import get_candle_engine
+    from api.services.chain_index import get_chain_index
+
+    from agents.http_session import get_http_pool
+
+    await get_agent_registry().flush()
+    get_decision_log().close()
+    get_trade_log().close()
+    get_candle_engine().flush()
+    get_chain_index().close()
+    if _tick_executor is not None:
+        _tick_executor.shutdown()
+    await get_http_pool().close()
+
+
 @app.get("/health")
 async def health() -> dict:
     from api.routers.oracle import get_price, ASSETS
+    from agents.http_session import get_http_pool
+    from agents.llm_scheduler import get_llm_scheduler
+    from agents.market_stats import get_market_stats
+    from api.services.orderbook import get_order_books
+    from api.services.match_engine import get_match_engine
+    from api.services.chain_index import get_chain_index
     return {
         "status": "ok",
         "chain":  os.getenv("CHAIN_ID", "10143"),
         "prices": {a: get_price(a)[0] for a in ASSETS},
+        "brain_pool": _brain_pool.stats() if _brain_pool is not None else None,
+        "decision_cache": _decision_cache.stats() if _decision_cache is not None else None,
+        "prompt_cache":   _brain_pool.prompt_cache.stats() if _brain_pool is not None else None,
+        "llm_scheduler":  get_llm_scheduler().stats(),
+        "llm_breaker":    get_llm_scheduler().breaker.stats(),
+        "market_stats":   get_market_stats().stats(),
+        "orderbook":      get_order_books().stats(),
+        "match_engine":   get_match_engine().stats(),
+        "chain_index":    get_chain_index().stats(),
+        "http_pool":  get_http_pool().stats(),
     }
@@ -1,12 +1,12 @@
 """Agents router — /v1/agents
-Ajanlar blockchain NFT olarak değil, backend'de JSON store'da tutulur.
+Ajanlar blockchain NFT olarak değil, backend'de bellek içi registry'de tutulur
+(api/services/agent_registry.py — data/agents.json'a write-behind snapshot).
 Her ajan: token_id (otomatik artan), DNA (risk_appetite, strategy, capital),
 owner_address, name, state.
 """
 from __future__ import annotations
 
 import json
-import os
 import time
 from pathlib import Path
 from typing import Optional
@@ -17,24 +17,12 @@ from pydantic import BaseModel, Field
 from api.models.schemas import (
     AgentResponse, AgentDecisionResponse, AgentStrategy, AgentState
 )
+from api.services.agent_registry import get_agent_registry
+from api.services.log_store import get_decision_log
+from api.services.match_engine import get_match_engine
 
 router = APIRouter()
 
-# ── Basit JSON veri deposu ────────────────────────────────────────────────────
-_STORE_PATH = Path(os.getenv("AGENT_STORE_PATH", "data/agents.json"))
-
-
-def _load() -> list[dict]:
-    if not _STORE_PATH.exists():
-        _STORE_PATH.parent.mkdir(parents=True, exist_ok=True)
-        _STORE_PATH.write_text("[]")
-    return json.loads(_STORE_PATH.read_text())
-
-
-def _save(agents: list[dict]) -> None:
-    _STORE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    _STORE_PATH.write_text(json.dumps(agents, indent=2))
-
 
 # ── Request modelleri ─────────────────────────────────────────────────────────
 class CreateAgentRequest(BaseModel):
@@ -69,14 +57,9 @@ async def list_agents(
     offset:   int           = Query(0),
 ):
     """Kayıtlı tüm ajanları listele."""
-    agents = _load()
-    if state:
-        agents = [a for a in agents if a["state"].upper() == state.upper()]
-    if strategy:
-        agents = [a for a in agents if a["strategy"].upper() == strategy.upper()]
-    if owner:
-        agents = [a for a in agents if a["owner_address"].lower() == owner.lower()]
-    agents = agents[offset: offset + limit]
+    agents = get_agent_registry().query(
+        state=state, strategy=strategy, owner=owner, limit=limit, offset=offset
+    )
     return [AgentResponse(**a) for a in agents]
 
 
@@ -86,15 +69,13 @@ async def create_agent(body: CreateAgentRequest):
     Yeni ajan oluştur ve backend'e kaydet.
     Her ajan benzersiz risk DNA'sına, stratejisine ve sermayesine sahiptir.
     """
-    agents = _load()
-
-    # Otomatik artan token_id
-    next_id = max((a["token_id"] for a in agents), default=0) + 1
-
     strategy_enum = STRATEGY_MAP.get(str(body.strategy))
     if not strategy_enum:
         raise HTTPException(400, f"Geçersiz strateji: {body.strategy}")
 
+    # Monoton artan token_id (silinen id'ler tekrar kullanılmaz)
+    next_id = get_agent_registry().allocate_id()
+
     # Sermayeyi wei string'e çevir
     capital_wei = str(int(body.initial_capital * 1e18))
 
@@ -120,8 +101,9 @@ async def create_agent(body: CreateAgentRequest):
         "preferred_commodity": "GHOST_ORE",
     }
 
-    agents.append(new_agent)
-    _save(agents)
+    get_agent_registry().add(new_agent)
+    # Simülatör hesabı oluşturulurken bir kez açılır; sonrası eşleşmelerle değişir
+    get_match_engine().seed_capital(next_id, int(capital_wei))
 
     return AgentResponse(**new_agent)
 
@@ -129,21 +111,17 @@ async def create_agent(body: CreateAgentRequest):
 @router.get("/{agent_id}", response_model=AgentResponse)
 async def get_agent(agent_id: int):
     """Tek bir ajanın detaylarını getir."""
-    agents = _load()
-    for a in agents:
-        if a["token_id"] == agent_id:
-            return AgentResponse(**a)
-    raise HTTPException(status_code=404, detail=f"Ajan bulunamadı: {agent_id}")
+    agent = get_agent_registry().get(agent_id)
+    if agent is None:
+        raise HTTPException(status_code=404, detail=f"Ajan bulunamadı: {agent_id}")
+    return AgentResponse(**agent)
 
 
 @router.delete("/{agent_id}", status_code=204)
 async def delete_agent(agent_id: int):
     """Ajanı sil."""
-    agents = _load()
-    new_agents = [a for a in agents if a["token_id"] != agent_id]
-    if len(new_agents) == len(agents):
+    if get_agent_registry().remove(agent_id) is None:
         raise HTTPException(404, "Ajan bulunamadı")
-    _save(new_agents)
 
 
 @router.get("/{agent_id}/decisions", response_model=list[AgentDecisionResponse])
@@ -153,14 +131,11 @@ async def agent_decisions(
     page: int  = Query(1, ge=1),
 ):
     """Bu ajanın AI kararlarını getir — sayfalama destekli (page, limit)."""
-    decision_file = Path(f"data/decisions/{agent_id}.json")
-    if not decision_file.exists():
-        return []
-    all_decisions: list = json.loads(decision_file.read_text())
-    # En yeni önce
-    all_decisions = list(reversed(all_decisions))
-    start = (page - 1) * limit
-    return all_decisions[start : start + limit]
+    # En yeni önce — agent_id indeksinden okunur
+    result = get_decision_log().query(
+        {"agent_id": str(agent_id)}, limit=limit, offset=(page - 1) * limit
+    )
+    return result.items
 
 
 @router.get("/{agent_id}/lifecycle")
@@ -181,7 +156,7 @@ async def agent_orders(agent_id: int, status: Optional[str] = Query(None)):
 @router.get("/{agent_id}/history", response_model=list[AgentDecisionResponse])
 async def agent_history(agent_id: int, limit: int = Query(50, le=200)):
     """Karar geçmişi (decisions ile aynı)."""
-    return await agent_decisions(agent_id, limit)
+    return await agent_decisions(agent_id, limit=limit, page=1)
 
 @router.get("/{agent_id}/orders")
 async def agent_orders(agent_id: int, status: str | None = Query(None)):
@@ -1,6 +1,12 @@
 """Engine router — /v1/engine"""
+from typing import Optional
+
 from fastapi import APIRouter, Query
 from api.models.schemas import EngineStatusResponse, TradeResponse
+from api.services.chain_index import get_chain_index
+from api.services.match_engine import get_match_engine
+
+from agents.market_feed import BLOCK_TIME_SECONDS
 
 router = APIRouter()
 
@@ -8,26 +14,51 @@ router = APIRouter()
 @router.get("/status", response_model=EngineStatusResponse)
 async def engine_status():
     """Current block, last batch, queue depth, total trades."""
-    # TODO: MatchEngine.getStats() + eth_blockNumber
-    return EngineStatusResponse(
-        current_block=0, last_batch_block=0,
-        queue_depth=0, total_trades=0, total_volume="0"
-    )
+    # Off-chain simülatör (api/services/match_engine.py) — MatchEngine.getStats() ile aynı alanlar
+    return EngineStatusResponse(**get_match_engine().status())
 
 
 @router.get("/batch/{block_number}", response_model=list[TradeResponse])
 async def batch_results(block_number: int):
     """All trades matched in a specific block."""
-    return []
+    index = get_chain_index()
+    if index.block:
+        # Zincir indeksleniyorsa gerçek TradeMatched olayları, yoksa simülatör
+        return [_trade(e) for e in index.all("TradeMatched", "block", block_number)]
+    return [m.to_dict() for m in get_match_engine().matches_by_block(block_number)]
 
 
 @router.get("/queue")
-async def pending_queue():
+async def pending_queue(
+    limit: int = Query(100, ge=1, le=1000),
+    commodity: Optional[str] = None,
+):
     """Pending unmatched orders with TTL countdown."""
-    return []
+    return get_match_engine().queue(limit, commodity)
 
 
 @router.get("/stats")
 async def engine_stats():
     """Throughput: trades/block, avg settlement latency."""
-    return {"trades_per_block": 0, "avg_latency_ms": 400, "block_time_ms": 400}
+    stats = get_match_engine().stats()
+    return {
+        "trades_per_block": stats["trades_per_batch"],
+        "avg_latency_ms":   stats["avg_batch_ms"],
+        "block_time_ms":    int(BLOCK_TIME_SECONDS * 1000),
+        **stats,
+    }
+
+
+def _trade(event: dict) -> dict:
+    return {
+        "bid_order_id":  event["bid_order_id"],
+        "ask_order_id":  event["ask_order_id"],
+        "agent_bid":     event["agent_bid"],
+        "agent_ask":     event["agent_ask"],
+        "commodity":     event["commodity"],
+        "matched_qty":   str(event["qty"]),
+        "matched_price": str(event["price"]),
+        "fee_burned":    str(event["fee_burned"]),
+        "block_number":  event["block_number"],
+        "timestamp":     event["timestamp"],
+    }
@@ -1,30 +1,45 @@
 """Market router — /v1/market"""
 from __future__ import annotations
 
-import json
-from pathlib import Path
-from fastapi import APIRouter, Query
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
 from api.models.schemas import (
     OrderResponse, TradeResponse, CandleResponse,
     SpreadResponse, CalldataResponse, OrderSide,
 )
+from api.services.candles import INTERVALS, get_candle_engine
+from api.services.chain_index import get_chain_index
+from api.services.feed_index import FeedPage, decode_cursor
+from api.services.log_store import SegmentedLog, get_decision_log, get_trade_log
+from api.services.orderbook import get_order_books
 
 router = APIRouter()
 
 COMMODITIES = ["ETH", "SOL", "MATIC", "BNB", "MON"]
 
-_BASE_DIR      = Path(__file__).parent.parent.parent   # /Users/x/Desktop/monad
-_TRADES_PATH   = _BASE_DIR / "data" / "trades.json"
-_DEC_ALL_PATH  = _BASE_DIR / "data" / "decisions_all.json"
-
 
-def _load_json(p: Path) -> list:
-    if not p.exists():
-        return []
-    try:
-        return json.loads(p.read_text())
-    except Exception:
-        return []
+def _feed(
+    log: SegmentedLog, filters: dict, page: int, limit: int, cursor: Optional[str]
+) -> dict:
+    """İndeksli sayfa: cursor verilirse page yok sayılır ve cursor'dan devam edilir."""
+    before = None
+    if cursor:
+        try:
+            before = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(400, "Geçersiz cursor")
+        page = 1
+    result: FeedPage = log.query(filters, limit=limit, offset=(page - 1) * limit, before=before)
+    total  = result.total
+    return {
+        "total":       total,
+        "page":        page,
+        "page_size":   limit,
+        "total_pages": max(1, (total + limit - 1) // limit),
+        "items":       result.items,
+        "next_cursor": result.next_cursor,
+    }
 
 
 @router.get("/commodities")
@@ -33,17 +48,24 @@ async def list_commodities():
 
 
 @router.get("/orderbook/{commodity}")
-async def get_orderbook(commodity: str, depth: int = Query(20, le=100)):
-    """Full L2 order book snapshot for a commodity."""
-    # TODO: GhostMarket.getBidOrderIds + getAskOrderIds then batch getDNA
-    return {"bids": [], "asks": [], "commodity": commodity}
+async def get_orderbook(commodity: str, depth: int = Query(20, ge=1, le=100)):
+    """
+    L2 snapshot: seviyeler [price, qty, orders]. `seq` ile
+    market.orderbook.{commodity} kanalındaki diff'ler sırayla uygulanır.
+    """
+    return get_order_books().snapshot(commodity, depth)
 
 
 @router.get("/orderbook/{commodity}/spread", response_model=SpreadResponse)
 async def get_spread(commodity: str):
     """Best bid, best ask, mid-price, spread for a commodity."""
+    spread = get_order_books().spread(commodity)
     return SpreadResponse(
-        commodity=commodity, best_bid="0", best_ask="0", mid_price=0.0, spread_pct=0.0
+        commodity=commodity,
+        best_bid=str(spread["best_bid"]),
+        best_ask=str(spread["best_ask"]),
+        mid_price=spread["mid_price"],
+        spread_pct=round(spread["spread_pct"], 6),
     )
 
 
@@ -69,9 +91,28 @@ async def cancel_order(order_id: str):
 @router.get("/orders/{order_id}", response_model=OrderResponse)
 async def get_order(order_id: str):
     """Get a single order by ID."""
-    # TODO: GhostMarket.getOrder(orderId)
-    from fastapi import HTTPException
-    raise HTTPException(status_code=404, detail="Order not found")
+    # OrderPosted + bu emre ait TradeMatched dolumları yerel indeksten
+    index  = get_chain_index()
+    posted = index.query("OrderPosted", "order", order_id.lower(), 1)
+    if not posted:
+        raise HTTPException(status_code=404, detail="Order not found")
+    order  = posted[0]
+    filled = sum(e["qty"] for e in index.all("TradeMatched", "order", order["order_id"]))
+    if filled >= order["qty"]:
+        status = "MATCHED"
+    elif index.query("OrderCancelled", "order", order["order_id"], 1):
+        status = "CANCELLED"
+    elif index.block > order["block_number"] + order["ttl_blocks"]:
+        status = "EXPIRED"
+    else:
+        status = "OPEN"
+    return OrderResponse(
+        order_id=order["order_id"], agent_id=order["agent_id"], agent_owner="",
+        commodity=order["commodity"], side=order["side"], price=str(order["price"]),
+        qty=str(order["qty"]), filled_qty=str(filled), status=status,
+        ttl_blocks=order["ttl_blocks"], created_block=order["block_number"],
+        created_at=order["timestamp"],
+    )
 
 
 @router.get("/trades")
@@ -80,23 +121,12 @@ async def global_trades(
     page:      int = Query(1, ge=1),
     commodity: str = Query(None),
     agent_id:  str = Query(None),
+    cursor:    str = Query(None, description="Önceki yanıttaki next_cursor"),
 ):
-    """Global AI trade feed — sayfalama: page + limit. Filtre: commodity, agent_id."""
-    all_trades = list(reversed(_load_json(_TRADES_PATH)))
-    if commodity:
-        all_trades = [t for t in all_trades if t.get("commodity") == commodity]
-    if agent_id:
-        all_trades = [t for t in all_trades if str(t.get("agent_id")) == agent_id]
-    total = len(all_trades)
-    start = (page - 1) * limit
-    items = all_trades[start : start + limit]
-    return {
-        "total":      total,
-        "page":       page,
-        "page_size":  limit,
-        "total_pages": max(1, (total + limit - 1) // limit),
-        "items":      items,
-    }
+    """Global AI trade feed — sayfalama: page + limit veya cursor. Filtre: commodity, agent_id."""
+    return _feed(
+        get_trade_log(), {"commodity": commodity, "agent_id": agent_id}, page, limit, cursor
+    )
 
 
 @router.get("/decisions")
@@ -106,25 +136,15 @@ async def global_decisions(
     commodity: str = Query(None),
     agent_id:  str = Query(None),
     action:    str = Query(None),
+    cursor:    str = Query(None, description="Önceki yanıttaki next_cursor"),
 ):
-    """Global AI decision log — sayfalama: page + limit. Filtre: commodity, agent_id, action."""
-    all_dec = list(reversed(_load_json(_DEC_ALL_PATH)))
-    if commodity:
-        all_dec = [d for d in all_dec if d.get("commodity") == commodity]
-    if agent_id:
-        all_dec = [d for d in all_dec if str(d.get("agent_id")) == agent_id]
-    if action:
-        all_dec = [d for d in all_dec if d.get("action") == action.upper()]
-    total = len(all_dec)
-    start = (page - 1) * limit
-    items = all_dec[start : start + limit]
-    return {
-        "total":       total,
-        "page":        page,
-        "page_size":   limit,
-        "total_pages": max(1, (total + limit - 1) // limit),
-        "items":       items,
+    """Global AI decision log — sayfalama: page + limit veya cursor. Filtre: commodity, agent_id, action."""
+    filters = {
+        "commodity": commodity,
+        "agent_id":  agent_id,
+        "action":    action.upper() if action else None,
     }
+    return _feed(get_decision_log(), filters, page, limit, cursor)
 
 
 @router.get("/trades/{commodity}")
@@ -132,25 +152,23 @@ async def commodity_trades(
     commodity: str,
     limit:     int = Query(50, ge=1, le=200),
     page:      int = Query(1, ge=1),
+    cursor:    str = Query(None, description="Önceki yanıttaki next_cursor"),
 ):
     """Belirli bir commodity için trade geçmişi — sayfalama destekli."""
-    all_trades = list(reversed(_load_json(_TRADES_PATH)))
-    filtered   = [t for t in all_trades if t.get("commodity") == commodity]
-    total      = len(filtered)
-    start      = (page - 1) * limit
-    return {
-        "total":       total,
-        "page":        page,
-        "page_size":   limit,
-        "total_pages": max(1, (total + limit - 1) // limit),
-        "items":       filtered[start : start + limit],
-    }
+    return _feed(get_trade_log(), {"commodity": commodity}, page, limit, cursor)
 
 
 @router.get("/candles/{commodity}", response_model=list[CandleResponse])
-async def candles(commodity: str, interval: str = Query("1m")):
-    """OHLCV candle data built from MatchEngine trade history."""
-    return []
+async def candles(
+    commodity: str,
+    interval:  str = Query("1m", description="1m, 5m, 1h veya 1d"),
+    limit:     int = Query(300, ge=1, le=1000),
+    end:       int = Query(None, description="Bu unix zamanına kadar olan barlar"),
+):
+    """OHLCV barları — trade log'dan artımlı üretilir (api/services/candles.py), açık bar dahil."""
+    if interval not in INTERVALS:
+        raise HTTPException(400, f"Geçersiz interval: {interval} ({', '.join(INTERVALS)})")
+    return get_candle_engine().candles(commodity, interval, limit=limit, end=end)
 
 
 @router.get("/price/{commodity}")
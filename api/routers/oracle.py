@@ -11,6 +11,8 @@ import logging
 import aiohttp
 
 from fastapi import APIRouter, Query
+from agents.http_session import get_http_pool
+from agents.market_stats import get_market_stats
 from api.models.schemas import OracleFeedResponse, AgentDecisionResponse
 
 router = APIRouter()
@@ -46,17 +48,21 @@ async def fetch_coingecko_prices() -> None:
     ids = ",".join(COINGECKO_IDS.values())
     url = f"https://api.coingecko.com/api/v3/simple/price?ids={ids}&vs_currencies=usd"
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=8)) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    now = int(time.time())
-                    for asset, cg_id in COINGECKO_IDS.items():
-                        if cg_id in data and "usd" in data[cg_id]:
-                            _prices[asset] = float(data[cg_id]["usd"])
-                            _updated_at[asset] = now
-                    _last_fetch = time.time()
-                    logger.info("CoinGecko fiyatlar güncellendi: %s", {k: _prices[k] for k in ASSETS})
+        # Paylaşılan keep-alive session (agents/http_session.py)
+        session = get_http_pool().session()
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=8)) as resp:
+            if resp.status == 200:
+                data = await resp.json()
+                now = int(time.time())
+                stats = get_market_stats()
+                for asset, cg_id in COINGECKO_IDS.items():
+                    if cg_id in data and "usd" in data[cg_id]:
+                        _prices[asset] = float(data[cg_id]["usd"])
+                        _updated_at[asset] = now
+                        # Her fiyat ticki rolling istatistiklere (getiri, volatilite, spread) girer
+                        stats.update(asset, _prices[asset])
+                _last_fetch = time.time()
+                logger.info("CoinGecko fiyatlar güncellendi: %s", {k: _prices[k] for k in ASSETS})
     except Exception as exc:
         logger.warning("CoinGecko fetch hatası: %s — önceki fiyat kullanılıyor", exc)
 
@@ -1,6 +1,7 @@
 """Partnerships router — /v1/partnerships"""
 from fastapi import APIRouter, Query
 from api.models.schemas import CovenantResponse, CalldataResponse
+from api.services.chain_index import get_chain_index
 
 router = APIRouter()
 
@@ -42,4 +43,17 @@ async def dissolve_partnership(covenant_id: int):
 @router.get("/{covenant_id}/pnl")
 async def covenant_pnl(covenant_id: int):
     """Combined P&L and distribution history for a covenant."""
-    return {"total_profit_distributed": "0", "distributions": []}
+    events = get_chain_index().all("ProfitDistributed", "covenant", covenant_id)
+    return {
+        "total_profit_distributed": str(sum(e["amount_a"] + e["amount_b"] for e in events)),
+        "distributions": [
+            {
+                "amount_a":     str(e["amount_a"]),
+                "amount_b":     str(e["amount_b"]),
+                "block_number": e["block_number"],
+                "timestamp":    e["timestamp"],
+                "tx_hash":      e["tx_hash"],
+            }
+            for e in reversed(events)
+        ],
+    }
@@ -1,6 +1,8 @@
 """Reputation router — /v1/reputation"""
 from fastapi import APIRouter, Query
 from api.models.schemas import ReputationResponse, LeaderboardEntry
+from api.services.agent_registry import get_agent_registry
+from api.services.chain_index import get_chain_index
 
 router = APIRouter()
 
@@ -14,13 +16,7 @@ async def leaderboard(limit: int = Query(20, le=100)):
 @router.get("/{agent_id}", response_model=dict)
 async def get_reputation(agent_id: int):
     """Full score breakdown — stub that returns defaults so frontend doesn't 404."""
-    import json, os
-    path = os.path.join(os.path.dirname(__file__), "../../data/agents.json")
-    try:
-        agents = json.loads(open(path).read())
-        agent = next((a for a in agents if a["token_id"] == agent_id), None)
-    except Exception:
-        agent = None
+    agent = get_agent_registry().get(agent_id)
     if agent is None:
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Agent not found")
@@ -41,9 +37,20 @@ async def get_reputation(agent_id: int):
 
 
 @router.get("/{agent_id}/history")
-async def reputation_history(agent_id: int, limit: int = Query(50)):
+async def reputation_history(agent_id: int, limit: int = Query(50, ge=1, le=500)):
     """Score changes over time for one agent."""
-    return []
+    # ReputationEngine.ScoreUpdated olayları yerel indeksten, en yeni önce
+    return [
+        {
+            "score":         e["score"],
+            "win_rate":      e["win_rate"],
+            "profit_factor": e["profit_factor"],
+            "block_number":  e["block_number"],
+            "timestamp":     e["timestamp"],
+            "tx_hash":       e["tx_hash"],
+        }
+        for e in get_chain_index().query("ScoreUpdated", "agent", agent_id, limit)
+    ]
 
 
 @router.get("/tiers")
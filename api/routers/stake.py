@@ -1,6 +1,7 @@
 """Stake router — /v1/stake"""
 from fastapi import APIRouter, Query
 from api.models.schemas import VaultResponse, StakerPositionResponse, CalldataResponse
+from api.services.chain_index import get_chain_index
 
 router = APIRouter()
 
@@ -13,8 +14,11 @@ async def list_vaults():
 
 @router.get("/{agent_id}", response_model=dict)
 async def get_stake_by_agent(agent_id: int):
-    """Stake info for an agent — returns empty stub so frontend doesn't 404."""
-    return {"agent_id": agent_id, "total_staked": "0", "share_price": "1", "apy": 0.0}
+    """Stake info for an agent — net Deposited − Withdrawn from the chain index."""
+    index = get_chain_index()
+    staked = sum(e["amount"] for e in index.all("Deposited", "agent", agent_id)) \
+        - sum(e["amount"] for e in index.all("Withdrawn", "agent", agent_id))
+    return {"agent_id": agent_id, "total_staked": str(max(0, staked)), "share_price": "1", "apy": 0.0}
 
 
 @router.get("/vaults/{agent_id}", response_model=VaultResponse)
@@ -39,7 +43,17 @@ async def withdraw(agent_id: int = Query(...), shares: str = Query(...)):
 @router.get("/positions/{address}", response_model=list[StakerPositionResponse])
 async def staker_positions(address: str):
     """All staking positions for a wallet."""
-    return []
+    index  = get_chain_index()
+    staker = address.lower()
+    shares: dict[int, int] = {}
+    for e in index.all("Deposited", "staker", staker):
+        shares[e["agent_id"]] = shares.get(e["agent_id"], 0) + e["shares"]
+    for e in index.all("Withdrawn", "staker", staker):
+        shares[e["agent_id"]] = shares.get(e["agent_id"], 0) - e["shares"]
+    return [
+        StakerPositionResponse(agent_id=agent_id, shares=str(n), pending_rewards="0")
+        for agent_id, n in sorted(shares.items()) if n > 0
+    ]
 
 
 @router.get("/rewards/{address}")
@@ -1,6 +1,9 @@
 """Token router — /v1/token"""
+import time
+
 from fastapi import APIRouter, Query
 from api.models.schemas import TokenStatsResponse, BurnEventResponse
+from api.services.chain_index import get_chain_index
 
 router = APIRouter()
 
@@ -8,18 +11,28 @@ router = APIRouter()
 @router.get("/stats", response_model=TokenStatsResponse)
 async def token_stats():
     """Total supply, circulating supply, total burned, burn rate."""
+    # FeeBurned.totalBurned kümülatif: son olay toplamı verir
+    index  = get_chain_index()
+    latest = index.query("FeeBurned", limit=1)
+    day    = index.since("FeeBurned", int(time.time()) - 86400)
     return TokenStatsResponse(
         total_supply="1000000000000000000000000000",
         circulating_supply="0",
-        total_burned="0",
-        burn_rate_24h="0",
+        total_burned=str(latest[0]["total_burned"]) if latest else "0",
+        burn_rate_24h=str(sum(e["amount"] for e in day)),
     )
 
 
 @router.get("/burns", response_model=list[BurnEventResponse])
 async def burn_events(limit: int = Query(50, le=200)):
     """Recent GHOST burn events."""
-    return []
+    return [
+        BurnEventResponse(
+            tx_hash=e["tx_hash"], burner=e["burner"], amount=str(e["amount"]),
+            total_burned=str(e["total_burned"]), block_number=e["block_number"], timestamp=e["timestamp"],
+        )
+        for e in get_chain_index().query("FeeBurned", limit=limit)
+    ]
 
 
 @router.get("/balance/{address}")
@@ -0,0 +1,199 @@
+"""
+In-process agent registry — single source of truth for agent records.
+
+Agents live in memory keyed by token_id, with secondary indexes on
+owner / strategy / state. data/agents.json is only a snapshot: mutations
+mark the registry dirty and a background writer persists it in batches
+(write-behind), so reads never touch the disk.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from collections import defaultdict
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+_BASE_DIR  = Path(__file__).parent.parent.parent
+STORE_PATH = Path(os.getenv("AGENT_STORE_PATH", "data/agents.json"))
+if not STORE_PATH.is_absolute():
+    STORE_PATH = _BASE_DIR / STORE_PATH
+
+SNAPSHOT_INTERVAL = float(os.getenv("AGENT_SNAPSHOT_INTERVAL_SECONDS", "2"))
+
+# field → normaliser used for the secondary index key
+_INDEXED = {
+    "owner_address": lambda v: str(v).lower(),
+    "strategy":      lambda v: str(v).upper(),
+    "state":         lambda v: str(v).upper(),
+}
+
+
+class AgentRegistry:
+    def __init__(self, path: Path) -> None:
+        self._path      = Path(path)
+        self._meta_path = self._path.with_suffix(".meta.json")
+        self._agents: dict[int, dict] = {}
+        self._index: dict[str, dict[str, set[int]]] = {f: defaultdict(set) for f in _INDEXED}
+        self._next_id = 1
+        self._version = 0          # bumped on every mutation
+        self._saved_version = 0
+        self._load()
+
+    # ── Reads ──────────────────────────────────────────────────────────────────
+    def get(self, token_id: int) -> Optional[dict]:
+        return self._agents.get(token_id)
+
+    def __contains__(self, token_id: int) -> bool:
+        return token_id in self._agents
+
+    def __len__(self) -> int:
+        return len(self._agents)
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(list(self._agents.values()))
+
+    def ids(self) -> list[int]:
+        return list(self._agents)
+
+    def query(
+        self,
+        *,
+        state: Optional[str] = None,
+        strategy: Optional[str] = None,
+        owner: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> list[dict]:
+        """Filtered page in token_id order, resolved through the secondary indexes."""
+        filters = {"state": state, "strategy": strategy, "owner_address": owner}
+        sets = [
+            self._index[f].get(_INDEXED[f](v), set())
+            for f, v in filters.items() if v
+        ]
+        if not sets:
+            return list(islice(self._agents.values(), offset, offset + limit))
+        ids = set.intersection(*sorted(sets, key=len))
+        return [self._agents[i] for i in sorted(ids)[offset: offset + limit]]
+
+    # ── Writes ─────────────────────────────────────────────────────────────────
+    def allocate_id(self) -> int:
+        """Monotonic — ids of deleted agents are never reused."""
+        token_id = self._next_id
+        self._next_id += 1
+        self._touch()
+        return token_id
+
+    def add(self, agent: dict) -> dict:
+        token_id = int(agent["token_id"])
+        if token_id in self._agents:
+            raise KeyError(f"token_id already registered: {token_id}")
+        self._agents[token_id] = agent
+        self._next_id = max(self._next_id, token_id + 1)
+        self._reindex(token_id, None, agent)
+        self._touch()
+        return agent
+
+    def update(self, token_id: int, **fields) -> Optional[dict]:
+        agent = self._agents.get(token_id)
+        if agent is None:
+            return None
+        if any(f in _INDEXED for f in fields):
+            before = {f: agent.get(f) for f in _INDEXED}
+            agent.update(fields)
+            self._reindex(token_id, before, agent)
+        else:
+            agent.update(fields)
+        self._touch()
+        return agent
+
+    def remove(self, token_id: int) -> Optional[dict]:
+        agent = self._agents.pop(token_id, None)
+        if agent is not None:
+            self._reindex(token_id, agent, None)
+            self._touch()
+        return agent
+
+    # ── Persistence (write-behind) ─────────────────────────────────────────────
+    @property
+    def dirty(self) -> bool:
+        return self._version != self._saved_version
+
+    async def flush(self) -> None:
+        """Write a snapshot if anything changed. Serialisation runs off the event loop."""
+        if not self.dirty:
+            return
+        version  = self._version
+        snapshot = [dict(a) for a in self._agents.values()]
+        next_id  = self._next_id
+        await asyncio.to_thread(self._write_snapshot, snapshot, next_id)
+        self._saved_version = version
+
+    async def run_writer(self, interval: float = SNAPSHOT_INTERVAL) -> None:
+        """Background task: persist batched changes every `interval` seconds."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Agent snapshot failed: %s", exc)
+
+    def stats(self) -> dict:
+        return {
+            "agents":  len(self._agents),
+            "next_id": self._next_id,
+            "dirty":   self.dirty,
+            "by_state":    {k: len(v) for k, v in self._index["state"].items() if v},
+            "by_strategy": {k: len(v) for k, v in self._index["strategy"].items() if v},
+        }
+
+    # ── Internals ──────────────────────────────────────────────────────────────
+    def _touch(self) -> None:
+        self._version += 1
+
+    def _reindex(self, token_id: int, before: Optional[dict], after: Optional[dict]) -> None:
+        for field, norm in _INDEXED.items():
+            old = before.get(field) if before else None
+            new = after.get(field) if after else None
+            if before is not None and old is not None:
+                if after is not None and new is not None and norm(old) == norm(new):
+                    continue
+                self._index[field][norm(old)].discard(token_id)
+            if after is not None and new is not None:
+                self._index[field][norm(new)].add(token_id)
+
+    def _load(self) -> None:
+        agents: list[dict] = []
+        if self._path.exists():
+            try:
+                agents = json.loads(self._path.read_text())
+            except Exception as exc:  # noqa: BLE001
+                logger.error("Agent store unreadable (%s): %s", self._path, exc)
+        for agent in sorted(agents, key=lambda a: int(a["token_id"])):
+            self.add(agent)
+
+        try:
+            meta = json.loads(self._meta_path.read_text())
+            self._next_id = max(self._next_id, int(meta.get("next_id", 1)))
+        except Exception:  # noqa: BLE001
+            pass
+        self._saved_version = self._version
+        logger.info("Agent registry loaded: %d agents, next_id=%d", len(self._agents), self._next_id)
+
+    def _write_snapshot(self, snapshot: list[dict], next_id: int) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(snapshot, indent=2))
+        os.replace(tmp, self._path)
+        self._meta_path.write_text(json.dumps({"next_id": next_id}))
+
+
+@lru_cache(maxsize=1)
+def get_agent_registry() -> AgentRegistry:
+    return AgentRegistry(STORE_PATH)
@@ -0,0 +1,256 @@
+"""
+Candle engine — incremental OHLCV bars from the trade log.
+
+Subscribes to the trade SegmentedLog (log_store.py) and folds every new
+trade into 1m / 5m / 1h / 1d bars at once; nothing rescans history. Each
+(commodity, interval) keeps the newest CANDLE_MAX_BARS completed bars in
+memory (trimmed in amortized batches) plus the open bar. Completed bars
+are appended as compact JSON arrays to one NDJSON file per series; a
+checkpoint holds the open bars and the last trade seq, so a restart
+replays only the trades after it.
+
+    data/candles/ETH/1m.ndjson     [time, open, high, low, close, volume] per line
+    data/candles/state.json        {"seq": 4812, "open": {"ETH": {"1m": [...]}}}
+
+Open bars are pushed on `market.price.{commodity}` once per tick.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+from bisect import bisect_right
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional
+
+from api.services.log_store import LOG_DIR, SegmentedLog, get_trade_log
+
+logger = logging.getLogger(__name__)
+
+CANDLE_DIR      = Path(os.getenv("CANDLE_STORE_DIR", str(LOG_DIR.parent / "candles")))
+CANDLE_MAX_BARS = int(os.getenv("CANDLE_MAX_BARS", "1000"))
+
+INTERVALS: dict[str, int] = {"1m": 60, "5m": 300, "1h": 3600, "1d": 86400}
+
+_STATE_FILE = "state.json"
+
+# Commodity names become directory names: no separators, dots or empty names
+_COMMODITY_RE = re.compile(r"[A-Za-z0-9_-]{1,32}")
+
+Bar = list   # [time, open, high, low, close, volume]
+
+
+class _Series:
+    """Completed bars of one (commodity, interval) in time order, plus the open bar."""
+
+    __slots__ = ("times", "bars", "open", "lines")
+
+    def __init__(self) -> None:
+        self.times: list[int] = []
+        self.bars:  list[Bar] = []
+        self.open:  Optional[Bar] = None
+        self.lines  = 0             # lines in the series file, for compaction
+
+    def push(self, bar: Bar, max_bars: int) -> None:
+        self.times.append(bar[0])
+        self.bars.append(bar)
+        if len(self.bars) > 2 * max_bars:      # amortized trim keeps appends O(1)
+            del self.times[:-max_bars]
+            del self.bars[:-max_bars]
+
+    def window(self, limit: int, end: Optional[int]) -> list[Bar]:
+        """Newest `limit` bars with time <= end (open bar included)."""
+        bars = self.bars
+        stop = len(bars) if end is None else bisect_right(self.times, end)
+        tail = bars[max(0, stop - limit):stop]
+        if self.open is not None and (end is None or self.open[0] <= end) and stop == len(bars):
+            tail = (tail + [self.open])[-limit:]
+        return tail
+
+
+class CandleEngine:
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        intervals: Optional[dict[str, int]] = None,
+        max_bars: int = CANDLE_MAX_BARS,
+    ) -> None:
+        self._dir      = Path(directory)
+        self.intervals = dict(intervals or INTERVALS)
+        self.max_bars  = max(1, max_bars)
+        self._lock     = threading.RLock()
+        self._series: dict[tuple[str, str], _Series] = {}
+        self._dirty: set[tuple[str, str]] = set()
+        self.last_seq  = 0
+        self.trades    = 0
+        self.late      = 0
+        self.rejected  = 0      # trades whose commodity is not a safe series name
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    # ── Input ──────────────────────────────────────────────────────────────────
+    def attach(self, log: SegmentedLog) -> None:
+        """Catch up on trades after the checkpoint, then follow new appends."""
+        log.subscribe(self.add, after=self.last_seq)
+
+    def add(self, trade: dict) -> None:
+        """Fold one trade record (seq, commodity, price, qty, timestamp) into every interval."""
+        seq = int(trade.get("seq", 0))
+        if seq and seq <= self.last_seq:
+            return
+        try:
+            commodity = str(trade["commodity"])
+            price     = float(trade["price"])
+            qty       = float(trade["qty"])
+            ts        = int(trade["timestamp"])
+        except (KeyError, TypeError, ValueError):
+            return
+        if price <= 0:
+            return
+        if not _COMMODITY_RE.fullmatch(commodity):
+            self.rejected += 1
+            return
+        with self._lock:
+            for interval, seconds in self.intervals.items():
+                self._fold(commodity, interval, ts - ts % seconds, price, qty)
+            self.last_seq = max(self.last_seq, seq)
+            self.trades += 1
+
+    def _fold(self, commodity: str, interval: str, start: int, price: float, qty: float) -> None:
+        key = (commodity, interval)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _Series()
+        bar = series.open
+        if bar is None or start > bar[0]:
+            if bar is not None:
+                self._close(key, series, bar)
+            series.open = [start, price, price, price, price, qty]
+        elif start == bar[0]:
+            bar[2] = max(bar[2], price)
+            bar[3] = min(bar[3], price)
+            bar[4] = price
+            bar[5] += qty
+        else:
+            self.late += 1          # trade older than the open bar — its bar is already closed
+            return
+        self._dirty.add(key)
+
+    def _close(self, key: tuple[str, str], series: _Series, bar: Bar) -> None:
+        if series.times and series.times[-1] >= bar[0]:
+            return                  # already persisted before a restart
+        series.push(bar, self.max_bars)
+        path = self._series_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if series.lines >= 2 * self.max_bars:
+            self._rewrite(path, series)
+        else:
+            with open(path, "a") as fh:
+                fh.write(json.dumps(bar, separators=(",", ":")) + "\n")
+            series.lines += 1
+
+    # ── Output ─────────────────────────────────────────────────────────────────
+    def candles(
+        self, commodity: str, interval: str, *, limit: int = 300, end: Optional[int] = None,
+    ) -> list[dict]:
+        """Up to `limit` newest bars (oldest first) — cost is O(bars returned)."""
+        if interval not in self.intervals:
+            raise ValueError(f"unknown interval: {interval}")
+        with self._lock:
+            series = self._series.get((commodity, interval))
+            bars = series.window(limit, end) if series is not None else []
+            return [_bar_dict(bar) for bar in bars]
+
+    def publish(self, manager: Any) -> int:
+        """Push the open bar of every series touched since the last call. Returns events."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            for commodity, interval in dirty:
+                bar = self._series[(commodity, interval)].open
+                manager.publish(f"market.price.{commodity}", {
+                    "type":      "candle",
+                    "commodity": commodity,
+                    "interval":  interval,
+                    "bar":       _bar_dict(bar),
+                })
+            return len(dirty)
+
+    def flush(self) -> None:
+        """Write the checkpoint (open bars + last seq). Call off the event loop."""
+        with self._lock:
+            state: dict = {"seq": self.last_seq, "open": {}}
+            for (commodity, interval), series in self._series.items():
+                if series.open is not None:
+                    state["open"].setdefault(commodity, {})[interval] = series.open
+            data = json.dumps(state, separators=(",", ":"))
+        tmp = self._dir / f"{_STATE_FILE}.tmp"
+        tmp.write_text(data)
+        os.replace(tmp, self._dir / _STATE_FILE)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "series":   len(self._series),
+                "bars":     sum(len(s.bars) for s in self._series.values()),
+                "trades":   self.trades,
+                "late":     self.late,
+                "rejected": self.rejected,
+                "last_seq": self.last_seq,
+            }
+
+    # ── Persistence ────────────────────────────────────────────────────────────
+    def _series_path(self, key: tuple[str, str]) -> Path:
+        commodity, interval = key
+        if not _COMMODITY_RE.fullmatch(commodity) or interval not in self.intervals:
+            raise ValueError(f"unsafe candle series: {commodity}/{interval}")
+        return self._dir / commodity / f"{interval}.ndjson"
+
+    def _rewrite(self, path: Path, series: _Series) -> None:
+        """Compact a series file down to the bars still held in memory."""
+        bars = series.bars[-self.max_bars:]
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text("".join(json.dumps(b, separators=(",", ":")) + "\n" for b in bars))
+        os.replace(tmp, path)
+        series.lines = len(bars)
+
+    def _load(self) -> None:
+        for path in self._dir.glob("*/*.ndjson"):
+            interval, commodity = path.stem, path.parent.name
+            if interval not in self.intervals or not _COMMODITY_RE.fullmatch(commodity):
+                continue
+            series = self._series[(commodity, interval)] = _Series()
+            for line in path.read_text().splitlines():
+                try:
+                    bar = json.loads(line)
+                except ValueError:
+                    continue            # partial last line after a crash
+                series.lines += 1
+                if isinstance(bar, list) and len(bar) == 6 and (not series.times or bar[0] > series.times[-1]):
+                    series.push(bar, self.max_bars)
+        try:
+            state = json.loads((self._dir / _STATE_FILE).read_text())
+        except (OSError, ValueError):
+            state = {}
+        self.last_seq = int(state.get("seq", 0))
+        for commodity, opens in state.get("open", {}).items():
+            if not _COMMODITY_RE.fullmatch(commodity):
+                continue
+            for interval, bar in opens.items():
+                if interval in self.intervals:
+                    self._series.setdefault((commodity, interval), _Series()).open = bar
+        logger.info("Candles loaded: %s — %s", self._dir, self.stats())
+
+
+def _bar_dict(bar: Bar) -> dict:
+    return {"time": bar[0], "open": bar[1], "high": bar[2], "low": bar[3], "close": bar[4], "volume": bar[5]}
+
+
+@lru_cache(maxsize=1)
+def get_candle_engine() -> CandleEngine:
+    engine = CandleEngine(CANDLE_DIR)
+    engine.attach(get_trade_log())
+    return engine
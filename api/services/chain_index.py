@@ -0,0 +1,484 @@
+"""
+Chain index — contract events in a local store.
+
+ChainIndexer backfills with eth_getLogs from the checkpoint to the chain
+head in INDEXER_BACKFILL_CHUNK block ranges, then follows
+PriceFeed.subscribe_monad_logs. Logs are decoded into flat records and kept
+by EventStore in memory with per-key indexes (agent, covenant, staker,
+order, block), so a history read is a list slice instead of an RPC round
+trip. Every record is appended to an NDJSON journal; state.json holds the
+last processed block.
+
+    data/indexer/events.ndjson    one decoded event per line, {"rollback": N} markers
+    data/indexer/state.json       {"block": 18234011}
+
+Reorgs: a log with `removed: true`, or one whose blockHash differs from the
+hash recorded for its block, rolls the store back to before that block, and
+the next backfill re-reads from there. On start, the newest indexed block
+hash is checked against the node; a mismatch rolls back INDEXER_REORG_DEPTH
+blocks.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+import aiohttp
+
+from api.services.log_store import LOG_DIR
+
+logger = logging.getLogger(__name__)
+
+INDEXER_DIR            = Path(os.getenv("INDEXER_STORE_DIR", str(LOG_DIR.parent / "indexer")))
+INDEXER_ENABLED        = os.getenv("INDEXER_ENABLED", "true").lower() == "true"
+INDEXER_START_BLOCK    = os.getenv("INDEXER_START_BLOCK", "")           # empty = from chain head
+INDEXER_BACKFILL_CHUNK = int(os.getenv("INDEXER_BACKFILL_CHUNK", "100"))  # blocks per eth_getLogs
+INDEXER_REORG_DEPTH    = int(os.getenv("INDEXER_REORG_DEPTH", "64"))
+INDEXER_FLUSH_SECONDS  = float(os.getenv("INDEXER_FLUSH_SECONDS", "2"))
+
+_STATE_FILE   = "state.json"
+_JOURNAL_FILE = "events.ndjson"
+_LAST_INDEX   = 1 << 62
+
+# name → (signature, indexed params, data params); every parameter is a static 32-byte word
+EVENTS: dict[str, tuple[str, list[tuple[str, str]], list[tuple[str, str]]]] = {
+    "OrderPosted": (
+        "OrderPosted(bytes32,uint256,bytes32,uint8,uint256,uint256,uint64)",
+        [("order_id", "bytes32"), ("agent_id", "uint"), ("commodity", "commodity")],
+        [("side", "side"), ("price", "uint"), ("qty", "uint"), ("ttl_blocks", "uint")],
+    ),
+    "OrderCancelled": (
+        "OrderCancelled(bytes32,uint256)",
+        [("order_id", "bytes32"), ("agent_id", "uint")],
+        [],
+    ),
+    "TradeMatched": (
+        "TradeMatched(bytes32,bytes32,uint256,uint256,bytes32,uint256,uint256,uint256)",
+        [("bid_order_id", "bytes32"), ("ask_order_id", "bytes32"), ("agent_bid", "uint")],
+        [("agent_ask", "uint"), ("commodity", "commodity"), ("qty", "uint"),
+         ("price", "uint"), ("fee_burned", "uint")],
+    ),
+    "BatchProcessed": (
+        "BatchProcessed(uint64,uint256)",
+        [],
+        [("batch_block", "uint"), ("match_count", "uint")],
+    ),
+    "ScoreUpdated": (
+        "ScoreUpdated(uint256,uint256,uint256,uint256)",
+        [("agent_id", "uint")],
+        [("score", "uint"), ("win_rate", "uint"), ("profit_factor", "uint")],
+    ),
+    "Deposited": (
+        "Deposited(uint256,address,uint256,uint256)",
+        [("agent_id", "uint"), ("staker", "address")],
+        [("amount", "uint"), ("shares", "uint")],
+    ),
+    "Withdrawn": (
+        "Withdrawn(uint256,address,uint256,uint256)",
+        [("agent_id", "uint"), ("staker", "address")],
+        [("amount", "uint"), ("shares", "uint")],
+    ),
+    "FeeBurned": (
+        "FeeBurned(address,uint256,uint256)",
+        [("burner", "address")],
+        [("amount", "uint"), ("total_burned", "uint")],
+    ),
+    "ProfitDistributed": (
+        "ProfitDistributed(uint256,uint256,uint256)",
+        [("covenant_id", "uint")],
+        [("amount_a", "uint"), ("amount_b", "uint")],
+    ),
+}
+
+# Secondary index keys per event: (key name, record field)
+INDEX_KEYS: dict[str, list[tuple[str, str]]] = {
+    "OrderPosted":       [("order", "order_id"), ("agent", "agent_id")],
+    "OrderCancelled":    [("order", "order_id")],
+    "TradeMatched":      [("block", "block_number"), ("order", "bid_order_id"), ("order", "ask_order_id"),
+                          ("agent", "agent_bid"), ("agent", "agent_ask")],
+    "BatchProcessed":    [("block", "block_number")],
+    "ScoreUpdated":      [("agent", "agent_id")],
+    "Deposited":         [("agent", "agent_id"), ("staker", "staker")],
+    "Withdrawn":         [("agent", "agent_id"), ("staker", "staker")],
+    "FeeBurned":         [],
+    "ProfitDistributed": [("covenant", "covenant_id")],
+}
+
+COMMODITY_NAMES = ["GHOST_ORE", "PHANTOM_GAS", "VOID_CHIP", "MON_USDC"]
+
+
+@lru_cache(maxsize=1)
+def _topics() -> dict[str, str]:
+    """topic0 → event name."""
+    from web3 import Web3
+    return {"0x" + Web3.keccak(text=sig).hex().removeprefix("0x"): name for name, (sig, _, _) in EVENTS.items()}
+
+
+@lru_cache(maxsize=1)
+def _commodities() -> dict[str, str]:
+    """keccak256(name) → name, as GhostMarket stores commodities."""
+    from web3 import Web3
+    return {"0x" + Web3.keccak(text=c).hex().removeprefix("0x"): c for c in COMMODITY_NAMES}
+
+
+def _decode_word(word: str, kind: str) -> Any:
+    word = word.lower().removeprefix("0x").rjust(64, "0")
+    if kind == "uint":
+        return int(word, 16)
+    if kind == "address":
+        return "0x" + word[-40:]
+    if kind == "side":
+        return "BID" if int(word, 16) == 0 else "ASK"
+    value = "0x" + word                         # bytes32
+    if kind == "commodity":
+        return _commodities().get(value, value)
+    return value
+
+
+def decode_log(log: dict) -> Optional[dict]:
+    """Flat record for a known event, None for anything else."""
+    topics = log.get("topics") or []
+    name = _topics().get(str(topics[0]).lower()) if topics else None
+    if name is None:
+        return None
+    _, indexed, params = EVENTS[name]
+    data = str(log.get("data") or "0x").removeprefix("0x")
+    words = [data[i:i + 64] for i in range(0, len(data), 64)]
+    if len(topics) != len(indexed) + 1 or len(words) < len(params):
+        return None
+    record = {
+        "event":        name,
+        "block_number": int(log["blockNumber"], 16),
+        "block_hash":   log.get("blockHash", ""),
+        "tx_hash":      log.get("transactionHash", ""),
+        "log_index":    int(log["logIndex"], 16),
+        "address":      str(log.get("address", "")).lower(),
+    }
+    for (field, kind), topic in zip(indexed, topics[1:]):
+        record[field] = _decode_word(topic, kind)
+    for (field, kind), word in zip(params, words):
+        record[field] = _decode_word(word, kind)
+    return record
+
+
+class EventStore:
+    """Decoded events in (block, log index) order with per-key indexes."""
+
+    def __init__(self, directory: Path, *, reorg_depth: int = INDEXER_REORG_DEPTH) -> None:
+        self._dir        = Path(directory)
+        self.reorg_depth = max(1, reorg_depth)
+        self._lock       = threading.RLock()
+        self._events: list[dict] = []
+        self._index: dict[tuple, list[int]] = {}     # (event, key, value) / (event,) → positions
+        self._hashes: dict[int, str] = {}            # recent block → hash
+        self.block     = 0                           # last processed block
+        self.cursor    = (0, -1)                     # last applied (block, log index)
+        self.rollbacks = 0
+        self.skipped   = 0
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._load()
+        self._fh = open(self._dir / _JOURNAL_FILE, "a")
+
+    # ── Writes ─────────────────────────────────────────────────────────────────
+    def apply(self, log: dict) -> Optional[dict]:
+        """Index one raw log. Returns the record, or None if skipped / unknown / duplicate."""
+        block = int(log["blockNumber"], 16)
+        if log.get("removed"):
+            self.rollback(block)
+            return None
+        with self._lock:
+            known = self._hashes.get(block)
+            if known is not None and log.get("blockHash") and known != log["blockHash"]:
+                self.rollback(block)
+            position = (block, int(log["logIndex"], 16))
+            if position <= self.cursor:
+                return None
+            self.cursor = position
+            self.block  = max(self.block, block)
+            record = decode_log(log)
+            if record is None:
+                self.skipped += 1
+                return None
+            ts = log.get("blockTimestamp") or log.get("timestamp")
+            record["timestamp"] = int(ts, 16) if isinstance(ts, str) else int(ts or time.time())
+            self._add(record)
+            self._fh.write(json.dumps(record, separators=(",", ":")) + "\n")
+            return record
+
+    def advance(self, block: int) -> None:
+        """Every block up to `block` has been read (backfill chunk done)."""
+        with self._lock:
+            if block > self.block:
+                self.block = block
+            if self.cursor[0] < block:
+                self.cursor = (block, _LAST_INDEX)
+
+    def rollback(self, block: int) -> int:
+        """Drop every event at or after `block`. Returns the number removed."""
+        with self._lock:
+            removed = 0
+            while self._events and self._events[-1]["block_number"] >= block:
+                position = len(self._events) - 1
+                for key in self._keys(self._events[-1]):
+                    positions = self._index[key]
+                    if positions and positions[-1] == position:
+                        positions.pop()
+                self._events.pop()
+                removed += 1
+            for b in [b for b in self._hashes if b >= block]:
+                del self._hashes[b]
+            self.block  = min(self.block, block - 1)
+            self.cursor = min(self.cursor, (block - 1, _LAST_INDEX))
+            self.rollbacks += 1
+            self._fh.write(json.dumps({"rollback": block}) + "\n")
+            self._fh.flush()
+            self._write_state()
+            logger.warning("Chain index rolled back to block %d (%d events removed)", block - 1, removed)
+            return removed
+
+    def flush(self) -> None:
+        """fsync the journal, then move the checkpoint. Call off the event loop."""
+        with self._lock:
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self._write_state()
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            self._fh.close()
+
+    def _add(self, record: dict) -> None:
+        position = len(self._events)
+        self._events.append(record)
+        for key in self._keys(record):
+            self._index.setdefault(key, []).append(position)
+        block = record["block_number"]
+        self._hashes[block] = record["block_hash"]
+        while len(self._hashes) > self.reorg_depth:
+            del self._hashes[next(iter(self._hashes))]
+
+    @staticmethod
+    def _keys(record: dict) -> list[tuple]:
+        event = record["event"]
+        keys = [(event,)]
+        for key, field in INDEX_KEYS.get(event, []):
+            k = (event, key, record.get(field))
+            if k not in keys:                   # self-trade: same agent on both sides
+                keys.append(k)
+        return keys
+
+    def _write_state(self) -> None:
+        tmp = self._dir / f"{_STATE_FILE}.tmp"
+        tmp.write_text(json.dumps({"block": self.block}))
+        os.replace(tmp, self._dir / _STATE_FILE)
+
+    # ── Reads ──────────────────────────────────────────────────────────────────
+    def query(self, event: str, key: Optional[str] = None, value: Any = None, limit: int = 50) -> list[dict]:
+        """Newest first. `key` / `value` select a secondary index, e.g. ("agent", 7)."""
+        with self._lock:
+            positions = self._index.get((event,) if key is None else (event, key, value), [])
+            return [self._events[p] for p in reversed(positions[-limit:])] if limit > 0 else []
+
+    def all(self, event: str, key: Optional[str] = None, value: Any = None) -> list[dict]:
+        """Oldest first, every match."""
+        with self._lock:
+            positions = self._index.get((event,) if key is None else (event, key, value), [])
+            return [self._events[p] for p in positions]
+
+    def since(self, event: str, timestamp: int) -> list[dict]:
+        """Events at or after `timestamp`, newest first — cost is O(matches)."""
+        out: list[dict] = []
+        with self._lock:
+            for p in reversed(self._index.get((event,), [])):
+                record = self._events[p]
+                if record["timestamp"] < timestamp:
+                    break
+                out.append(record)
+        return out
+
+    def latest_hash(self) -> Optional[tuple[int, str]]:
+        with self._lock:
+            if not self._hashes:
+                return None
+            block = max(self._hashes)
+            return block, self._hashes[block]
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {key[0]: len(v) for key, v in self._index.items() if len(key) == 1}
+            return {
+                "block":     self.block,
+                "events":    len(self._events),
+                "by_event":  counts,
+                "rollbacks": self.rollbacks,
+                "skipped":   self.skipped,
+            }
+
+    # ── Persistence ────────────────────────────────────────────────────────────
+    def _load(self) -> None:
+        path = self._dir / _JOURNAL_FILE
+        lines = 0
+        if path.exists():
+            for line in path.read_text().splitlines():
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue            # partial last line after a crash
+                lines += 1
+                if "rollback" in entry:
+                    block = int(entry["rollback"])
+                    while self._events and self._events[-1]["block_number"] >= block:
+                        self._events.pop()
+                    continue
+                self._events.append(entry)
+        try:
+            state = json.loads((self._dir / _STATE_FILE).read_text())
+        except (OSError, ValueError):
+            state = {}
+        events, self._events = self._events, []
+        for record in events:
+            self._add(record)
+        if events:
+            self.cursor = (events[-1]["block_number"], events[-1]["log_index"])
+        self.block = max(int(state.get("block", 0)), self.cursor[0])
+        if lines != len(events):        # rollback markers / torn lines → compact
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text("".join(json.dumps(e, separators=(",", ":")) + "\n" for e in events))
+            os.replace(tmp, path)
+        logger.info("Chain index loaded: %s — %s", self._dir, self.stats())
+
+
+class ChainIndexer:
+    """Backfill + live follow for one EventStore."""
+
+    def __init__(
+        self,
+        store: EventStore,
+        addresses: Iterable[str],
+        *,
+        rpc_url: Optional[str] = None,
+        feed: Any = None,
+        chunk: int = INDEXER_BACKFILL_CHUNK,
+        start_block: Optional[int] = None,
+    ) -> None:
+        from agents.http_session import get_http_pool
+        from agents.market_feed import MONORACLE_RPC, PriceFeed
+
+        self.store     = store
+        self.addresses = [a for a in addresses if a]
+        self.rpc_url   = rpc_url or MONORACLE_RPC
+        self.feed      = feed or PriceFeed()
+        self.chunk     = max(1, chunk)
+        self.start     = start_block
+        self._http     = get_http_pool()
+        self.rpc_calls = 0
+
+    async def run(self) -> None:
+        await self.check_reorg()
+        await self.backfill()
+        last_flush = time.monotonic()
+        async for log in self.feed.subscribe_monad_logs(self.addresses):
+            block = int(log["blockNumber"], 16)
+            if not log.get("removed") and block > self.store.block + 1:
+                await self.backfill(block - 1)     # blocks missed while (re)connecting
+            self.store.apply(log)
+            if time.monotonic() - last_flush >= INDEXER_FLUSH_SECONDS:
+                await asyncio.to_thread(self.store.flush)
+                last_flush = time.monotonic()
+
+    async def check_reorg(self) -> None:
+        latest = self.store.latest_hash()
+        if latest is None:
+            return
+        block, known = latest
+        header = await self._rpc("eth_getBlockByNumber", [hex(block), False])
+        if header and header.get("hash") != known:
+            self.store.rollback(max(1, block - self.store.reorg_depth + 1))
+
+    async def backfill(self, to_block: Optional[int] = None) -> int:
+        """eth_getLogs from the checkpoint to `to_block` (default: head). Returns events indexed."""
+        head = to_block if to_block is not None else int(await self._rpc("eth_blockNumber", []), 16)
+        if self.store.block:
+            start = self.store.block + 1
+        elif self.start is not None:
+            start = self.start
+        else:
+            start = head                        # fresh store, no start block: follow from now
+        indexed = 0
+        for lo in range(start, head + 1, self.chunk):
+            hi = min(lo + self.chunk - 1, head)
+            logs = await self._rpc("eth_getLogs", [{
+                "fromBlock": hex(lo), "toBlock": hex(hi), "address": self.addresses,
+            }]) or []
+            logs.sort(key=lambda l: (int(l["blockNumber"], 16), int(l["logIndex"], 16)))
+            times = await self._block_times({l["blockNumber"] for l in logs if "blockTimestamp" not in l})
+            for log in logs:
+                log.setdefault("blockTimestamp", times.get(log["blockNumber"]))
+                indexed += self.store.apply(log) is not None
+            self.store.advance(hi)
+            await asyncio.to_thread(self.store.flush)
+        if head >= start:
+            logger.info("Chain index backfill %d → %d: %d events", start, head, indexed)
+        return indexed
+
+    async def _block_times(self, blocks: set[str]) -> dict[str, str]:
+        """Block timestamps for backfilled logs, one JSON-RPC batch per chunk."""
+        if not blocks:
+            return {}
+        order = sorted(blocks)
+        payload = [
+            {"jsonrpc": "2.0", "method": "eth_getBlockByNumber", "params": [b, False], "id": i}
+            for i, b in enumerate(order)
+        ]
+        data = await self._post(payload)
+        out: dict[str, str] = {}
+        for item in data if isinstance(data, list) else []:
+            result = item.get("result") if isinstance(item, dict) else None
+            if result:
+                out[order[int(item["id"])]] = result.get("timestamp")
+        return out
+
+    async def _rpc(self, method: str, params: list) -> Any:
+        data = await self._post({"jsonrpc": "2.0", "method": method, "params": params, "id": 1})
+        if "error" in data:
+            raise RuntimeError(f"{method}: {data['error']}")
+        return data.get("result")
+
+    async def _post(self, payload: Any) -> Any:
+        self.rpc_calls += 1
+        session = self._http.session()
+        async with session.post(self.rpc_url, json=payload, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+            return await resp.json()
+
+
+async def run_indexer() -> None:
+    """Startup task: index every configured contract, retrying after RPC failures."""
+    from api.services.chain import ADDRESSES
+
+    addresses = [a for a in ADDRESSES.values() if a]
+    if not INDEXER_ENABLED or not addresses:
+        logger.info("Chain indexer disabled (INDEXER_ENABLED=%s, %d contracts)", INDEXER_ENABLED, len(addresses))
+        return
+    start = int(INDEXER_START_BLOCK) if INDEXER_START_BLOCK else None
+    indexer = ChainIndexer(get_chain_index(), addresses, start_block=start)
+    while True:
+        try:
+            await indexer.run()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Chain indexer error: %s — restarting in 5s", exc)
+            await asyncio.sleep(5)
+
+
+@lru_cache(maxsize=1)
+def get_chain_index() -> EventStore:
+    return EventStore(INDEXER_DIR)
@@ -0,0 +1,202 @@
+"""
+Feed index — in-memory secondary indexes over seq-tagged log records.
+
+Records are kept in seq order inside a bounded window; each indexed field
+maps value → ascending list of seqs. Queries walk the matching seq list
+newest-first (several filters intersect their lists, shortest first), so a
+filtered page costs O(page) instead of a scan over the whole history. Pagination is page/offset or an opaque cursor that
+resumes strictly before a given seq.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import os
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Iterable, Optional, Sequence
+
+FEED_INDEX_CAPACITY = int(os.getenv("FEED_INDEX_CAPACITY", "50000"))
+
+_CURSOR_PREFIX = "seq:"
+
+
+def encode_cursor(seq: int) -> str:
+    return base64.urlsafe_b64encode(f"{_CURSOR_PREFIX}{seq}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Opaque cursor → seq. Raises ValueError on a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError) as exc:
+        raise ValueError(f"invalid cursor: {cursor}") from exc
+    if not raw.startswith(_CURSOR_PREFIX):
+        raise ValueError(f"invalid cursor: {cursor}")
+    return int(raw[len(_CURSOR_PREFIX):])
+
+
+@dataclass
+class FeedPage:
+    total:       int
+    items:       list[dict] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
+class _SeqRange(Sequence[int]):
+    """All retained seqs [first, last] without materialising a list."""
+
+    def __init__(self, first: int, last: int) -> None:
+        self._first, self._last = first, last
+
+    def __len__(self) -> int:
+        return max(0, self._last - self._first + 1)
+
+    def __getitem__(self, i):  # type: ignore[override]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._first + i
+
+
+class FeedIndex:
+    def __init__(self, fields: Iterable[str], capacity: int = FEED_INDEX_CAPACITY) -> None:
+        self.fields    = tuple(fields)
+        self.capacity  = max(1, capacity)
+        self._records: list[Optional[dict]] = []
+        self._head     = 0              # index of the oldest retained record
+        self._first_seq = 1             # seq of _records[_head]
+        self._postings: dict[str, dict[str, list[int]]] = {f: {} for f in self.fields}
+
+    # ── Write ──────────────────────────────────────────────────────────────────
+    def add(self, record: dict) -> None:
+        """Index one record. Seqs must arrive in increasing order; gaps are padded."""
+        seq = int(record["seq"])
+        if len(self) == 0:
+            self._records.clear()
+            self._head = 0
+            self._first_seq = seq
+        elif seq <= self.last_seq:
+            return
+        while seq > self.last_seq + 1:      # lost/corrupt line in a segment
+            self._records.append(None)
+        self._records.append(record)
+        for f in self.fields:
+            value = record.get(f)
+            if value is not None:
+                self._postings[f].setdefault(str(value), []).append(seq)
+        if len(self) > self.capacity:
+            self._evict(len(self) - self.capacity)
+
+    # ── Read ───────────────────────────────────────────────────────────────────
+    def __len__(self) -> int:
+        return len(self._records) - self._head
+
+    @property
+    def last_seq(self) -> int:
+        return self._first_seq + len(self) - 1
+
+    def get(self, seq: int) -> Optional[dict]:
+        pos = seq - self._first_seq
+        if 0 <= pos < len(self):
+            return self._records[self._head + pos]
+        return None
+
+    def since(self, seq: int) -> list[dict]:
+        """Retained records with a seq above `seq`, oldest first."""
+        start = max(seq + 1, self._first_seq) - self._first_seq + self._head
+        return [rec for rec in self._records[start:] if rec is not None]
+
+    def count(self, field_name: str, value: str) -> int:
+        return len(self._seqs(field_name, str(value)))
+
+    def query(
+        self,
+        filters: Optional[dict[str, Optional[str]]] = None,
+        *,
+        limit: int = 50,
+        offset: int = 0,
+        before: Optional[int] = None,
+    ) -> FeedPage:
+        """Newest-first page of records matching every (field == value) filter."""
+        active = {f: str(v) for f, v in (filters or {}).items() if v is not None and v != ""}
+        for f in active:
+            if f not in self._postings:
+                raise KeyError(f"field not indexed: {f}")
+
+        if active:
+            lists = sorted((self._seqs(f, v) for f, v in active.items()), key=len)
+            driver: Sequence[int] = _intersect(lists)
+        else:
+            driver = _SeqRange(self._first_seq, self.last_seq)
+        total = len(driver)
+
+        end = bisect_left(driver, before) if before is not None else len(driver)
+        items: list[dict] = []
+        skipped = 0
+        i = end - 1
+        while i >= 0 and len(items) < limit:
+            rec = self.get(driver[i])
+            i -= 1
+            if rec is None:
+                continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            items.append(rec)
+
+        next_cursor = None
+        if items and len(items) == limit and i >= 0:
+            next_cursor = encode_cursor(int(items[-1]["seq"]))
+        return FeedPage(total=total, items=items, next_cursor=next_cursor)
+
+    def stats(self) -> dict:
+        return {
+            "records":  len(self),
+            "first_seq": self._first_seq,
+            "last_seq": self.last_seq,
+            "keys":     {f: len(p) for f, p in self._postings.items()},
+        }
+
+    # ── Internals ──────────────────────────────────────────────────────────────
+    def _seqs(self, field_name: str, value: str) -> list[int]:
+        """Posting list for value, trimmed of seqs that fell out of the window."""
+        postings = self._postings[field_name]
+        seqs = postings.get(value)
+        if not seqs:
+            return []
+        cut = bisect_left(seqs, self._first_seq)
+        if cut:
+            del seqs[:cut]
+            if not seqs:
+                del postings[value]
+        return seqs
+
+    def _evict(self, n: int) -> None:
+        self._head += n
+        self._first_seq += n
+        # Compact the backing list (and stale postings) once the dead prefix dominates
+        if self._head > len(self._records) // 2:
+            del self._records[: self._head]
+            self._head = 0
+            for f, postings in self._postings.items():
+                for value in list(postings):
+                    self._seqs(f, value)
+
+
+def _intersect(lists: list[list[int]]) -> list[int]:
+    """Seqs present in every ascending list; `lists` sorted by length, shortest first."""
+    result = lists[0]
+    for other in lists[1:]:
+        if not result:
+            break
+        out, lo = [], 0
+        for seq in result:
+            lo = bisect_left(other, seq, lo)
+            if lo == len(other):
+                break
+            if other[lo] == seq:
+                out.append(seq)
+        result = out
+    return result
@@ -0,0 +1,279 @@
+"""
+Append-only segmented log — decisions and trades history.
+
+Every entry is one NDJSON line tagged with a monotonic `seq`. Writes go to
+the active segment file and cost O(1); fsync is batched, segments roll
+over by size and the oldest ones are pruned. Recent entries are kept in an
+in-memory FeedIndex (see feed_index.py) with secondary indexes on the
+given fields, so readers never touch the disk.
+
+    data/log/decisions/000000000001.ndjson
+    data/log/decisions/000000004812.ndjson   ← active segment
+    data/log/decisions/index.json            ← segment table (first/last seq, bytes)
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from api.services.feed_index import FEED_INDEX_CAPACITY, FeedIndex, FeedPage
+
+logger = logging.getLogger(__name__)
+
+_BASE_DIR = Path(__file__).parent.parent.parent
+LOG_DIR   = Path(os.getenv("LOG_STORE_DIR", str(_BASE_DIR / "data" / "log")))
+
+SEGMENT_BYTES = int(os.getenv("LOG_SEGMENT_BYTES", str(4 * 1024 * 1024)))
+MAX_SEGMENTS  = int(os.getenv("LOG_MAX_SEGMENTS", "16"))
+FSYNC_BATCH   = int(os.getenv("LOG_FSYNC_BATCH", "256"))
+
+_INDEX_FILE = "index.json"
+_SEG_SUFFIX = ".ndjson"
+
+
+class SegmentedLog:
+    """Append-only NDJSON log split into size-bounded segment files."""
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        segment_bytes: int = SEGMENT_BYTES,
+        max_segments: int = MAX_SEGMENTS,
+        fsync_batch: int = FSYNC_BATCH,
+        index_fields: Iterable[str] = (),
+        index_capacity: int = FEED_INDEX_CAPACITY,
+    ) -> None:
+        self._dir           = Path(directory)
+        self._segment_bytes = segment_bytes
+        self._max_segments  = max(1, max_segments)
+        self._fsync_batch   = max(1, fsync_batch)
+
+        self._lock = threading.RLock()
+        self._segments: list[dict] = []     # {"file", "first_seq", "last_seq", "bytes"}
+        self.index = FeedIndex(index_fields, index_capacity)
+        self._next_seq = 1
+        self._pending  = 0
+        self._fh = None
+        self._listeners: list[Callable[[dict], None]] = []
+
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._open()
+
+    # ── Write path ─────────────────────────────────────────────────────────────
+    def append(self, entry: dict) -> int:
+        """Append one entry, returns its seq. fsync happens every `fsync_batch` entries."""
+        with self._lock:
+            seq = self._next_seq
+            record = {"seq": seq, **entry}
+            data = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+
+            active = self._segments[-1]
+            if active["bytes"] and active["bytes"] + len(data) > self._segment_bytes:
+                self._rollover(seq)
+                active = self._segments[-1]
+
+            self._fh.write(data)
+            active["bytes"] += len(data)
+            active["last_seq"] = seq
+            self._next_seq += 1
+            self.index.add(record)
+            for listener in self._listeners:
+                try:
+                    listener(record)
+                except Exception as exc:  # noqa: BLE001
+                    logger.warning("Log listener failed on seq %d: %s", seq, exc)
+
+            self._pending += 1
+            if self._pending >= self._fsync_batch:
+                self._sync_locked()
+            return seq
+
+    def subscribe(self, listener: Callable[[dict], None], after: Optional[int] = None) -> None:
+        """
+        Call `listener(record)` for every entry appended from now on. With
+        `after`, retained entries past that seq are replayed to it first.
+        """
+        with self._lock:
+            if after is not None:
+                for record in self.index.since(after):
+                    listener(record)
+            self._listeners.append(listener)
+
+    def extend(self, entries: Iterable[dict]) -> None:
+        for entry in entries:
+            self.append(entry)
+
+    def sync(self) -> None:
+        """Flush + fsync pending writes (call off the event loop, e.g. via to_thread)."""
+        with self._lock:
+            self._sync_locked()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._sync_locked()
+                self._fh.close()
+                self._fh = None
+
+    # ── Read path ──────────────────────────────────────────────────────────────
+    def query(
+        self,
+        filters: Optional[dict[str, Optional[str]]] = None,
+        *,
+        limit: int = 50,
+        offset: int = 0,
+        before: Optional[int] = None,
+    ) -> FeedPage:
+        """Newest-first indexed page of retained entries (see FeedIndex.query)."""
+        with self._lock:
+            return self.index.query(filters, limit=limit, offset=offset, before=before)
+
+    @property
+    def last_seq(self) -> int:
+        return self._next_seq - 1
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "segments":  len(self._segments),
+                "bytes":     sum(s["bytes"] for s in self._segments),
+                "last_seq":  self.last_seq,
+                "indexed":   len(self.index),
+                "pending":   self._pending,
+            }
+
+    # ── Internals ──────────────────────────────────────────────────────────────
+    def _segment_path(self, seg: dict) -> Path:
+        return self._dir / seg["file"]
+
+    def _open(self) -> None:
+        files = sorted(p for p in self._dir.glob(f"*{_SEG_SUFFIX}"))
+        for path in files:
+            self._segments.append(self._scan_segment(path))
+
+        if self._segments:
+            self._next_seq = max(s["last_seq"] for s in self._segments) + 1
+        if not self._segments:
+            self._segments.append(self._new_segment(self._next_seq))
+
+        self._fh = open(self._segment_path(self._segments[-1]), "ab")
+        self._write_index()
+        logger.info("Log opened: %s — %s", self._dir, self.stats())
+
+    def _scan_segment(self, path: Path) -> dict:
+        """Rebuild one segment's index entry and feed its records into the FeedIndex."""
+        raw = path.read_bytes()
+        # Crash mid-write: drop the trailing partial line
+        if raw and not raw.endswith(b"\n"):
+            raw = raw[: raw.rfind(b"\n") + 1]
+            with open(path, "r+b") as fh:
+                fh.truncate(len(raw))
+            logger.warning("Truncated partial record in %s", path.name)
+
+        first_seq = int(path.stem)
+        last_seq = first_seq - 1
+        for line in raw.splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            last_seq = max(last_seq, int(record.get("seq", last_seq + 1)))
+            self.index.add(record)
+        return {"file": path.name, "first_seq": first_seq, "last_seq": last_seq, "bytes": len(raw)}
+
+    def _new_segment(self, first_seq: int) -> dict:
+        seg = {"file": f"{first_seq:012d}{_SEG_SUFFIX}", "first_seq": first_seq,
+               "last_seq": first_seq - 1, "bytes": 0}
+        self._segment_path(seg).touch()
+        return seg
+
+    def _rollover(self, next_seq: int) -> None:
+        self._sync_locked()
+        self._fh.close()
+        self._segments.append(self._new_segment(next_seq))
+        self._fh = open(self._segment_path(self._segments[-1]), "ab")
+
+        while len(self._segments) > self._max_segments:
+            old = self._segments.pop(0)
+            try:
+                self._segment_path(old).unlink()
+            except FileNotFoundError:
+                pass
+        self._write_index()
+
+    def _sync_locked(self) -> None:
+        if self._fh is None or not self._pending:
+            return
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._pending = 0
+        self._write_index()
+
+    def _write_index(self) -> None:
+        tmp = self._dir / f"{_INDEX_FILE}.tmp"
+        tmp.write_text(json.dumps({"next_seq": self._next_seq, "segments": self._segments}))
+        os.replace(tmp, self._dir / _INDEX_FILE)
+
+
+# ── Legacy JSON import ─────────────────────────────────────────────────────────
+def _load_json_list(path: Path) -> list[dict]:
+    try:
+        data = json.loads(path.read_text())
+        return data if isinstance(data, list) else []
+    except Exception:
+        return []
+
+
+def _import_legacy(
+    log: SegmentedLog, paths: list[Path], per_agent: list[Path] = ()
+) -> None:
+    """Seed an empty log once from the old whole-file JSON histories."""
+    if log.last_seq or not any(p.exists() for p in [*paths, *per_agent]):
+        return
+    seen: set[tuple] = set()
+    entries: list[dict] = []
+    sources = [(p, None) for p in paths] + [(p, p.stem) for p in per_agent]
+    for path, agent_id in sources:
+        for entry in _load_json_list(path):
+            if agent_id is not None:
+                entry.setdefault("agent_id", agent_id)
+            ident = tuple(str(entry.get(k)) for k in (
+                "tx_hash", "agent_id", "timestamp", "action", "side", "commodity", "price", "qty",
+            ))
+            if ident in seen:
+                continue
+            seen.add(ident)
+            entries.append(entry)
+    entries.sort(key=lambda e: e.get("timestamp", 0))
+    log.extend(entries)
+    log.sync()
+    logger.info("Imported %d legacy entries into %s", len(entries), log._dir)
+
+
+# ── Shared instances ───────────────────────────────────────────────────────────
+@lru_cache(maxsize=1)
+def get_decision_log() -> SegmentedLog:
+    log = SegmentedLog(LOG_DIR / "decisions", index_fields=("agent_id", "commodity", "action"))
+    legacy_dir = _BASE_DIR / "data" / "decisions"
+    _import_legacy(
+        log,
+        [_BASE_DIR / "data" / "decisions_all.json"],
+        per_agent=sorted(legacy_dir.glob("*.json")),
+    )
+    return log
+
+
+@lru_cache(maxsize=1)
+def get_trade_log() -> SegmentedLog:
+    log = SegmentedLog(LOG_DIR / "trades", index_fields=("agent_id", "commodity", "side"))
+    _import_legacy(log, [_BASE_DIR / "data" / "trades.json"])
+    return log
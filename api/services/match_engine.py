@@ -0,0 +1,448 @@
+"""
+Match engine — off-chain simulator of MatchEngine.processBatch.
+
+Copies the contract's semantics on GhostMarket-style resting orders:
+
+    price-time   best bid (highest price) against best ask (lowest price),
+                 older order first at equal prices; the bid price is paid
+    TTL          an order is live while block <= created_block + ttl_blocks;
+                 an expired best order stops its commodity, as on chain,
+                 until expire() sweeps it (GhostMarket.expireOrders)
+    fee          trade_value = qty * price / 1e18, fee = value * BURN_FEE_BPS / 10_000
+    settlement   _settleAgentCapitals: both capitals are read before the
+                 update, bid pays value + fee (floored at 0), ask receives
+                 value - fee; the ask side always counts as a win
+
+Amounts are integers in wei (18 decimals) so results match the contract to
+the unit. Each commodity side is a heap keyed (price, arrival), so finding
+the best order is O(log n) instead of the contract's linear scan plus
+re-fetch after every fill. Filled / cancelled / expired orders are dropped
+lazily when they reach the top of a heap; expiry uses its own min-heap.
+
+Not simulated: the burn balance check only applies when `fee_balance` is
+set, ReputationEngine scoring is reduced to win / loss counts, and a fill
+against a BANKRUPT agent (which reverts the whole batch on chain) is counted
+in `stats()["bankrupt_fills"]` instead of undoing the batch.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+WAD = 10**18
+
+MAX_MATCHES  = 500
+BURN_FEE_BPS = 10
+DEFAULT_TTL  = 50
+MAX_TTL      = 7200
+
+MATCH_ENGINE_HISTORY_BLOCKS = int(os.getenv("MATCH_ENGINE_HISTORY_BLOCKS", "10000"))   # blocks of batches kept
+
+BID = "BID"
+ASK = "ASK"
+
+OPEN      = "OPEN"
+MATCHED   = "MATCHED"
+EXPIRED   = "EXPIRED"
+CANCELLED = "CANCELLED"
+
+
+def to_wei(amount: float) -> int:
+    return int(amount * WAD)
+
+
+@dataclass
+class Order:
+    order_id:      str
+    agent_id:      int
+    commodity:     str
+    side:          str
+    price:         int          # wei per unit
+    qty:           int          # wei
+    ttl_blocks:    int
+    created_block: int
+    created_at:    int
+    seq:           int
+    filled_qty:    int = 0
+    status:        str = OPEN
+
+    @property
+    def remaining(self) -> int:
+        return self.qty - self.filled_qty
+
+    @property
+    def expiry_block(self) -> int:
+        return self.created_block + self.ttl_blocks
+
+    def to_dict(self, block: Optional[int] = None) -> dict:
+        out = {
+            "order_id":      self.order_id,
+            "agent_id":      self.agent_id,
+            "commodity":     self.commodity,
+            "side":          self.side,
+            "price":         str(self.price),
+            "qty":           str(self.qty),
+            "filled_qty":    str(self.filled_qty),
+            "status":        self.status,
+            "ttl_blocks":    self.ttl_blocks,
+            "created_block": self.created_block,
+            "expiry_block":  self.expiry_block,
+        }
+        if block is not None:
+            out["blocks_left"] = max(0, self.expiry_block - block)
+        return out
+
+
+@dataclass
+class MatchResult:
+    bid_order_id:  str
+    ask_order_id:  str
+    agent_bid:     int
+    agent_ask:     int
+    commodity:     str
+    matched_qty:   int
+    matched_price: int
+    fee_burned:    int
+    block_number:  int
+    timestamp:     int
+
+    def to_dict(self) -> dict:
+        return {
+            "bid_order_id":  self.bid_order_id,
+            "ask_order_id":  self.ask_order_id,
+            "agent_bid":     self.agent_bid,
+            "agent_ask":     self.agent_ask,
+            "commodity":     self.commodity,
+            "matched_qty":   str(self.matched_qty),
+            "matched_price": str(self.matched_price),
+            "fee_burned":    str(self.fee_burned),
+            "block_number":  self.block_number,
+            "timestamp":     self.timestamp,
+        }
+
+
+@dataclass
+class Account:
+    """The BrokerAgent DNA fields settlement touches."""
+    capital:   int
+    wins:      int = 0
+    losses:    int = 0
+    bankrupt:  bool = False
+
+
+class _Book:
+    __slots__ = ("bids", "asks", "open")
+
+    def __init__(self) -> None:
+        self.bids: list[tuple[int, int, Order]] = []    # (-price, seq, order)
+        self.asks: list[tuple[int, int, Order]] = []    # ( price, seq, order)
+        self.open = {BID: 0, ASK: 0}
+
+    def push(self, order: Order) -> None:
+        if order.side == BID:
+            heapq.heappush(self.bids, (-order.price, order.seq, order))
+        else:
+            heapq.heappush(self.asks, (order.price, order.seq, order))
+        self.open[order.side] += 1
+
+    def best(self, side: str) -> Optional[Order]:
+        heap = self.bids if side == BID else self.asks
+        while heap and heap[0][2].status != OPEN:
+            heapq.heappop(heap)
+        return heap[0][2] if heap else None
+
+
+@dataclass
+class _Batch:
+    block:    int
+    matches:  list[MatchResult] = field(default_factory=list)
+    seconds:  float = 0.0
+
+
+class MatchEngine:
+    def __init__(
+        self,
+        *,
+        fee_bps: int = BURN_FEE_BPS,
+        max_matches: int = MAX_MATCHES,
+        history_blocks: int = MATCH_ENGINE_HISTORY_BLOCKS,
+        fee_balance: Optional[int] = None,
+    ) -> None:
+        self.fee_bps        = fee_bps
+        self.max_matches    = max_matches
+        self.history_blocks = max(1, history_blocks)
+        self.fee_balance    = fee_balance            # engine's GHOST balance; None = always burns
+        self._lock     = threading.RLock()
+        self._seq      = itertools.count(1)
+        self._books:   dict[str, _Book] = {}
+        self._orders:  dict[str, Order] = {}         # open orders only
+        self._expiry:  list[tuple[int, int, Order]] = []
+        self._batches: dict[int, _Batch] = {}        # block → batch, oldest first
+        self.accounts: dict[int, Account] = {}
+        self.current_block    = 0
+        self.last_batch_block = 0
+        self.total_trades     = 0
+        self.total_volume     = 0                    # GHOST wei
+        self.fees_burned      = 0
+        self.batch_count      = 0
+        self.batch_seconds    = 0.0
+        self.expired          = 0
+        self.cancelled        = 0
+        self.bankrupt_fills   = 0
+
+    # ── Orders (GhostMarket) ───────────────────────────────────────────────────
+    def post(
+        self,
+        agent_id: int,
+        commodity: str,
+        side: str,
+        price: int,
+        qty: int,
+        ttl_blocks: int = 0,
+        *,
+        block: Optional[int] = None,
+        order_id: Optional[str] = None,
+        timestamp: Optional[int] = None,
+    ) -> Order:
+        """GhostMarket.postOrder — price / qty in wei, ttl 0 = DEFAULT_TTL."""
+        if side not in (BID, ASK):
+            raise ValueError(f"unknown side: {side}")
+        if price <= 0:
+            raise ValueError("zero price")
+        if qty <= 0:
+            raise ValueError("zero qty")
+        ttl = ttl_blocks or DEFAULT_TTL
+        if ttl > MAX_TTL:
+            raise ValueError("TTL too long")
+        with self._lock:
+            block = self._block(block)
+            seq = next(self._seq)
+            order = Order(
+                order_id      = order_id or f"{block:x}-{seq:x}",
+                agent_id      = agent_id,
+                commodity     = commodity,
+                side          = side,
+                price         = price,
+                qty           = qty,
+                ttl_blocks    = ttl,
+                created_block = block,
+                created_at    = int(time.time()) if timestamp is None else timestamp,
+                seq           = seq,
+            )
+            if order.order_id in self._orders:
+                raise ValueError(f"duplicate order id: {order.order_id}")
+            self._orders[order.order_id] = order
+            self._book(commodity).push(order)
+            heapq.heappush(self._expiry, (order.expiry_block, seq, order))
+            return order
+
+    def cancel(self, order_id: str) -> Optional[Order]:
+        with self._lock:
+            order = self._orders.get(order_id)
+            if order is None:
+                return None
+            self._close(order, CANCELLED)
+            self.cancelled += 1
+            return order
+
+    def expire(self, block: Optional[int] = None) -> list[Order]:
+        """GhostMarket.expireOrders over every order past its TTL at `block`."""
+        out: list[Order] = []
+        with self._lock:
+            block = self._block(block)
+            while self._expiry and self._expiry[0][0] < block:
+                order = heapq.heappop(self._expiry)[2]
+                if order.status == OPEN:
+                    self._close(order, EXPIRED)
+                    out.append(order)
+            self.expired += len(out)
+        return out
+
+    def _close(self, order: Order, status: str) -> None:
+        order.status = status
+        del self._orders[order.order_id]
+        self._books[order.commodity].open[order.side] -= 1
+
+    def _fill(self, order: Order, qty: int) -> None:
+        order.filled_qty += qty
+        if order.filled_qty == order.qty:
+            self._close(order, MATCHED)
+
+    # ── Capital ────────────────────────────────────────────────────────────────
+    def seed_capital(self, agent_id: int, capital: int) -> Account:
+        """Start an agent's simulated capital; an existing account keeps its own."""
+        with self._lock:
+            account = self.accounts.get(agent_id)
+            if account is None:
+                account = self.accounts[agent_id] = Account(capital, bankrupt=capital == 0)
+            return account
+
+    def _settle(self, agent_bid: int, agent_ask: int, value: int, fee: int) -> None:
+        """_settleAgentCapitals — both DNAs are read before either update."""
+        bid_capital = self._account(agent_bid).capital
+        ask_capital = self._account(agent_ask).capital
+        bid_new = bid_capital - value - fee if bid_capital >= value + fee else 0
+        ask_new = ask_capital + value - fee
+        bid_won = ask_new > ask_capital
+        self._update_capital(agent_bid, bid_new, not bid_won)
+        self._update_capital(agent_ask, ask_new, True)
+
+    def _account(self, agent_id: int) -> Account:
+        account = self.accounts.get(agent_id)
+        if account is None:
+            account = self.accounts[agent_id] = Account(0)
+        return account
+
+    def _update_capital(self, agent_id: int, capital: int, won: bool) -> None:
+        account = self._account(agent_id)
+        if account.bankrupt:
+            self.bankrupt_fills += 1
+        account.capital = capital
+        if won:
+            account.wins += 1
+        else:
+            account.losses += 1
+        account.bankrupt = capital == 0
+
+    # ── Matching (MatchEngine) ─────────────────────────────────────────────────
+    def process_batch(
+        self,
+        commodities: Optional[Iterable[str]] = None,
+        max_matches: Optional[int] = None,
+        *,
+        block: Optional[int] = None,
+        timestamp: Optional[int] = None,
+    ) -> list[MatchResult]:
+        """Up to `max_matches` matches across `commodities` (default: every book) in order."""
+        max_matches = self.max_matches if max_matches is None else max_matches
+        if max_matches > self.max_matches:
+            raise ValueError("exceeds MAX_MATCHES")
+        started = time.perf_counter()
+        with self._lock:
+            block = self._block(block)
+            ts = int(time.time()) if timestamp is None else timestamp
+            batch = self._batches.get(block)
+            if batch is None:
+                batch = self._batches[block] = _Batch(block)
+                while len(self._batches) > self.history_blocks:
+                    del self._batches[next(iter(self._batches))]
+            count = 0
+            for commodity in list(self._books if commodities is None else commodities):
+                if count >= max_matches:
+                    break
+                count += self._match_commodity(commodity, max_matches - count, block, ts, batch.matches)
+            self.last_batch_block = block
+            self.batch_count += 1
+            elapsed = time.perf_counter() - started
+            batch.seconds += elapsed
+            self.batch_seconds += elapsed
+            return batch.matches[len(batch.matches) - count:]
+
+    def _match_commodity(
+        self, commodity: str, max_matches: int, block: int, ts: int, out: list[MatchResult],
+    ) -> int:
+        book = self._books.get(commodity)
+        if book is None:
+            return 0
+        count = 0
+        bid, ask = book.best(BID), book.best(ASK)
+        while bid is not None and ask is not None and bid.price >= ask.price and count < max_matches:
+            if block > bid.expiry_block or block > ask.expiry_block:
+                break
+            qty   = min(bid.remaining, ask.remaining)
+            price = bid.price                       # price-time: aggressor pays bid price
+            value = qty * price // WAD
+            fee   = value * self.fee_bps // 10_000
+            if fee > 0 and (self.fee_balance is None or self.fee_balance >= fee):
+                if self.fee_balance is not None:
+                    self.fee_balance -= fee
+                self.fees_burned += fee
+            self._fill(bid, qty)
+            self._fill(ask, qty)
+            self._settle(bid.agent_id, ask.agent_id, value, fee)
+            out.append(MatchResult(
+                bid.order_id, ask.order_id, bid.agent_id, ask.agent_id, commodity,
+                qty, price, fee, block, ts,
+            ))
+            self.total_trades += 1
+            self.total_volume += value
+            count += 1
+            bid, ask = book.best(BID), book.best(ASK)
+        return count
+
+    # ── Reads ──────────────────────────────────────────────────────────────────
+    def get(self, order_id: str) -> Optional[Order]:
+        return self._orders.get(order_id)
+
+    def matches_by_block(self, block: int) -> list[MatchResult]:
+        with self._lock:
+            batch = self._batches.get(block)
+            return list(batch.matches) if batch is not None else []
+
+    def queue(self, limit: int = 100, commodity: Optional[str] = None) -> list[dict]:
+        """Open orders closest to expiry first, with their TTL countdown."""
+        with self._lock:
+            orders = (o for o in self._orders.values() if commodity is None or o.commodity == commodity)
+            soonest = heapq.nsmallest(limit, orders, key=lambda o: (o.expiry_block, o.seq))
+            return [o.to_dict(self.current_block) for o in soonest]
+
+    def best(self, commodity: str) -> tuple[Optional[Order], Optional[Order]]:
+        with self._lock:
+            book = self._books.get(commodity)
+            return (book.best(BID), book.best(ASK)) if book is not None else (None, None)
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._orders)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "current_block":    self.current_block,
+                "last_batch_block": self.last_batch_block,
+                "queue_depth":      self.queue_depth,
+                "total_trades":     self.total_trades,
+                "total_volume":     str(self.total_volume),
+            }
+
+    def stats(self) -> dict:
+        with self._lock:
+            batches = self.batch_count or 1
+            return {
+                "orders":           self.queue_depth,
+                "books":            {c: dict(b.open) for c, b in self._books.items()},
+                "batches":          self.batch_count,
+                "trades":           self.total_trades,
+                "trades_per_batch": round(self.total_trades / batches, 3),
+                "avg_batch_ms":     round(self.batch_seconds / batches * 1000, 3),
+                "fees_burned":      str(self.fees_burned),
+                "expired":          self.expired,
+                "cancelled":        self.cancelled,
+                "accounts":         len(self.accounts),
+                "bankrupt_fills":   self.bankrupt_fills,
+            }
+
+    # ── Internals ──────────────────────────────────────────────────────────────
+    def _block(self, block: Optional[int]) -> int:
+        if block is not None:
+            self.current_block = max(self.current_block, block)
+            return block
+        return self.current_block
+
+    def _book(self, commodity: str) -> _Book:
+        book = self._books.get(commodity)
+        if book is None:
+            book = self._books[commodity] = _Book()
+        return book
+
+
+_match_engine = MatchEngine()
+
+
+def get_match_engine() -> MatchEngine:
+    return _match_engine
@@ -0,0 +1,284 @@
+"""
+Order book — in-memory L2 books per commodity.
+
+Resting orders are aggregated into price levels. Each side keeps a dict
+price → level plus a heap of level prices (max-heap for bids, min-heap for
+asks): a level is found in O(1), creating one pushes in O(log n), and an
+emptied level is only deleted from the dict — its heap entry is dropped
+lazily once it reaches the top. The best bid / ask is the heap top. Orders
+expire by TTL through a min-heap of expiry times.
+
+Every level change is recorded; diffs() drains them as one message per
+commodity with a sequence number. Level entries are absolute
+([price, qty, orders], qty 0 = level removed), so a diff whose changes are
+already in a snapshot can be applied again safely:
+
+    {"commodity": "ETH", "seq": 42, "prev_seq": 41,
+     "bids": [[3199.5, 1.25, 3]], "asks": [[3201.0, 0, 0]]}
+
+Orders come from agent BID/ASK decisions today and map one-to-one onto
+GhostMarket's OrderPosted / OrderFilled / OrderCancelled / OrderExpired.
+"""
+from __future__ import annotations
+
+import heapq
+import math
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+ORDERBOOK_PRICE_DIGITS = int(os.getenv("ORDERBOOK_PRICE_DIGITS", "6"))   # significant digits per level
+
+BID = "BID"
+ASK = "ASK"
+
+
+def level_price(price: float, digits: int = ORDERBOOK_PRICE_DIGITS) -> float:
+    """Round a price to `digits` significant digits — the level it rests on."""
+    if price <= 0 or not math.isfinite(price):
+        return 0.0
+    return float(round(price, digits - 1 - math.floor(math.log10(price))))
+
+
+@dataclass
+class RestingOrder:
+    order_id:   str
+    agent_id:   str
+    commodity:  str
+    side:       str
+    price:      float           # level price
+    qty:        float           # remaining
+    expires_at: float
+
+
+class _Side:
+    __slots__ = ("levels", "heap", "sign", "orders")
+
+    def __init__(self, descending: bool) -> None:
+        self.levels: dict[float, list] = {}     # price → [qty, orders]
+        self.heap: list[float] = []             # sign * price; may hold emptied levels
+        self.sign   = -1.0 if descending else 1.0
+        self.orders = 0
+
+    def add(self, price: float, qty: float, orders: int) -> list:
+        level = self.levels.get(price)
+        if level is None:
+            level = self.levels[price] = [0.0, 0]
+            heapq.heappush(self.heap, self.sign * price)
+            if len(self.heap) > 2 * len(self.levels) + 16:
+                # Mostly stale entries: rebuild, amortized O(1) per push
+                self.heap = [self.sign * p for p in self.levels]
+                heapq.heapify(self.heap)
+        level[0] += qty
+        level[1] += orders
+        self.orders += orders
+        if level[1] <= 0:
+            del self.levels[price]              # heap entry goes when it surfaces
+            return [price, 0, 0]
+        return [price, round(level[0], 12), level[1]]
+
+    def best(self) -> Optional[float]:
+        heap = self.heap
+        while heap and self.sign * heap[0] not in self.levels:
+            heapq.heappop(heap)
+        return self.sign * heap[0] if heap else None
+
+    def top(self, n: int) -> list[list]:
+        out: list[list] = []
+        seen: set[float] = set()
+        # A re-created level can leave a duplicate entry behind; skip stale and repeated prices
+        for key in heapq.nsmallest(n + len(self.heap) - len(self.levels), self.heap):
+            price = self.sign * key
+            if price in self.levels and price not in seen:
+                seen.add(price)
+                out.append([price, round(self.levels[price][0], 12), self.levels[price][1]])
+                if len(out) == n:
+                    break
+        return out
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+
+class OrderBook:
+    def __init__(self, commodity: str, digits: int = ORDERBOOK_PRICE_DIGITS) -> None:
+        self.commodity = commodity
+        self.digits    = digits
+        self.bids      = _Side(descending=True)
+        self.asks      = _Side(descending=False)
+        self.seq       = 0
+        self._changes: dict[tuple[str, float], list] = {}   # pending diff, last state per level
+
+    def _side(self, side: str) -> _Side:
+        return self.bids if side == BID else self.asks
+
+    def apply(self, side: str, price: float, qty: float, orders: int) -> None:
+        self._changes[(side, price)] = self._side(side).add(price, qty, orders)
+
+    @property
+    def best_bid(self) -> Optional[float]:
+        return self.bids.best()
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        return self.asks.best()
+
+    def order_count(self, side: str) -> int:
+        return self._side(side).orders
+
+    def snapshot(self, depth: int) -> dict:
+        return {
+            "commodity": self.commodity,
+            "seq":       self.seq,
+            "bids":      self.bids.top(depth),
+            "asks":      self.asks.top(depth),
+        }
+
+    def spread(self) -> dict:
+        bid, ask = self.best_bid, self.best_ask
+        mid = (bid + ask) / 2 if bid is not None and ask is not None else (bid or ask or 0.0)
+        return {
+            "best_bid":   bid or 0.0,
+            "best_ask":   ask or 0.0,
+            "mid_price":  mid,
+            "spread_pct": (ask - bid) / mid * 100 if bid is not None and ask is not None and mid else 0.0,
+        }
+
+    def diff(self) -> Optional[dict]:
+        if not self._changes:
+            return None
+        changes, self._changes = self._changes, {}
+        self.seq += 1
+        return {
+            "commodity": self.commodity,
+            "seq":       self.seq,
+            "prev_seq":  self.seq - 1,
+            "bids":      sorted((lvl for (s, _), lvl in changes.items() if s == BID), reverse=True),
+            "asks":      sorted(lvl for (s, _), lvl in changes.items() if s == ASK),
+        }
+
+
+class OrderBooks:
+    """All commodity books plus the resting orders behind their levels."""
+
+    def __init__(self, digits: int = ORDERBOOK_PRICE_DIGITS) -> None:
+        self.digits  = digits
+        self._lock   = threading.RLock()
+        self._books: dict[str, OrderBook] = {}
+        self._orders: dict[str, RestingOrder] = {}
+        self._expiry: list[tuple[float, str]] = []      # (expires_at, order_id) min-heap
+        self.posted    = 0
+        self.filled    = 0
+        self.cancelled = 0
+        self.expired   = 0
+
+    def book(self, commodity: str) -> OrderBook:
+        """Book for a write path, created on first order. Reads use _books.get()."""
+        book = self._books.get(commodity)
+        if book is None:
+            book = self._books[commodity] = OrderBook(commodity, self.digits)
+        return book
+
+    def __contains__(self, commodity: str) -> bool:
+        return commodity in self._books
+
+    # ── Order events (GhostMarket semantics) ───────────────────────────────────
+    def post(
+        self, order_id: str, agent_id: str, commodity: str, side: str,
+        price: float, qty: float, expires_at: float,
+    ) -> Optional[RestingOrder]:
+        price = level_price(price, self.digits)
+        if side not in (BID, ASK) or price <= 0 or not qty > 0:
+            return None
+        with self._lock:
+            if order_id in self._orders:
+                return self._orders[order_id]
+            order = RestingOrder(order_id, str(agent_id), commodity, side, price, qty, expires_at)
+            self._orders[order_id] = order
+            heapq.heappush(self._expiry, (expires_at, order_id))
+            self.book(commodity).apply(side, price, qty, 1)
+            self.posted += 1
+            return order
+
+    def fill(self, order_id: str, qty: float) -> Optional[RestingOrder]:
+        """Partial or full fill; a fully filled order leaves the book."""
+        with self._lock:
+            order = self._orders.get(order_id)
+            if order is None or qty <= 0:
+                return None
+            qty = min(qty, order.qty)
+            order.qty -= qty
+            done = order.qty <= 1e-12
+            self.book(order.commodity).apply(order.side, order.price, -qty, -1 if done else 0)
+            if done:
+                del self._orders[order_id]
+            self.filled += 1
+            return order
+
+    def cancel(self, order_id: str) -> Optional[RestingOrder]:
+        with self._lock:
+            order = self._remove(order_id)
+            if order is not None:
+                self.cancelled += 1
+            return order
+
+    def expire(self, now: float) -> list[RestingOrder]:
+        """Drop every order whose TTL ran out by `now`."""
+        out: list[RestingOrder] = []
+        with self._lock:
+            while self._expiry and self._expiry[0][0] <= now:
+                _, order_id = heapq.heappop(self._expiry)
+                order = self._remove(order_id)      # already filled / cancelled → None
+                if order is not None:
+                    out.append(order)
+            self.expired += len(out)
+        return out
+
+    def _remove(self, order_id: str) -> Optional[RestingOrder]:
+        order = self._orders.pop(order_id, None)
+        if order is not None:
+            self.book(order.commodity).apply(order.side, order.price, -order.qty, -1)
+        return order
+
+    # ── Reads ──────────────────────────────────────────────────────────────────
+    def get(self, order_id: str) -> Optional[RestingOrder]:
+        return self._orders.get(order_id)
+
+    def snapshot(self, commodity: str, depth: int = 20) -> dict:
+        with self._lock:
+            book = self._books.get(commodity)
+            if book is None:
+                return {"commodity": commodity, "seq": 0, "bids": [], "asks": []}
+            return book.snapshot(depth)
+
+    def spread(self, commodity: str) -> dict:
+        with self._lock:
+            book = self._books.get(commodity)
+            if book is None:
+                return {"commodity": commodity, "best_bid": 0.0, "best_ask": 0.0, "mid_price": 0.0, "spread_pct": 0.0}
+            return {"commodity": commodity, **book.spread()}
+
+    def diffs(self) -> list[dict]:
+        """Drain pending level changes: one sequenced diff per changed book."""
+        with self._lock:
+            return [d for d in (book.diff() for book in self._books.values()) if d is not None]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "books":     len(self._books),
+                "orders":    len(self._orders),
+                "levels":    sum(len(b.bids) + len(b.asks) for b in self._books.values()),
+                "posted":    self.posted,
+                "filled":    self.filled,
+                "cancelled": self.cancelled,
+                "expired":   self.expired,
+            }
+
+
+_order_books = OrderBooks()
+
+
+def get_order_books() -> OrderBooks:
+    return _order_books
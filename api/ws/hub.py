@@ -6,7 +6,8 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
-from collections import defaultdict
+import os
+from collections import defaultdict, deque
 from typing import Any
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
@@ -19,42 +20,259 @@ websocket_router = APIRouter()
 _subscribers: dict[str, set[WebSocket]] = defaultdict(set)
 _lock = asyncio.Lock()
 
+# ── Outbound queue config ──────────────────────────────────────────────────────
+SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+SEND_TIMEOUT    = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "10"))
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_CONFLATE    = "conflate"     # keep only the newest pending message per channel
+OVERFLOW_DISCONNECT  = "disconnect"   # slow consumer gets kicked
+OVERFLOW_POLICY = os.getenv("WS_OVERFLOW_POLICY", OVERFLOW_DROP_OLDEST)
+
+# ── Coalescing ─────────────────────────────────────────────────────────────────
+# publish() buffers events per channel; flush() (end of tick, or after the
+# window) sends them as one {"type": "batch", "channel", "items"} frame.
+# Clients subscribed with mode=single still get one frame per event.
+COALESCE_WINDOW = float(os.getenv("WS_COALESCE_WINDOW_MS", "250")) / 1000
+MODE_BATCH  = "batch"
+MODE_SINGLE = "single"
+
+_CONTROL = ""   # channel tag for per-client control frames (acks, ping, errors)
+
+
+class _Client:
+    """One connection's bounded outbound queue, drained by a dedicated writer task."""
+
+    def __init__(self, ws: WebSocket, mgr: "ConnectionManager") -> None:
+        self.ws      = ws
+        self._mgr    = mgr
+        self._queue: deque[tuple[str, str]] = deque()
+        self._wakeup = asyncio.Event()
+        self.closed  = False
+        self.single_channels: set[str] = set()   # channels subscribed with mode=single
+        self.task    = asyncio.create_task(self._writer())
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def enqueue(self, channel: str, payload: str) -> None:
+        if self.closed:
+            return
+        # Control frames count toward the bound too, but are never the ones dropped
+        if len(self._queue) >= self._mgr.queue_size and not self._make_room(channel):
+            return
+        self._queue.append((channel, payload))
+        self._mgr._pending[channel] += 1
+        self._wakeup.set()
+
+    def _make_room(self, channel: str) -> bool:
+        """Free one slot for a `channel` frame; False if the frame must not be queued."""
+        policy = self._mgr.overflow_policy
+        if policy == OVERFLOW_DISCONNECT:
+            self._kick(channel)
+            return False
+        victim = None
+        if policy == OVERFLOW_CONFLATE and channel != _CONTROL:
+            victim = next((i for i, (ch, _) in enumerate(self._queue) if ch == channel), None)
+        if victim is None:
+            victim = next((i for i, (ch, _) in enumerate(self._queue) if ch != _CONTROL), None)
+        if victim is None:
+            # Only control frames pending: drop the new event, or kick a client that reads nothing
+            if channel == _CONTROL:
+                self._kick(channel)
+            else:
+                self._mgr._dropped[channel] += 1
+            return False
+        old_channel, _ = self._queue[victim]
+        del self._queue[victim]
+        self._mgr._pending[old_channel] -= 1
+        self._mgr._dropped[old_channel] += 1
+        return True
+
+    def _kick(self, channel: str) -> None:
+        self.closed = True
+        self._mgr._dropped[channel] += 1
+        self._mgr._kicked += 1
+        asyncio.create_task(self._mgr.disconnect_all(self.ws, reason="slow consumer"))
+
+    async def _writer(self) -> None:
+        try:
+            while True:
+                while not self._queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                channel, payload = self._queue.popleft()
+                self._mgr._pending[channel] -= 1
+                await asyncio.wait_for(self.ws.send_text(payload), timeout=SEND_TIMEOUT)
+                self._mgr._sent[channel] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # noqa: BLE001
+            logger.info("WS writer stopped: %s", exc)
+            asyncio.create_task(self._mgr.disconnect_all(self.ws))
+
+    def close(self) -> None:
+        self.closed = True
+        for channel, _ in self._queue:
+            self._mgr._pending[channel] -= 1
+        self._queue.clear()
+        if self.task is not asyncio.current_task():
+            self.task.cancel()
+
 
 class ConnectionManager:
-    async def connect(self, ws: WebSocket, channel: str) -> None:
-        await ws.accept()
+    def __init__(
+        self, queue_size: int = SEND_QUEUE_SIZE, overflow_policy: str = OVERFLOW_POLICY
+    ) -> None:
+        self.queue_size      = max(1, queue_size)
+        self.overflow_policy = overflow_policy
+        self._clients: dict[WebSocket, _Client] = {}
+        self._pending: dict[str, int] = defaultdict(int)
+        self._sent:    dict[str, int] = defaultdict(int)
+        self._dropped: dict[str, int] = defaultdict(int)
+        self._kicked = 0
+        self._batches: dict[str, list] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._events_coalesced = 0
+
+    def register(self, ws: WebSocket) -> _Client:
+        client = self._clients.get(ws)
+        if client is None:
+            client = self._clients[ws] = _Client(ws, self)
+        return client
+
+    def set_mode(self, ws: WebSocket, channel: str, mode: str) -> None:
+        client = self.register(ws)
+        if mode == MODE_SINGLE:
+            client.single_channels.add(channel)
+        else:
+            client.single_channels.discard(channel)
+
+    async def subscribe(self, ws: WebSocket, channel: str, mode: str = MODE_BATCH) -> None:
+        self.set_mode(ws, channel, mode)
         async with _lock:
             _subscribers[channel].add(ws)
-        logger.info("WS connected: channel=%s total=%d", channel, len(_subscribers[channel]))
 
     async def disconnect(self, ws: WebSocket, channel: str) -> None:
         async with _lock:
             _subscribers[channel].discard(ws)
 
-    async def broadcast(self, channel: str, data: Any) -> None:
-        payload = json.dumps(data)
-        dead: list[WebSocket] = []
-        for ws in list(_subscribers.get(channel, [])):
+    async def disconnect_all(self, ws: WebSocket, reason: str = "") -> None:
+        """Unsubscribe from every channel, stop the writer and close the socket."""
+        client = self._clients.pop(ws, None)
+        async with _lock:
+            for subs in _subscribers.values():
+                subs.discard(ws)
+        if client is None:
+            return
+        client.close()
+        if reason:
+            logger.warning("WS disconnected (%s)", reason)
             try:
-                await ws.send_text(payload)
+                await ws.close(code=1013, reason=reason)
             except Exception:  # noqa: BLE001
-                dead.append(ws)
-        for ws in dead:
-            await self.disconnect(ws, channel)
+                pass
+
+    def send(self, ws: WebSocket, data: Any) -> None:
+        """Queue a control frame for one client (bounded like any frame, never dropped by the overflow policy)."""
+        client = self._clients.get(ws)
+        if client is not None:
+            client.enqueue(_CONTROL, json.dumps(data))
+
+    async def broadcast(self, channel: str, data: Any) -> None:
+        """Serialise once and enqueue for every subscriber — returns without awaiting sends."""
+        subscribers = _subscribers.get(channel)
+        if not subscribers:
+            return
+        payload = json.dumps(data)
+        for ws in list(subscribers):
+            client = self._clients.get(ws)
+            if client is not None:
+                client.enqueue(channel, payload)
+
+    def publish(self, channel: str, data: Any) -> None:
+        """Buffer an event for the channel's next coalesced frame."""
+        if not _subscribers.get(channel):
+            return
+        self._batches.setdefault(channel, []).append(data)
+        if self._flush_handle is None:
+            if COALESCE_WINDOW <= 0:
+                self.flush()
+            else:
+                loop = asyncio.get_running_loop()
+                self._flush_handle = loop.call_later(COALESCE_WINDOW, self.flush)
+
+    def flush(self) -> int:
+        """Send every buffered channel as one batch frame. Returns frames built."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batches, self._batches = self._batches, {}
+        frames = 0
+        for channel, items in batches.items():
+            batch_payload: str | None = None
+            single_payloads: list[str] | None = None
+            for ws in list(_subscribers.get(channel, ())):
+                client = self._clients.get(ws)
+                if client is None:
+                    continue
+                if channel in client.single_channels:
+                    if single_payloads is None:
+                        single_payloads = [json.dumps(item) for item in items]
+                    for payload in single_payloads:
+                        client.enqueue(channel, payload)
+                else:
+                    if batch_payload is None:
+                        batch_payload = json.dumps(
+                            {"type": "batch", "channel": channel, "items": items}
+                        )
+                    client.enqueue(channel, batch_payload)
+            frames += 1
+            self._events_coalesced += len(items)
+        return frames
+
+    def stats(self) -> dict:
+        channels = set(_subscribers) | set(self._sent) | set(self._dropped)
+        channels.discard(_CONTROL)
+        return {
+            "clients":         len(self._clients),
+            "overflow_policy": self.overflow_policy,
+            "queue_size":      self.queue_size,
+            "kicked":          self._kicked,
+            "events_coalesced": self._events_coalesced,
+            "max_client_depth": max((len(c) for c in self._clients.values()), default=0),
+            "channels": {
+                ch: {
+                    "subscribers": len(_subscribers.get(ch, ())),
+                    "queue_depth": self._pending.get(ch, 0),
+                    "sent":        self._sent.get(ch, 0),
+                    "dropped":     self._dropped.get(ch, 0),
+                }
+                for ch in sorted(channels)
+            },
+        }
 
 
 manager = ConnectionManager()
 
 
+@websocket_router.get("/ws/stats")
+async def websocket_stats() -> dict:
+    """Per-channel queue depth, sent and dropped counters."""
+    return manager.stats()
+
+
 # ── WebSocket Endpoint ─────────────────────────────────────────────────────────
 @websocket_router.websocket("/ws")
-async def websocket_endpoint(ws: WebSocket, channels: str = "") -> None:
+async def websocket_endpoint(ws: WebSocket, channels: str = "", mode: str = MODE_BATCH) -> None:
     """
     Multiplex WebSocket.
     ?channels=channel1,channel2 ile otomatik subscribe olur.
     Client ayrıca { "subscribe": "channel_name" } gönderebilir.
+    Tick olayları varsayılan olarak { "type": "batch", "items": [...] } frame'i ile gelir;
+    ?mode=single veya { "subscribe": ..., "mode": "single" } ile olay başına bir frame alınır.
     """
     await ws.accept()
+    manager.register(ws)   # giden mesajlar bu client'ın kuyruğundan yazılır
     active_channels: set[str] = set()
 
     # Query parametresi ile gelen kanalları otomatik subscribe et
@@ -62,10 +280,9 @@ async def websocket_endpoint(ws: WebSocket, channels: str = "") -> None:
         for ch in channels.split(","):
             ch = ch.strip()
             if ch:
-                async with _lock:
-                    _subscribers[ch].add(ws)
+                await manager.subscribe(ws, ch, mode)
                 active_channels.add(ch)
-                logger.info("Auto-subscribed: channel=%s", ch)
+                logger.info("Auto-subscribed: channel=%s mode=%s", ch, mode)
 
     try:
         while True:
@@ -73,38 +290,36 @@ async def websocket_endpoint(ws: WebSocket, channels: str = "") -> None:
                 raw = await asyncio.wait_for(ws.receive_text(), timeout=30)
             except asyncio.TimeoutError:
                 # Heartbeat ping
-                await ws.send_text(json.dumps({"type": "ping"}))
+                manager.send(ws, {"type": "ping"})
                 continue
 
             try:
                 msg = json.loads(raw)
             except json.JSONDecodeError:
-                await ws.send_text(json.dumps({"error": "Invalid JSON"}))
+                manager.send(ws, {"error": "Invalid JSON"})
                 continue
 
             channel = _resolve_channel(msg)
 
             if not channel:
-                await ws.send_text(json.dumps({"error": "Unknown channel"}))
+                manager.send(ws, {"error": "Unknown channel"})
                 continue
 
             if "subscribe" in msg:
-                async with _lock:
-                    _subscribers[channel].add(ws)
+                await manager.subscribe(ws, channel, msg.get("mode", MODE_BATCH))
                 active_channels.add(channel)
-                await ws.send_text(json.dumps({"subscribed": channel}))
+                manager.send(ws, {"subscribed": channel})
 
             elif "unsubscribe" in msg:
                 async with _lock:
                     _subscribers[channel].discard(ws)
                 active_channels.discard(channel)
-                await ws.send_text(json.dumps({"unsubscribed": channel}))
+                manager.send(ws, {"unsubscribed": channel})
 
     except WebSocketDisconnect:
-        for ch in active_channels:
-            async with _lock:
-                _subscribers[ch].discard(ws)
         logger.info("WS disconnected, cleaned %d channels", len(active_channels))
+    finally:
+        await manager.disconnect_all(ws)
 
 
 def _resolve_channel(msg: dict) -> str | None:
@@ -127,7 +342,7 @@ def _resolve_channel(msg: dict) -> str | None:
 
 # ── Broadcast helpers used by background tasks ─────────────────────────────────
 async def broadcast_trade(trade: dict) -> None:
-    await manager.broadcast("market.trades", {"type": "trade", "data": trade})
+    manager.publish("market.trades", {"type": "trade", "data": trade})
 
 
 async def broadcast_orderbook(commodity: str, diff: dict) -> None:
@@ -149,7 +364,7 @@ async def broadcast_lifecycle(agent_id: int, old_state: str, new_state: str) ->
 
 
 async def broadcast_decision(decision: dict) -> None:
-    await manager.broadcast("agent.decisions", {"type": "decision", "data": decision})
+    manager.publish("agent.decisions", {"type": "decision", "data": decision})
 
 
 async def broadcast_burn(amount: str, total: str) -> None:
@@ -0,0 +1,183 @@
+"""
+Ghost Broker — Match Engine Benchmark
+-------------------------------------
+api/services/match_engine.py simülatörünü büyük açık emir defterlerinde
+koşar. Her commodity için mid fiyat etrafında normal dağılımlı BID/ASK
+emirleri üretilir, sonra defter MAX_MATCHES'lik batch'lerle boşaltılır.
+
+Ölçülenler (defter boyutu başına):
+    emir ekleme hızı, batch süresi p50/p95/max, eşleşme/sn, expire taraması
+
+--check ile sonuçlar, sözleşmedeki gibi her eşleşmeden sonra tüm defteri
+tarayan doğrusal bir referansla (küçük bir defterde) birebir karşılaştırılır.
+
+Kullanım:
+    python benchmarks/match_engine.py                          # 1k/10k/100k açık emir
+    python benchmarks/match_engine.py --sizes 100000 --batches 50 --out engine.json
+    python benchmarks/match_engine.py --check 2000
+
+Sonuç stdout'a tek bir JSON dokümanı olarak yazılır (ve --out verilirse
+dosyaya); özet tablo stderr'e gider.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.services.match_engine import (  # noqa: E402
+    ASK, BID, MAX_MATCHES, OPEN, WAD, MatchEngine, to_wei,
+)
+
+MIDS = {"GHOST_ORE": 1.0, "PHANTOM_GAS": 0.05, "VOID_CHIP": 12.5, "MON_USDC": 1.15}
+
+
+def _orders(n: int, seed: int, agents: int) -> list[tuple]:
+    rng = random.Random(seed)
+    commodities = list(MIDS)
+    out = []
+    for _ in range(n):
+        commodity = rng.choice(commodities)
+        side = BID if rng.random() < 0.5 else ASK
+        mid = MIDS[commodity]
+        # Spread ortada hafif kesişir: her batch eşleşme bulur
+        price = mid * (1 + rng.gauss(0.002 if side == BID else -0.002, 0.01))
+        out.append((
+            rng.randrange(agents), commodity, side,
+            to_wei(round(max(price, mid * 0.5), 6)), to_wei(round(rng.uniform(0.1, 5.0), 3)),
+            rng.randint(50, 7200),
+        ))
+    return out
+
+
+def _percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def bench(n: int, batches: int, seed: int, agents: int) -> dict:
+    orders = _orders(n, seed, agents)
+    engine = MatchEngine()
+    for agent in range(agents):
+        engine.seed_capital(agent, 10_000 * WAD)
+
+    started = time.perf_counter()
+    for agent, commodity, side, price, qty, ttl in orders:
+        engine.post(agent, commodity, side, price, qty, ttl, block=1)
+    post_s = time.perf_counter() - started
+
+    durations, matched = [], 0
+    for block in range(2, 2 + batches):
+        t0 = time.perf_counter()
+        count = len(engine.process_batch(block=block))
+        durations.append(time.perf_counter() - t0)
+        matched += count
+        if count == 0:
+            break                   # defter artık kesişmiyor
+
+    t0 = time.perf_counter()
+    expired = len(engine.expire(block=10_000))
+    expire_s = time.perf_counter() - t0
+
+    total = sum(durations)
+    return {
+        "open_orders":     n,
+        "posts_per_s":     round(n / post_s),
+        "batches":         len(durations),
+        "matches":         matched,
+        "batch_ms_p50":    round(_percentile(durations, 0.50) * 1000, 3),
+        "batch_ms_p95":    round(_percentile(durations, 0.95) * 1000, 3),
+        "batch_ms_max":    round(max(durations) * 1000, 3),
+        "matches_per_s":   round(matched / total) if total else 0,
+        "expired":         expired,
+        "expire_ms":       round(expire_s * 1000, 3),
+        "stats":           engine.stats(),
+    }
+
+
+# ── Reference ──────────────────────────────────────────────────────────────────
+def _reference(orders: list[tuple], max_matches: int, block: int) -> list[tuple]:
+    """
+    _matchCommodity as written in MatchEngine.sol: linear best-bid / best-ask
+    scan, repeated after every fill. Ties go to the oldest order, the
+    simulator's price-time rule.
+    """
+    book = [
+        {"id": i, "agent": a, "commodity": c, "side": s, "price": p, "qty": q, "filled": 0,
+         "status": OPEN, "expiry": 1 + ttl}
+        for i, (a, c, s, p, q, ttl) in enumerate(orders)
+    ]
+    out, count = [], 0
+    for commodity in dict.fromkeys(o["commodity"] for o in book):
+        def best(side: str):
+            live = [o for o in book if o["commodity"] == commodity and o["side"] == side and o["status"] == OPEN]
+            if not live:
+                return None
+            if side == BID:
+                return max(live, key=lambda o: (o["price"], -o["id"]))
+            return min(live, key=lambda o: (o["price"], o["id"]))
+
+        bid, ask = best(BID), best(ASK)
+        while bid and ask and bid["price"] >= ask["price"] and count < max_matches:
+            if block > bid["expiry"] or block > ask["expiry"]:
+                break
+            qty = min(bid["qty"] - bid["filled"], ask["qty"] - ask["filled"])
+            for o in (bid, ask):
+                o["filled"] += qty
+                if o["filled"] == o["qty"]:
+                    o["status"] = "MATCHED"
+            value = qty * bid["price"] // WAD
+            out.append((bid["id"], ask["id"], qty, bid["price"], value * 10 // 10_000))
+            count += 1
+            bid, ask = best(BID), best(ASK)
+    return out
+
+
+def check(n: int, seed: int, agents: int) -> dict:
+    orders = _orders(n, seed, agents)
+    engine = MatchEngine()
+    ids = {engine.post(a, c, s, p, q, ttl, block=1).order_id: i for i, (a, c, s, p, q, ttl) in enumerate(orders)}
+    got = [
+        (ids[m.bid_order_id], ids[m.ask_order_id], m.matched_qty, m.matched_price, m.fee_burned)
+        for m in engine.process_batch(block=2)
+    ]
+    want = _reference(orders, MAX_MATCHES, 2)
+    return {"orders": n, "matches": len(got), "identical": got == want}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ghost Broker match engine benchmark")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="açık emir sayıları (virgülle)")
+    parser.add_argument("--batches", type=int, default=20, help="defter başına batch sayısı")
+    parser.add_argument("--agents", type=int, default=1000, help="emirlerin dağıldığı agent sayısı")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check", type=int, default=0, help="doğrusal referansla karşılaştırma (emir sayısı)")
+    parser.add_argument("--out", help="JSON sonucu ayrıca bu dosyaya yaz")
+    args = parser.parse_args()
+
+    document: dict = {"max_matches": MAX_MATCHES, "results": []}
+    if args.check:
+        document["check"] = check(args.check, args.seed, args.agents)
+        print(f"check: {document['check']}", file=sys.stderr)
+    for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+        result = bench(size, args.batches, args.seed, args.agents)
+        document["results"].append(result)
+        print(
+            f"{size:>8} emir | post {result['posts_per_s']:>8}/s | batch p50 {result['batch_ms_p50']:>8} ms "
+            f"p95 {result['batch_ms_p95']:>8} ms | {result['matches_per_s']:>7} eşleşme/s",
+            file=sys.stderr,
+        )
+
+    text = json.dumps(document, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
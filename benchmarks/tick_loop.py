@@ -0,0 +1,431 @@
+"""
+Ghost Broker — Tick Loop Benchmark
+----------------------------------
+Sentetik agent popülasyonları (3 stratejiye dağılmış) üretir ve iki tick
+döngüsünü ağ olmadan uçtan uca koşar:
+
+    api      api.main._agent_ticker — kural motoru, cache, batch, WS yayını, log
+    runner   run_agents.run         — orchestrator döngüsü
+
+Sahte parçalar: LLM_BACKEND=fake (agents/llm_backend.py — ayarlı gecikme ve
+hata oranı), CoinGecko / Monoracle yerine sabit tohumlu fiyatlar ve her
+yayını sayan sahte bir WebSocket client'ı. Her (hedef, popülasyon) ayrı bir
+alt süreçte koşar; modül singleton'ları ve bellek ölçümü birbirine karışmaz.
+
+Ölçülenler (tick başına):
+    tick süresi p50/p95/p99/max, agent/sn, diske yazılan byte, event-loop
+    bloklanma süresi, agent başına RSS, WS frame/byte, LLM çağrıları
+
+Kullanım:
+    python benchmarks/tick_loop.py                                # api+runner, 100/1k/10k agent
+    python benchmarks/tick_loop.py --sizes 100,1000,10000,100000 --ticks 3 --out bench.json
+    python benchmarks/tick_loop.py --targets api --llm-latency fixed:0.2 --llm-error-rate 0.05
+    python benchmarks/tick_loop.py --generate 5000 data/agents.json   # sadece popülasyon yaz
+
+Sonuç stdout'a tek bir JSON dokümanı olarak yazılır (ve --out verilirse
+dosyaya); özet tablo stderr'e gider. Agent logları ölçüm sırasında
+yakalanır ama yazdırılmaz.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parent.parent
+
+STRATEGIES  = ("AGGRESSIVE", "BALANCED", "CONSERVATIVE")
+API_PRICES  = {"ETH": 3200.0, "SOL": 145.0, "MATIC": 0.72, "BNB": 590.0, "MON": 1.15}
+
+LAG_INTERVAL  = 0.005    # event-loop lag probe period
+LAG_THRESHOLD = 0.002    # lag above this counts as blocking
+
+
+# ── Population ─────────────────────────────────────────────────────────────────
+def generate_population(n: int, seed: int = 0, wei: bool = True) -> list[dict]:
+    """
+    n agents spread over the three strategies. `wei=True` writes capital the
+    way the API registry stores it (wei strings); run_agents reads USD floats.
+    """
+    rng = random.Random(seed)
+    agents = []
+    for token_id in range(1, n + 1):
+        capital = round(rng.lognormvariate(4.6, 0.8), 4)          # ~100 USD median
+        initial = round(capital * rng.uniform(0.7, 1.3), 4)
+        agents.append({
+            "token_id":        token_id,
+            "name":            f"Bench #{token_id}",
+            "strategy":        STRATEGIES[rng.randrange(3)],
+            "risk_appetite":   rng.randint(0, 100),
+            "capital":         str(int(capital * 1e18)) if wei else capital,
+            "initial_capital": str(int(initial * 1e18)) if wei else initial,
+            "owner_address":   f"0x{rng.getrandbits(160):040x}",
+            "state":           "ACTIVE",
+        })
+    return agents
+
+
+def write_population(path: Path, n: int, seed: int = 0, wei: bool = True) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(generate_population(n, seed, wei)))
+
+
+# ── Measurements ───────────────────────────────────────────────────────────────
+class _TickClock(logging.Handler):
+    """Timestamps the loop's own 'Tick #N' log line; other records are swallowed."""
+
+    def __init__(self, marker: str) -> None:
+        super().__init__()
+        self.marker = marker
+        self.starts: list[float] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if isinstance(record.msg, str) and record.msg.startswith(self.marker):
+            self.starts.append(time.perf_counter())
+
+
+class _LoopLag:
+    def __init__(self) -> None:
+        self.blocked = 0.0
+        self.worst   = 0.0
+        self.samples = 0
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(LAG_INTERVAL)
+            lag = loop.time() - started - LAG_INTERVAL
+            self.samples += 1
+            if lag > LAG_THRESHOLD:
+                self.blocked += lag
+                self.worst = max(self.worst, lag)
+
+
+class _FakeWebSocket:
+    """Stands in for a browser subscribed to the decision and trade channels."""
+
+    def __init__(self) -> None:
+        self.frames = 0
+        self.bytes  = 0
+
+    async def accept(self) -> None:
+        return None
+
+    async def send_text(self, payload: str) -> None:
+        self.frames += 1
+        self.bytes  += len(payload.encode())
+
+    async def close(self, code: int = 1000, reason: str = "") -> None:
+        return None
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _write_syscall_bytes() -> int:
+    try:
+        with open("/proc/self/io") as fh:
+            return next(int(line.split()[1]) for line in fh if line.startswith("wchar"))
+    except (OSError, StopIteration):
+        return 0
+
+
+def _tree_bytes(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def _capture(logger_name: str, marker: str) -> _TickClock:
+    logging.getLogger().setLevel(logging.WARNING)
+    for handler in list(logging.getLogger().handlers):
+        handler.setLevel(logging.ERROR)
+    clock = _TickClock(marker)
+    log = logging.getLogger(logger_name)
+    log.handlers[:] = [clock]
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    return clock
+
+
+# ── Targets ────────────────────────────────────────────────────────────────────
+async def _bench_api(n: int, ticks: int, data_dir: Path) -> tuple[_TickClock, dict]:
+    import api.main as main
+    from api.routers import oracle
+    from api.services.agent_registry import get_agent_registry
+    from api.ws.hub import manager
+    from agents.llm_scheduler import get_llm_scheduler
+
+    oracle._prices.update(API_PRICES)
+    clock = _capture("ghost_broker", "━━━ Tick #")
+
+    # The ticker parks in wait_ready() between ticks; after the last measured
+    # tick it parks for good, so cancelling it never cuts a tick in half
+    scheduler = get_llm_scheduler()
+    done, ended = asyncio.Event(), []
+    wait_ready = scheduler.wait_ready
+
+    async def parked_wait_ready(*a, **kw):
+        if len(clock.starts) >= ticks:
+            ended.append(time.perf_counter())
+            done.set()
+            await asyncio.Event().wait()
+        return await wait_ready(*a, **kw)
+
+    scheduler.wait_ready = parked_wait_ready
+
+    ws = _FakeWebSocket()
+    manager.register(ws)
+    for channel in ("agent.decisions", "market.trades"):
+        await manager.subscribe(ws, channel)
+
+    registry = get_agent_registry()
+    writer = asyncio.create_task(registry.run_writer())
+    ticker = asyncio.create_task(main._agent_ticker())
+    await done.wait()
+    end = ended[0]
+    ticker.cancel()
+    await registry.flush()
+    writer.cancel()
+    await asyncio.gather(ticker, writer, return_exceptions=True)
+
+    # Drain the last frames, then stop the WS writer while it is idle — a cancel
+    # landing mid-send can be lost in asyncio.wait_for on Python 3.11
+    manager.flush()
+    while len(manager.register(ws)):
+        await asyncio.sleep(0.001)
+    await manager.disconnect_all(ws)
+
+    clock.starts = clock.starts[:ticks] + [end]
+    extra = {
+        "ws":  {"frames": ws.frames, "bytes": ws.bytes},
+        "llm": main._brain_pool.client.stats(),
+        "decision_cache": main._decision_cache.stats(),
+    }
+    return clock, extra
+
+
+async def _bench_runner(n: int, ticks: int, data_dir: Path, dry_run: bool) -> tuple[_TickClock, dict]:
+    import run_agents
+    from agents.llm_backend import make_client
+    from agents.market_feed import PriceFeed
+
+    class FakePriceFeed(PriceFeed):
+        """Monoracle JSON-RPC replaced by a seeded random walk."""
+
+        _rng = random.Random(0)
+
+        async def _rpc_oracle_prices(self, commodities):
+            self.rpc_calls += 1
+            out = {}
+            for commodity in commodities:
+                price = self._prices.get(commodity, 1.0) * (1 + self._rng.uniform(-0.01, 0.01))
+                self._prices[commodity] = price
+                out[commodity] = (price, 0.98)
+            return out
+
+    run_agents.PriceFeed = FakePriceFeed
+    clock = _capture("run_agents", "═══ Tick #")
+    client = make_client("fake")
+    await run_agents.run(dry_run=dry_run, max_ticks=ticks, client=client)
+    clock.starts = clock.starts[:ticks] + [time.perf_counter()]
+    return clock, {"llm": client.stats()}
+
+
+def _worker(args: argparse.Namespace) -> dict:
+    """One (target, population) run inside this process."""
+    data_dir = Path(tempfile.mkdtemp(prefix="ghost-bench-"))
+    os.environ.update({
+        "AGENT_STORE_PATH":                str(data_dir / "data" / "agents.json"),
+        "LOG_STORE_DIR":                   str(data_dir / "data" / "log"),
+        "LLM_BACKEND":                     "fake",
+        "LLM_FAKE_LATENCY":                args.llm_latency,
+        "LLM_FAKE_ERROR_RATE":             str(args.llm_error_rate),
+        "LLM_FAKE_SEED":                   str(args.seed),
+        "LLM_RPM":                         "1e9",      # measure the loop, not the rate budget
+        "LLM_TPM":                         "1e12",
+        "AGENT_TICK_MIN_INTERVAL_SECONDS": "0",
+        "TICK_INTERVAL_SECONDS":           "0",
+        "WS_COALESCE_WINDOW_MS":           "0",
+    })
+    write_population(data_dir / "data" / "agents.json", args.agents, args.seed, wei=args.worker == "api")
+    os.chdir(data_dir)                   # run_agents writes data/decisions relative to cwd
+    sys.path.insert(0, str(_ROOT))
+
+    from agents.circuit_breaker import percentile
+
+    # Import cost and the population file are baseline, not per-agent memory
+    if args.worker == "api":
+        import api.main  # noqa: F401
+        # _agent_ticker imports these lazily on its first tick
+        import agents.brain_pool, agents.decision_cache, agents.rule_engine  # noqa: F401,E401
+        import agents.brain.batch, agents.llm_backend, agents.tick_executor  # noqa: F401,E401
+    else:
+        import run_agents  # noqa: F401
+    rss_before   = _rss_bytes()
+    disk_before  = _tree_bytes(data_dir)
+    write_before = _write_syscall_bytes()
+
+    async def measure():
+        lag = _LoopLag()
+        probe = asyncio.create_task(lag.run())
+        try:
+            if args.worker == "api":
+                clock, extra = await _bench_api(args.agents, args.ticks, data_dir)
+            else:
+                clock, extra = await _bench_runner(args.agents, args.ticks, data_dir, args.dry_run)
+        finally:
+            probe.cancel()
+        return clock, extra, lag
+
+    started = time.perf_counter()
+    clock, extra, lag = asyncio.run(measure())
+    wall = time.perf_counter() - started
+
+    durations = sorted(b - a for a, b in zip(clock.starts, clock.starts[1:]))
+    measured = sum(durations)
+    disk = _tree_bytes(data_dir) - disk_before
+    rss_growth = max(_peak_rss_bytes(), _rss_bytes()) - rss_before
+    return {
+        "target":   args.worker,
+        "agents":   args.agents,
+        "ticks":    len(durations),
+        "tick_seconds": {
+            "p50":  round(percentile(durations, 50), 4),
+            "p95":  round(percentile(durations, 95), 4),
+            "p99":  round(percentile(durations, 99), 4),
+            "max":  round(durations[-1], 4) if durations else 0.0,
+            "mean": round(measured / len(durations), 4) if durations else 0.0,
+        },
+        "agents_per_second":     round(args.agents * len(durations) / measured, 1) if measured else 0.0,
+        "disk_bytes":            disk,
+        "disk_bytes_per_tick":   disk // max(1, len(durations)),
+        "write_syscall_bytes":   _write_syscall_bytes() - write_before,
+        "loop_blocked_seconds":  round(lag.blocked, 4),
+        "loop_blocked_share":    round(lag.blocked / wall, 4) if wall else 0.0,
+        "loop_block_max_seconds": round(lag.worst, 4),
+        "rss_bytes_per_agent":   round(rss_growth / args.agents, 1),
+        "peak_rss_bytes":        _peak_rss_bytes(),
+        "wall_seconds":          round(wall, 3),
+        **extra,
+    }
+
+
+# ── Driver ─────────────────────────────────────────────────────────────────────
+def _run_case(target: str, agents: int, args: argparse.Namespace) -> dict:
+    cmd = [
+        sys.executable, str(Path(__file__).resolve()), "--worker", target,
+        "--agents", str(agents), "--ticks", str(args.ticks), "--seed", str(args.seed),
+        "--llm-latency", args.llm_latency, "--llm-error-rate", str(args.llm_error_rate),
+    ]
+    if args.dry_run:
+        cmd.append("--dry-run")
+    proc = subprocess.run(cmd, capture_output=True, text=True, cwd=_ROOT)
+    lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+    if proc.returncode != 0 or not lines:
+        return {"target": target, "agents": agents, "error": proc.stderr.strip().splitlines()[-5:]}
+    return json.loads(lines[-1])
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=_ROOT, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _print_table(results: list[dict]) -> None:
+    header = f"{'target':<8}{'agents':>8}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}{'agents/s':>11}" \
+             f"{'disk/tick':>12}{'blocked s':>11}{'RSS/agent':>11}"
+    print(header, file=sys.stderr)
+    for r in results:
+        if "error" in r:
+            print(f"{r['target']:<8}{r['agents']:>8}  ERROR: {r['error']}", file=sys.stderr)
+            continue
+        t = r["tick_seconds"]
+        print(
+            f"{r['target']:<8}{r['agents']:>8}{t['p50']:>9.3f}{t['p95']:>9.3f}{t['p99']:>9.3f}"
+            f"{r['agents_per_second']:>11.0f}{r['disk_bytes_per_tick']:>12}"
+            f"{r['loop_blocked_seconds']:>11.3f}{r['rss_bytes_per_agent']:>11.0f}",
+            file=sys.stderr,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ghost Broker tick loop benchmark")
+    parser.add_argument("--targets", default="api,runner", help="api, runner veya ikisi (virgülle)")
+    parser.add_argument("--sizes", default="100,1000,10000", help="agent sayıları (virgülle, 100k'ya kadar)")
+    parser.add_argument("--ticks", type=int, default=3, help="ölçülen tick sayısı")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-latency", default="lognormal:-3,0.5", metavar="SPEC",
+                        help="sahte LLM gecikmesi (agents/llm_backend.py formatı)")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, metavar="P")
+    parser.add_argument("--dry-run", action="store_true", help="runner: kararları diske yazma")
+    parser.add_argument("--out", metavar="PATH", help="JSON sonucu ayrıca bu dosyaya yaz")
+    parser.add_argument("--generate", nargs=2, metavar=("N", "PATH"),
+                        help="sadece N agent'lık popülasyonu PATH'e yaz ve çık")
+    parser.add_argument("--worker", choices=["api", "runner"], help=argparse.SUPPRESS)
+    parser.add_argument("--agents", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.generate:
+        n, path = int(args.generate[0]), Path(args.generate[1])
+        write_population(path, n, args.seed)
+        print(f"{n} agents → {path}", file=sys.stderr)
+        return
+
+    if args.worker:
+        print(json.dumps(_worker(args)))
+        return
+
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results = []
+    for target in targets:
+        for size in sizes:
+            print(f"… {target} × {size} agents", file=sys.stderr)
+            results.append(_run_case(target, size, args))
+
+    document = {
+        "benchmark": "tick_loop",
+        "version":   1,
+        "commit":    _git_commit(),
+        "timestamp": int(time.time()),
+        "python":    platform.python_version(),
+        "platform":  platform.platform(),
+        "config": {
+            "ticks": args.ticks, "seed": args.seed, "llm_latency": args.llm_latency,
+            "llm_error_rate": args.llm_error_rate, "dry_run": args.dry_run,
+        },
+        "results": results,
+    }
+    _print_table(results)
+    text = json.dumps(document, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
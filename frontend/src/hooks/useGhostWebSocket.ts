@@ -29,8 +29,10 @@ export function useGhostWebSocket(channels: string[], onEvent: Handler) {
 
     ws.onmessage = (ev) => {
       try {
-        const data = JSON.parse(ev.data as string) as WSEvent;
-        onEventRef.current(data);
+        const msg = JSON.parse(ev.data as string);
+        // Tick events arrive coalesced per channel: { type: "batch", items: [...] }
+        const events: WSEvent[] = msg?.type === "batch" && Array.isArray(msg.items) ? msg.items : [msg];
+        events.forEach((data) => onEventRef.current(data));
       } catch {
         // ignore parse errors
       }
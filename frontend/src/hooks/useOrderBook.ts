@@ -0,0 +1,78 @@
+/**
+ * useOrderBook — live L2 book for one commodity.
+ * Subscribes to market.orderbook.{commodity}, loads the REST snapshot and
+ * applies diffs in seq order; diffs that arrive before the snapshot are
+ * buffered, and a seq gap triggers a fresh snapshot.
+ */
+"use client";
+
+import { useCallback, useEffect, useMemo, useRef, useState } from "react";
+import { fetchOrderbook } from "@/lib/api";
+import { applyDiff } from "@/lib/orderbook";
+import { useGhostWebSocket } from "@/hooks/useGhostWebSocket";
+import type { OrderBookDiff, OrderBookSnapshot, WSEvent } from "@/types";
+
+export function useOrderBook(commodity: string): OrderBookSnapshot | null {
+  const [book, setBook] = useState<OrderBookSnapshot | null>(null);
+  const bookRef    = useRef<OrderBookSnapshot | null>(null);
+  const pendingRef = useRef<OrderBookDiff[]>([]);   // diffs received while the snapshot loads
+  const loadingRef = useRef(false);
+
+  const resync = useCallback(() => {
+    if (loadingRef.current) return;
+    loadingRef.current = true;
+    bookRef.current = null;
+    fetchOrderbook(commodity)
+      .then((snapshot) => {
+        let next = snapshot;
+        const pending = pendingRef.current;
+        pendingRef.current = [];
+        for (const diff of pending) {
+          const result = applyDiff(next, diff);
+          if (result.gap) {
+            // The snapshot predates a buffered diff's parent — try again
+            loadingRef.current = false;
+            resync();
+            return;
+          }
+          next = result.book;
+        }
+        bookRef.current = next;
+        setBook(next);
+        loadingRef.current = false;
+      })
+      .catch((err) => {
+        loadingRef.current = false;
+        console.error(err);
+      });
+  }, [commodity]);
+
+  useEffect(() => {
+    pendingRef.current = [];
+    setBook(null);
+    resync();
+  }, [resync]);
+
+  const channels = useMemo(() => [`market.orderbook.${commodity}`], [commodity]);
+
+  useGhostWebSocket(channels, (event: WSEvent) => {
+    if (event.type !== "diff" || event.data.commodity !== commodity) return;
+    const current = bookRef.current;
+    if (current === null) {
+      pendingRef.current.push(event.data);
+      return;
+    }
+    const result = applyDiff(current, event.data);
+    if (result.gap) {
+      pendingRef.current = [event.data];
+      resync();
+      return;
+    }
+    if (result.book !== current) {
+      bookRef.current = result.book;
+      setBook(result.book);
+    }
+  });
+
+  return book;
+}
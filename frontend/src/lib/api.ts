@@ -20,7 +20,7 @@ async function post<T>(path: string, body?: unknown): Promise<T> {
 
 import type {
   Agent, Trade, Reputation, LeaderboardEntry,
-  Vault, Covenant, OracleFeed, TokenStats, AgentDecision,
+  Vault, Covenant, OracleFeed, TokenStats, AgentDecision, OrderBookSnapshot,
 } from "@/types";
 
 // ── Agents ─────────────────────────────────────────────────────────────────────
@@ -31,7 +31,7 @@ export const fetchDecisions = (id: number)   => get<AgentDecision[]>(`/agents/${
 
 // ── Market ─────────────────────────────────────────────────────────────────────
 export const fetchOrderbook = (commodity: string) =>
-  get<{ bids: [string, string][]; asks: [string, string][] }>(`/market/orderbook/${commodity}`);
+  get<OrderBookSnapshot>(`/market/orderbook/${commodity}`);
 
 export const fetchTrades    = (limit = 50) => get<Trade[]>(`/market/trades?limit=${limit}`);
 export const fetchCandles   = (commodity: string, interval = "1m") =>
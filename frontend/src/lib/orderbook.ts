@@ -0,0 +1,36 @@
+/**
+ * L2 order book maintenance: a REST snapshot plus the sequenced diffs of
+ * market.orderbook.{commodity}. Diff levels are absolute (qty 0 = removed),
+ * so a diff already contained in the snapshot can be skipped safely; a diff
+ * whose prev_seq is not the book's seq means one was missed and the book
+ * must be re-fetched.
+ */
+import type { OrderBookDiff, OrderBookLevel, OrderBookSnapshot } from "@/types";
+
+export interface DiffResult {
+  book: OrderBookSnapshot;
+  gap:  boolean;   // true → a diff was missed; re-fetch the snapshot
+}
+
+function mergeSide(levels: OrderBookLevel[], changes: OrderBookLevel[], descending: boolean): OrderBookLevel[] {
+  const byPrice = new Map<number, OrderBookLevel>(levels.map((l) => [l[0], l]));
+  for (const level of changes) {
+    if (level[1] > 0) byPrice.set(level[0], level);
+    else byPrice.delete(level[0]);
+  }
+  return [...byPrice.values()].sort((a, b) => (descending ? b[0] - a[0] : a[0] - b[0]));
+}
+
+export function applyDiff(book: OrderBookSnapshot, diff: OrderBookDiff): DiffResult {
+  if (diff.seq <= book.seq) return { book, gap: false };          // already in the snapshot
+  if (diff.prev_seq !== book.seq) return { book, gap: true };
+  return {
+    book: {
+      commodity: book.commodity,
+      seq:       diff.seq,
+      bids:      mergeSide(book.bids, diff.bids, true),
+      asks:      mergeSide(book.asks, diff.asks, false),
+    },
+    gap: false,
+  };
+}
@@ -119,11 +119,27 @@ export interface TokenStats {
   burn_rate_24h:      string;
 }
 
+/** L2 level: [price, qty, orders]; in a diff qty 0 means the level was removed */
+export type OrderBookLevel = [price: number, qty: number, orders: number];
+
+export interface OrderBookSnapshot {
+  commodity: string;
+  seq:       number;
+  bids:      OrderBookLevel[];
+  asks:      OrderBookLevel[];
+}
+
+/** Changed levels since `prev_seq`; a client whose book is not at `prev_seq` missed a diff */
+export interface OrderBookDiff extends OrderBookSnapshot {
+  prev_seq: number;
+}
+
 // ── WebSocket event types ──────────────────────────────────────────────────────
 export type WSEvent =
   | { type: "trade";     data: Trade }
-  | { type: "diff";      data: { bids: [string, string][]; asks: [string, string][] } }
+  | { type: "diff";      data: OrderBookDiff }
   | { type: "price";     commodity: string; price: number; confidence: number }
   | { type: "lifecycle"; agentId: number; from: AgentState; to: AgentState }
   | { type: "decision";  data: AgentDecision }
-  | { type: "burn";      amount: string; totalBurned: string };
+  | { type: "burn";      amount: string; totalBurned: string }
+  | { type: "engine_batch"; data: { block_number: number; match_count: number; trades: Trade[] } };
@@ -24,6 +24,17 @@ export type WSChannel =
   | 'token.burn'
   | 'chain.block';
 
+/**
+ * One WS frame → the events it carries. Tick events arrive coalesced per
+ * channel as { type: 'batch', channel, items: [...] }; anything else
+ * (e.g. an engine_batch event in single mode) is a single event.
+ */
+export function unwrapFrame(msg: unknown): WSEvent[] {
+  const frame = msg as { type?: unknown; items?: unknown } | null;
+  if (frame?.type === 'batch' && Array.isArray(frame.items)) return frame.items as WSEvent[];
+  return [msg as WSEvent];
+}
+
 interface UseGhostWSOptions {
   channels: WSChannel[];
   onEvent: (event: WSEvent) => void;
@@ -52,8 +63,8 @@ export function useGhostWS({ channels, onEvent, enabled = true }: UseGhostWSOpti
 
     ws.onmessage = (e) => {
       try {
-        const event = JSON.parse(e.data) as WSEvent;
-        onEventRef.current(event);
+        // Tick olayları kanal başına tek frame'de gelir: { type: 'batch', items: [...] }
+        unwrapFrame(JSON.parse(e.data)).forEach((event) => onEventRef.current(event));
       } catch {
         // malformed frame — ignore
       }
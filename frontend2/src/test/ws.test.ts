@@ -1,4 +1,5 @@
 import { describe, it, expect } from "vitest";
+import { unwrapFrame } from "@/lib/ws";
 
 /**
  * Tests for WebSocket URL construction to ensure trailing slashes
@@ -27,3 +28,33 @@ describe("WebSocket URL construction", () => {
     expect(url).toBe("ws://localhost:8000/ws?channels=chain.block");
   });
 });
+
+describe("unwrapFrame", () => {
+  const trade = { type: "trade", data: { commodity: "ETH", matched_price: "1.0" } };
+  const decision = { type: "decision", data: { agent_id: "7", action: "BID" } };
+
+  it("unwraps a coalesced batch frame into its items, in order", () => {
+    const frame = { type: "batch", channel: "market.trades", items: [trade, decision] };
+    expect(unwrapFrame(frame)).toEqual([trade, decision]);
+  });
+
+  it("passes a single event through", () => {
+    expect(unwrapFrame(trade)).toEqual([trade]);
+  });
+
+  it("does not mistake an engine_batch event for a coalesced frame", () => {
+    const engine = { type: "engine_batch", data: { block_number: 12, match_count: 0, trades: [] } };
+    expect(unwrapFrame(engine)).toEqual([engine]);
+  });
+
+  it("unwraps coalesced engine_batch events", () => {
+    const engine = { type: "engine_batch", data: { block_number: 12, match_count: 0, trades: [] } };
+    const frame = { type: "batch", channel: "engine.batch", items: [engine, engine] };
+    expect(unwrapFrame(frame)).toEqual([engine, engine]);
+  });
+
+  it("treats a batch-typed frame without items as a single event", () => {
+    const legacy = { type: "batch", data: { block_number: 12 } };
+    expect(unwrapFrame(legacy)).toEqual([legacy]);
+  });
+});
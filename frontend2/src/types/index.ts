@@ -175,7 +175,8 @@ export type WSEvent =
   | { type: 'lifecycle'; data: { agent_id: number; event: string; block: number; details: string } }
   | { type: 'decision';  data: AgentDecisionResponse }
   | { type: 'burn';      data: { amount: string; total_burned: string; block_number: number } }
-  | { type: 'block';     data: { block_number: number; tps: number } };
+  | { type: 'block';     data: { block_number: number; tps: number } }
+  | { type: 'engine_batch'; data: { block_number: number; match_count: number; trades: TradeResponse[] } };
 
 // ── UI-only types (for components / mock) ────────────────────────────────────
 export interface RiskDNA {
@@ -7,6 +7,13 @@ Kullanım:
     python run_agents.py
     python run_agents.py --dry-run       # on-chain yazmadan sadece kararları logla
     python run_agents.py --tick 5        # 5 tick sonra dur (test modu)
+    python run_agents.py --llm record    # Gemini çağrılarını kasete kaydet
+    python run_agents.py --llm replay --llm-latency lognormal:-0.7,0.5 --llm-error-rate 0.02
+                                         # ağsız, tekrarlanabilir benchmark (kaset + sentetik cevap)
+    python run_agents.py --llm fake      # kasetsiz, sadece sentetik cevaplar
+
+Replay/fake modunda LLM bütçesi hâlâ uygulanır; sadece orchestrator
+overhead'ini ölçmek için LLM_RPM / LLM_TPM'i yüksek ayarla.
 """
 from __future__ import annotations
 
@@ -30,6 +37,12 @@ from agents.brain.aggressive_agent   import AggressiveAgent
 from agents.brain.balanced_agent     import BalancedAgent
 from agents.brain.conservative_agent import ConservativeAgent
 from agents.market_feed import PriceFeed
+from agents.decision_cache import DecisionCache
+from agents.http_session import get_http_pool
+from agents.llm_backend import (
+    LLM_BACKEND, LLM_CASSETTE, LLM_FAKE_ERROR_RATE, LLM_FAKE_429_RATE, LLM_FAKE_LATENCY, LLM_FAKE_SEED,
+    make_client,
+)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -78,13 +91,13 @@ def load_agents() -> list[AgentDNA]:
     return dnas
 
 
-def make_brain(dna: AgentDNA):
+def make_brain(dna: AgentDNA, client=None):
     if dna.strategy == Strategy.AGGRESSIVE:
-        return AggressiveAgent(dna)
+        return AggressiveAgent(dna, client=client)
     elif dna.strategy == Strategy.BALANCED:
-        return BalancedAgent(dna)
+        return BalancedAgent(dna, client=client)
     else:
-        return ConservativeAgent(dna)
+        return ConservativeAgent(dna, client=client)
 
 
 def pick_commodity(dna: AgentDNA, tick: int) -> str:
@@ -96,23 +109,9 @@ def pick_commodity(dna: AgentDNA, tick: int) -> str:
         return COMMODITIES[tick % len(COMMODITIES)]
 
 
-async def build_market(feed: PriceFeed, commodity: str) -> MarketState:
-    """Sentetik market state — gerçek feed desteklenmiyorsa fallback ile."""
-    try:
-        oracle_price, conf = await feed.fetch_oracle_price(commodity)
-    except Exception:
-        oracle_price, conf = 1.0, 0.8      # fallback
-
-    spread_pct = 0.005
-    return await feed.get_market_state(
-        commodity    = commodity,
-        best_bid     = oracle_price * (1 - spread_pct),
-        best_ask     = oracle_price * (1 + spread_pct),
-        volume_24h   = oracle_price * 10_000,
-        price_change = 0.5,
-        depth_bid    = 8,
-        depth_ask    = 6,
-    )
+def build_market(feed: PriceFeed, commodity: str) -> MarketState:
+    """Market state — rolling istatistiklerden anlık okuma, ağ çağrısı yok."""
+    return feed.market_state(commodity)
 
 
 def save_decision(agent_id: str, decision) -> None:
@@ -135,14 +134,17 @@ def save_decision(agent_id: str, decision) -> None:
 
 # ── Main Loop ──────────────────────────────────────────────────────────────────
 
-async def run(dry_run: bool = False, max_ticks: int = 0) -> None:
+async def run(dry_run: bool = False, max_ticks: int = 0, client=None) -> None:
     dnas = load_agents()
     if not dnas:
         logger.error("Çalıştırılacak agent yok. Önce frontend'den agent yarat.")
         return
 
-    brains = {dna.agent_id: make_brain(dna) for dna in dnas}
+    # Tüm brain'ler tek LLM client'ını (Gemini / kayıt / replay) paylaşır
+    client = client or make_client()
+    brains = {dna.agent_id: make_brain(dna, client) for dna in dnas}
     feed   = PriceFeed()
+    cache  = DecisionCache()   # benzer girdili agentler aynı kararı paylaşır
 
     logger.info("🚀 Ghost Broker orchestrator başlıyor — %d agent, dry_run=%s", len(dnas), dry_run)
 
@@ -151,11 +153,24 @@ async def run(dry_run: bool = False, max_ticks: int = 0) -> None:
         tick += 1
         logger.info("═══ Tick #%d ═══════════════════════════════════════════", tick)
 
-        for dna in dnas:
-            commodity = pick_commodity(dna, tick)
+        # Tüm commodity evreni tek JSON-RPC batch ile yenilenir; build_market cache'ten okur
+        needed = list(dict.fromkeys(pick_commodity(dna, tick) for dna in dnas))
+        try:
+            await feed.fetch_oracle_prices(needed)
+        except Exception as exc:
+            logger.warning("  Oracle batch hatası: %s", exc)
+        markets: dict[str, MarketState] = {c: build_market(feed, c) for c in needed}
+
+        # Tüm kararlar async client üzerinden aynı anda uçuşta; thread tutulmaz
+        results = await asyncio.gather(
+            *(cache.adecide(brains[dna.agent_id], markets[pick_commodity(dna, tick)]) for dna in dnas),
+            return_exceptions=True,
+        )
+
+        for dna, decision in zip(dnas, results):
             try:
-                market   = await build_market(feed, commodity)
-                decision = brains[dna.agent_id].decide(market)
+                if isinstance(decision, BaseException):
+                    raise decision
 
                 logger.info(
                     "  Agent #%s [%s] → %s @ %.4f x %.4f (conf=%.2f)",
@@ -164,12 +179,22 @@ async def run(dry_run: bool = False, max_ticks: int = 0) -> None:
                 )
                 logger.info("    Reasoning: %s", decision.reasoning[:120])
 
+                # BID/ASK kararları simüle işlem olarak VWAP / hacim / derinliğe girer
+                if decision.action.value in ("BID", "ASK"):
+                    feed.stats.trade(decision.commodity, decision.action.value, decision.price, decision.qty)
+
                 if not dry_run:
                     save_decision(dna.agent_id, decision)
 
             except Exception as exc:
                 logger.error("  Agent #%s hata: %s", dna.agent_id, exc)
 
+        logger.info("  Oracle cache: %s", feed.cache_stats())
+        logger.info("  Market stats: %s", {c: feed.stats.get(c).summary() for c in needed})
+        logger.info("  Decision cache: %s", cache.stats())
+        if hasattr(client, "stats"):
+            logger.info("  LLM backend: %s", client.stats())
+
         if max_ticks and tick >= max_ticks:
             logger.info("✅ %d tick tamamlandı, çıkılıyor.", max_ticks)
             break
@@ -177,6 +202,13 @@ async def run(dry_run: bool = False, max_ticks: int = 0) -> None:
         await asyncio.sleep(TICK_INTERVAL)
 
 
+async def main(dry_run: bool = False, max_ticks: int = 0, client=None) -> None:
+    try:
+        await run(dry_run=dry_run, max_ticks=max_ticks, client=client)
+    finally:
+        await get_http_pool().close()   # paylaşılan HTTP session'ı temiz kapat
+
+
 # ── CLI Entry Point ────────────────────────────────────────────────────────────
 
 if __name__ == "__main__":
@@ -185,6 +217,27 @@ if __name__ == "__main__":
                         help="On-chain yazmadan sadece kararları logla")
     parser.add_argument("--tick", type=int, default=0, metavar="N",
                         help="N tick sonra dur (0 = sonsuz döngü)")
+    parser.add_argument("--llm", choices=["gemini", "record", "replay", "fake"], default=LLM_BACKEND,
+                        help="LLM backend: gerçek Gemini, kayıt, kasetten replay veya sentetik")
+    parser.add_argument("--cassette", default=LLM_CASSETTE, metavar="PATH",
+                        help="record/replay kaset dosyası (JSONL)")
+    parser.add_argument("--llm-latency", default=LLM_FAKE_LATENCY, metavar="SPEC",
+                        help="replay gecikmesi: fixed:S | uniform:LO,HI | normal:MU,SIGMA | "
+                             "lognormal:MU,SIGMA | recorded")
+    parser.add_argument("--llm-error-rate", type=float, default=LLM_FAKE_ERROR_RATE, metavar="P",
+                        help="replay'de enjekte edilen hata oranı (0-1)")
+    parser.add_argument("--llm-429-rate", type=float, default=LLM_FAKE_429_RATE, metavar="P",
+                        help="replay'de enjekte edilen 429 oranı (0-1)")
+    parser.add_argument("--seed", type=int, default=LLM_FAKE_SEED,
+                        help="replay RNG tohumu (tekrarlanabilir koşular)")
     args = parser.parse_args()
 
-    asyncio.run(run(dry_run=args.dry_run, max_ticks=args.tick))
+    llm_client = make_client(
+        args.llm,
+        cassette        = args.cassette,
+        latency         = args.llm_latency,
+        error_rate      = args.llm_error_rate,
+        rate_limit_rate = args.llm_429_rate,
+        seed            = args.seed,
+    )
+    asyncio.run(main(dry_run=args.dry_run, max_ticks=args.tick, client=llm_client))
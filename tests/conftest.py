@@ -0,0 +1,5 @@
+"""Make the repo root importable (agents/, api/) when pytest runs from anywhere."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
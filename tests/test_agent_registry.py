@@ -0,0 +1,84 @@
+"""AgentRegistry: in-memory mutations, secondary indexes and write-behind snapshots."""
+import asyncio
+import json
+
+from api.services.agent_registry import AgentRegistry
+
+
+def _agent(token_id: int, **fields) -> dict:
+    return {"token_id": token_id, "owner_address": "0xAbC", "strategy": "balanced", "state": "ACTIVE", **fields}
+
+
+def test_mutations_stay_in_memory_until_flush(tmp_path):
+    path = tmp_path / "agents.json"
+    registry = AgentRegistry(path)
+    registry.add(_agent(registry.allocate_id()))
+    registry.update(1, capital="5")
+    assert registry.dirty and not path.exists()
+
+    asyncio.run(registry.flush())
+    assert not registry.dirty
+    assert json.loads(path.read_text()) == [_agent(1, capital="5")]
+
+
+def test_flush_is_a_noop_when_clean(tmp_path):
+    registry = AgentRegistry(tmp_path / "agents.json")
+    asyncio.run(registry.flush())
+    assert not (tmp_path / "agents.json").exists()
+
+
+def test_changes_during_a_flush_stay_dirty(tmp_path):
+    registry = AgentRegistry(tmp_path / "agents.json")
+    registry.add(_agent(1))
+
+    async def run():
+        flushing = asyncio.create_task(registry.flush())
+        await asyncio.sleep(0)                     # snapshot taken, write running in a thread
+        registry.update(1, capital="7")
+        await flushing
+
+    asyncio.run(run())
+    assert registry.dirty
+    asyncio.run(registry.flush())
+    assert json.loads((tmp_path / "agents.json").read_text())[0]["capital"] == "7"
+
+
+def test_writer_batches_changes(tmp_path):
+    path = tmp_path / "agents.json"
+    registry = AgentRegistry(path)
+
+    async def run():
+        writer = asyncio.create_task(registry.run_writer(interval=0.01))
+        for i in range(1, 51):
+            registry.add(_agent(i))
+        await asyncio.sleep(0.1)
+        writer.cancel()
+
+    asyncio.run(run())
+    assert len(json.loads(path.read_text())) == 50
+
+
+def test_reload_keeps_agents_and_never_reuses_ids(tmp_path):
+    path = tmp_path / "agents.json"
+    registry = AgentRegistry(path)
+    for _ in range(3):
+        registry.add(_agent(registry.allocate_id()))
+    registry.remove(3)
+    asyncio.run(registry.flush())
+
+    reloaded = AgentRegistry(path)
+    assert reloaded.ids() == [1, 2]
+    assert reloaded.allocate_id() == 4
+
+
+def test_secondary_indexes_follow_updates(tmp_path):
+    registry = AgentRegistry(tmp_path / "agents.json")
+    registry.add(_agent(1))
+    registry.add(_agent(2, strategy="aggressive", owner_address="0xdef"))
+    assert [a["token_id"] for a in registry.query(owner="0xabc")] == [1]
+
+    registry.update(1, state="PAUSED")
+    assert registry.query(state="ACTIVE") == [registry.get(2)]
+    assert registry.query(state="paused", strategy="BALANCED") == [registry.get(1)]
+    registry.remove(2)
+    assert registry.query(strategy="AGGRESSIVE") == []
@@ -0,0 +1,148 @@
+"""Batched brain decisions: prompt layout, response → agent mapping and per-agent fallback."""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from agents.brain import stream
+from agents.brain.balanced_agent import BalancedAgent
+from agents.brain.batch import build_batch_prompt, parse_batch_response
+from agents.brain.prompt_cache import PromptCache
+from agents.brain.schema import BATCH_SCHEMA
+from agents.circuit_breaker import CircuitBreaker
+from agents.llm_scheduler import LLMScheduler
+from agents.types import ActionType, AgentDNA, MarketState, Strategy
+
+_SIZE = BalancedAgent.SIZE_PCT
+
+
+def _dna(token_id: int, capital: float = 100.0) -> AgentDNA:
+    return AgentDNA(str(token_id), token_id, 50, Strategy.BALANCED, capital, capital, "0x0")
+
+
+def _market(mid: float = 10.0) -> MarketState:
+    return MarketState("ETH", mid * 0.999, mid * 1.001, mid, 0.2, 1000.0, 0.5, 5, 5, mid, 0.9)
+
+
+def _item(agent_id: str, **fields) -> dict:
+    return {"agent_id": agent_id, "action": "BID", "price": 10.0, "qty": 5.0, "confidence": 0.7,
+            "reasoning": f"r{agent_id}", **fields}
+
+
+class _Client:
+    """generate_content answering every call with `text`; records the calls."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.calls: list[dict] = []
+        self.aio = SimpleNamespace(models=SimpleNamespace(generate_content=self._generate))
+
+    async def _generate(self, **kwargs):
+        self.calls.append(kwargs)
+        return SimpleNamespace(text=self.text, usage_metadata=None)
+
+
+@pytest.fixture(autouse=True)
+def _no_streaming(monkeypatch):
+    monkeypatch.setattr(stream, "DECISION_STREAMING", False)
+
+
+def _brains(client: _Client, ids=(1, 2, 3)) -> list[BalancedAgent]:
+    prompts = PromptCache(client)
+    scheduler = LLMScheduler(rpm=600, breaker=CircuitBreaker(enabled=False))
+    brains = []
+    for token_id in ids:
+        brain = BalancedAgent(_dna(token_id), client=client, prompt_cache=prompts)
+        brain._scheduler = scheduler
+        brains.append(brain)
+    return brains
+
+
+# ── Prompt and parsing ─────────────────────────────────────────────────────────
+
+def test_batch_prompt_sends_the_market_once_and_one_line_per_agent():
+    brains = _brains(_Client("[]"))
+    prompt = build_batch_prompt(brains, _market(), _SIZE)
+    assert prompt.count("Mid Price:") == 1
+    assert [f"agent_id={i}" in prompt for i in (1, 2, 3)] == [True] * 3
+    assert prompt.index("=== AGENTS ===") > prompt.index("Mid Price:")
+
+
+def test_response_is_mapped_by_agent_id_and_bad_items_are_dropped():
+    brains = _brains(_Client("[]"))
+    text = json.dumps([
+        _item("3", qty=1_000.0),              # clamped to capital * max size
+        _item("1"),
+        _item("1", action="ASK"),             # duplicate: first answer wins
+        _item("42"),                          # not in the batch
+        {"agent_id": "2", "action": "SHORT"}, # garbled
+    ])
+    decisions = parse_batch_response(text, _market(), brains, _SIZE)
+    assert set(decisions) == {"1", "3"}
+    assert decisions["1"].action == ActionType.BID and decisions["1"].reasoning == "r1"
+    assert decisions["3"].qty == pytest.approx(100.0 * _SIZE[1])
+    assert decisions["3"].agent_id == "3"
+
+
+def test_wrapped_array_is_accepted():
+    brains = _brains(_Client("[]"))
+    text = json.dumps({"decisions": [_item("2")]})
+    assert set(parse_batch_response(text, _market(), brains, _SIZE)) == {"2"}
+
+
+# ── One call for the group ─────────────────────────────────────────────────────
+
+def test_adecide_batch_makes_one_call_with_the_array_schema():
+    client = _Client(json.dumps([_item("1"), _item("2")]))
+    brains = _brains(client)
+
+    decisions = asyncio.run(BalancedAgent.adecide_batch(brains, _market()))
+    assert set(decisions) == {"1", "2"}                 # agent 3 left to its own fallback
+    assert len(client.calls) == 1
+    config = client.calls[0]["config"]
+    assert config.response_schema == BATCH_SCHEMA
+    assert config.system_instruction == BalancedAgent.BATCH_STATIC_PROMPT
+
+
+def test_batch_members_missing_from_the_response_fall_back_individually(monkeypatch):
+    from agents.decision_cache import DecisionCache
+    from agents.tick_executor import STATUS_FALLBACK, STATUS_OK, TickExecutor
+    from api import main
+
+    monkeypatch.setattr(main, "_decision_cache", DecisionCache(enabled=False))
+    client = _Client(json.dumps([_item("1"), _item("3"), _item("9")]))
+    market = _market()
+    contexts = {
+        b.dna.token_id: {"dna": b.dna, "market": market, "brain": b, "commodity": "ETH"} for b in _brains(client)
+    }
+    svc = SimpleNamespace(rule_engine=None, breaker=CircuitBreaker(enabled=False))
+    jobs, groups, _, _ = main._prescreen(svc, contexts)
+    tick_jobs = main._group_jobs(jobs, groups, {"ETH": market}, batch_size=8)
+    assert len(tick_jobs) == 1 and len(tick_jobs[0].members) == 3
+
+    report = asyncio.run(TickExecutor().run(tick_jobs))
+    outcomes = {o.key: o for o in report.outcomes}
+    assert len(client.calls) == 1
+    assert outcomes[1].status == STATUS_OK and outcomes[1].value.reasoning == "r1"
+    assert outcomes[3].status == STATUS_OK
+    assert outcomes[2].status == STATUS_FALLBACK and outcomes[2].error == "missing from batch response"
+    assert outcomes[2].value.reasoning.startswith("[Fallback]")
+
+
+def test_groups_are_chunked_by_batch_size(monkeypatch):
+    from agents.decision_cache import DecisionCache
+    from api import main
+
+    monkeypatch.setattr(main, "_decision_cache", DecisionCache(enabled=False))
+    market = _market()
+    contexts = {
+        b.dna.token_id: {"dna": b.dna, "market": market, "brain": b, "commodity": "ETH"}
+        for b in _brains(_Client("[]"), ids=range(1, 6))
+    }
+    svc = SimpleNamespace(rule_engine=None, breaker=CircuitBreaker(enabled=False))
+    jobs, groups, _, _ = main._prescreen(svc, contexts)
+    tick_jobs = main._group_jobs(jobs, groups, {"ETH": market}, batch_size=2)
+    # 2 + 2 grouped, the lone fifth agent keeps its individual job
+    assert [len(j.members) if j.members else 1 for j in tick_jobs] == [2, 2, 1]
+    assert tick_jobs[-1] is jobs[5]
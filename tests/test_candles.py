@@ -0,0 +1,122 @@
+"""CandleEngine: OHLCV folding, persistence and restart replay from the trade log."""
+import json
+
+import pytest
+
+from api.services.candles import CandleEngine
+from api.services.log_store import SegmentedLog
+
+_INTERVALS = {"1m": 60, "5m": 300}
+
+
+def _engine(path, **kwargs) -> CandleEngine:
+    return CandleEngine(path, intervals=_INTERVALS, **kwargs)
+
+
+def _trade(ts: int, price: float, qty: float = 1.0, commodity: str = "ETH", seq: int = 0) -> dict:
+    trade = {"commodity": commodity, "price": price, "qty": qty, "timestamp": ts}
+    if seq:
+        trade["seq"] = seq
+    return trade
+
+
+class _Manager:
+    def __init__(self) -> None:
+        self.events: list[tuple[str, dict]] = []
+
+    def publish(self, channel: str, payload: dict) -> None:
+        self.events.append((channel, payload))
+
+
+def test_trades_fold_into_every_interval(tmp_path):
+    engine = _engine(tmp_path)
+    for ts, price, qty in ((0, 10, 1), (30, 12, 2), (59, 9, 1), (61, 11, 4)):
+        engine.add(_trade(ts, price, qty))
+
+    minute = engine.candles("ETH", "1m")
+    assert minute == [
+        {"time": 0,  "open": 10.0, "high": 12.0, "low": 9.0,  "close": 9.0,  "volume": 4.0},
+        {"time": 60, "open": 11.0, "high": 11.0, "low": 11.0, "close": 11.0, "volume": 4.0},
+    ]
+    five = engine.candles("ETH", "5m")
+    assert five == [{"time": 0, "open": 10.0, "high": 12.0, "low": 9.0, "close": 11.0, "volume": 8.0}]
+
+
+def test_closed_bars_are_appended_to_the_series_file(tmp_path):
+    engine = _engine(tmp_path)
+    for ts in (0, 60, 120):
+        engine.add(_trade(ts, 1.0 + ts))
+    lines = (tmp_path / "ETH" / "1m.ndjson").read_text().splitlines()
+    assert [json.loads(line)[0] for line in lines] == [0, 60]      # open bar is not written
+
+
+def test_late_trade_for_a_closed_bar_is_dropped(tmp_path):
+    engine = _engine(tmp_path)
+    engine.add(_trade(60, 5.0))
+    engine.add(_trade(10, 99.0))
+    assert engine.late == 1                     # only the 1m bar at 0 is closed
+    assert engine.candles("ETH", "1m")[-1]["high"] == 5.0
+    assert engine.candles("ETH", "5m")[-1]["high"] == 99.0
+
+
+def test_window_limit_and_end(tmp_path):
+    engine = _engine(tmp_path)
+    for minute in range(10):
+        engine.add(_trade(minute * 60, 1.0 + minute))
+    assert [b["time"] for b in engine.candles("ETH", "1m", limit=3)] == [420, 480, 540]
+    assert [b["time"] for b in engine.candles("ETH", "1m", limit=2, end=300)] == [240, 300]
+    assert engine.candles("BTC", "1m") == []
+
+
+def test_unknown_interval_raises(tmp_path):
+    with pytest.raises(ValueError):
+        _engine(tmp_path).candles("ETH", "1w")
+
+
+def test_unsafe_commodity_is_rejected(tmp_path):
+    engine = _engine(tmp_path / "candles")
+    for name in ("../x", "a/b", "", ".", "x" * 33):
+        engine.add(_trade(0, 1.0, commodity=name))
+    assert engine.rejected == 5 and engine.trades == 0
+    assert not (tmp_path / "x").exists()
+
+
+def test_publish_pushes_touched_open_bars_once(tmp_path):
+    engine = _engine(tmp_path)
+    engine.add(_trade(0, 1.0))
+    manager = _Manager()
+    assert engine.publish(manager) == 2
+    assert {event["interval"] for _, event in manager.events} == {"1m", "5m"}
+    assert all(channel == "market.price.ETH" for channel, _ in manager.events)
+    assert engine.publish(manager) == 0
+
+
+def test_flush_and_reopen_restores_open_bars_and_seq(tmp_path):
+    engine = _engine(tmp_path)
+    for seq, ts in enumerate((0, 60, 70), start=1):
+        engine.add(_trade(ts, float(seq), seq=seq))
+    engine.flush()
+
+    reopened = _engine(tmp_path)
+    assert reopened.last_seq == 3
+    assert reopened.candles("ETH", "1m") == engine.candles("ETH", "1m")
+    assert reopened.candles("ETH", "5m") == engine.candles("ETH", "5m")
+
+
+def test_restart_replays_only_trades_after_the_checkpoint(tmp_path):
+    log = SegmentedLog(tmp_path / "trades")
+    engine = _engine(tmp_path / "candles")
+    engine.attach(log)
+    for ts in (0, 20, 61):
+        log.append(_trade(ts, 2.0))
+    engine.flush()
+    for ts in (62, 130):                        # written while the engine was down
+        log.append(_trade(ts, 3.0))
+    expected = [(b["time"], b["volume"]) for b in engine.candles("ETH", "1m")]
+
+    restarted = _engine(tmp_path / "candles")
+    restarted.attach(log)
+    assert restarted.last_seq == 5 and restarted.trades == 2
+    assert [(b["time"], b["volume"]) for b in restarted.candles("ETH", "1m")] == expected
+    lines = (tmp_path / "candles" / "ETH" / "1m.ndjson").read_text().splitlines()
+    assert [json.loads(line)[0] for line in lines] == [0, 60]      # no bar written twice
@@ -0,0 +1,165 @@
+"""EventStore: indexing, reorg rollback and journal replay on restart."""
+import json
+
+import pytest
+
+from api.services import chain_index
+from api.services.chain_index import EventStore
+
+_TOPICS = {"OrderPosted": "0x" + "a1" * 32, "TradeMatched": "0x" + "a2" * 32}
+_ETH = "0x" + "e7" * 32
+
+
+@pytest.fixture(autouse=True)
+def _fixed_topics(monkeypatch):
+    """Fixed topic0 / commodity words so the store can be tested without web3's keccak."""
+    monkeypatch.setattr(chain_index, "_topics", lambda: {t: name for name, t in _TOPICS.items()})
+    monkeypatch.setattr(chain_index, "_commodities", lambda: {_ETH: "ETH"})
+
+
+@pytest.fixture
+def open_store(tmp_path):
+    """EventStore factory on tmp_path; every store is closed after the test."""
+    stores = []
+
+    def factory(**kwargs) -> EventStore:
+        stores.append(EventStore(tmp_path, **kwargs))
+        return stores[-1]
+
+    yield factory
+    for store in stores:
+        if not store._fh.closed:
+            store.close()
+
+
+def _word(value: int) -> str:
+    return f"{value:064x}"
+
+
+def _log(event: str, block: int, index: int, topics: list, data: list, block_hash: str = "", **extra) -> dict:
+    return {
+        "blockNumber":    hex(block),
+        "blockHash":      block_hash or f"0x{block:064x}",
+        "logIndex":       hex(index),
+        "transactionHash": "0x" + "00" * 32,
+        "address":        "0xMarket",
+        "topics":         [_TOPICS.get(event, event)] + ["0x" + t for t in topics],
+        "data":           "0x" + "".join(data),
+        "blockTimestamp": hex(1_700_000_000 + block),
+        **extra,
+    }
+
+
+def _posted(block: int, index: int, order: int, agent: int, **extra) -> dict:
+    return _log(
+        "OrderPosted", block, index,
+        [_word(order), _word(agent), _ETH[2:]],
+        [_word(1), _word(10**18), _word(2 * 10**18), _word(50)],
+        **extra,
+    )
+
+
+def _traded(block: int, index: int, bid: int, ask: int, agent_bid: int, agent_ask: int) -> dict:
+    return _log(
+        "TradeMatched", block, index,
+        [_word(bid), _word(ask), _word(agent_bid)],
+        [_word(agent_ask), _ETH[2:], _word(10**18), _word(10**18), _word(10**15)],
+    )
+
+
+def _orders(store: EventStore, **query) -> list[int]:
+    return [int(r["order_id"], 16) for r in store.all("OrderPosted", **query)]
+
+
+def test_apply_decodes_and_indexes(open_store):
+    store = open_store()
+    record = store.apply(_posted(10, 0, order=1, agent=7))
+    assert record["side"] == "ASK" and record["commodity"] == "ETH"
+    assert record["qty"] == 2 * 10**18 and record["timestamp"] == 1_700_000_010
+    store.apply(_posted(11, 0, order=2, agent=8))
+    store.apply(_posted(12, 3, order=3, agent=7))
+    store.apply(_traded(12, 4, bid=3, ask=2, agent_bid=7, agent_ask=7))   # self-trade
+
+    assert [int(r["order_id"], 16) for r in store.query("OrderPosted", "agent", 7)] == [3, 1]
+    assert len(store.all("TradeMatched", "agent", 7)) == 1              # indexed once
+    assert len(store.all("TradeMatched", "block", 12)) == 1
+    assert store.block == 12
+
+
+def test_replayed_and_unknown_logs_are_skipped(open_store):
+    store = open_store()
+    store.apply(_posted(10, 1, order=1, agent=7))
+    assert store.apply(_posted(10, 1, order=1, agent=7)) is None        # same position
+    assert store.apply(_posted(10, 0, order=9, agent=7)) is None        # older position
+    assert store.apply(_log("0x" + "ff" * 32, 10, 2, [], [])) is None
+    assert store.stats()["skipped"] == 1 and _orders(store) == [1]
+
+
+def test_rollback_drops_events_from_the_block_on(open_store):
+    store = open_store()
+    for block in range(10, 15):
+        store.apply(_posted(block, 0, order=block, agent=block % 2))
+    assert store.rollback(12) == 3
+    assert _orders(store) == [10, 11]
+    assert _orders(store, key="agent", value=0) == [10]
+    assert store.block == 11 and store.latest_hash()[0] == 11
+
+    store.apply(_posted(12, 0, order=99, agent=0))                     # the new branch
+    assert _orders(store, key="agent", value=0) == [10, 99]
+
+
+def test_removed_log_rolls_back(open_store):
+    store = open_store()
+    store.apply(_posted(10, 0, order=1, agent=7))
+    store.apply(_posted(11, 0, order=2, agent=7))
+    assert store.apply(_posted(11, 0, order=2, agent=7, removed=True)) is None
+    assert _orders(store) == [1] and store.rollbacks == 1
+
+
+def test_block_hash_mismatch_replaces_the_block(open_store):
+    store = open_store()
+    store.apply(_posted(10, 0, order=1, agent=7))
+    store.apply(_posted(11, 0, order=2, agent=7))
+    store.apply(_posted(11, 1, order=3, agent=7))
+    record = store.apply(_posted(11, 0, order=4, agent=7, block_hash="0x" + "bb" * 32))
+    assert record is not None and store.rollbacks == 1
+    assert _orders(store) == [1, 4]
+    assert store.latest_hash() == (11, "0x" + "bb" * 32)
+
+
+def test_restart_replays_rollback_markers_and_compacts(open_store, tmp_path):
+    store = open_store()
+    for block in range(10, 14):
+        store.apply(_posted(block, 0, order=block, agent=7))
+    store.rollback(12)
+    store.apply(_posted(12, 0, order=42, agent=7))
+    store.close()
+
+    reopened = open_store()
+    assert _orders(reopened) == [10, 11, 42]
+    assert _orders(reopened, key="agent", value=7) == [10, 11, 42]
+    assert reopened.block == 12 and reopened.cursor == (12, 0)
+    lines = [json.loads(line) for line in (tmp_path / "events.ndjson").read_text().splitlines()]
+    assert all("rollback" not in line for line in lines) and len(lines) == 3
+    assert reopened.apply(_posted(12, 0, order=42, agent=7)) is None    # already indexed
+
+
+def test_hash_checks_only_reach_back_reorg_depth_blocks(open_store):
+    store = open_store(reorg_depth=2)
+    for block in range(10, 14):
+        store.apply(_posted(block, 0, order=block, agent=7))
+    assert store.latest_hash()[0] == 13
+    assert store._hashes.keys() == {12, 13}
+
+
+def test_decode_log_with_real_topics(monkeypatch):
+    pytest.importorskip("web3")
+    monkeypatch.undo()
+    from web3 import Web3
+
+    topic0 = "0x" + Web3.keccak(text=chain_index.EVENTS["OrderPosted"][0]).hex().removeprefix("0x")
+    eth = "0x" + Web3.keccak(text="GHOST_ORE").hex().removeprefix("0x")
+    log = _posted(10, 0, order=1, agent=7)
+    log["topics"][0], log["topics"][3] = topic0, eth
+    record = chain_index.decode_log(log)
+    assert record["event"] == "OrderPosted" and record["commodity"] == "GHOST_ORE"
@@ -0,0 +1,169 @@
+"""CircuitBreaker transitions, and the outcomes LLMScheduler reports to it."""
+import asyncio
+import json
+
+import pytest
+
+from agents.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from agents.llm_scheduler import LLMScheduler
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _breaker(clock=None, **kwargs) -> CircuitBreaker:
+    kwargs = {"error_rate": 0.5, "p95_seconds": 5, "window": 10, "min_calls": 4, "cooldown": 30, **kwargs}
+    return CircuitBreaker(enabled=True, clock=clock or _Clock(), **kwargs)
+
+
+async def _ok():
+    return "ok"
+
+
+async def _fail():
+    raise RuntimeError("boom")
+
+
+def test_stays_closed_below_min_calls():
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record(False, 0.1)
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+def test_opens_on_error_rate():
+    breaker = _breaker()
+    for ok in (True, False, True, False):
+        breaker.record(ok, 0.1)
+    assert breaker.state == OPEN and not breaker.allow()
+    assert breaker.trips == 1 and "error rate" in breaker.last_reason
+
+
+def test_opens_on_p95_latency():
+    breaker = _breaker()
+    for seconds in (0.1, 0.1, 0.1, 6.0):
+        breaker.record(True, seconds)
+    assert breaker.state == OPEN and "p95" in breaker.last_reason
+
+
+def test_probe_waits_for_cooldown_then_closes_on_success():
+    clock = _Clock()
+    breaker = _breaker(clock)
+    for _ in range(4):
+        breaker.record(False, 0.1)
+
+    async def run():
+        assert not breaker.start_probe(_ok)         # cooldown not over
+        clock.now = 31
+        assert breaker.start_probe(_ok)
+        assert breaker.state == HALF_OPEN
+        assert not breaker.start_probe(_ok)         # one probe at a time
+        await breaker._probe
+
+    asyncio.run(run())
+    assert breaker.state == CLOSED and breaker.allow()
+    assert breaker.stats()["error_rate"] == 0.0      # window starts fresh
+
+
+def test_failed_probe_reopens_for_another_cooldown():
+    clock = _Clock()
+    breaker = _breaker(clock)
+    for _ in range(4):
+        breaker.record(False, 0.1)
+
+    async def run():
+        clock.now = 31
+        breaker.start_probe(_fail)
+        await breaker._probe
+
+    asyncio.run(run())
+    assert breaker.state == OPEN and breaker.trips == 1
+    assert not breaker.probe_due()
+    clock.now = 62
+    assert breaker.probe_due()
+
+
+def test_outcomes_while_open_are_ignored():
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record(False, 0.1)
+    for _ in range(10):
+        breaker.record(True, 0.1)
+    assert breaker.state == OPEN
+
+
+def test_disabled_breaker_always_allows():
+    breaker = CircuitBreaker(enabled=False, min_calls=1)
+    breaker.record(False, 0.1)
+    assert breaker.allow()
+
+
+# ── Scheduler → breaker ────────────────────────────────────────────────────────
+def _scheduler(breaker: CircuitBreaker) -> LLMScheduler:
+    return LLMScheduler(rpm=1000, breaker=breaker)
+
+
+def test_open_breaker_fails_submit_fast():
+    breaker = _breaker(min_calls=1)
+    breaker.record(False, 0.1)
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(_scheduler(breaker).submit(_ok, tokens=1))
+
+
+def test_parse_failures_count_as_failed_calls():
+    breaker = _breaker(min_calls=2)
+    scheduler = _scheduler(breaker)
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                await scheduler.submit(_ok, tokens=1, parse=json.loads)   # "ok" is not JSON
+
+    asyncio.run(run())
+    assert scheduler.failed == 2 and scheduler.completed == 0
+    assert breaker.state == OPEN
+
+
+def test_parsed_result_is_returned_and_recorded_as_success():
+    breaker = _breaker(min_calls=1)
+    scheduler = _scheduler(breaker)
+    assert asyncio.run(scheduler.submit(_ok, tokens=1, parse=str.upper)) == "OK"
+    assert scheduler.completed == 1 and breaker.state == CLOSED
+
+
+def test_cancelled_dispatched_call_is_a_failure():
+    breaker = _breaker(min_calls=1)
+    scheduler = _scheduler(breaker)
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def run():
+        task = asyncio.create_task(scheduler.submit(hang, tokens=1))
+        await asyncio.sleep(0.01)
+        task.cancel()                               # tick deadline
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert scheduler.failed == 1 and breaker.state == OPEN
+
+
+def test_rate_limits_do_not_trip_the_breaker():
+    breaker = _breaker(min_calls=1)
+    scheduler = _scheduler(breaker)
+
+    class RateLimited(RuntimeError):
+        code = 429
+
+    async def limited():
+        raise RateLimited("429 RESOURCE_EXHAUSTED")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(scheduler.submit(limited, tokens=1))
+    assert breaker.state == CLOSED and scheduler.rate_limited == 1
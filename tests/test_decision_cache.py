@@ -0,0 +1,178 @@
+"""DecisionCache: quantized keys, capital rescaling, TTL / LRU and single-flight misses."""
+import asyncio
+
+import pytest
+
+from agents.decision_cache import DecisionCache
+from agents.types import ActionType, AgentDecision, AgentDNA, MarketState, Strategy
+
+
+def _dna(token_id: int, capital: float = 100.0, risk: int = 50) -> AgentDNA:
+    return AgentDNA(str(token_id), token_id, risk, Strategy.BALANCED, capital, capital, "0x0")
+
+
+def _market(mid: float = 1.0, change: float = 0.0) -> MarketState:
+    return MarketState("ETH", mid * 0.999, mid * 1.001, mid, 0.2, 1000.0, change, 5, 5, mid, 0.9)
+
+
+class _Brain:
+    """Counts calls; each decision sizes 10% of the asking agent's capital."""
+
+    def __init__(self, dna: AgentDNA, delay: float = 0.0, error: Exception | None = None) -> None:
+        self.dna, self.delay, self.error = dna, delay, error
+        self.calls = 0
+
+    async def adecide(self, market: MarketState) -> AgentDecision:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return AgentDecision(self.dna.agent_id, ActionType.BID, market.commodity, market.mid_price,
+                             self.dna.capital * 0.1, "because", 0.8)
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_hit_is_rescaled_to_the_requesting_agent():
+    cache = DecisionCache(ttl=60)
+    cache.store(_dna(1, capital=100), _market(), asyncio.run(_Brain(_dna(1, 100)).adecide(_market())))
+    hit = cache.lookup(_dna(2, capital=120), _market())     # same capital bucket
+    assert hit.agent_id == "2"
+    assert hit.qty == pytest.approx(12.0)
+    assert hit.reasoning.startswith("[Cached]")
+
+
+def test_different_inputs_miss():
+    cache = DecisionCache(ttl=60)
+    cache.store(_dna(1), _market(), asyncio.run(_Brain(_dna(1)).adecide(_market())))
+    assert cache.lookup(_dna(2), _market(change=3.0)) is None
+    assert cache.lookup(_dna(2, capital=10_000), _market()) is None
+    assert cache.lookup(_dna(2, risk=95), _market()) is None
+
+
+def test_entries_expire_and_evict_lru():
+    clock = _Clock()
+    cache = DecisionCache(ttl=10, max_entries=2, clock=clock)
+    for change in (0.0, 1.0, 2.0):
+        cache.store(_dna(1), _market(change=change), asyncio.run(_Brain(_dna(1)).adecide(_market())))
+    assert cache.evictions == 1 and cache.lookup(_dna(1), _market(change=0.0)) is None
+
+    clock.now = 11
+    assert cache.lookup(_dna(1), _market(change=2.0)) is None
+    assert cache.expired == 1
+
+
+def test_concurrent_misses_share_one_brain_call():
+    cache = DecisionCache(ttl=60)
+    brains = [_Brain(_dna(i, capital=100 + i), delay=0.01) for i in range(10)]
+
+    async def run():
+        return await asyncio.gather(*(cache.adecide(b, _market()) for b in brains))
+
+    decisions = asyncio.run(run())
+    assert sum(b.calls for b in brains) == 1
+    assert cache.coalesced == 9
+    assert [d.agent_id for d in decisions] == [str(i) for i in range(10)]
+    assert decisions[5].qty == pytest.approx(10.5)
+    assert len(cache) == 1
+
+
+def test_leader_error_reaches_followers_and_is_not_cached():
+    cache = DecisionCache(ttl=60)
+    brains = [_Brain(_dna(i), delay=0.01, error=RuntimeError("llm down")) for i in range(3)]
+
+    async def run():
+        return await asyncio.gather(*(cache.adecide(b, _market()) for b in brains), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert sum(b.calls for b in brains) == 1
+    assert len(cache) == 0
+
+
+def test_cancelled_leader_lets_a_follower_call_the_brain():
+    cache = DecisionCache(ttl=60)
+    leader, follower = _Brain(_dna(1), delay=1.0), _Brain(_dna(2), delay=0.0)
+
+    async def run():
+        first = asyncio.create_task(cache.adecide(leader, _market()))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(cache.adecide(follower, _market()))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    decision = asyncio.run(run())
+    assert decision.agent_id == "2" and follower.calls == 1
+
+
+def test_disabled_cache_always_calls_the_brain():
+    cache = DecisionCache(enabled=False)
+    brain = _Brain(_dna(1))
+    for _ in range(2):
+        asyncio.run(cache.adecide(brain, _market()))
+    assert brain.calls == 2 and len(cache) == 0
+
+
+# ── Ticker path: _prescreen coalesces same-key misses within one tick ─────────
+def _tick(monkeypatch, cache: DecisionCache, brains: list[_Brain]):
+    from types import SimpleNamespace
+
+    from agents.circuit_breaker import CircuitBreaker
+    from agents.tick_executor import TickExecutor
+    from api import main
+
+    monkeypatch.setattr(main, "_decision_cache", cache)
+    contexts = {
+        b.dna.token_id: {"dna": b.dna, "market": _market(), "brain": b, "commodity": "ETH"} for b in brains
+    }
+    svc = SimpleNamespace(rule_engine=None, breaker=CircuitBreaker(enabled=False))
+    jobs, _, resolved, followers = main._prescreen(svc, contexts)
+    report = asyncio.run(TickExecutor().run(jobs.values()))
+    report.add_resolved(resolved)
+    report.add_resolved(main._share_coalesced(contexts, report.outcomes, followers))
+    return jobs, report
+
+
+def test_same_key_agents_in_one_tick_make_one_brain_call(monkeypatch):
+    from agents.tick_executor import STATUS_CACHED, STATUS_OK
+
+    cache = DecisionCache(ttl=60)
+    brains = [_Brain(_dna(i, capital=100 + i)) for i in range(1, 4)]
+    jobs, report = _tick(monkeypatch, cache, brains)
+
+    assert list(jobs) == [1] and sum(b.calls for b in brains) == 1
+    by_key = {o.key: o for o in report.outcomes}
+    assert by_key[1].status == STATUS_OK
+    assert by_key[3].status == STATUS_CACHED and by_key[3].value.agent_id == "3"
+    assert by_key[3].value.qty == pytest.approx(10.3)
+    assert report.summary()["cached"] == 2 and cache.coalesced == 2
+
+
+def test_followers_fall_back_when_the_leader_fails(monkeypatch):
+    from agents.tick_executor import STATUS_FALLBACK
+
+    brains = [_Brain(_dna(i), error=RuntimeError("llm down")) for i in range(1, 3)]
+    _, report = _tick(monkeypatch, DecisionCache(ttl=60), brains)
+    follower = next(o for o in report.outcomes if o.key == 2)
+    assert follower.status == STATUS_FALLBACK and "llm down" in follower.error
+    assert follower.value.agent_id == "2"
+    assert sum(b.calls for b in brains) == 1
+
+
+def test_rescaled_qty_never_exceeds_the_strategy_max_size():
+    from agents.brain.balanced_agent import SIZE_PCT
+
+    cache = DecisionCache(ttl=60, jitter=0.5)
+    source = _dna(1, capital=100)
+    at_cap = AgentDecision("1", ActionType.BID, "ETH", 1.0, 100 * SIZE_PCT[1], "max size", 0.9)
+    cache.store(source, _market(), at_cap)
+    for token_id in range(2, 50):
+        hit = cache.lookup(_dna(token_id, capital=120), _market())
+        assert hit.qty <= 120 * SIZE_PCT[1] + 1e-9
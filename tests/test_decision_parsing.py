@@ -0,0 +1,165 @@
+"""Decision decoding: schema validation + clamping, and the streaming JSON scanner."""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from pydantic import ValidationError
+
+from agents.brain import stream
+from agents.brain.schema import MAX_PRICE_DEVIATION, batch_decisions, parse_batch, parse_decision
+from agents.brain.stream import JsonScanner, agenerate, all_answered
+from agents.types import ActionType, AgentDNA, MarketState, Strategy
+
+_SIZE = (0.08, 0.15)
+
+
+def _dna(token_id: int = 1, capital: float = 100.0) -> AgentDNA:
+    return AgentDNA(str(token_id), token_id, 50, Strategy.BALANCED, capital, capital, "0x0")
+
+
+def _market(mid: float = 10.0) -> MarketState:
+    return MarketState("ETH", mid * 0.999, mid * 1.001, mid, 0.2, 1000.0, 0.5, 5, 5, mid, 0.9)
+
+
+def _json(**fields) -> str:
+    decision = {"action": "BID", "price": 10.0, "qty": 12.0, "confidence": 0.7, "reasoning": "dip"}
+    return json.dumps({**decision, **fields})
+
+
+# ── Schema ─────────────────────────────────────────────────────────────────────
+def test_valid_decision_is_decoded():
+    decision = parse_decision(_json(action=" bid "), _dna(), _market(), _SIZE)
+    assert decision.action == ActionType.BID and decision.agent_id == "1"
+    assert (decision.price, decision.qty, decision.confidence) == (10.0, 12.0, 0.7)
+    assert decision.commodity == "ETH" and decision.reasoning == "dip"
+
+
+@pytest.mark.parametrize("fields, expected", [
+    ({"qty": 1_000.0},      {"qty": 15.0}),                     # capped at capital * max size
+    ({"qty": 1.0},          {"qty": 1.0}),                      # below the range is allowed
+    ({"qty": -5.0},         {"qty": 0.0}),
+    ({"price": 50.0},       {"price": 10.0 * (1 + MAX_PRICE_DEVIATION)}),
+    ({"price": 0.0},        {"price": 10.0}),                   # non-positive → mid
+    ({"confidence": 7.0},   {"confidence": 1.0}),
+    ({"confidence": -1.0},  {"confidence": 0.0}),
+    ({"action": "HOLD"},    {"qty": 0.0}),
+])
+def test_out_of_range_values_are_clamped(fields, expected):
+    decision = parse_decision(_json(**fields), _dna(), _market(), _SIZE)
+    for name, value in expected.items():
+        assert getattr(decision, name) == pytest.approx(value)
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "not json",
+    '{"action": "BID", "price": 10',                        # truncated
+    _json(action="SHORT"),                                  # not an ActionType
+    _json(price="ten"),
+    json.dumps({"action": "BID", "price": 10.0}),           # missing fields
+])
+def test_invalid_decisions_raise(text):
+    with pytest.raises(ValidationError):
+        parse_decision(text, _dna(), _market(), _SIZE)
+
+
+def test_fenced_response_is_accepted():
+    decision = parse_decision("```json\n" + _json() + "\n```", _dna(), _market(), _SIZE)
+    assert decision.qty == 12.0
+
+
+def test_batch_keeps_valid_items_for_known_agents_only():
+    brains = {str(i): SimpleNamespace(dna=_dna(i)) for i in (1, 2, 3)}
+    items = parse_batch(json.dumps([
+        {"agent_id": 1, **json.loads(_json(qty=999.0))},
+        {"agent_id": "2", "action": "BID"},                 # malformed: costs agent 2 only
+        {"agent_id": "9", **json.loads(_json())},           # not in this batch
+        {"agent_id": "1", **json.loads(_json(qty=1.0))},    # first answer wins
+    ]))
+    decisions = batch_decisions(items, brains, _market(), _SIZE)
+    assert list(decisions) == ["1"] and decisions["1"].qty == 15.0
+
+
+def test_wrapped_batch_is_unwrapped():
+    items = parse_batch(json.dumps({"decisions": [{"agent_id": "1", **json.loads(_json())}]}))
+    assert len(items) == 1
+
+
+# ── Streaming scanner ──────────────────────────────────────────────────────────
+def _split(text: str, size: int) -> list[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 1000])
+def test_scanner_finds_the_value_end_across_chunk_splits(size):
+    value = '{"action":"BID","reasoning":"a \\"quoted\\" {brace} and ] bracket"}'
+    scanner = JsonScanner()
+    for chunk in _split(value + "\n\n  trailing", size):
+        scanner.feed(chunk)
+        if scanner.done:
+            break
+    assert scanner.done and scanner.value() == value
+    assert json.loads(scanner.value())["reasoning"].endswith("] bracket")
+
+
+def test_scanner_collects_array_items_before_the_array_closes():
+    scanner = JsonScanner()
+    for chunk in _split('[{"agent_id":"1","x":[1,2]}, {"agent_id":"2"}, {"agent_id":"3", "reas', 5):
+        scanner.feed(chunk)
+    assert not scanner.done
+    assert [json.loads(item)["agent_id"] for item in scanner.items] == ["1", "2"]
+    assert json.loads(scanner.value()) == [{"agent_id": "1", "x": [1, 2]}, {"agent_id": "2"}]
+
+
+def test_partial_object_is_returned_raw():
+    scanner = JsonScanner()
+    scanner.feed('{"action": "BI')
+    assert not scanner.done and scanner.value() == '{"action": "BI'
+
+
+def test_all_answered_stops_once_every_agent_has_a_valid_item():
+    until = all_answered(["1", "2"])
+    scanner = JsonScanner()
+    scanner.feed('[{"agent_id":"1",' + _json()[1:] + ",")
+    assert not until(scanner)
+    scanner.feed('{"agent_id":"2","action":"BID"},')          # invalid item does not count
+    assert not until(scanner)
+    scanner.feed('{"agent_id":"2",' + _json()[1:])
+    assert until(scanner)
+
+
+class _StreamClient:
+    """generate_content_stream over fixed chunks; counts how many were read."""
+
+    def __init__(self, chunks: list[str]) -> None:
+        self.chunks, self.read, self.closed = chunks, 0, False
+        self.aio = SimpleNamespace(models=SimpleNamespace(generate_content_stream=self._stream))
+
+    async def _stream(self, **_):
+        client = self
+
+        class _Stream:
+            def __aiter__(self):
+                return self
+
+            async def __anext__(self):
+                if client.read == len(client.chunks):
+                    raise StopAsyncIteration
+                client.read += 1
+                return SimpleNamespace(text=client.chunks[client.read - 1], usage_metadata=None)
+
+            async def aclose(self):
+                client.closed = True
+
+        return _Stream()
+
+
+def test_agenerate_stops_reading_once_the_value_is_complete(monkeypatch):
+    monkeypatch.setattr(stream, "DECISION_STREAMING", True)
+    text = _json()
+    client = _StreamClient(_split(text, 10) + ["\n", "\n", "{extra"])
+    response = asyncio.run(agenerate(client, model="m", contents="c", config=None))
+    assert response.text == text and response.stopped_early
+    assert client.read == len(_split(text, 10)) and client.closed
+    assert parse_decision(response.text, _dna(), _market(), _SIZE).qty == 12.0
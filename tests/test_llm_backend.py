@@ -0,0 +1,209 @@
+"""Record / replay LLM backends: cassette round trip, prompt matching and injected failures."""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from google.genai import types as genai_types
+
+from agents.brain.schema import parse_batch, parse_decision
+from agents.llm_backend import (
+    Cassette, RecordingClient, ReplayClient, ReplayError, get_cassette, make_client,
+)
+from agents.llm_scheduler import is_rate_limited
+from agents.types import AgentDNA, MarketState, Strategy
+
+_MODEL = "gemini-test"
+_RULES_A = "You trade aggressively."
+_RULES_B = "You trade conservatively."
+
+
+def _config(static: str = _RULES_A) -> genai_types.GenerateContentConfig:
+    return genai_types.GenerateContentConfig(system_instruction=static, temperature=0.4)
+
+
+def _answer(tag: str) -> str:
+    return json.dumps({"action": "BID", "price": 10.0, "qty": 1.0, "confidence": 0.7, "reasoning": tag})
+
+
+class _Gemini:
+    """Real-client stand-in: answers with the prompt's tag, streaming in two chunks."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.aio = SimpleNamespace(models=SimpleNamespace(
+            generate_content=self._generate, generate_content_stream=self._stream,
+        ))
+
+    async def _generate(self, *, model, contents, config=None):
+        self.calls += 1
+        usage = genai_types.GenerateContentResponseUsageMetadata(prompt_token_count=120, total_token_count=150)
+        return SimpleNamespace(text=_answer(contents), usage_metadata=usage)
+
+    async def _stream(self, *, model, contents, config=None):
+        self.calls += 1
+        text = _answer(contents)
+
+        async def chunks():
+            yield SimpleNamespace(text=text[:10], usage_metadata=None)
+            yield SimpleNamespace(text=text[10:], usage_metadata=None)
+        return chunks()
+
+
+async def _collect(stream) -> str:
+    return "".join([chunk.text async for chunk in await stream])
+
+
+def _record(path, prompts, static: str = _RULES_A) -> RecordingClient:
+    recorder = RecordingClient(_Gemini(), Cassette(path))
+
+    async def run():
+        for prompt in prompts:
+            await recorder.aio.models.generate_content(model=_MODEL, contents=prompt, config=_config(static))
+
+    asyncio.run(run())
+    return recorder
+
+
+def _replay(path, **kwargs) -> ReplayClient:
+    return ReplayClient(Cassette(path), latency="fixed:0", **kwargs)
+
+
+# ── Round trip ─────────────────────────────────────────────────────────────────
+
+def test_recorded_calls_replay_exactly_from_a_reloaded_cassette(tmp_path):
+    path = tmp_path / "tape.jsonl"
+    recorder = _record(path, ["alpha", "beta"])
+    assert recorder.recorded == 2 and len(path.read_text().splitlines()) == 2
+
+    replay = _replay(path)
+
+    async def run():
+        return [
+            await replay.aio.models.generate_content(model=_MODEL, contents=p, config=_config())
+            for p in ("beta", "alpha")
+        ]
+
+    beta, alpha = asyncio.run(run())
+    assert beta.text == _answer("beta") and alpha.text == _answer("alpha")
+    assert beta.usage_metadata.prompt_token_count == 120
+    assert replay.stats()["exact_hits"] == 2 and replay.stats()["synthetic"] == 0
+
+
+def test_streamed_calls_are_recorded_whole_and_replayed_in_chunks(tmp_path):
+    path = tmp_path / "tape.jsonl"
+    recorder = RecordingClient(_Gemini(), Cassette(path))
+    streamed = asyncio.run(_collect(
+        recorder.aio.models.generate_content_stream(model=_MODEL, contents="gamma", config=_config())
+    ))
+    assert streamed == _answer("gamma")
+
+    replay = _replay(path)
+    replayed = asyncio.run(_collect(
+        replay.aio.models.generate_content_stream(model=_MODEL, contents="gamma", config=_config())
+    ))
+    assert replayed == _answer("gamma") and replay.exact_hits == 1
+
+
+def test_key_covers_model_static_prefix_and_contents(tmp_path):
+    path = tmp_path / "tape.jsonl"
+    _record(path, ["alpha"])
+    replay = _replay(path)
+
+    async def run():
+        models = replay.aio.models
+        await models.generate_content(model="other-model", contents="alpha", config=_config())
+        await models.generate_content(model=_MODEL, contents="alpha", config=_config(_RULES_B))
+        return await models.generate_content(model=_MODEL, contents="delta", config=_config())
+
+    other_prompt = asyncio.run(run())
+    assert replay.exact_hits == 0
+    # Same strategy prefix, new prompt: a recorded answer of that prefix is reused
+    assert replay.similar == 2 and replay.synthetic == 1
+    assert other_prompt.text == _answer("alpha")
+
+
+def test_similar_batch_answer_is_remapped_to_the_prompts_agents(tmp_path):
+    class _Batch(_Gemini):
+        async def _generate(self, *, model, contents, config=None):
+            return SimpleNamespace(text=json.dumps([
+                {"agent_id": "1", **json.loads(_answer("one"))}, {"agent_id": "2", **json.loads(_answer("two"))},
+            ]), usage_metadata=None)
+
+    path = tmp_path / "tape.jsonl"
+    recorder = RecordingClient(_Batch(), Cassette(path))
+    asyncio.run(recorder.aio.models.generate_content(
+        model=_MODEL, contents="- agent_id=1 | name=A\n- agent_id=2 | name=B", config=_config(),
+    ))
+    assert json.loads(path.read_text())["batch"] is True
+
+    replay = _replay(path)
+    response = asyncio.run(replay.aio.models.generate_content(
+        model=_MODEL, contents="- agent_id=7 | name=C\n- agent_id=8 | name=D\n- agent_id=9 | name=E",
+        config=_config(),
+    ))
+    items = parse_batch(response.text)
+    assert [item["agent_id"] for item in items] == ["7", "8", "9"]
+    assert [item["reasoning"] for item in items] == ["one", "two", "one"]    # answers cycle over the agents
+    assert replay.similar == 1
+
+
+def test_empty_answers_are_not_recorded(tmp_path):
+    class _Silent(_Gemini):
+        async def _generate(self, *, model, contents, config=None):
+            return SimpleNamespace(text="", usage_metadata=None)
+
+    path = tmp_path / "tape.jsonl"
+    recorder = RecordingClient(_Silent(), Cassette(path))
+    asyncio.run(recorder.aio.models.generate_content(model=_MODEL, contents="x", config=_config()))
+    assert recorder.recorded == 0 and not path.exists()
+
+
+# ── Synthetic answers and injected failures ────────────────────────────────────
+
+def test_unrecorded_prompt_gets_a_schema_valid_synthetic_answer():
+    replay = ReplayClient(None, latency="fixed:0", seed=3)
+    prompt = "=== LIVE MARKET ===\nMid Price:    12.5\nSize Range:       1.00–2.00 USD"
+    response = asyncio.run(replay.aio.models.generate_content(model=_MODEL, contents=prompt, config=_config()))
+    dna = AgentDNA("1", 1, 50, Strategy.BALANCED, 100.0, 100.0, "0x0")
+    market = MarketState("ETH", 12.4, 12.6, 12.5, 0.2, 0.0, 0.0, 0, 0, 12.5, 0.9)
+    decision = parse_decision(response.text, dna, market, (0.01, 0.02))
+    assert abs(decision.price - 12.5) <= 12.5 * 0.01
+    assert replay.synthetic == 1
+
+
+def test_same_seed_replays_the_same_answers():
+    def answers(seed):
+        replay = ReplayClient(None, latency="fixed:0", seed=seed)
+
+        async def run():
+            return [
+                (await replay.aio.models.generate_content(model=_MODEL, contents=f"Mid Price: {i}", config=None)).text
+                for i in range(1, 5)
+            ]
+        return asyncio.run(run())
+
+    assert answers(5) == answers(5)
+    assert answers(5) != answers(6)
+
+
+@pytest.mark.parametrize("rates, code, limited", [
+    ({"rate_limit_rate": 1.0}, 429, True),
+    ({"error_rate": 1.0}, 503, False),
+])
+def test_injected_errors_carry_the_status_code(rates, code, limited):
+    replay = ReplayClient(None, latency="fixed:0", **rates)
+    with pytest.raises(ReplayError) as info:
+        asyncio.run(replay.aio.models.generate_content(model=_MODEL, contents="x", config=None))
+    assert info.value.code == code
+    assert is_rate_limited(info.value) is limited
+    assert replay.errors == 1
+
+
+def test_cassettes_are_shared_per_path_and_backends_resolve(tmp_path):
+    path = tmp_path / "tape.jsonl"
+    assert get_cassette(path) is get_cassette(str(path))
+    assert isinstance(make_client("fake"), ReplayClient)
+    assert make_client("replay", cassette=path).cassette is get_cassette(path)
+    with pytest.raises(ValueError):
+        make_client("nope")
@@ -0,0 +1,158 @@
+"""LLMScheduler: RPM / TPM budgets, priority dispatch, 429 backoff and AIMD recovery."""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from agents.circuit_breaker import CircuitBreaker
+from agents.llm_scheduler import (
+    PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL, LLMScheduler, TokenBucket, estimate_tokens,
+    is_rate_limited, priority_for,
+)
+
+
+class RateLimited(Exception):
+    code = 429
+
+
+def _scheduler(**kwargs) -> LLMScheduler:
+    kwargs.setdefault("breaker", CircuitBreaker(enabled=False))
+    return LLMScheduler(**kwargs)
+
+
+def _reply(value="ok", tokens=None):
+    async def call():
+        usage = SimpleNamespace(total_token_count=tokens) if tokens else None
+        return SimpleNamespace(text=value, usage_metadata=usage)
+    return call
+
+
+def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(per_minute=60)             # 1 token / second
+    bucket.take(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0, abs=0.05)
+    bucket.scale = 0.5
+    assert bucket.wait_time(1) == pytest.approx(2.0, abs=0.1)
+    assert bucket.wait_time(1000) == pytest.approx(120.0, abs=1)   # capped at capacity
+
+
+def test_request_budget_is_charged_per_call():
+    scheduler = _scheduler(rpm=3)
+
+    async def run():
+        for _ in range(3):
+            await scheduler.submit(_reply(), tokens=10)
+
+    asyncio.run(run())
+    assert scheduler.requests.level() < 1
+    assert scheduler._ready_in(10) > 0
+
+
+def test_token_budget_reconciles_with_reported_usage():
+    scheduler = _scheduler(rpm=1000, tpm=600)
+    asyncio.run(scheduler.submit(_reply(tokens=100), tokens=500))
+    assert scheduler.tokens.level() == pytest.approx(500, abs=1)    # 600 - 500 estimated + 400 refunded
+    assert scheduler._ready_in(550) > 0
+
+
+def test_waiting_calls_are_released_in_priority_order():
+    scheduler = _scheduler(rpm=1)
+    order = []
+
+    def tagged(name):
+        async def call():
+            order.append(name)
+        return call
+
+    async def run():
+        await scheduler.submit(tagged("first"), tokens=1)            # drains the bucket
+        scheduler.requests.rate = 40                                 # refill one slot every 25 ms
+        calls = [("low", (PRIORITY_LOW,)), ("normal", (PRIORITY_NORMAL,)), ("high", (PRIORITY_HIGH,))]
+        await asyncio.gather(*(scheduler.submit(tagged(n), tokens=1, priority=p) for n, p in calls))
+
+    asyncio.run(run())
+    assert order == ["first", "high", "normal", "low"]
+
+
+def test_rate_limit_halves_rate_and_backs_off_exponentially():
+    scheduler = _scheduler(rpm=60, backoff_max=4)
+
+    async def limited():
+        raise RateLimited("429 RESOURCE_EXHAUSTED")
+
+    async def run():
+        for expected_backoff in (1.0, 2.0, 4.0, 4.0):
+            scheduler._paused_until = 0.0
+            scheduler.requests.tokens = scheduler.requests.capacity
+            with pytest.raises(RateLimited):
+                await scheduler.submit(limited, tokens=1)
+            assert scheduler._backoff == expected_backoff
+            assert scheduler._paused_until > time.monotonic()
+
+    asyncio.run(run())
+    assert scheduler.rate_limited == 4
+    assert scheduler.requests.scale == pytest.approx(0.0625)
+    assert scheduler.tokens.scale == scheduler.requests.scale
+
+
+def test_success_recovers_rate_additively():
+    scheduler = _scheduler(rpm=60)
+    scheduler._set_scale(0.5)
+    scheduler._backoff = 8.0
+
+    asyncio.run(scheduler.submit(_reply(), tokens=1))
+    assert scheduler._backoff == 0.0
+    assert scheduler.requests.scale == pytest.approx(0.55)
+
+
+def test_wait_ready_sleeps_through_the_pause():
+    scheduler = _scheduler(rpm=60)
+    scheduler._paused_until = time.monotonic() + 0.05
+    waited = asyncio.run(scheduler.wait_ready(1))
+    assert waited >= 0.04
+
+
+def test_deadline_bounds_the_call():
+    scheduler = _scheduler(rpm=60)
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(scheduler.submit(slow, tokens=1, timeout=0.01))
+    assert scheduler.failed == 1
+
+
+def test_helpers():
+    assert is_rate_limited(RateLimited())
+    assert is_rate_limited(SimpleNamespace(code=None, status="RESOURCE_EXHAUSTED"))
+    assert is_rate_limited(SimpleNamespace(status=429))
+    assert not is_rate_limited(ValueError("bad json"))
+    assert estimate_tokens("x" * 400, outputs=2) == 100 + 400
+    assert priority_for(5000, 0)[0] == PRIORITY_HIGH
+    assert priority_for(10, 0, "aggressive")[0] == PRIORITY_NORMAL
+    assert priority_for(10, 0, "balanced")[0] == PRIORITY_LOW
+
+
+@pytest.mark.parametrize("exc", [
+    ValueError("price 429.5 out of range"),                  # parse error quoting 429
+    asyncio.TimeoutError("deadline after 429 ms"),
+    RuntimeError("RESOURCE_EXHAUSTED in reasoning text"),
+])
+def test_message_text_alone_is_not_a_rate_limit(exc):
+    scheduler = _scheduler(rpm=600)
+
+    async def fail():
+        raise exc
+
+    with pytest.raises(type(exc)):
+        asyncio.run(scheduler.submit(fail, tokens=1))
+    assert scheduler.rate_limited == 0 and scheduler.requests.scale == 1.0
+
+
+def test_calls_within_counts_level_plus_refill():
+    scheduler = _scheduler(rpm=60)
+    assert scheduler.calls_within(15) == pytest.approx(60 + 15, abs=0.1)
+    scheduler.requests.take(60)
+    assert scheduler.calls_within(15) == pytest.approx(15, abs=0.1)
@@ -0,0 +1,96 @@
+"""SegmentedLog: seq-tagged appends, cursor pagination and restart recovery."""
+import pytest
+
+from api.services.feed_index import decode_cursor, encode_cursor
+from api.services.log_store import SegmentedLog
+
+
+def _log(path, **kwargs) -> SegmentedLog:
+    return SegmentedLog(path, index_fields=("agent_id", "commodity"), **kwargs)
+
+
+def _fill(log: SegmentedLog, n: int) -> None:
+    for i in range(n):
+        log.append({"agent_id": str(i % 3), "commodity": "ETH" if i % 2 else "SOL", "i": i})
+
+
+def _walk(log: SegmentedLog, filters: dict, limit: int) -> list[int]:
+    """Follow next_cursor until the last page; returns the seqs seen."""
+    seqs, before = [], None
+    while True:
+        page = log.query(filters, limit=limit, before=before)
+        seqs += [r["seq"] for r in page.items]
+        if page.next_cursor is None:
+            return seqs
+        before = decode_cursor(page.next_cursor)
+
+
+def test_append_assigns_increasing_seqs(tmp_path):
+    log = _log(tmp_path)
+    assert [log.append({"i": i}) for i in range(3)] == [1, 2, 3]
+    assert log.last_seq == 3
+
+
+def test_cursor_walk_visits_every_match_once_newest_first(tmp_path):
+    log = _log(tmp_path)
+    _fill(log, 100)
+    seqs = _walk(log, {"agent_id": "1"}, limit=7)
+    expected = [s for s in range(100, 0, -1) if (s - 1) % 3 == 1]
+    assert seqs == expected
+
+
+def test_cursor_is_stable_while_new_entries_arrive(tmp_path):
+    log = _log(tmp_path)
+    _fill(log, 20)
+    first = log.query(limit=5)
+    _fill(log, 10)                                  # newer entries must not shift the next page
+    second = log.query(limit=5, before=decode_cursor(first.next_cursor))
+    assert [r["seq"] for r in first.items] == [20, 19, 18, 17, 16]
+    assert [r["seq"] for r in second.items] == [15, 14, 13, 12, 11]
+
+
+def test_offset_pages_and_total(tmp_path):
+    log = _log(tmp_path)
+    _fill(log, 30)
+    page = log.query({"commodity": "ETH"}, limit=4, offset=4)
+    assert page.total == 15
+    assert [r["seq"] for r in page.items] == [22, 20, 18, 16]
+
+
+def test_last_page_has_no_cursor(tmp_path):
+    log = _log(tmp_path)
+    _fill(log, 4)
+    assert log.query(limit=4).next_cursor is None
+    assert log.query(limit=3).next_cursor is not None
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(4812)) == 4812
+
+
+@pytest.mark.parametrize("cursor", ["", "!!!", "b2Zmc2V0OjEw", "c2VxOng"])   # "offset:10", "seq:x"
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_reopen_rebuilds_index_and_drops_partial_line(tmp_path):
+    log = _log(tmp_path, segment_bytes=200)
+    _fill(log, 25)
+    log.close()
+    active = sorted(tmp_path.glob("*.ndjson"))[-1]
+    with open(active, "ab") as fh:
+        fh.write(b'{"seq":26,"agent_')             # crash mid-write
+
+    reopened = _log(tmp_path, segment_bytes=200)
+    assert reopened.last_seq == 25
+    assert reopened.append({"agent_id": "9"}) == 26
+    assert _walk(reopened, {}, limit=10) == list(range(26, 0, -1))
+
+
+def test_rollover_prunes_oldest_segments(tmp_path):
+    log = _log(tmp_path, segment_bytes=120, max_segments=3)
+    _fill(log, 40)
+    log.sync()
+    assert len(list(tmp_path.glob("*.ndjson"))) == 3
+    assert log.stats()["segments"] == 3
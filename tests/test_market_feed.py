@@ -0,0 +1,242 @@
+"""PriceFeed: oracle TTL cache, single-flight misses and JSON-RPC batch decoding."""
+import asyncio
+
+import pytest
+
+from agents import market_feed
+from agents.market_feed import BASE_PRICES, COMMODITIES, PriceFeed
+from agents.market_stats import MarketStats
+
+
+def _wei(price: float) -> str:
+    return hex(int(price * 10**18))
+
+
+class _Response:
+    def __init__(self, data) -> None:
+        self._data = data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    async def json(self):
+        return self._data
+
+
+class _Session:
+    """Answers every eth_call of a batch via `reply(commodity_index, request)`."""
+
+    def __init__(self, reply=None, gate: asyncio.Event | None = None, shape=None) -> None:
+        self.reply = reply or (lambda i, req: {"jsonrpc": "2.0", "id": req["id"], "result": _wei(i + 1)})
+        self.gate = gate
+        self.shape = shape or (lambda body: body)
+        self.batches: list[list] = []
+
+    def post(self, url, json=None, timeout=None):
+        self.batches.append(json)
+        return self._respond(json)
+
+    def _respond(self, payload):
+        session = self
+
+        class _Pending:
+            async def __aenter__(self):
+                if session.gate is not None:
+                    await session.gate.wait()
+                return _Response(session.shape([session.reply(i, req) for i, req in enumerate(payload)]))
+
+            async def __aexit__(self, *exc) -> None:
+                return None
+
+        return _Pending()
+
+
+class _Pool:
+    def __init__(self, session: _Session) -> None:
+        self._session = session
+
+    def session(self) -> _Session:
+        return self._session
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(market_feed.time, "monotonic", clock)
+    return clock
+
+
+def _feed(session: _Session, **kwargs) -> PriceFeed:
+    return PriceFeed(http=_Pool(session), stats=MarketStats(), **kwargs)
+
+
+# ── Single-flight ──────────────────────────────────────────────────────────────
+
+def test_concurrent_callers_share_one_request(clock):
+    gate = asyncio.Event()
+    session = _Session(gate=gate)
+    feed = _feed(session)
+
+    async def run():
+        callers = [asyncio.create_task(feed.fetch_oracle_price("GHOST_ORE")) for _ in range(5)]
+        for _ in range(5):
+            await asyncio.sleep(0)
+        gate.set()
+        return await asyncio.gather(*callers)
+
+    results = asyncio.run(run())
+    assert results == [(1.0, 0.98)] * 5
+    assert len(session.batches) == 1 and feed.rpc_calls == 1
+    assert feed.cache_misses == 1 and feed.cache_coalesced == 4
+    assert feed._inflight == {}
+
+
+def test_inflight_failure_reaches_every_waiter(clock, monkeypatch):
+    gate = asyncio.Event()
+    feed = _feed(_Session(gate=gate))
+
+    async def boom(commodities):
+        await gate.wait()
+        raise RuntimeError("rpc down")
+
+    monkeypatch.setattr(feed, "_rpc_oracle_prices", boom)
+
+    async def run():
+        callers = [asyncio.create_task(feed.fetch_oracle_price("VOID_CHIP")) for _ in range(3)]
+        for _ in range(5):
+            await asyncio.sleep(0)
+        gate.set()
+        return await asyncio.gather(*callers, return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert feed._inflight == {}
+
+
+# ── TTL cache ──────────────────────────────────────────────────────────────────
+
+def test_fresh_entry_is_served_from_cache(clock):
+    session = _Session()
+    feed = _feed(session)
+
+    async def run():
+        first = await feed.fetch_oracle_price("GHOST_ORE")
+        clock.now += feed.ttl_for("GHOST_ORE") / 2
+        second = await feed.fetch_oracle_price("GHOST_ORE")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert len(session.batches) == 1
+    assert feed.cache_hits == 1
+    assert second[0] == first[0]
+    assert second[1] < first[1]          # confidence decays with the cache age
+
+
+def test_expired_ttl_triggers_a_refetch(clock):
+    session = _Session()
+    feed = _feed(session)
+
+    async def run():
+        await feed.fetch_oracle_price("GHOST_ORE")
+        clock.now += feed.ttl_for("GHOST_ORE") + 0.01
+        return await feed.fetch_oracle_price("GHOST_ORE")
+
+    assert asyncio.run(run()) == (1.0, 0.98)
+    assert len(session.batches) == 2
+    assert feed.cache_misses == 2 and feed.cache_hits == 0
+
+
+def test_ttl_override_applies_per_commodity(clock):
+    session = _Session()
+    feed = _feed(session, ttl_overrides={"VOID_CHIP": 10.0})
+
+    async def run():
+        await feed.fetch_oracle_prices(["GHOST_ORE", "VOID_CHIP"])
+        clock.now += 5.0
+        await feed.fetch_oracle_prices(["GHOST_ORE", "VOID_CHIP"])
+
+    asyncio.run(run())
+    assert len(session.batches) == 2
+    assert [req["id"] for req in session.batches[1]] == [0]   # only GHOST_ORE expired
+    assert feed.cache_hits == 1
+
+
+def test_bulk_fetch_only_requests_missing_commodities(clock):
+    session = _Session()
+    feed = _feed(session)
+
+    async def run():
+        await feed.fetch_oracle_price("PHANTOM_GAS")
+        return await feed.fetch_oracle_prices(COMMODITIES)
+
+    out = asyncio.run(run())
+    assert set(out) == set(COMMODITIES)
+    assert len(session.batches) == 2
+    assert len(session.batches[1]) == 2
+
+
+# ── JSON-RPC batch decoding ────────────────────────────────────────────────────
+
+def test_batch_with_per_item_error_falls_back_for_that_item_only(clock):
+    def reply(i, req):
+        if i == 1:
+            return {"jsonrpc": "2.0", "id": req["id"], "error": {"code": -32000, "message": "execution reverted"}}
+        return {"jsonrpc": "2.0", "id": req["id"], "result": _wei(10 * (i + 1))}
+
+    session = _Session(reply, shape=lambda body: list(reversed(body)))   # any response order
+    feed = _feed(session)
+
+    out = asyncio.run(feed.fetch_oracle_prices(COMMODITIES))
+    assert out[COMMODITIES[0]] == (10.0, 0.98)
+    assert out[COMMODITIES[1]] == (BASE_PRICES[COMMODITIES[1]], 0.70)
+    assert out[COMMODITIES[2]] == (30.0, 0.98)
+    assert len(session.batches) == 1
+
+
+def test_batch_level_error_object_falls_back_for_everything(clock):
+    session = _Session(shape=lambda body: {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "bad"}})
+    feed = _feed(session)
+
+    out = asyncio.run(feed.fetch_oracle_prices(COMMODITIES))
+    assert out == {c: (BASE_PRICES[c], 0.70) for c in COMMODITIES}
+
+
+def test_transport_error_falls_back_and_is_cached(clock):
+    class _Broken(_Session):
+        def post(self, url, json=None, timeout=None):
+            self.batches.append(json)
+            raise ConnectionError("refused")
+
+    session = _Broken()
+    feed = _feed(session)
+
+    async def run():
+        first = await feed.fetch_oracle_price("GHOST_ORE")
+        second = await feed.fetch_oracle_price("GHOST_ORE")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == (BASE_PRICES["GHOST_ORE"], 0.70)
+    assert second[0] == first[0]
+    assert len(session.batches) == 1
+
+
+def test_fetched_prices_reach_the_callbacks(clock):
+    seen = []
+    feed = _feed(_Session())
+    feed.on_price_update(lambda commodity, price: seen.append((commodity, price)))
+
+    asyncio.run(feed.fetch_oracle_prices(COMMODITIES))
+    assert seen == [(c, float(i + 1)) for i, c in enumerate(COMMODITIES)]
+    assert feed.market_state("VOID_CHIP").oracle_price == 3.0
@@ -0,0 +1,129 @@
+"""Rolling market statistics: ring buffers, rolling sums and the per-commodity numbers built on them."""
+import math
+import random
+import statistics
+
+import pytest
+
+from agents.market_stats import CommodityStats, MarketStats, RingBuffer, RollingSum
+
+
+# ── RingBuffer ─────────────────────────────────────────────────────────────────
+
+def test_ring_fills_then_overwrites_the_oldest():
+    ring = RingBuffer(3)
+    assert [ring.push(v) for v in (1.0, 2.0, 3.0)] == [None, None, None]
+    assert ring.values() == [1.0, 2.0, 3.0] and len(ring) == 3
+
+    assert ring.push(4.0) == 1.0
+    assert ring.push(5.0) == 2.0
+    assert ring.values() == [3.0, 4.0, 5.0]
+    assert (ring.oldest(), ring.latest()) == (3.0, 5.0)
+
+
+@pytest.mark.parametrize("pushes", [1, 4, 7, 8, 9, 31])
+def test_ring_values_after_any_number_of_wraps(pushes):
+    ring = RingBuffer(4)
+    for v in range(pushes):
+        ring.push(float(v))
+    expected = [float(v) for v in range(max(0, pushes - 4), pushes)]
+    assert ring.values() == expected
+    assert ring.oldest() == expected[0] and ring.latest() == expected[-1]
+
+
+def test_ring_capacity_is_at_least_one():
+    ring = RingBuffer(0)
+    assert ring.capacity == 1
+    assert ring.push(1.0) is None and ring.push(2.0) == 1.0
+    assert ring.values() == [2.0]
+
+
+# ── RollingSum ─────────────────────────────────────────────────────────────────
+
+def test_rolling_sum_tracks_the_window_across_wraps():
+    rolling = RollingSum(5)
+    pushed = []
+    for v in range(1, 23):
+        rolling.push(float(v))
+        pushed.append(float(v))
+        window = pushed[-5:]
+        assert rolling.total == pytest.approx(sum(window))
+        assert rolling.squares == pytest.approx(sum(x * x for x in window))
+    assert rolling.total == 18 + 19 + 20 + 21 + 22
+
+
+def test_rolling_stdev_matches_statistics():
+    rng = random.Random(7)
+    rolling = RollingSum(16)
+    values = [rng.gauss(0.0, 0.02) for _ in range(100)]
+    for v in values:
+        rolling.push(v)
+    assert rolling.stdev() == pytest.approx(statistics.stdev(values[-16:]), rel=1e-9)
+
+
+def test_rolling_stdev_needs_two_values():
+    rolling = RollingSum(4)
+    assert rolling.stdev() == 0.0
+    rolling.push(3.0)
+    assert rolling.stdev() == 0.0
+
+
+def test_resum_on_wrap_bounds_float_drift():
+    rolling = RollingSum(8)
+    # Large values followed by small ones: the incremental sum alone would keep the cancellation error
+    for _ in range(8):
+        rolling.push(1e16)
+    for v in range(1, 9):
+        rolling.push(v * 0.1)
+    assert rolling.total == math.fsum(v * 0.1 for v in range(1, 9))
+
+
+# ── CommodityStats ─────────────────────────────────────────────────────────────
+
+def test_price_change_and_volatility_over_the_window():
+    stats = CommodityStats(window=4)
+    prices = [100.0, 101.0, 99.0, 102.0, 104.0, 103.0]
+    for p in prices:
+        stats.update(p)
+    # window 4 → 5 prices kept, change from prices[-5] to prices[-1]
+    assert stats.price_change() == pytest.approx((103.0 / 101.0 - 1) * 100)
+    returns = [math.log(b / a) for a, b in zip(prices[-5:], prices[-4:])]
+    assert stats.volatility() == pytest.approx(statistics.stdev(returns) * 100)
+
+
+def test_invalid_prices_are_ignored():
+    stats = CommodityStats(window=4)
+    for p in (0.0, -1.0, float("nan"), float("inf")):
+        stats.update(p)
+    assert stats.updates == 0 and stats.last_price == 0.0
+
+
+def test_vwap_and_depth_cover_the_last_window_trades():
+    stats = CommodityStats(window=3)
+    stats.trade("BID", 10.0, 1.0, ts=0)     # rolls out of the window
+    stats.trade("ASK", 12.0, 2.0, ts=0)
+    stats.trade("BID", 11.0, 1.0, ts=0)
+    stats.trade("BID", 13.0, 1.0, ts=0)
+    assert stats.vwap() == pytest.approx((24.0 + 11.0 + 13.0) / 4.0)
+    assert stats.depth() == (2, 1)
+
+
+def test_volume_24h_rolls_hour_buckets_out():
+    stats = CommodityStats()
+    hour = 3600
+    stats.trade("BID", 1.0, 10.0, ts=0)
+    stats.trade("BID", 1.0, 5.0, ts=5 * hour)
+    assert stats.volume_24h == pytest.approx(15.0)
+    stats.trade("ASK", 1.0, 1.0, ts=24 * hour)     # hour 0 leaves the 24h window
+    assert stats.volume_24h == pytest.approx(6.0)
+    stats.trade("ASK", 1.0, 2.0, ts=100 * hour)    # everything before is gone
+    assert stats.volume_24h == pytest.approx(2.0)
+
+
+def test_snapshot_builds_a_market_state_from_the_stats():
+    stats = MarketStats(window=4)
+    for p in (10.0, 10.5, 11.0):
+        stats.update("ETH", p)
+    state = stats.snapshot("ETH", 10.8, 0.9)
+    assert state.commodity == "ETH" and state.oracle_price == 10.8
+    assert state.price_change == pytest.approx(10.0)
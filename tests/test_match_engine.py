@@ -0,0 +1,112 @@
+"""MatchEngine: price-time matching and settlement parity with MatchEngine.sol."""
+import random
+
+import pytest
+
+from api.services.match_engine import ASK, BID, EXPIRED, MATCHED, OPEN, WAD, MatchEngine, to_wei
+from benchmarks.match_engine import check
+
+
+def _settle_reference(capitals: dict[int, int], agent_bid: int, agent_ask: int, value: int, fee: int) -> None:
+    """_settleAgentCapitals line by line: both DNAs read before either update."""
+    bid_capital, ask_capital = capitals[agent_bid], capitals[agent_ask]
+    capitals[agent_bid] = bid_capital - value - fee if bid_capital >= value + fee else 0
+    capitals[agent_ask] = ask_capital + value - fee
+
+
+def test_matches_are_identical_to_the_linear_contract_scan():
+    result = check(1500, seed=7, agents=50)
+    assert result["matches"] > 0 and result["identical"]
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_settlement_matches_the_contract(seed):
+    rng = random.Random(seed)
+    engine = MatchEngine()
+    capitals = {}
+    for agent in range(20):
+        capital = to_wei(rng.choice([0.5, 5.0, 50.0]))
+        engine.seed_capital(agent, capital)
+        capitals[agent] = capital
+    for _ in range(400):
+        side = BID if rng.random() < 0.5 else ASK
+        price = to_wei(round(rng.uniform(0.9, 1.1), 4))
+        engine.post(rng.randrange(20), "GHOST_ORE", side, price, to_wei(round(rng.uniform(0.1, 3.0), 3)), block=1)
+
+    matches = engine.process_batch(block=2)
+    assert matches
+    for m in matches:
+        value = m.matched_qty * m.matched_price // WAD
+        assert m.fee_burned == value * 10 // 10_000
+        _settle_reference(capitals, m.agent_bid, m.agent_ask, value, m.fee_burned)
+    assert {a: acc.capital for a, acc in engine.accounts.items()} == capitals
+    assert engine.fees_burned == sum(m.fee_burned for m in matches)
+
+
+def test_ask_always_wins_and_broke_bidder_goes_to_zero():
+    engine = MatchEngine()
+    engine.seed_capital(1, WAD // 2)                 # cannot cover value + fee
+    engine.seed_capital(2, 10 * WAD)
+    engine.post(1, "GHOST_ORE", BID, WAD, WAD, block=1)
+    engine.post(2, "GHOST_ORE", ASK, WAD, WAD, block=1)
+    match, = engine.process_batch(block=1)
+
+    fee = WAD * 10 // 10_000
+    assert match.fee_burned == fee
+    bidder, asker = engine.accounts[1], engine.accounts[2]
+    assert bidder.capital == 0 and bidder.bankrupt and bidder.losses == 1
+    assert asker.capital == 11 * WAD - fee and asker.wins == 1
+
+
+def test_partial_fill_pays_the_bid_price_and_keeps_the_rest_open():
+    engine = MatchEngine()
+    bid = engine.post(1, "VOID_CHIP", BID, 12 * WAD, 3 * WAD, block=1)
+    ask = engine.post(2, "VOID_CHIP", ASK, 11 * WAD, WAD, block=1)
+    match, = engine.process_batch(block=1)
+    assert (match.matched_qty, match.matched_price) == (WAD, 12 * WAD)
+    assert ask.status == MATCHED and bid.status == OPEN and bid.remaining == 2 * WAD
+    assert engine.queue_depth == 1
+
+
+def test_expired_best_order_stops_its_commodity_until_swept():
+    engine = MatchEngine()
+    stale = engine.post(1, "GHOST_ORE", BID, 2 * WAD, WAD, 5, block=1)
+    engine.post(2, "GHOST_ORE", BID, WAD, WAD, 100, block=1)
+    engine.post(3, "GHOST_ORE", ASK, WAD, WAD, 100, block=1)
+
+    assert engine.process_batch(block=10) == []     # stale best bid blocks the book
+    assert engine.expire(block=10) == [stale] and stale.status == EXPIRED
+    match, = engine.process_batch(block=10)
+    assert match.agent_bid == 2
+    assert engine.stats()["expired"] == 1
+
+
+def test_seed_capital_keeps_an_existing_account():
+    engine = MatchEngine()
+    engine.seed_capital(1, 5 * WAD)
+    engine.accounts[1].capital = 3 * WAD
+    assert engine.seed_capital(1, 5 * WAD).capital == 3 * WAD
+    assert engine.seed_capital(2, 0).bankrupt
+
+
+@pytest.mark.parametrize("side, price, qty, ttl", [
+    ("HOLD", WAD, WAD, 0),
+    (BID, 0, WAD, 0),
+    (BID, WAD, 0, 0),
+    (BID, WAD, WAD, 7201),
+])
+def test_bad_orders_raise(side, price, qty, ttl):
+    with pytest.raises(ValueError):
+        MatchEngine().post(1, "GHOST_ORE", side, price, qty, ttl)
+
+
+def test_batch_respects_max_matches():
+    engine = MatchEngine(max_matches=3)
+    for _ in range(5):
+        engine.post(1, "GHOST_ORE", BID, WAD, WAD, block=1)
+        engine.post(2, "GHOST_ORE", ASK, WAD, WAD, block=1)
+    assert len(engine.process_batch(block=1)) == 3
+    assert len(engine.process_batch(block=2)) == 2
+    assert len(engine.matches_by_block(1)) == 3
+    with pytest.raises(ValueError):
+        engine.process_batch(max_matches=4)
@@ -0,0 +1,125 @@
+"""OrderBooks: L2 levels, best bid / ask, sequenced diffs, fills and TTL expiry."""
+import random
+
+import pytest
+
+from api.services.orderbook import ASK, BID, OrderBooks, level_price
+
+
+def _books() -> OrderBooks:
+    return OrderBooks(digits=6)
+
+
+def _post(books: OrderBooks, order_id: str, side: str, price: float, qty: float = 1.0,
+          expires_at: float = 100.0, commodity: str = "ETH"):
+    return books.post(order_id, "7", commodity, side, price, qty, expires_at)
+
+
+@pytest.mark.parametrize("price, level", [
+    (3199.51234, 3199.51),
+    (0.0123456789, 0.0123457),
+    (0, 0.0),
+    (float("nan"), 0.0),
+])
+def test_level_price_rounds_to_significant_digits(price, level):
+    assert level_price(price, 6) == level
+
+
+def test_best_bid_ask_and_levels_aggregate():
+    books = _books()
+    _post(books, "b1", BID, 99.0, 1.0)
+    _post(books, "b2", BID, 100.0, 2.0)
+    _post(books, "b3", BID, 100.0, 0.5)
+    _post(books, "a1", ASK, 101.0, 3.0)
+    _post(books, "a2", ASK, 102.0, 1.0)
+
+    snap = books.snapshot("ETH", depth=1)
+    assert snap["bids"] == [[100.0, 2.5, 2]]
+    assert snap["asks"] == [[101.0, 3.0, 1]]
+    spread = books.spread("ETH")
+    assert spread["best_bid"] == 100.0 and spread["best_ask"] == 101.0
+    assert spread["mid_price"] == 100.5
+
+
+def test_top_levels_match_a_sorted_scan():
+    rng = random.Random(3)
+    books = _books()
+    live: dict[str, tuple] = {}
+    for i in range(400):
+        side = BID if rng.random() < 0.5 else ASK
+        price = float(rng.randint(90, 110))
+        _post(books, str(i), side, price, 1.0)
+        live[str(i)] = (side, price)
+        if rng.random() < 0.4:                  # empty and re-create levels
+            victim = rng.choice(list(live))
+            books.cancel(victim)
+            del live[victim]
+
+    for side, descending, key in ((BID, True, "bids"), (ASK, False, "asks")):
+        counts: dict[float, int] = {}
+        for s, price in live.values():
+            if s == side:
+                counts[price] = counts.get(price, 0) + 1
+        expected = [[p, float(counts[p]), counts[p]] for p in sorted(counts, reverse=descending)[:5]]
+        assert books.snapshot("ETH", depth=5)[key] == expected
+
+
+def test_diffs_are_sequenced_and_hold_the_last_level_state():
+    books = _books()
+    _post(books, "b1", BID, 100.0, 1.0)
+    _post(books, "b2", BID, 100.0, 2.0)
+    _post(books, "a1", ASK, 101.0, 1.0)
+
+    first, = books.diffs()
+    assert (first["seq"], first["prev_seq"]) == (1, 0)
+    assert first["bids"] == [[100.0, 3.0, 2]] and first["asks"] == [[101.0, 1.0, 1]]
+    assert books.diffs() == []                  # drained
+
+    books.cancel("a1")
+    second, = books.diffs()
+    assert (second["seq"], second["prev_seq"]) == (2, 1)
+    assert second["bids"] == [] and second["asks"] == [[101.0, 0, 0]]
+    assert books.snapshot("ETH")["seq"] == 2
+
+
+def test_partial_then_full_fill():
+    books = _books()
+    _post(books, "b1", BID, 100.0, 2.0)
+    books.fill("b1", 0.5)
+    assert books.get("b1").qty == 1.5
+    assert books.snapshot("ETH")["bids"] == [[100.0, 1.5, 1]]
+
+    books.fill("b1", 5.0)                       # clamped to what remains
+    assert books.get("b1") is None
+    assert books.snapshot("ETH")["bids"] == []
+    assert books.stats()["filled"] == 2
+
+
+def test_expire_drops_due_orders_and_skips_removed_ones():
+    books = _books()
+    _post(books, "b1", BID, 100.0, expires_at=10)
+    _post(books, "b2", BID, 99.0, expires_at=20)
+    _post(books, "a1", ASK, 101.0, expires_at=10)
+    books.fill("a1", 1.0)                       # gone before its TTL
+
+    assert [o.order_id for o in books.expire(now=15)] == ["b1"]
+    assert books.spread("ETH")["best_bid"] == 99.0
+    assert [o.order_id for o in books.expire(now=20)] == ["b2"]
+    assert books.stats()["expired"] == 2 and books.stats()["orders"] == 0
+
+
+def test_invalid_and_duplicate_posts():
+    books = _books()
+    assert _post(books, "x", "HOLD", 100.0) is None
+    assert _post(books, "x", BID, 0.0) is None
+    assert _post(books, "x", BID, 100.0, qty=0.0) is None
+    first = _post(books, "b1", BID, 100.0)
+    assert _post(books, "b1", BID, 200.0) is first
+    assert books.stats()["posted"] == 1
+
+
+def test_reads_on_unknown_commodity_do_not_create_books():
+    books = _books()
+    assert books.snapshot("BTC") == {"commodity": "BTC", "seq": 0, "bids": [], "asks": []}
+    assert books.spread("BTC")["mid_price"] == 0.0
+    assert "BTC" not in books and books.stats()["books"] == 0
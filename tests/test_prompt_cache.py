@@ -0,0 +1,110 @@
+"""PromptCache: static prefix / dynamic prompt split, prefix reuse and usage accounting."""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from agents.brain import stream
+from agents.brain.aggressive_agent import AggressiveAgent
+from agents.brain.balanced_agent import BalancedAgent
+from agents.brain.prompt_cache import PromptCache, get_prompt_cache
+from agents.brain.schema import DECISION_SCHEMA
+from agents.circuit_breaker import CircuitBreaker
+from agents.llm_scheduler import LLMScheduler
+from agents.types import AgentDNA, MarketState, Strategy
+
+
+def _dna(token_id: int, strategy: Strategy = Strategy.BALANCED) -> AgentDNA:
+    return AgentDNA(str(token_id), token_id, 50, strategy, 100.0, 100.0, "0x0", name=f"Ghost {token_id}")
+
+
+def _market() -> MarketState:
+    return MarketState("ETH", 9.99, 10.01, 10.0, 0.2, 1000.0, 0.5, 5, 5, 10.0, 0.9)
+
+
+class _Client:
+    """Records generate_content calls; a provider cache create() must never happen."""
+
+    def __init__(self) -> None:
+        self.calls: list[dict] = []
+        self.aio = SimpleNamespace(
+            models=SimpleNamespace(generate_content=self._generate),
+            caches=SimpleNamespace(create=self._create),
+        )
+
+    async def _generate(self, **kwargs):
+        self.calls.append(kwargs)
+        text = json.dumps({"action": "HOLD", "price": 10.0, "qty": 0.0, "confidence": 0.6, "reasoning": "wait"})
+        usage = SimpleNamespace(prompt_token_count=400, cached_content_token_count=256)
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+    async def _create(self, **kwargs):
+        raise AssertionError("explicit provider caches are not used")
+
+
+@pytest.fixture(autouse=True)
+def _no_streaming(monkeypatch):
+    monkeypatch.setattr(stream, "DECISION_STREAMING", False)
+
+
+def _brain(cls, dna: AgentDNA, client: _Client, prompts: PromptCache):
+    brain = cls(dna, client=client, prompt_cache=prompts)
+    brain._scheduler = LLMScheduler(rpm=600, breaker=CircuitBreaker(enabled=False))
+    return brain
+
+
+def test_static_prefix_goes_to_system_instruction_and_only_the_dynamic_part_is_sent():
+    client = _Client()
+    prompts = PromptCache(client)
+    asyncio.run(_brain(BalancedAgent, _dna(1), client, prompts).adecide(_market()))
+
+    call = client.calls[0]
+    assert call["config"].system_instruction == BalancedAgent.STATIC_PROMPT
+    assert call["config"].response_schema == DECISION_SCHEMA       # generation settings pass through
+    assert call["config"].cached_content is None
+    contents = call["contents"]
+    assert "=== YOUR IDENTITY ===" in contents and "Ghost 1" in contents
+    assert "=== LIVE MARKET ===" in contents
+    assert "TRADING RULES" not in contents and "Respond ONLY" not in contents
+
+
+def test_prefix_is_shared_by_brains_of_one_strategy():
+    client = _Client()
+    prompts = PromptCache(client)
+    brains = [
+        _brain(BalancedAgent, _dna(1), client, prompts),
+        _brain(BalancedAgent, _dna(2), client, prompts),
+        _brain(AggressiveAgent, _dna(3, Strategy.AGGRESSIVE), client, prompts),
+    ]
+
+    async def run():
+        for brain in brains:
+            await brain.adecide(_market())
+
+    asyncio.run(run())
+    stats = prompts.stats()
+    assert (stats["prefixes"], stats["calls"], stats["reused"]) == (2, 3, 1)
+    assert client.calls[0]["config"].system_instruction is client.calls[1]["config"].system_instruction
+    assert stats["avg_static_chars"] > stats["avg_dynamic_chars"] > 0
+
+
+def test_prefix_key_includes_the_model():
+    prompts = PromptCache()
+    prompts.config("model-a", "static", "dynamic")
+    prompts.config("model-b", "static", "dynamic")
+    assert prompts.stats()["prefixes"] == 2 and prompts.reused == 0
+
+
+def test_provider_usage_is_accounted():
+    client = _Client()
+    prompts = PromptCache(client)
+    asyncio.run(_brain(BalancedAgent, _dna(1), client, prompts).adecide(_market()))
+    prompts.record_usage(SimpleNamespace(usage_metadata=None))
+    assert (prompts.prompt_tokens, prompts.cached_tokens) == (400, 256)
+
+
+def test_one_cache_per_client():
+    a, b = _Client(), _Client()
+    assert get_prompt_cache(a) is get_prompt_cache(a)
+    assert get_prompt_cache(a) is not get_prompt_cache(b)
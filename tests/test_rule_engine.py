@@ -0,0 +1,121 @@
+"""RuleEngine: each strategy's rule masks, sizing / pricing, and the API ticker's oracle gap."""
+import pytest
+
+from agents.brain import balanced_agent
+from agents.brain_pool import BRAIN_CLASSES
+from agents.market_stats import MarketStats
+from agents.rule_engine import RuleEngine
+from agents.types import ActionType, AgentDNA, MarketState, Strategy
+
+_AGG, _BAL, _CON = Strategy.AGGRESSIVE, Strategy.BALANCED, Strategy.CONSERVATIVE
+
+
+def _dna(strategy: Strategy, token_id: int = 1, capital: float = 100.0) -> AgentDNA:
+    return AgentDNA(str(token_id), token_id, 50, strategy, capital, capital, "0x0")
+
+
+def _market(mid=100.0, oracle=100.0, change=0.0, spread=1.0, depth=(10, 10), conf=0.9) -> MarketState:
+    half = mid * spread / 200
+    return MarketState("ETH", mid - half, mid + half, mid, spread, 1000.0, change, depth[0], depth[1], oracle, conf)
+
+
+def _screen(strategy: Strategy, market: MarketState):
+    screen = RuleEngine(band=0.5).evaluate([_dna(strategy)], [market])
+    return screen.decision(0, _dna(strategy), market), screen
+
+
+@pytest.mark.parametrize("strategy, market, action, rule", [
+    # Aggressive: momentum entry below oracle, profit taking, hold on wide / thin books
+    (_AGG, _market(mid=99.0, change=3.0),            ActionType.BID,  "buy rule"),
+    (_AGG, _market(change=-3.0),                     ActionType.ASK,  "sell rule"),
+    (_AGG, _market(mid=105.0, spread=1.0),           ActionType.ASK,  "sell rule"),   # mid > oracle + spread
+    (_AGG, _market(mid=99.0, change=3.0, spread=8.0), ActionType.HOLD, "hold rule"),
+    (_AGG, _market(change=3.0, depth=(1, 10)),       ActionType.HOLD, "hold rule"),
+    # Balanced: mean reversion around the oracle, trend-follow on depth
+    (_BAL, _market(mid=95.0),                        ActionType.BID,  "buy rule"),
+    (_BAL, _market(mid=105.0),                       ActionType.ASK,  "sell rule"),
+    (_BAL, _market(change=4.0, depth=(20, 5)),       ActionType.BID,  "buy rule"),
+    (_BAL, _market(mid=95.0, conf=0.2),              ActionType.HOLD, "hold rule"),
+    (_BAL, _market(mid=95.0, spread=6.0),            ActionType.HOLD, "hold rule"),
+    # Conservative: quote against the last move when the spread pays
+    (_CON, _market(change=-1.0, spread=1.5),         ActionType.BID,  "buy rule"),
+    (_CON, _market(change=1.0, spread=1.5),          ActionType.ASK,  "sell rule"),
+    (_CON, _market(change=6.0, spread=1.5),          ActionType.HOLD, "hold rule"),
+    (_CON, _market(change=-1.0, spread=0.1),         ActionType.HOLD, "hold rule"),
+])
+def test_strategy_rules(strategy, market, action, rule):
+    decision, screen = _screen(strategy, market)
+    assert decision.action == action
+    assert screen.rule[0] == rule
+    assert decision.reasoning.startswith(f"[Rule] {strategy.value.upper()} {rule}")
+
+
+def test_no_rule_is_a_hold():
+    decision, screen = _screen(_BAL, _market())
+    assert decision.action == ActionType.HOLD and screen.rule[0] == "no rule"
+
+
+@pytest.mark.parametrize("strategy", [_AGG, _BAL, _CON])
+def test_qty_stays_in_the_brains_size_range(strategy):
+    lo, hi = BRAIN_CLASSES[strategy].SIZE_PCT
+    markets = [_market(mid=95.0 + i, change=-3.0 + i, spread=1.5) for i in range(10)]
+    dnas = [_dna(strategy, i) for i in range(10)]
+    screen = RuleEngine().evaluate(dnas, markets)
+    for i in range(10):
+        if screen.action[i] != 0:
+            assert 100 * lo - 1e-9 <= screen.qty[i] <= 100 * hi + 1e-9
+        else:
+            assert screen.qty[i] == 0
+
+
+def test_conservative_quotes_off_the_oracle():
+    offset = BRAIN_CLASSES[_CON].THRESHOLDS["quote_offset"] / 100
+    bid, _ = _screen(_CON, _market(oracle=200.0, mid=200.0, change=-1.0, spread=1.5))
+    ask, _ = _screen(_CON, _market(oracle=200.0, mid=200.0, change=1.0, spread=1.5))
+    assert bid.price == pytest.approx(200 * (1 - offset))
+    assert ask.price == pytest.approx(200 * (1 + offset))
+
+
+def test_inputs_near_a_threshold_are_escalated():
+    _, clear = _screen(_BAL, _market(mid=90.0))
+    _, close = _screen(_BAL, _market(mid=98.9))     # gap just past the 1% threshold
+    assert not clear.ambiguous[0] and close.ambiguous[0]
+    assert clear.stats() == {"agents": 1, "resolved": 1, "escalated": 0, "band": 0.5}
+
+
+def test_thresholds_come_from_the_brain_module(monkeypatch):
+    assert _screen(_BAL, _market(mid=95.0))[0].action == ActionType.BID
+    monkeypatch.setitem(balanced_agent.THRESHOLDS, "oracle_gap", 10.0)
+    assert _screen(_BAL, _market(mid=95.0))[0].action == ActionType.HOLD
+
+
+# ── API ticker: the simulated book's mid diverges from the CoinGecko oracle ────
+def test_book_mid_feeds_the_oracle_gap_rules():
+    from api.main import _apply_book
+    from api.services.orderbook import ASK, BID, OrderBooks
+
+    stats = MarketStats()
+    stats.update("ETH", 100.0)
+    market = stats.snapshot("ETH", 100.0, 0.9)
+    _, screen = _screen(_BAL, market)
+    assert market.mid_price == market.oracle_price and screen.action[0] == 0   # gap rules cannot fire
+
+    books = OrderBooks()
+    books.post("b", "1", "ETH", BID, 94.0, 1.0, 1e12)
+    books.post("a", "2", "ETH", ASK, 96.0, 1.0, 1e12)
+    _apply_book(market, books.book("ETH"))
+    assert (market.best_bid, market.mid_price, market.best_ask) == (94.0, 95.0, 96.0)
+    assert market.oracle_price == 100.0 and market.orderbook_depth_bid == 1
+    decision, _ = _screen(_BAL, market)
+    assert decision.action == ActionType.BID       # mean-reversion buy below the oracle
+
+
+def test_one_sided_book_keeps_the_oracle_mid():
+    from api.main import _apply_book
+    from api.services.orderbook import BID, OrderBooks
+
+    market = _market()
+    books = OrderBooks()
+    books.post("b", "1", "ETH", BID, 94.0, 1.0, 1e12)
+    _apply_book(market, books.book("ETH"))
+    assert market.mid_price == 100.0 and market.orderbook_depth_bid == 1
@@ -0,0 +1,284 @@
+"""TickExecutor: bounded fan-out, per-tick deadline, fallbacks and the API ticker built on it."""
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+
+import pytest
+
+from agents.tick_executor import (
+    STATUS_CACHED, STATUS_FALLBACK, STATUS_OK, STATUS_RULE, STATUS_TIMEOUT,
+    TickExecutor, TickJob, TickOutcome, TickReport,
+)
+
+
+def _run(executor: TickExecutor, jobs) -> TickReport:
+    try:
+        return asyncio.run(executor.run(jobs))
+    finally:
+        executor.shutdown()
+
+
+def _by_key(report: TickReport) -> dict:
+    return {o.key: o for o in report.outcomes}
+
+
+# ── Concurrency and deadline ───────────────────────────────────────────────────
+
+def test_in_flight_decisions_are_bounded_by_concurrency():
+    active, peak = 0, 0
+
+    async def decide():
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return "done"
+
+    jobs = [TickJob(i, decide) for i in range(12)]
+    report = _run(TickExecutor(concurrency=3, deadline=5), jobs)
+    assert peak == 3
+    assert report.finished == 12 and all(o.status == STATUS_OK for o in report.outcomes)
+
+
+def test_concurrent_jobs_overlap_instead_of_running_serially():
+    async def decide():
+        await asyncio.sleep(0.05)
+        return 1
+
+    report = _run(TickExecutor(concurrency=20, deadline=5), [TickJob(i, decide) for i in range(20)])
+    assert report.finished == 20
+    assert report.wall_time < 0.5
+
+
+def test_deadline_cancels_slow_jobs_and_resolves_them_via_fallback():
+    cancelled = []
+
+    async def fast():
+        return "fast"
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    jobs = [TickJob("fast", fast), TickJob("slow", slow, fallback=lambda: "fallback")]
+    started = time.perf_counter()
+    report = _run(TickExecutor(deadline=0.05), jobs)
+
+    assert time.perf_counter() - started < 1.0
+    assert cancelled == [True]
+    outcomes = _by_key(report)
+    assert outcomes["fast"].status == STATUS_OK and outcomes["fast"].value == "fast"
+    assert outcomes["slow"].status == STATUS_TIMEOUT and outcomes["slow"].value == "fallback"
+    assert outcomes["slow"].error == "tick deadline exceeded"
+    assert report.summary()["timed_out"] == 1 and report.finished == 1
+
+
+def test_queued_jobs_past_the_deadline_time_out_too():
+    async def slow():
+        await asyncio.sleep(5)
+
+    jobs = [TickJob(i, slow, fallback=lambda: "fb") for i in range(4)]
+    report = _run(TickExecutor(concurrency=1, deadline=0.05), jobs)
+    assert report.timed_out == 4
+    assert {o.status for o in report.outcomes} == {STATUS_TIMEOUT}
+
+
+def test_raising_job_falls_back_with_the_error():
+    async def broken():
+        raise RuntimeError("llm down")
+
+    report = _run(TickExecutor(), [TickJob(1, broken, fallback=lambda: "rule")])
+    outcome = report.outcomes[0]
+    assert (outcome.status, outcome.value, outcome.error) == (STATUS_FALLBACK, "rule", "llm down")
+    assert report.fell_back == 1
+
+
+def test_failing_fallback_yields_no_value():
+    async def broken():
+        raise RuntimeError("llm down")
+
+    def fallback():
+        raise ValueError("no market")
+
+    report = _run(TickExecutor(), [TickJob(1, broken, fallback=fallback)])
+    assert report.outcomes[0].status == STATUS_FALLBACK and report.outcomes[0].value is None
+
+
+# ── Blocking jobs ──────────────────────────────────────────────────────────────
+
+def test_blocking_jobs_run_on_the_lazy_thread_pool():
+    executor = TickExecutor(threads=2)
+
+    async def async_job():
+        return threading.current_thread().name
+
+    asyncio.run(executor.run([TickJob("a", async_job)]))
+    assert executor._pool is None                  # async jobs never create it
+
+    report = asyncio.run(executor.run([TickJob("b", lambda: threading.current_thread().name)]))
+    assert report.outcomes[0].value.startswith("tick-decide")
+    assert executor._pool is not None
+    executor.shutdown()
+    assert executor._pool is None
+
+
+# ── Group jobs ─────────────────────────────────────────────────────────────────
+
+def _group(decide, keys=(1, 2, 3)) -> TickJob:
+    members = [TickJob(k, lambda: None, fallback=lambda k=k: f"fb-{k}") for k in keys]
+    return TickJob("group", decide, members=members)
+
+
+def test_group_members_missing_from_the_result_fall_back_individually():
+    async def decide():
+        return {1: "d1", 3: "d3", 99: "stranger"}
+
+    report = _run(TickExecutor(), [_group(decide)])
+    outcomes = _by_key(report)
+    assert report.total == 3 and set(outcomes) == {1, 2, 3}
+    assert outcomes[1].value == "d1" and outcomes[3].value == "d3"
+    assert outcomes[2].status == STATUS_FALLBACK and outcomes[2].value == "fb-2"
+    assert outcomes[2].error == "missing from batch response"
+    assert report.finished == 2 and report.fell_back == 1
+
+
+@pytest.mark.parametrize("result", [{}, None])
+def test_empty_group_result_falls_back_for_every_member(result):
+    async def decide():
+        return result
+
+    report = _run(TickExecutor(), [_group(decide)])
+    assert [o.value for o in report.outcomes] == ["fb-1", "fb-2", "fb-3"]
+    assert report.fell_back == 3
+
+
+def test_group_timeout_applies_to_every_member():
+    async def decide():
+        await asyncio.sleep(5)
+
+    report = _run(TickExecutor(deadline=0.05), [_group(decide)])
+    assert {o.status for o in report.outcomes} == {STATUS_TIMEOUT}
+    assert report.timed_out == 3
+
+
+def test_add_resolved_counts_by_status():
+    report = TickReport()
+    report.add_resolved([
+        TickOutcome(1, "a", STATUS_CACHED), TickOutcome(2, "b", STATUS_RULE),
+        TickOutcome(3, "c", STATUS_RULE), TickOutcome(4, "d", STATUS_FALLBACK, "circuit open"),
+    ])
+    assert report.summary() | {"wall_time": 0} == {
+        "total": 4, "finished": 0, "timed_out": 0, "fell_back": 1, "cached": 1, "rule": 2, "wall_time": 0,
+    }
+
+
+# ── API ticker ─────────────────────────────────────────────────────────────────
+
+class _Brain:
+    def __init__(self, dna, delay: float = 0.0) -> None:
+        self.dna, self.delay, self.priority = dna, delay, None
+
+    async def adecide(self, market):
+        from agents.types import ActionType, AgentDecision
+
+        await asyncio.sleep(self.delay)
+        return AgentDecision(self.dna.agent_id, ActionType.BID, market.commodity, market.best_bid,
+                             round(self.dna.capital * 0.1, 6), "model says bid", 0.8)
+
+
+class _Pool:
+    """BrainPool stand-in: agent 3 is slow enough to miss the tick deadline."""
+
+    def __init__(self) -> None:
+        self.brains: dict = {}
+        self.prompt_cache = SimpleNamespace(stats=dict)
+
+    def get(self, dna):
+        brain = self.brains.get(dna.token_id)
+        if brain is None:
+            brain = self.brains[dna.token_id] = _Brain(dna, delay=5.0 if dna.token_id == 3 else 0.0)
+        brain.dna = dna
+        return brain
+
+    def retain(self, token_ids) -> int:
+        return 0
+
+    def stats(self) -> dict:
+        return {}
+
+
+class _Registry:
+    def __init__(self, agents: list[dict]) -> None:
+        self.agents = {a["token_id"]: dict(a) for a in agents}
+
+    def get(self, token_id):
+        return self.agents.get(token_id)
+
+    def update(self, token_id, **fields) -> None:
+        self.agents[token_id].update(fields)
+
+
+class _Log:
+    def __init__(self) -> None:
+        self.entries: list = []
+
+    def append(self, entry: dict) -> None:
+        self.entries.append(entry)
+
+    def sync(self) -> None:
+        pass
+
+
+def test_run_tick_applies_llm_and_timed_out_decisions(monkeypatch):
+    from agents.circuit_breaker import CircuitBreaker
+    from agents.decision_cache import DecisionCache
+    from agents.llm_scheduler import LLMScheduler
+    from agents.market_stats import MarketStats
+    from api import main
+    from api.services.match_engine import MatchEngine
+    from api.services.orderbook import OrderBooks
+    from api.ws import hub
+
+    monkeypatch.setattr(hub, "_subscribers", defaultdict(set))
+    monkeypatch.setattr(hub, "_lock", asyncio.Lock())
+    monkeypatch.setattr(main, "_brain_pool", _Pool())
+    monkeypatch.setattr(main, "_decision_cache", DecisionCache(enabled=False))
+
+    agents = [
+        {"token_id": i, "name": f"A{i}", "strategy": "BALANCED", "risk_appetite": 50,
+         "capital": str(100 * 10**18), "initial_capital": str(100 * 10**18)}
+        for i in (1, 2, 3)
+    ]
+    svc = main._TickServices(
+        scheduler    = LLMScheduler(rpm=600),
+        breaker      = CircuitBreaker(enabled=False),
+        rule_engine  = None,
+        executor     = TickExecutor(deadline=0.2),
+        market_stats = MarketStats(),
+        registry     = _Registry(agents),
+        decision_log = _Log(),
+        trade_log    = _Log(),
+        candles      = SimpleNamespace(publish=lambda manager: None, flush=lambda: None),
+        books        = OrderBooks(),
+        engine       = MatchEngine(),
+    )
+
+    try:
+        llm_calls = asyncio.run(main._run_tick(svc, 1, agents))
+    finally:
+        svc.executor.shutdown()
+
+    assert llm_calls == 3
+    by_agent = {e["agent_id"]: e for e in svc.decision_log.entries}
+    assert set(by_agent) == {"1", "2", "3"}
+    assert by_agent["1"]["reasoning"] == "model says bid"
+    assert by_agent["3"]["reasoning"].startswith("[Fallback]")     # missed the deadline
+    assert all(svc.registry.get(i)["last_tick_at"] for i in (1, 2, 3))
+    commodity = by_agent["1"]["commodity"]
+    assert svc.books.book(commodity).order_count("BID") == 2
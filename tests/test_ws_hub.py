@@ -0,0 +1,147 @@
+"""ConnectionManager: bounded per-client queues, overflow policies and control frames."""
+import asyncio
+import json
+from collections import defaultdict
+
+import pytest
+
+from api.ws import hub
+from api.ws.hub import (
+    MODE_SINGLE, OVERFLOW_CONFLATE, OVERFLOW_DISCONNECT, OVERFLOW_DROP_OLDEST, ConnectionManager,
+)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_subscribers(monkeypatch):
+    monkeypatch.setattr(hub, "_subscribers", defaultdict(set))
+    monkeypatch.setattr(hub, "_lock", asyncio.Lock())
+
+
+class _Socket:
+    """Records sent frames; a blocked socket holds its first send until released."""
+
+    def __init__(self, blocked: bool = False) -> None:
+        self.sent: list = []
+        self.closed = None
+        self.gate = asyncio.Event()
+        if not blocked:
+            self.gate.set()
+
+    async def send_text(self, payload: str) -> None:
+        await self.gate.wait()
+        self.sent.append(json.loads(payload))
+
+    async def close(self, code: int = 1000, reason: str = "") -> None:
+        self.closed = (code, reason)
+
+
+async def _drain() -> None:
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+
+def _ids(ws: _Socket) -> list:
+    return [frame.get("id", frame.get("type")) for frame in ws.sent]
+
+
+def test_drop_oldest_keeps_the_newest_frames():
+    async def run():
+        mgr = ConnectionManager(queue_size=3, overflow_policy=OVERFLOW_DROP_OLDEST)
+        ws = _Socket(blocked=True)
+        await mgr.subscribe(ws, "a")
+        for i in range(5):
+            await mgr.broadcast("a", {"id": i})
+        ws.gate.set()
+        await _drain()
+        return ws, mgr.stats()
+
+    ws, stats = asyncio.run(run())
+    assert _ids(ws) == [2, 3, 4]
+    assert stats["channels"]["a"]["dropped"] == 2 and stats["channels"]["a"]["sent"] == 3
+
+
+def test_conflate_drops_the_oldest_frame_of_the_same_channel():
+    async def run():
+        mgr = ConnectionManager(queue_size=3, overflow_policy=OVERFLOW_CONFLATE)
+        ws = _Socket(blocked=True)
+        for channel in ("a", "b"):
+            await mgr.subscribe(ws, channel)
+        for channel, i in (("a", "a1"), ("b", "b1"), ("a", "a2"), ("a", "a3"), ("b", "b2")):
+            await mgr.broadcast(channel, {"id": i})
+        ws.gate.set()
+        await _drain()
+        return ws
+
+    assert _ids(asyncio.run(run())) == ["a2", "a3", "b2"]
+
+
+def test_disconnect_kicks_only_the_slow_client():
+    async def run():
+        mgr = ConnectionManager(queue_size=2, overflow_policy=OVERFLOW_DISCONNECT)
+        slow, fast = _Socket(blocked=True), _Socket()
+        for ws in (slow, fast):
+            await mgr.subscribe(ws, "a")
+        for i in range(4):
+            await mgr.broadcast("a", {"id": i})
+            await _drain()
+        return mgr, slow, fast
+
+    mgr, slow, fast = asyncio.run(run())
+    assert slow.closed == (1013, "slow consumer")
+    assert fast.closed is None and _ids(fast) == [0, 1, 2, 3]
+    assert hub._subscribers["a"] == {fast}
+    assert mgr.stats()["kicked"] == 1 and mgr.stats()["clients"] == 1
+
+
+def test_control_frames_survive_overflow():
+    async def run():
+        mgr = ConnectionManager(queue_size=3, overflow_policy=OVERFLOW_DROP_OLDEST)
+        ws = _Socket(blocked=True)
+        await mgr.subscribe(ws, "a")
+        mgr.send(ws, {"type": "c1"})
+        await mgr.broadcast("a", {"id": 1})
+        await mgr.broadcast("a", {"id": 2})
+        await mgr.broadcast("a", {"id": 3})     # evicts data frame 1
+        mgr.send(ws, {"type": "c2"})            # evicts data frame 2
+        ws.gate.set()
+        await _drain()
+        return ws
+
+    assert _ids(asyncio.run(run())) == ["c1", 3, "c2"]
+
+
+@pytest.mark.parametrize("policy", [OVERFLOW_DROP_OLDEST, OVERFLOW_CONFLATE])
+def test_queue_full_of_control_frames_drops_data_then_kicks(policy):
+    async def run():
+        mgr = ConnectionManager(queue_size=2, overflow_policy=policy)
+        ws = _Socket(blocked=True)
+        await mgr.subscribe(ws, "a")
+        mgr.send(ws, {"type": "c1"})
+        mgr.send(ws, {"type": "c2"})
+        await mgr.broadcast("a", {"id": 1})     # no data frame to evict: the new one is dropped
+        dropped, closed = mgr.stats()["channels"]["a"]["dropped"], ws.closed
+        mgr.send(ws, {"type": "c3"})            # a client that reads nothing is kicked
+        await _drain()
+        return mgr, ws, dropped, closed
+
+    mgr, ws, dropped, closed_before = asyncio.run(run())
+    assert dropped == 1 and closed_before is None
+    assert ws.closed == (1013, "slow consumer") and mgr.stats()["kicked"] == 1
+
+
+def test_flush_sends_one_batch_frame_or_single_frames_per_mode():
+    async def run():
+        mgr = ConnectionManager()
+        batched, single = _Socket(), _Socket()
+        await mgr.subscribe(batched, "agent.decisions")
+        await mgr.subscribe(single, "agent.decisions", MODE_SINGLE)
+        for i in range(3):
+            mgr.publish("agent.decisions", {"id": i})
+        assert mgr.flush() == 1
+        await _drain()
+        return batched, single
+
+    batched, single = asyncio.run(run())
+    items = [{"id": 0}, {"id": 1}, {"id": 2}]
+    assert batched.sent == [{"type": "batch", "channel": "agent.decisions", "items": items}]
+    assert _ids(single) == [0, 1, 2]